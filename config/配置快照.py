@@ -0,0 +1,272 @@
+"""
+配置快照
+一次加载得到的完整配置及其派生结构，构建后不可修改（字典为MappingProxyType，列表为元组）；
+读取方只需持有快照引用，重载时由配置管理器整体替换引用，无需加锁或复制。
+基于上一版本构建时，未变化的配置项与派生结构直接复用，只重建受影响的部分
+"""
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, Mapping, NamedTuple, Optional, Tuple
+
+
+def 冻结(值: Any) -> Any:
+    """递归冻结：dict转为只读映射，list/tuple转为元组"""
+    if isinstance(值, (dict, MappingProxyType)):
+        return MappingProxyType({键: 冻结(子值) for 键, 子值 in 值.items()})
+    if isinstance(值, (list, tuple)):
+        return tuple(冻结(子值) for 子值 in 值)
+    return 值
+
+
+def 解冻(值: Any) -> Any:
+    """递归解冻：只读映射转回dict，元组转回list（用于备份和编辑）"""
+    if isinstance(值, Mapping):
+        return {键: 解冻(子值) for 键, 子值 in 值.items()}
+    if isinstance(值, tuple):
+        return [解冻(子值) for 子值 in 值]
+    return 值
+
+
+_缺失 = object()
+
+
+def _增量冻结(旧分区: Optional[Mapping[str, Any]], 新配置: Dict[str, Any]) -> Tuple[Mapping[str, Any], FrozenSet[str]]:
+    """
+    冻结一个配置分区，未变化的顶层项复用旧版本的冻结对象
+
+    参数:
+        旧分区: 上一版本的冻结分区，None表示首次构建
+        新配置: 新读取的配置字典
+
+    返回:
+        (冻结后的分区, 变更的顶层键集合)
+    """
+    新配置 = 新配置 or {}
+    if 旧分区 is None:
+        return 冻结(新配置), frozenset(新配置)
+
+    结果 = {}
+    变更 = set()
+    for 键, 值 in 新配置.items():
+        新值 = 冻结(值)
+        旧值 = 旧分区.get(键, _缺失)
+        if 旧值 is not _缺失 and 旧值 == 新值:
+            结果[键] = 旧值
+        else:
+            结果[键] = 新值
+            变更.add(键)
+    变更.update(键 for 键 in 旧分区 if 键 not in 新配置)
+
+    if not 变更:
+        return 旧分区, frozenset()
+    return MappingProxyType(结果), frozenset(变更)
+
+
+@dataclass(frozen=True)
+class 配置差异:
+    """两个快照之间的结构差异（按分区记录变更的顶层键）"""
+    基本配置: FrozenSet[str] = frozenset()
+    技能配置: FrozenSet[str] = frozenset()
+    气劲配置: FrozenSet[str] = frozenset()
+
+    @property
+    def 为空(self) -> bool:
+        """是否没有任何变更"""
+        return not (self.基本配置 or self.技能配置 or self.气劲配置)
+
+    def 获取摘要(self) -> Dict[str, Any]:
+        """获取差异摘要"""
+        return {
+            "基本配置": sorted(self.基本配置),
+            "技能配置": sorted(self.技能配置),
+            "气劲配置": sorted(self.气劲配置)
+        }
+
+
+# 派生字段依赖的基本配置键
+_基本派生字段 = ("检测区域", "蓝条配置", "目标状态配置", "自动选人键值", "选中最低血量键值", "循环节拍", "启动预热",
+            "活动状态", "帧总线")
+
+
+class 探测项(NamedTuple):
+    """探测计划中的一个取色点"""
+    名称: str
+    类型: str  # 技能 / 气劲 / 蓝条
+    坐标: Tuple[int, int]
+    颜色: Optional[Tuple[int, ...]]
+    波动值: Optional[int]
+    键值: int
+    冷却时间: Optional[float] = None  # 技能冷却时长提示（秒），用于自适应采样退避
+
+
+# 简单模式下的默认技能优先级顺序
+默认技能顺序 = ("青川濯莲", "七情和合", "千枝绽蕊", "逐云寒蕊",
+            "当归四逆", "银光照雪", "赤芍寒香", "绿野蔓生", "白芷含芳")
+
+
+class 配置快照:
+    """
+    不可变的版本化配置快照
+    原始配置与派生结构在构建时计算完成；基于上一版本构建时只重建受差异影响的部分
+    """
+
+    __slots__ = (
+        "版本", "环境", "创建时间", "差异",
+        "基本配置", "技能配置", "气劲配置",
+        "检测区域", "蓝条配置", "目标状态配置", "自动选人键值", "选中最低血量键值",
+        "循环节拍", "启动预热", "活动状态", "帧总线", "键值技能映射", "技能序列", "探测计划"
+    )
+
+    def __init__(self, 版本: int, 环境: str, 基本配置: Dict[str, Any],
+                 技能配置: Dict[str, Any], 气劲配置: Dict[str, Any],
+                 上一版本: Optional['配置快照'] = None):
+        """
+        构建配置快照
+
+        参数:
+            版本: 快照版本号（单调递增）
+            环境: 配置环境名称
+            基本配置: 基本配置字典（已合并环境配置）
+            技能配置: 技能配置字典
+            气劲配置: 气劲配置字典
+            上一版本: 可选，增量构建的基准快照
+        """
+        旧 = 上一版本
+        基本, 基本变更 = _增量冻结(旧.基本配置 if 旧 else None, 基本配置)
+        技能, 技能变更 = _增量冻结(旧.技能配置 if 旧 else None, 技能配置)
+        气劲, 气劲变更 = _增量冻结(旧.气劲配置 if 旧 else None, 气劲配置)
+
+        设置 = object.__setattr__
+        设置(self, "版本", 版本)
+        设置(self, "环境", 环境)
+        设置(self, "创建时间", time.time())
+        设置(self, "差异", 配置差异(基本变更, 技能变更, 气劲变更))
+        设置(self, "基本配置", 基本)
+        设置(self, "技能配置", 技能)
+        设置(self, "气劲配置", 气劲)
+
+        for 名称, 值 in self._编译派生结构(旧).items():
+            设置(self, 名称, 值)
+
+    def __setattr__(self, 名称: str, 值: Any):
+        raise AttributeError("配置快照不可修改")
+
+    def _编译派生结构(self, 旧: Optional['配置快照']) -> Dict[str, Any]:
+        """计算引擎热路径直接使用的派生结构，未受影响的部分沿用上一版本"""
+        差异 = self.差异
+        派生: Dict[str, Any] = {}
+
+        if 旧 is not None and not 差异.基本配置:
+            派生.update((名称, getattr(旧, 名称)) for 名称 in _基本派生字段)
+        else:
+            派生.update(self._编译基本派生())
+
+        if 旧 is not None and not 差异.技能配置:
+            派生["键值技能映射"] = 旧.键值技能映射
+            派生["技能序列"] = 旧.技能序列
+        else:
+            派生["键值技能映射"] = self._编译键值技能映射()
+            派生["技能序列"] = tuple(
+                self.技能配置[技能名]["键值"] for 技能名 in 默认技能顺序
+                if 技能名 in self.技能配置 and "键值" in self.技能配置[技能名]
+            )
+
+        if 旧 is not None and not 差异.技能配置 and not 差异.气劲配置 and "蓝条监控" not in 差异.基本配置:
+            派生["探测计划"] = 旧.探测计划
+        else:
+            派生["探测计划"] = self._编译探测计划(旧)
+        return 派生
+
+    def _编译基本派生(self) -> Dict[str, Any]:
+        """由基本配置计算检测区域、蓝条、目标状态、按键及节拍/预热/活动状态/帧总线设置"""
+        基本 = self.基本配置
+
+        技能检测区域 = 基本.get("技能检测区域") or {}
+        坐标 = 技能检测区域.get("坐标")
+        宽高 = 技能检测区域.get("宽高")
+        检测区域 = (坐标[0], 坐标[1], 宽高[0], 宽高[1]) if 坐标 and 宽高 else None
+
+        自动选择配置 = 基本.get("自动选择最低血量") or {}
+        节拍配置 = 基本.get("循环节拍") or {}
+        预热配置 = 基本.get("启动预热") or {}
+
+        return {
+            "检测区域": 检测区域,
+            "蓝条配置": 基本.get("蓝条监控"),
+            "目标状态配置": 基本.get("目标状态配置") or MappingProxyType({}),
+            "自动选人键值": 自动选择配置.get("key", 0),
+            "选中最低血量键值": 基本.get("选中最低血量键值", 0),
+            "循环节拍": MappingProxyType({
+                "目标频率": 节拍配置.get("目标频率", 60),
+                "错拍策略": 节拍配置.get("错拍策略", "跳过")
+            }),
+            "启动预热": MappingProxyType({
+                "启用": 预热配置.get("启用", True),
+                "空跑次数": 预热配置.get("空跑次数", 5)
+            }),
+            "活动状态": 基本.get("活动状态") or MappingProxyType({}),
+            "帧总线": 基本.get("帧总线") or MappingProxyType({})
+        }
+
+    def _编译键值技能映射(self) -> Mapping[int, Mapping[str, Any]]:
+        """技能键值到技能探测配置的映射（仅包含配置了技能坐标值的技能）"""
+        映射 = {}
+        for 技能配置 in self.技能配置.values():
+            if not isinstance(技能配置, Mapping) or not 技能配置.get("技能坐标值"):
+                continue
+            键值 = (技能配置.get("技能按键") or {}).get("key", 0)
+            if 键值 > 0:
+                映射[键值] = 技能配置
+        return MappingProxyType(映射)
+
+    def _编译探测计划(self, 旧: Optional['配置快照'] = None) -> Tuple[探测项, ...]:
+        """收集所有取色点（技能图标、气劲状态、蓝条），按坐标去重；未变更项复用旧探测项"""
+        差异 = self.差异
+        旧探测项 = {(项.类型, 项.名称): 项 for 项 in 旧.探测计划} if 旧 is not None else {}
+        变更名称 = {"技能": 差异.技能配置, "气劲": 差异.气劲配置,
+                "蓝条": {"蓝条"} if "蓝条监控" in 差异.基本配置 else ()}
+        计划 = []
+        已收录 = set()
+
+        def 收录(项: 探测项):
+            if 项.坐标 not in 已收录:
+                已收录.add(项.坐标)
+                计划.append(项)
+
+        def 添加(名称: str, 类型: str, 配置: Any, 坐标键: str, 颜色键: str, 波动键: str, 键值: int = 0,
+               冷却时间: Optional[float] = None):
+            if not isinstance(配置, Mapping):
+                return
+            复用 = 旧探测项.get((类型, 名称))
+            if 复用 is not None and 名称 not in 变更名称[类型]:
+                收录(复用)
+                return
+            坐标 = 配置.get(坐标键)
+            if not 坐标 or len(坐标) < 2:
+                return
+            收录(探测项(名称, 类型, (坐标[0], 坐标[1]), 配置.get(颜色键), 配置.get(波动键), 键值, 冷却时间))
+
+        for 名称, 技能配置 in self.技能配置.items():
+            键值 = (技能配置.get("技能按键") or {}).get("key", 0) if isinstance(技能配置, Mapping) else 0
+            冷却时间 = 技能配置.get("冷却时间") if isinstance(技能配置, Mapping) else None
+            添加(名称, "技能", 技能配置, "技能坐标值", "技能颜色值", "技能颜色波动值", 键值, 冷却时间)
+        for 名称, 气劲配置 in self.气劲配置.items():
+            添加(名称, "气劲", 气劲配置, "坐标", "颜色", "颜色波动值")
+        添加("蓝条", "蓝条", self.基本配置.get("蓝条监控"), "坐标", "颜色", "颜色波动值")
+        return tuple(计划)
+
+    def 获取摘要(self) -> Dict[str, Any]:
+        """获取快照摘要信息"""
+        return {
+            "版本": self.版本,
+            "环境": self.环境,
+            "创建时间": self.创建时间,
+            "技能数量": len(self.技能配置),
+            "气劲数量": len(self.气劲配置),
+            "探测点数量": len(self.探测计划),
+            "可确认技能数量": len(self.键值技能映射)
+        }
+
+    def __repr__(self) -> str:
+        return f"配置快照(版本={self.版本}, 环境={self.环境})"
@@ -5,9 +5,11 @@
 import json
 import os
 import copy
-from typing import Dict, Any, List, Optional, Callable
+import threading
+from typing import Dict, Any, List, Optional, Callable, Mapping, Tuple
 from pathlib import Path
 from core.依赖容器 import 配置提供器接口
+from config.配置快照 import 配置快照
 
 
 class 配置验证错误(Exception):
@@ -36,6 +38,16 @@ class 配置管理器:
             self._环境配置 = None
             self._初始化完成 = True
             
+            # 不可变配置快照：重载时整体替换引用，读取方无需加锁
+            self._快照: Optional[配置快照] = None
+            self._快照版本 = 0
+            self._构建锁 = threading.Lock()
+            # 各配置文件解析后的原始内容（未合并环境配置），增量重载时只重新解析变更的文件
+            self._文件缓存: Dict[str, Optional[Dict[str, Any]]] = {}
+            # 新快照替换前调用的预处理函数（在构建线程中执行）
+            self._快照预处理列表: List[Callable[[配置快照, Optional[配置快照]], None]] = []
+            self._重载统计 = {"完整重载": 0, "增量重载": 0, "无变化": 0, "失败": 0}
+            
             # 配置变更回调列表
             self._变更回调列表: List[Callable] = []
             
@@ -72,6 +84,14 @@ class 配置管理器:
                     "启用": False
                 },
                 "选中最低血量键值": 0,
+                "循环节拍": {
+                    "目标频率": 60,
+                    "错拍策略": "跳过"
+                },
+                "启动预热": {
+                    "启用": True,
+                    "空跑次数": 5
+                },
                 "目标状态配置": {
                     "血条区域": [0, 0, 0, 0],
                     "血条颜色阈值": {"lower": [0, 0, 0], "upper": [180, 255, 255]},
@@ -89,65 +109,133 @@ class 配置管理器:
         }
     
     def 读取所有配置(self):
-        """读取所有配置文件"""
-        self.读取基本配置文件()
-        self.读取技能配置文件()
-        self.读取气劲配置文件()
-        self.读取环境配置文件()
+        """读取所有配置文件并发布新快照"""
+        self._发布快照(*self._加载配置字典())
+    
+    def 获取配置文件列表(self) -> List[str]:
+        """获取参与构建快照的配置文件名（含当前环境配置文件）"""
+        return list(self._主配置文件) + [self._环境文件名()]
+    
+    # 主配置文件名 -> 描述
+    _主配置文件 = {'基本配置.json': "基本配置", '技能配置.json': "技能配置", '气劲配置.json': "气劲配置"}
+    
+    def _环境文件名(self) -> str:
+        """当前环境配置文件名"""
+        return f'配置.{self._环境}.json'
+    
+    def _加载配置字典(self, 变更文件: Optional[List[str]] = None) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        读取、合并并验证配置文件（只操作局部字典，不影响当前快照）
+        
+        参数:
+            变更文件: 可选，只重新解析这些文件，其余使用上次解析结果；None表示全部重新读取
         
-        # 验证配置
-        self._验证配置()
+        返回:
+            (基本配置, 技能配置, 气劲配置)
+        """
+        文件缓存 = dict(self._文件缓存)
+        for 文件名, 描述 in self._主配置文件.items():
+            if 变更文件 is None or 文件名 in 变更文件 or 文件名 not in 文件缓存:
+                文件缓存[文件名] = self._读取配置文件(文件名, 描述)
+        环境文件名 = self._环境文件名()
+        if 变更文件 is None or 环境文件名 in 变更文件 or 环境文件名 not in 文件缓存:
+            文件缓存[环境文件名] = self._读取环境配置()
+        
+        # 合并会修改字典，使用解析结果的副本
+        基本字典 = copy.deepcopy(文件缓存['基本配置.json'])
+        技能字典 = copy.deepcopy(文件缓存['技能配置.json'])
+        气劲字典 = copy.deepcopy(文件缓存['气劲配置.json'])
+        环境配置 = 文件缓存[环境文件名]
+        if 环境配置:
+            self._合并环境配置(基本字典, 技能字典, 气劲字典, 环境配置)
+        
+        self._验证配置(基本字典, 技能字典, 气劲字典)
+        
+        # 全部验证通过后才更新解析缓存
+        self._文件缓存 = 文件缓存
+        self._环境配置 = 环境配置
+        return 基本字典, 技能字典, 气劲字典
     
-    def 读取基本配置文件(self):
-        """读取基本配置文件"""
-        file_path = os.path.join(self._配置路径, '基本配置.json')
+    def 添加快照预处理(self, 函数: Callable[[配置快照, Optional[配置快照]], None]):
+        """
+        添加快照预处理函数，新快照替换当前快照之前在构建线程中调用
+        可用于预先重建依赖配置的资源（如模板图像），避免在检测线程中读盘
+        
+        参数:
+            函数: 以(新快照, 旧快照)调用
+        """
+        self._快照预处理列表.append(函数)
+    
+    def _发布快照(self, 基本字典: Dict[str, Any], 技能字典: Dict[str, Any],
+               气劲字典: Dict[str, Any]) -> Optional[配置快照]:
+        """
+        基于当前快照增量构建新版本，并以单次引用赋值完成切换
+        
+        返回:
+            新快照；与当前快照没有差异时返回None（不切换）
+        """
+        with self._构建锁:
+            旧快照 = self._快照
+            快照 = 配置快照(self._快照版本 + 1, self._环境, 基本字典, 技能字典, 气劲字典, 旧快照)
+            self._基本字典 = 基本字典
+            self._技能字典 = 技能字典
+            self._气劲字典 = 气劲字典
+            if 旧快照 is not None and 快照.差异.为空:
+                return None
+            
+            for 函数 in self._快照预处理列表:
+                try:
+                    函数(快照, 旧快照)
+                except Exception as e:
+                    print(f"配置快照预处理失败: {e}")
+            
+            self._快照版本 = 快照.版本
+            self._快照 = 快照
+        return 快照
+    
+    def _读取配置文件(self, 文件名: str, 描述: str) -> Dict[str, Any]:
+        """读取单个JSON配置文件"""
+        file_path = os.path.join(self._配置路径, 文件名)
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                self._基本字典 = json.load(f)
+                return json.load(f)
         except FileNotFoundError:
-            raise FileNotFoundError(f"基本配置文件不存在: {file_path}")
+            raise FileNotFoundError(f"{描述}文件不存在: {file_path}")
         except json.JSONDecodeError:
-            raise ValueError(f"基本配置文件格式错误: {file_path}")
+            raise ValueError(f"{描述}文件格式错误: {file_path}")
+    
+    def 读取基本配置文件(self):
+        """读取基本配置文件"""
+        self._发布快照(*self._加载配置字典(['基本配置.json']))
     
     def 读取技能配置文件(self):
         """读取技能配置文件"""
-        file_path = os.path.join(self._配置路径, '技能配置.json')
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self._技能字典 = json.load(f)
-        except FileNotFoundError:
-            raise FileNotFoundError(f"技能配置文件不存在: {file_path}")
-        except json.JSONDecodeError:
-            raise ValueError(f"技能配置文件格式错误: {file_path}")
+        self._发布快照(*self._加载配置字典(['技能配置.json']))
     
     def 读取气劲配置文件(self):
         """读取气劲配置文件"""
-        file_path = os.path.join(self._配置路径, '气劲配置.json')
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self._气劲字典 = json.load(f)
-        except FileNotFoundError:
-            raise FileNotFoundError(f"气劲配置文件不存在: {file_path}")
-        except json.JSONDecodeError:
-            raise ValueError(f"气劲配置文件格式错误: {file_path}")
+        self._发布快照(*self._加载配置字典(['气劲配置.json']))
     
-    def 读取环境配置文件(self):
-        """读取环境特定配置文件"""
+    def _读取环境配置(self) -> Optional[Dict[str, Any]]:
+        """读取环境特定配置文件，不存在或读取失败返回None"""
         环境文件 = os.path.join(self._配置路径, f'配置.{self._环境}.json')
         
         if os.path.exists(环境文件):
             try:
                 with open(环境文件, 'r', encoding='utf-8') as f:
-                    self._环境配置 = json.load(f)
-                    
-                # 合并环境配置到主配置
-                self._合并环境配置()
+                    return json.load(f)
             except Exception as e:
                 print(f"警告: 无法读取环境配置文件 {环境文件}: {e}")
+        return None
     
-    def _合并环境配置(self):
+    def 读取环境配置文件(self):
+        """读取环境特定配置文件并合并到当前配置"""
+        self._发布快照(*self._加载配置字典([self._环境文件名()]))
+    
+    def _合并环境配置(self, 基本字典: Dict[str, Any], 技能字典: Dict[str, Any],
+                  气劲字典: Dict[str, Any], 环境配置: Dict[str, Any]):
         """合并环境配置到主配置"""
-        if not self._环境配置:
+        if not 环境配置:
             return
             
         def 深度合并(主配置, 环境配置):
@@ -158,20 +246,25 @@ class 配置管理器:
                 else:
                     主配置[键] = 值
         
-        if self._基本字典 and self._环境配置.get("基本配置"):
-            深度合并(self._基本字典, self._环境配置["基本配置"])
-        if self._技能字典 and self._环境配置.get("技能配置"):
-            深度合并(self._技能字典, self._环境配置["技能配置"])
-        if self._气劲字典 and self._环境配置.get("气劲配置"):
-            深度合并(self._气劲字典, self._环境配置["气劲配置"])
+        if 基本字典 and 环境配置.get("基本配置"):
+            深度合并(基本字典, 环境配置["基本配置"])
+        if 技能字典 and 环境配置.get("技能配置"):
+            深度合并(技能字典, 环境配置["技能配置"])
+        if 气劲字典 and 环境配置.get("气劲配置"):
+            深度合并(气劲字典, 环境配置["气劲配置"])
     
-    def _验证配置(self):
-        """验证配置完整性（带缓存优化）"""
+    def _验证配置(self, 基本字典: Optional[Dict[str, Any]] = None, 技能字典: Optional[Dict[str, Any]] = None,
+              气劲字典: Optional[Dict[str, Any]] = None):
+        """验证配置完整性（带缓存优化），未传入的配置使用当前配置"""
         import time
         
+        基本字典 = self._基本字典 if 基本字典 is None else 基本字典
+        技能字典 = self._技能字典 if 技能字典 is None else 技能字典
+        气劲字典 = self._气劲字典 if 气劲字典 is None else 气劲字典
+        
         # 检查缓存
         当前时间 = time.time()
-        缓存键 = f"{self._环境}_{hash(str(self._基本字典))}_{hash(str(self._技能字典))}_{hash(str(self._气劲字典))}"
+        缓存键 = f"{self._环境}_{hash(str(基本字典))}_{hash(str(技能字典))}_{hash(str(气劲字典))}"
         
         if 缓存键 in self._验证缓存:
             缓存结果, 缓存时间 = self._验证缓存[缓存键]
@@ -181,11 +274,11 @@ class 配置管理器:
         # 执行验证
         try:
             # 验证基本配置
-            if not self._基本字典:
+            if not 基本字典:
                 raise 配置验证错误("基本配置缺失")
             
             # 验证技能检测区域
-            技能检测区域 = self._基本字典.get("技能检测区域")
+            技能检测区域 = 基本字典.get("技能检测区域")
             if not 技能检测区域:
                 raise 配置验证错误("技能检测区域配置缺失")
             
@@ -193,7 +286,7 @@ class 配置管理器:
                 raise 配置验证错误("技能检测区域配置不完整")
             
             # 验证蓝条监控
-            蓝条配置 = self._基本字典.get("蓝条监控")
+            蓝条配置 = 基本字典.get("蓝条监控")
             if not 蓝条配置:
                 raise 配置验证错误("蓝条监控配置缺失")
             
@@ -201,11 +294,11 @@ class 配置管理器:
                 raise 配置验证错误("蓝条监控配置不完整")
             
             # 验证技能配置
-            if not self._技能字典:
+            if not 技能字典:
                 raise 配置验证错误("技能配置缺失")
             
             # 验证气劲配置
-            if not self._气劲字典:
+            if not 气劲字典:
                 raise 配置验证错误("气劲配置缺失")
             
             # 缓存验证结果
@@ -244,41 +337,108 @@ class 配置管理器:
                 print(f"配置变更回调执行失败: {e}")
     
     @property
-    def 基本字典(self) -> Dict[str, Any]:
-        """获取基本配置"""
-        if self._基本字典 is None:
-            self.读取基本配置文件()
-        return self._基本字典
+    def 快照(self) -> 配置快照:
+        """获取当前配置快照（首次访问时加载）"""
+        if self._快照 is None:
+            self.读取所有配置()
+        return self._快照
+    
+    @property
+    def 快照版本(self) -> int:
+        """当前配置快照版本号，尚未加载时为0"""
+        return self._快照版本
     
     @property
-    def 技能字典(self) -> Dict[str, Any]:
-        """获取技能配置"""
-        if self._技能字典 is None:
-            self.读取技能配置文件()
-        return self._技能字典
+    def 基本字典(self) -> Mapping[str, Any]:
+        """获取基本配置（只读映射）"""
+        return self.快照.基本配置
     
     @property
-    def 气劲字典(self) -> Dict[str, Any]:
-        """获取气劲配置"""
-        if self._气劲字典 is None:
-            self.读取气劲配置文件()
-        return self._气劲字典
-    
-    def 重新加载配置(self):
-        """重新加载所有配置文件（支持批量处理）"""
+    def 技能字典(self) -> Mapping[str, Any]:
+        """获取技能配置（只读映射）"""
+        return self.快照.技能配置
+    
+    @property
+    def 气劲字典(self) -> Mapping[str, Any]:
+        """获取气劲配置（只读映射）"""
+        return self.快照.气劲配置
+    
+    def 重新加载配置(self, 变更文件: Optional[List[str]] = None):
+        """
+        重新加载配置文件（支持批量处理）
+        先完整构建并验证新快照，成功后才替换当前快照；失败时保留旧快照并抛出异常
+        
+        参数:
+            变更文件: 可选，发生变化的配置文件（文件名或路径），只重新解析这些文件；
+                     None表示全部重新读取
+        """
         # 如果正在批量处理中，推迟处理
         if self._批量处理中:
-            self._待处理变更.append("重新加载")
+            self._待处理变更.append(变更文件)
             return
         
-        self._基本字典 = None
-        self._技能字典 = None
-        self._气劲字典 = None
-        self._环境配置 = None
-        self.读取所有配置()
+        self._执行重新加载(变更文件)
+    
+    def _执行重新加载(self, 变更文件: Optional[List[str]] = None) -> Optional[配置快照]:
+        """构建新快照、原子替换并触发回调；配置没有实际变化时不切换也不回调"""
+        if 变更文件 is not None:
+            变更文件 = [os.path.basename(文件) for 文件 in 变更文件]
+            # 只有未参与构建的文件变化时无需重载
+            if not set(变更文件) & set(self.获取配置文件列表()):
+                self._重载统计["无变化"] += 1
+                return None
+        
+        try:
+            快照 = self._发布快照(*self._加载配置字典(变更文件))
+        except Exception:
+            self._重载统计["失败"] += 1
+            raise
+        
+        self._重载统计["完整重载" if 变更文件 is None else "增量重载"] += 1
+        if 快照 is None:
+            self._重载统计["无变化"] += 1
+            return None
         
         # 触发配置变更回调
         self._触发配置变更回调()
+        return 快照
+    
+    def 获取重载统计(self) -> Dict[str, Any]:
+        """获取配置重载统计"""
+        快照 = self._快照
+        return {
+            **self._重载统计,
+            "当前版本": self._快照版本,
+            "最近差异": 快照.差异.获取摘要() if 快照 is not None else {}
+        }
+    
+    def 异步重新加载配置(self, 完成回调: Optional[Callable[[bool, Optional[Exception]], None]] = None,
+                   变更文件: Optional[List[str]] = None) -> threading.Thread:
+        """
+        在后台线程中读取、解析并验证配置，完成后原子替换快照
+        读取方在替换前始终看到完整的旧快照
+        
+        参数:
+            完成回调: 可选，完成时以(是否成功, 异常)调用
+            变更文件: 可选，只重新解析这些文件
+        
+        返回:
+            执行重载的后台线程
+        """
+        def 执行():
+            try:
+                self._执行重新加载(变更文件)
+            except Exception as e:
+                print(f"配置重新加载失败，继续使用版本 {self._快照版本}: {e}")
+                if 完成回调:
+                    完成回调(False, e)
+                return
+            if 完成回调:
+                完成回调(True, None)
+        
+        线程 = threading.Thread(target=执行, name="配置重新加载", daemon=True)
+        线程.start()
+        return 线程
     
     def 开始批量处理(self):
         """开始批量处理模式，延迟回调触发"""
@@ -290,14 +450,11 @@ class 配置管理器:
         self._批量处理中 = False
         
         if self._待处理变更:
-            # 合并相同的变更请求
-            if "重新加载" in self._待处理变更:
-                self._基本字典 = None
-                self._技能字典 = None
-                self._气劲字典 = None
-                self._环境配置 = None
-                self.读取所有配置()
-                self._触发配置变更回调()
+            # 合并积压的变更请求：任一请求需要完整重载则完整重载，否则合并变更文件
+            if any(变更 is None for 变更 in self._待处理变更):
+                self._执行重新加载()
+            else:
+                self._执行重新加载(sorted({文件 for 变更 in self._待处理变更 for 文件 in 变更}))
             
             # 清空待处理队列
             self._待处理变更 = []
@@ -330,10 +487,11 @@ class 配置管理器:
         返回:
             bool: 配置是否完整
         """
-        if not self._技能字典 or 技能名称 not in self._技能字典:
+        技能字典 = self.技能字典
+        if not 技能字典 or 技能名称 not in 技能字典:
             return False
         
-        技能配置 = self._技能字典[技能名称]
+        技能配置 = 技能字典[技能名称]
         return all(键 in 技能配置 for 键 in ["键值", "坐标", "颜色"])
     
     def 获取配置备份(self) -> Dict[str, Any]:
@@ -352,10 +510,12 @@ class 配置管理器:
         参数:
             备份: 配置备份字典
         """
-        self._基本字典 = 备份.get("基本配置", {})
-        self._技能字典 = 备份.get("技能配置", {})
-        self._气劲字典 = 备份.get("气劲配置", {})
         self._环境 = 备份.get("环境", "development")
+        self._发布快照(
+            copy.deepcopy(备份.get("基本配置", {})),
+            copy.deepcopy(备份.get("技能配置", {})),
+            copy.deepcopy(备份.get("气劲配置", {}))
+        )
         
         # 触发配置变更回调
         self._触发配置变更回调()
@@ -393,4 +553,12 @@ class 配置管理器:
 
     def 获取目标状态配置(self) -> Dict[str, Any]:
         """获取目标状态配置"""
-        return self.基本字典.get("目标状态配置", {})
\ No newline at end of file
+        return self.基本字典.get("目标状态配置", {})
+
+    def 获取循环节拍配置(self) -> Dict[str, Any]:
+        """获取主循环节拍配置（目标频率、错拍策略）"""
+        return dict(self.快照.循环节拍)
+
+    def 获取启动预热配置(self) -> Dict[str, Any]:
+        """获取启动预热配置（是否启用、空跑次数）"""
+        return dict(self.快照.启动预热)
@@ -1,61 +1,409 @@
 """
 依赖注入容器
-提供类型安全的依赖管理和自动注入功能
+注册时编译解析图（构造函数参数按类型注解注入），启动前验证缺失与循环绑定，
+并以延迟代理提供昂贵的后端，首次使用时才创建
 """
-from typing import Dict, Any, Type, Callable, Optional
+import inspect
+import threading
+import importlib
+import importlib.util
+from enum import Enum
+from dataclasses import dataclass
+from typing import Dict, Any, Type, Callable, Optional, List, Tuple, Union, get_type_hints, get_origin, get_args
 from abc import ABC, abstractmethod
 
 
+class 生命周期(Enum):
+    """实例生命周期"""
+    单例 = "单例"      # 容器内只创建一次
+    瞬态 = "瞬态"      # 每次解析都创建新实例
+    作用域 = "作用域"  # 同一作用域内只创建一次
+
+
+class 依赖解析错误(ValueError):
+    """依赖缺失、循环或创建失败"""
+    pass
+
+
+@dataclass
+class 服务绑定:
+    """一条接口到提供者的绑定"""
+    接口类型: Type
+    提供者: Any  # 实例、工厂函数、实现类型，或"模块:类名"形式的延迟导入路径
+    方式: str  # 实例 / 工厂 / 实现
+    生命周期: 生命周期 = 生命周期.单例
+    所需模块: Tuple[str, ...] = ()
+    依赖: Optional[List[Tuple[str, Type, bool]]] = None  # (参数名, 类型, 是否必需)
+    创建函数: Optional[Callable] = None
+    已编译: bool = False
+
+
+class 延迟代理:
+    """
+    延迟代理
+    首次访问属性时才通过容器创建真实实例，之后直接转发
+    """
+
+    __slots__ = ("_容器", "_接口类型", "_实例", "_锁")
+
+    def __init__(self, 容器: '依赖容器', 接口类型: Type):
+        self._容器 = 容器
+        self._接口类型 = 接口类型
+        self._实例 = None
+        self._锁 = threading.Lock()
+
+    def 获取目标(self) -> Any:
+        """获取（必要时创建）真实实例"""
+        实例 = self._实例
+        if 实例 is None:
+            with self._锁:
+                if self._实例 is None:
+                    self._实例 = self._容器.获取实例(self._接口类型)
+                实例 = self._实例
+        return 实例
+
+    @property
+    def 已创建(self) -> bool:
+        """真实实例是否已创建"""
+        return self._实例 is not None
+
+    def __getattr__(self, 名称: str) -> Any:
+        return getattr(self.获取目标(), 名称)
+
+    def __repr__(self) -> str:
+        状态 = "已创建" if self._实例 is not None else "未创建"
+        return f"<延迟代理 {self._接口类型.__name__} ({状态})>"
+
+
+class 依赖作用域:
+    """依赖作用域：作用域生命周期的实例在作用域内共享，退出时释放"""
+
+    def __init__(self, 容器: '依赖容器'):
+        self._容器 = 容器
+        self._实例缓存: Dict[Type, Any] = {}
+
+    def 获取实例(self, 接口类型: Type) -> Any:
+        """在本作用域内解析依赖"""
+        return self._容器._解析(接口类型, self._实例缓存, ())
+
+    def 释放(self):
+        """释放作用域内的实例"""
+        self._实例缓存.clear()
+
+    def __enter__(self) -> '依赖作用域':
+        return self
+
+    def __exit__(self, 异常类型, 异常值, 追踪) -> None:
+        self.释放()
+
+
+# 不参与自动注入的内置类型
+_内置类型 = (str, int, float, bool, bytes, list, dict, tuple, set)
+
+
 class 依赖容器:
-    """简单的依赖注入容器"""
+    """依赖注入容器（编译解析图版本）"""
     
     def __init__(self):
         self._单例缓存: Dict[Type, Any] = {}
-        self._工厂函数: Dict[Type, Callable] = {}
-        self._接口映射: Dict[Type, Type] = {}
+        self._绑定: Dict[Type, 服务绑定] = {}
+        self._锁 = threading.RLock()
+    
+    # ---------- 注册 ----------
     
     def 注册单例(self, 接口类型: Type, 实现实例: Any):
         """注册单例实例"""
-        self._单例缓存[接口类型] = 实现实例
+        with self._锁:
+            self._绑定[接口类型] = 服务绑定(接口类型, 实现实例, "实例", 已编译=True, 依赖=[])
+            self._单例缓存[接口类型] = 实现实例
+    
+    def 注册工厂(self, 接口类型: Type, 工厂函数: Callable, 生命周期: 生命周期 = 生命周期.单例,
+               所需模块: Tuple[str, ...] = ()):
+        """
+        注册工厂函数（工厂函数的参数按类型注解注入）
+        
+        参数:
+            接口类型: 接口类型
+            工厂函数: 工厂函数
+            生命周期: 实例生命周期
+            所需模块: 可用性检查时需要能找到的模块
+        """
+        self._添加绑定(服务绑定(接口类型, 工厂函数, "工厂", 生命周期, tuple(所需模块)))
+    
+    def 注册实现(self, 接口类型: Type, 实现类型: Union[Type, str], 生命周期: 生命周期 = 生命周期.单例,
+               所需模块: Tuple[str, ...] = ()):
+        """
+        注册接口到实现的映射（构造函数参数按类型注解注入）
+        
+        参数:
+            接口类型: 接口类型
+            实现类型: 实现类型，或"模块:类名"形式的路径（首次解析时才导入）
+            生命周期: 实例生命周期
+            所需模块: 可用性检查时需要能找到的模块
+        """
+        self._添加绑定(服务绑定(接口类型, 实现类型, "实现", 生命周期, tuple(所需模块)))
+    
+    def _添加绑定(self, 绑定: 服务绑定):
+        """添加绑定；提供者已导入时立即编译"""
+        with self._锁:
+            self._单例缓存.pop(绑定.接口类型, None)
+            self._绑定[绑定.接口类型] = 绑定
+            if not isinstance(绑定.提供者, str):
+                self._编译绑定(绑定)
+    
+    # ---------- 编译 ----------
+    
+    def _编译绑定(self, 绑定: 服务绑定):
+        """分析提供者的参数注解，生成依赖列表和创建函数"""
+        if 绑定.已编译:
+            return
+        提供者 = 绑定.提供者
+        if isinstance(提供者, str):
+            模块名, _, 类名 = 提供者.partition(":")
+            提供者 = getattr(importlib.import_module(模块名), 类名)
+            绑定.提供者 = 提供者
+        
+        绑定.依赖 = self._分析参数(提供者)
+        
+        def 创建函数(解析: Callable[[Type], Any], 提供者=提供者, 依赖=绑定.依赖) -> Any:
+            参数 = {}
+            for 参数名, 类型, 必需 in 依赖:
+                if 必需 or self._可解析(类型):
+                    参数[参数名] = 解析(类型)
+            return 提供者(**参数)
+        
+        绑定.创建函数 = 创建函数
+        绑定.已编译 = True
     
-    def 注册工厂(self, 接口类型: Type, 工厂函数: Callable):
-        """注册工厂函数"""
-        self._工厂函数[接口类型] = 工厂函数
+    @staticmethod
+    def _分析参数(提供者: Callable) -> List[Tuple[str, Type, bool]]:
+        """提取需要注入的参数：(参数名, 类型, 是否必需)"""
+        目标 = 提供者.__init__ if inspect.isclass(提供者) else 提供者
+        try:
+            签名 = inspect.signature(目标)
+        except (TypeError, ValueError):
+            return []
+        try:
+            注解 = get_type_hints(目标)
+        except Exception:
+            注解 = getattr(目标, "__annotations__", {})
+        
+        依赖 = []
+        for 参数名, 参数 in 签名.parameters.items():
+            if 参数名 == "self" or 参数.kind in (参数.VAR_POSITIONAL, 参数.VAR_KEYWORD):
+                continue
+            类型 = 注解.get(参数名, 参数.annotation)
+            # Optional[X] 视为 X
+            if get_origin(类型) is Union:
+                候选 = [类型参数 for 类型参数 in get_args(类型) if 类型参数 is not type(None)]
+                类型 = 候选[0] if len(候选) == 1 else 参数.empty
+            必需 = 参数.default is 参数.empty
+            if not inspect.isclass(类型) or 类型 in _内置类型:
+                if 必需:
+                    # 无法注入的必需参数，验证时报告为缺失
+                    依赖.append((参数名, 类型, True))
+                continue
+            依赖.append((参数名, 类型, 必需))
+        return 依赖
     
-    def 注册实现(self, 接口类型: Type, 实现类型: Type):
-        """注册接口到实现的映射"""
-        self._接口映射[接口类型] = 实现类型
+    def _可解析(self, 接口类型: Any) -> bool:
+        """接口是否已绑定，或是可直接构造的具体类"""
+        if 接口类型 in self._绑定:
+            return True
+        return (inspect.isclass(接口类型) and 接口类型 not in _内置类型
+                and not inspect.isabstract(接口类型))
+    
+    # ---------- 解析 ----------
     
     def 获取实例(self, 接口类型: Type) -> Any:
-        """获取依赖实例"""
-        # 1. 检查单例缓存
-        if 接口类型 in self._单例缓存:
-            return self._单例缓存[接口类型]
-        
-        # 2. 检查工厂函数
-        if 接口类型 in self._工厂函数:
-            实例 = self._工厂函数[接口类型]()
-            self._单例缓存[接口类型] = 实例  # 缓存为单例
+        """获取依赖实例（作用域生命周期的依赖需通过作用域获取）"""
+        实例 = self._单例缓存.get(接口类型)
+        if 实例 is not None:
+            return 实例
+        return self._解析(接口类型, None, ())
+    
+    def 获取延迟实例(self, 接口类型: Type) -> Any:
+        """获取延迟代理（已创建的单例直接返回实例）"""
+        实例 = self._单例缓存.get(接口类型)
+        if 实例 is not None:
             return 实例
+        if 接口类型 not in self._绑定 and not self._可解析(接口类型):
+            raise 依赖解析错误(f"未注册的依赖: {getattr(接口类型, '__name__', 接口类型)}")
+        return 延迟代理(self, 接口类型)
+    
+    def 创建作用域(self) -> 依赖作用域:
+        """创建依赖作用域"""
+        return 依赖作用域(self)
+    
+    def _解析(self, 接口类型: Type, 作用域缓存: Optional[Dict[Type, Any]], 解析栈: Tuple[Type, ...]) -> Any:
+        """按绑定解析依赖，解析栈用于检测运行时循环"""
+        if 接口类型 in 解析栈:
+            路径 = " -> ".join(t.__name__ for t in 解析栈 + (接口类型,))
+            raise 依赖解析错误(f"循环依赖: {路径}")
+        
+        绑定 = self._绑定.get(接口类型)
+        if 绑定 is None:
+            if not self._可解析(接口类型):
+                raise 依赖解析错误(f"无法解析依赖: {getattr(接口类型, '__name__', 接口类型)}")
+            # 未注册的具体类：按原有行为隐式注册为单例实现
+            with self._锁:
+                绑定 = self._绑定.get(接口类型)
+                if 绑定 is None:
+                    绑定 = 服务绑定(接口类型, 接口类型, "实现")
+                    self._编译绑定(绑定)
+                    self._绑定[接口类型] = 绑定
         
-        # 3. 检查接口映射
-        if 接口类型 in self._接口映射:
-            实现类型 = self._接口映射[接口类型]
-            实例 = 实现类型()
-            self._单例缓存[接口类型] = 实例  # 缓存为单例
+        if 绑定.方式 == "实例":
+            return 绑定.提供者
+        
+        if 绑定.生命周期 == 生命周期.单例:
+            实例 = self._单例缓存.get(接口类型)
+            if 实例 is not None:
+                return 实例
+            with self._锁:
+                实例 = self._单例缓存.get(接口类型)
+                if 实例 is None:
+                    实例 = self._创建(绑定, 作用域缓存, 解析栈)
+                    self._单例缓存[接口类型] = 实例
             return 实例
         
-        # 4. 尝试直接实例化
+        if 绑定.生命周期 == 生命周期.作用域:
+            if 作用域缓存 is None:
+                raise 依赖解析错误(f"作用域依赖需在作用域内解析: {接口类型.__name__}")
+            if 接口类型 not in 作用域缓存:
+                作用域缓存[接口类型] = self._创建(绑定, 作用域缓存, 解析栈)
+            return 作用域缓存[接口类型]
+        
+        return self._创建(绑定, 作用域缓存, 解析栈)
+    
+    def _创建(self, 绑定: 服务绑定, 作用域缓存: Optional[Dict[Type, Any]], 解析栈: Tuple[Type, ...]) -> Any:
+        """调用编译好的创建函数"""
         try:
-            实例 = 接口类型()
-            self._单例缓存[接口类型] = 实例
-            return 实例
+            self._编译绑定(绑定)
+        except Exception as e:
+            raise 依赖解析错误(f"无法加载 {绑定.接口类型.__name__} 的实现: {e}") from e
+        
+        新解析栈 = 解析栈 + (绑定.接口类型,)
+        try:
+            return 绑定.创建函数(lambda 类型: self._解析(类型, 作用域缓存, 新解析栈))
+        except 依赖解析错误:
+            raise
         except Exception as e:
-            raise ValueError(f"无法解析依赖: {接口类型.__name__}, 错误: {e}")
+            raise 依赖解析错误(f"无法创建依赖: {绑定.接口类型.__name__}, 错误: {e}") from e
+    
+    # ---------- 验证 ----------
+    
+    def 是否已注册(self, 接口类型: Type) -> bool:
+        """接口是否已显式注册"""
+        return 接口类型 in self._绑定
+    
+    def 是否可用(self, 接口类型: Type) -> bool:
+        """
+        接口已注册且其实现所需的模块都能找到
+        只用find_spec检查模块是否存在，不导入也不构造：模块导入失败或构造函数出错
+        要到真正创建实例时（如延迟代理首次使用）才会以依赖解析错误暴露
+        """
+        绑定 = self._绑定.get(接口类型)
+        if 绑定 is None:
+            return False
+        return not self._缺失模块(绑定)
+    
+    @staticmethod
+    def _缺失模块(绑定: 服务绑定) -> List[str]:
+        """返回绑定所需但找不到的模块"""
+        模块列表 = list(绑定.所需模块)
+        if isinstance(绑定.提供者, str):
+            模块列表.append(绑定.提供者.partition(":")[0])
+        缺失 = []
+        for 模块名 in 模块列表:
+            try:
+                if importlib.util.find_spec(模块名) is None:
+                    缺失.append(模块名)
+            except (ImportError, ValueError):
+                缺失.append(模块名)
+        return 缺失
+    
+    def 验证(self, 抛出异常: bool = False) -> Dict[str, Any]:
+        """
+        验证解析图：检查缺失绑定、循环依赖和不可用的实现
+        延迟导入的实现只检查模块是否存在，不导入、不分析其构造函数
+        
+        参数:
+            抛出异常: 存在缺失或循环依赖时抛出依赖解析错误
+            
+        返回:
+            验证结果字典
+        """
+        缺失依赖: List[str] = []
+        循环依赖: List[str] = []
+        不可用: Dict[str, List[str]] = {}
+        
+        with self._锁:
+            绑定列表 = list(self._绑定.values())
+        
+        for 绑定 in 绑定列表:
+            缺失模块 = self._缺失模块(绑定)
+            if 缺失模块:
+                不可用[绑定.接口类型.__name__] = 缺失模块
+            if not 绑定.已编译:
+                continue
+            for 参数名, 类型, 必需 in 绑定.依赖 or []:
+                if 必需 and not self._可解析(类型):
+                    类型名 = getattr(类型, "__name__", str(类型))
+                    缺失依赖.append(f"{绑定.接口类型.__name__}.{参数名}: {类型名}")
+        
+        # 深度优先检测循环
+        状态: Dict[Type, int] = {}  # 1=访问中, 2=已完成
+        
+        def 访问(接口类型: Type, 路径: List[Type]):
+            状态[接口类型] = 1
+            绑定 = self._绑定.get(接口类型)
+            if 绑定 is not None and 绑定.已编译:
+                for _, 类型, 必需 in 绑定.依赖 or []:
+                    if not (必需 or 类型 in self._绑定):
+                        continue
+                    if 状态.get(类型) == 1:
+                        环 = 路径[路径.index(类型):] + [类型] if 类型 in 路径 else [接口类型, 类型]
+                        循环依赖.append(" -> ".join(t.__name__ for t in 环))
+                    elif 状态.get(类型) is None and 类型 in self._绑定:
+                        访问(类型, 路径 + [类型])
+            状态[接口类型] = 2
+        
+        for 绑定 in 绑定列表:
+            if 绑定.接口类型 not in 状态:
+                访问(绑定.接口类型, [绑定.接口类型])
+        
+        结果 = {
+            "通过": not 缺失依赖 and not 循环依赖,
+            "绑定数量": len(绑定列表),
+            "缺失依赖": 缺失依赖,
+            "循环依赖": 循环依赖,
+            "不可用实现": 不可用
+        }
+        if 抛出异常 and not 结果["通过"]:
+            raise 依赖解析错误(f"依赖验证失败: 缺失={缺失依赖}, 循环={循环依赖}")
+        return 结果
+    
+    def 获取绑定信息(self) -> Dict[str, Any]:
+        """获取各绑定的注册方式、生命周期和创建状态"""
+        with self._锁:
+            绑定列表 = list(self._绑定.values())
+        return {
+            绑定.接口类型.__name__: {
+                "方式": 绑定.方式,
+                "生命周期": 绑定.生命周期.value,
+                "已编译": 绑定.已编译,
+                "已创建": 绑定.接口类型 in self._单例缓存
+            }
+            for 绑定 in 绑定列表
+        }
     
     def 清除缓存(self):
-        """清除所有缓存实例"""
-        self._单例缓存.clear()
+        """清除所有缓存实例（显式注册的单例实例保留）"""
+        with self._锁:
+            self._单例缓存 = {
+                接口类型: 绑定.提供者 for 接口类型, 绑定 in self._绑定.items() if 绑定.方式 == "实例"
+            }
 
 
 class 配置提供器接口(ABC):
@@ -99,4 +447,16 @@ class 容器工厂:
         配置提供器 = 默认配置提供器(配置路径, 调试模式)
         容器.注册单例(配置提供器接口, 配置提供器)
         
-        return 容器
\ No newline at end of file
+        return 容器
+    
+    @staticmethod
+    def 注册默认后端(容器: 依赖容器):
+        """
+        以延迟导入路径注册默认的按键与图像后端
+        注册时不导入驱动和win32模块，可用性通过模块查找判断
+        """
+        from interface.按键操作接口 import 按键操作接口
+        from interface.图像获取接口 import 图像获取接口
+        容器.注册实现(按键操作接口, "interface.幽灵盒子按键接口:幽灵盒子按键接口")
+        容器.注册实现(图像获取接口, "interface.Windows图像接口:Windows图像接口",
+                  所需模块=("win32gui", "win32ui", "win32con", "numpy", "cv2"))
\ No newline at end of file
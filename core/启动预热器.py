@@ -0,0 +1,328 @@
+"""
+启动预热器
+在引擎启动时预先支付首拍开销：编译配置、加载模板、分配帧缓冲，
+并用合成帧空跑若干拍预热检测与决策代码路径，再经检测图、工作线程池和帧总线（启用时）
+执行合成帧检测，让池线程和工作进程在首拍前就绪，每一步单独计时
+"""
+import time
+from typing import Dict, Any, List, Optional, Tuple, Callable, TYPE_CHECKING
+from interface.图像获取接口 import 图像获取接口
+from core.策略接口 import 策略上下文
+from core.状态监测器 import 状态监测器
+from utils.时间戳优化器 import 全局时钟
+from utils.精确等待器 import 全局精确等待器
+from utils.服务质量管理器 import 服务质量管理器
+
+if TYPE_CHECKING:
+    from core.技能循环引擎 import 技能循环引擎
+
+
+class 合成图像接口(图像获取接口):
+    """
+    合成图像接口
+    预先分配一块全黑帧缓冲，按区域返回其切片视图，不访问屏幕
+    """
+
+    def __init__(self, 宽: int, 高: int):
+        """
+        初始化合成帧缓冲
+
+        参数:
+            宽: 帧宽度（像素）
+            高: 帧高度（像素）
+        """
+        self.宽 = max(1, 宽)
+        self.高 = max(1, 高)
+        try:
+            import numpy as np
+            self.帧缓冲 = np.zeros((self.高, self.宽, 3), dtype=np.uint8)
+        except ImportError:
+            self.帧缓冲 = None
+
+    @property
+    def 缓冲字节数(self) -> int:
+        """帧缓冲占用字节数"""
+        return self.帧缓冲.nbytes if self.帧缓冲 is not None else 0
+
+    def 获取屏幕区域(self, 区域: Tuple[int, int, int, int]):
+        """返回与区域同尺寸的合成帧视图（无拷贝）"""
+        if self.帧缓冲 is None or not 区域:
+            return None
+        _, _, 宽, 高 = 区域
+        return self.帧缓冲[:max(1, min(高, self.高)), :max(1, min(宽, self.宽))]
+
+
+class 启动预热器:
+    """
+    启动预热器
+    步骤按顺序执行，单步失败只记录错误，不影响后续步骤和引擎启动
+    """
+
+    def __init__(self, 引擎: '技能循环引擎', 空跑次数: int = 5, 等待超时: float = 10.0):
+        """
+        初始化启动预热器
+
+        参数:
+            引擎: 技能循环引擎实例
+            空跑次数: 合成帧空跑拍数
+            等待超时: 检测图节点和帧总线任务的最长等待秒数（工作进程首个任务包含导入视觉库）
+        """
+        self.引擎 = 引擎
+        self.空跑次数 = 空跑次数
+        self.等待超时 = 等待超时
+        self.合成接口: Optional[合成图像接口] = None
+        self._步骤记录: List[Dict[str, Any]] = []
+        self._空跑耗时: List[float] = []
+        self._总耗时 = 0.0
+        self._完成时间 = 0.0
+
+    def 执行(self) -> bool:
+        """
+        执行全部预热步骤
+
+        返回:
+            bool: 是否所有步骤都成功
+        """
+        self._步骤记录 = []
+        self._空跑耗时 = []
+        开始时间 = time.perf_counter()
+
+        步骤列表: List[Tuple[str, Callable[[], Any]]] = [
+            ("编译配置", self._编译配置),
+            ("加载模板", self._加载模板),
+            ("分配帧缓冲", self._分配帧缓冲),
+            ("空跑预热", self._空跑预热),
+            ("检测图预热", self._检测图预热),
+            ("帧总线预热", self._帧总线预热),
+            ("校准等待器", self._校准等待器)
+        ]
+        全部成功 = True
+        for 名称, 函数 in 步骤列表:
+            全部成功 = self._执行步骤(名称, 函数) and 全部成功
+
+        self._总耗时 = time.perf_counter() - 开始时间
+        self._完成时间 = time.time()
+        return 全部成功
+
+    def _执行步骤(self, 名称: str, 函数: Callable[[], Any]) -> bool:
+        """执行单个步骤并记录耗时与结果"""
+        开始时间 = time.perf_counter()
+        try:
+            结果 = 函数()
+            成功, 错误信息 = True, ""
+        except Exception as e:
+            结果 = None
+            成功, 错误信息 = False, f"{type(e).__name__}: {e}"
+        self._步骤记录.append({
+            "名称": 名称,
+            "耗时": time.perf_counter() - 开始时间,
+            "成功": 成功,
+            "结果": 结果,
+            "错误信息": 错误信息
+        })
+        return 成功
+
+    def _编译配置(self) -> str:
+        """取得当前配置快照（派生结构已在构建时编译）并让引擎采用，避免首拍切换版本"""
+        快照 = self.引擎.配置管理器.快照
+        if 快照 is not self.引擎._配置快照:
+            self.引擎._应用配置快照(快照)
+        return f"版本{快照.版本}, {len(快照.技能配置)}个技能, {len(快照.探测计划)}个探测点"
+
+    def _加载模板(self) -> str:
+        """预读Buff/Debuff模板并导入视觉库"""
+        引擎 = self.引擎
+        if not 引擎.使用智能模式:
+            return "简单模式无需模板"
+
+        目标状态配置 = 引擎.目标状态配置 or {}
+        Buff数量 = 引擎.状态监测器.预加载模板(
+            目标状态配置.get("关注Buff列表", []), 目标状态配置.get("Buff模板路径", {}), "Buff")
+        Debuff数量 = 引擎.状态监测器.预加载模板(
+            目标状态配置.get("关注Debuff列表", []), 目标状态配置.get("Debuff模板路径", {}), "Debuff")
+        return f"Buff模板{Buff数量}个, Debuff模板{Debuff数量}个"
+
+    def _分配帧缓冲(self) -> str:
+        """按检测用到的最大区域分配合成帧缓冲"""
+        引擎 = self.引擎
+        if not 引擎.使用智能模式:
+            return "简单模式无需帧缓冲"
+
+        区域列表 = [引擎.检测区域]
+        目标状态配置 = 引擎.目标状态配置 or {}
+        for 键 in ("血条区域", "Buff区域", "Debuff区域"):
+            区域 = 目标状态配置.get(键)
+            if 区域 and len(区域) == 4:
+                区域列表.append(tuple(区域))
+
+        宽 = max(abs(区域[2]) for 区域 in 区域列表)
+        高 = max(abs(区域[3]) for 区域 in 区域列表)
+        self.合成接口 = 合成图像接口(宽, 高)
+        if self.合成接口.帧缓冲 is None:
+            return "numpy不可用，跳过帧缓冲"
+        return f"{self.合成接口.宽}x{self.合成接口.高}, {self.合成接口.缓冲字节数 / 1024:.1f}KB"
+
+    def _空跑预热(self) -> str:
+        """用合成帧空跑所有已注册策略（只推算技能，不按键）"""
+        引擎 = self.引擎
+        if not 引擎.使用智能模式:
+            return "简单模式无需空跑"
+        if self.合成接口 is None:
+            raise RuntimeError("帧缓冲未分配")
+        if self.合成接口.帧缓冲 is None:
+            return "帧缓冲不可用，跳过空跑"
+
+        # 合成帧专用的状态监测器，共享已加载的模板缓存
+        合成监测器 = 状态监测器(self.合成接口)
+        合成监测器.模板缓存 = 引擎.状态监测器.模板缓存
+
+        策略列表 = list(引擎.策略管理器._注册策略.values())
+        推算次数 = 0
+        try:
+            for _ in range(self.空跑次数):
+                拍开始 = time.perf_counter()
+                帧时间戳 = 全局时钟.开始新帧()
+                引擎.状态检测器.开始新帧(帧时间戳)
+                for 策略 in 策略列表:
+                    上下文 = 策略上下文(
+                        技能状态检测器=引擎.状态检测器,
+                        图像获取接口=self.合成接口,
+                        状态监测器=合成监测器,
+                        技能字典=引擎._配置快照.技能配置,
+                        气劲字典=引擎._配置快照.气劲配置,
+                        蓝条配置=引擎.蓝条配置,
+                        检测区域=引擎.检测区域,
+                        七情和合状态=引擎.七情和合状态,
+                        目标状态配置=引擎.目标状态配置,
+                        帧时间戳=帧时间戳
+                    )
+                    # 预热目标状态检测路径（HP/Buff/Debuff）
+                    上下文.目标HP
+                    上下文.目标Buffs
+                    上下文.目标Debuffs
+                    try:
+                        策略.推算技能(上下文)
+                    except Exception:
+                        pass
+                    推算次数 += 1
+                self._空跑耗时.append(time.perf_counter() - 拍开始)
+        finally:
+            # 合成帧的检测结果不能带入真实循环
+            引擎.状态检测器.清除缓存()
+            引擎.状态检测器.开始新帧(None)
+        return f"{self.空跑次数}拍, {len(策略列表)}个策略, 共{推算次数}次推算"
+
+    def _检测图预热(self) -> str:
+        """
+        用合成帧经检测图执行若干拍：节点在共享工作线程池上运行（创建池线程），
+        重型检测按配置经过帧总线；期间区域截图后端换成合成帧，服务质量换成临时实例，
+        冷启动耗时不会计入真实的预估耗时
+        """
+        引擎 = self.引擎
+        if not 引擎.使用智能模式 or 引擎.检测执行器 is None:
+            return "未使用检测图"
+        if self.合成接口 is None or self.合成接口.帧缓冲 is None:
+            return "帧缓冲不可用，跳过检测图预热"
+
+        区域接口 = 引擎.区域图像接口
+        原后端, 原服务质量 = 区域接口.后端, 引擎.服务质量
+        区域接口.后端 = self.合成接口
+        引擎.服务质量 = 服务质量管理器()
+        引擎._本拍目标状态配置 = 引擎.目标状态配置 or {}
+        引擎._本拍检测准入 = {}
+        try:
+            输出 = 策略上下文(
+                技能状态检测器=引擎.状态检测器,
+                图像获取接口=self.合成接口,
+                状态监测器=引擎.状态监测器,
+                技能字典=引擎._配置快照.技能配置,
+                气劲字典=引擎._配置快照.气劲配置,
+                蓝条配置=引擎.蓝条配置,
+                检测区域=引擎.检测区域,
+                七情和合状态=引擎.七情和合状态,
+                目标状态配置=引擎._本拍目标状态配置
+            ).需要的检测() + ["技能探测"]
+            失败节点 = set()
+            for _ in range(self.空跑次数):
+                帧时间戳 = 全局时钟.开始新帧()
+                引擎.状态检测器.开始新帧(帧时间戳)
+                运行 = 引擎.检测执行器.启动(输出)
+                for 名称 in 输出:
+                    try:
+                        运行.结果(名称, self.等待超时)
+                    except Exception:
+                        # 合成帧上的检测失败不影响预热目的（线程和代码路径已就绪），只在结果中报告
+                        失败节点.add(名称)
+        finally:
+            区域接口.后端, 引擎.服务质量 = 原后端, 原服务质量
+            # 合成帧的截图和检测结果不能带入真实循环
+            区域接口.清除缓存()
+            引擎.状态检测器.清除缓存()
+            引擎.状态检测器.开始新帧(None)
+        线程池统计 = 引擎.检测线程池.获取统计信息()
+        结果 = f"{self.空跑次数}拍, 节点{'/'.join(输出)}, 线程池{线程池统计.get('线程数', '?')}线程"
+        return 结果 + (f", 失败节点{'/'.join(sorted(失败节点))}" if 失败节点 else "")
+
+    def _帧总线预热(self) -> str:
+        """
+        向每个帧总线工作进程提交合成帧检测：工作进程导入视觉库、读入已配置的模板，
+        避免首拍的重型检测超时回退到进程内执行
+        """
+        引擎 = self.引擎
+        if not 引擎.使用智能模式:
+            return "简单模式无需帧总线"
+        总线 = 引擎.视觉帧总线
+        if not 总线.可用 or not 总线.运行中:
+            return "帧总线未启用"
+        if self.合成接口 is None or self.合成接口.帧缓冲 is None:
+            return "帧缓冲不可用，跳过帧总线预热"
+
+        目标状态配置 = 引擎.目标状态配置 or {}
+        # 未配置血条阈值时使用全范围阈值，确保工作进程实际执行一次颜色计算
+        预热任务: List[Tuple[str, tuple]] = [
+            ("HP估算", (目标状态配置.get("血条颜色阈值") or {"lower": [0, 0, 0], "upper": [180, 255, 255]},))]
+        for 类型 in ("Buff", "Debuff"):
+            if 目标状态配置.get(f"关注{类型}列表"):
+                预热任务.append(("图标匹配", (目标状态配置[f"关注{类型}列表"],
+                                         目标状态配置.get(f"{类型}模板路径", {}), 类型)))
+
+        句柄 = 总线.发布帧(self.合成接口.帧缓冲[:32, :32])
+        if 句柄 is None:
+            raise RuntimeError("合成帧无法写入帧总线")
+        try:
+            # 同类任务连续提交：总线按在途任务最少分派，每个工作进程各得一份
+            任务列表 = [总线.提交(检测器, 句柄, *参数)
+                      for 检测器, 参数 in 预热任务 for _ in range(总线.工作进程数)]
+        finally:
+            总线.释放(句柄)
+        for 任务 in 任务列表:
+            任务.result(self.等待超时)
+        return f"{总线.工作进程数}个工作进程, {len(任务列表)}个任务"
+
+    def _校准等待器(self) -> str:
+        """短等待几次，让精确等待器学习当前平台的睡眠超调量"""
+        for _ in range(5):
+            全局精确等待器.等待(0.002)
+        return f"超调估计{全局精确等待器.超调估计 * 1000:.3f}ms"
+
+    def 获取预热报告(self) -> Dict[str, Any]:
+        """获取最近一次预热的分步耗时报告"""
+        报告: Dict[str, Any] = {
+            "总耗时": f"{self._总耗时 * 1000:.2f}ms",
+            "完成时间": self._完成时间,
+            "步骤": {
+                记录["名称"]: {
+                    "耗时": f"{记录['耗时'] * 1000:.2f}ms",
+                    "成功": 记录["成功"],
+                    "结果": 记录["结果"] if 记录["成功"] else 记录["错误信息"]
+                }
+                for 记录 in self._步骤记录
+            }
+        }
+        if self._空跑耗时:
+            报告["空跑"] = {
+                "首拍耗时": f"{self._空跑耗时[0] * 1000:.2f}ms",
+                "末拍耗时": f"{self._空跑耗时[-1] * 1000:.2f}ms",
+                "平均耗时": f"{sum(self._空跑耗时) / len(self._空跑耗时) * 1000:.2f}ms"
+            }
+        return 报告
@@ -0,0 +1,324 @@
+"""
+引擎进程
+可选把技能循环引擎放到独立的工作进程中运行，界面作为客户端：
+引擎状态和指标以固定布局写入共享内存状态块（顺序锁），界面读取时不加锁、不经过进程间往返；
+启动/停止/暂停等命令经一条命令管道发送，Qt绘制和界面定时器因此不会与引擎线程争抢GIL
+"""
+import os
+import time
+import pickle
+import struct
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Dict, Any, Optional
+
+
+class 状态块:
+    """
+    共享内存状态块（单写多读的顺序锁）
+    写入方先把序号加1（奇数表示正在写），写完负载后再加1；
+    读取方在读取负载前后各读一次序号，两次相同且为偶数时数据一致，否则重读
+    """
+
+    # 序号单独占据开头8字节
+    _序号格式 = struct.Struct("<Q")
+    # running, paused, ready, 负载级别, 进程号, 执行次数, 平均响应时间, 成功率, 采样频率, 更新时间, 模式, 活动状态, 启动错误
+    _负载格式 = struct.Struct("<???BIQdddd64s32s128s")
+    大小 = _序号格式.size + _负载格式.size
+
+    def __init__(self, 名称: Optional[str] = None):
+        """
+        创建或连接状态块
+
+        参数:
+            名称: 已存在的共享内存名称（客户端之外的进程连接用），None表示新建
+        """
+        self._创建者 = 名称 is None
+        if self._创建者:
+            self._共享内存 = shared_memory.SharedMemory(create=True, size=self.大小)
+            self._共享内存.buf[:self.大小] = bytes(self.大小)
+        else:
+            self._共享内存 = shared_memory.SharedMemory(name=名称)
+        self._写锁 = threading.Lock()
+        self._上次结果: Dict[str, Any] = {}
+        self.重读次数 = 0
+
+    @property
+    def 名称(self) -> str:
+        """共享内存名称"""
+        return self._共享内存.name
+
+    @staticmethod
+    def _编码(文本: Any, 长度: int) -> bytes:
+        """按字节截断为UTF-8（不截断到半个字符）"""
+        数据 = str(文本).encode("utf-8")[:长度]
+        return 数据.decode("utf-8", "ignore").encode("utf-8")
+
+    def 写入(self, 状态: Dict[str, Any]):
+        """
+        写入一份状态（同一进程内的多个写入线程互斥，读取方不受影响）
+
+        参数:
+            状态: 引擎运行状态字典
+        """
+        缓冲 = self._共享内存.buf
+        with self._写锁:
+            序号 = self._序号格式.unpack_from(缓冲, 0)[0]
+            self._序号格式.pack_into(缓冲, 0, 序号 + 1)
+            self._负载格式.pack_into(
+                缓冲, self._序号格式.size,
+                bool(状态.get("running")), bool(状态.get("paused")), bool(状态.get("ready")),
+                int(状态.get("load_level", 0)) & 0xFF, os.getpid(),
+                int(状态.get("execution_count", 0)),
+                float(状态.get("avg_response_time", 0.0)), float(状态.get("success_rate", 0.0)),
+                float(状态.get("tick_rate", 0.0)), time.time(),
+                self._编码(状态.get("mode", ""), 64), self._编码(状态.get("activity_state", ""), 32),
+                self._编码(状态.get("start_error", ""), 128)
+            )
+            self._序号格式.pack_into(缓冲, 0, 序号 + 2)
+
+    def 读取(self, 最多重试: int = 100) -> Dict[str, Any]:
+        """
+        无锁读取最新状态
+
+        参数:
+            最多重试: 写入频繁时的最多重读次数，仍不一致时返回上次读到的一致状态
+
+        返回:
+            dict: 运行状态（从未写入过时为空字典）
+        """
+        缓冲 = self._共享内存.buf
+        for _ in range(最多重试):
+            序号 = self._序号格式.unpack_from(缓冲, 0)[0]
+            if 序号 & 1:
+                self.重读次数 += 1
+                continue
+            负载 = bytes(缓冲[self._序号格式.size:self.大小])
+            if self._序号格式.unpack_from(缓冲, 0)[0] != 序号:
+                self.重读次数 += 1
+                continue
+            if 序号 == 0:
+                return {}
+            (运行, 暂停, 就绪, 负载级别, 进程号, 执行次数, 平均响应时间, 成功率,
+             采样频率, 更新时间, 模式, 活动状态, 启动错误) = self._负载格式.unpack(负载)
+            self._上次结果 = {
+                'running': 运行,
+                'paused': 暂停,
+                'ready': 就绪,
+                'mode': 模式.rstrip(b"\0").decode("utf-8", "ignore"),
+                'execution_count': 执行次数,
+                'avg_response_time': 平均响应时间,
+                'success_rate': 成功率,
+                'activity_state': 活动状态.rstrip(b"\0").decode("utf-8", "ignore"),
+                'load_level': 负载级别,
+                'tick_rate': 采样频率,
+                'start_error': 启动错误.rstrip(b"\0").decode("utf-8", "ignore"),
+                'updated_at': 更新时间,
+                'pid': 进程号
+            }
+            return self._上次结果
+        return self._上次结果
+
+    def 关闭(self):
+        """断开共享内存，创建者同时释放它"""
+        try:
+            self._共享内存.close()
+            if self._创建者:
+                self._共享内存.unlink()
+        except (BufferError, FileNotFoundError):
+            pass
+
+
+def _引擎进程主循环(状态块名称: str, 命令连接: Any, 配置路径: str, 发布间隔: float):
+    """
+    引擎进程入口：创建引擎，执行命令管道中的命令，并定期刷新状态块
+    运行中由引擎在拍末发布状态；停止或暂停时由本循环按发布间隔刷新
+    管道另一端关闭（界面进程退出）时停止引擎并退出
+    """
+    from core.技能循环引擎 import 技能循环引擎
+
+    块 = 状态块(状态块名称)
+    引擎 = 技能循环引擎(配置路径=配置路径)
+    引擎.状态发布回调 = 块.写入
+    块.写入(引擎.get_running_status())
+    命令表 = {
+        "start": 引擎.start,
+        "stop": 引擎.stop,
+        "pause": 引擎.pause,
+        "设置循环模式": 引擎.设置循环模式,
+        "获取性能报告": 引擎.获取性能报告
+    }
+    try:
+        while True:
+            try:
+                有命令 = 命令连接.poll(发布间隔)
+                消息 = 命令连接.recv() if 有命令 else None
+            except (EOFError, OSError):
+                break
+            if 消息 is not None:
+                命令, 参数, 需要回复 = 消息
+                if 命令 == "exit":
+                    break
+                try:
+                    结果, 错误 = 命令表[命令](*参数), None
+                except Exception as e:
+                    结果, 错误 = None, f"{type(e).__name__}: {e}"
+                    print(f"引擎进程执行命令 {命令} 失败: {错误}")
+                if 需要回复:
+                    try:
+                        try:
+                            命令连接.send((结果, 错误))
+                        except (pickle.PicklingError, TypeError, AttributeError) as e:
+                            # 结果无法序列化时回复错误（序列化在写管道之前，失败时管道中没有残留数据）
+                            命令连接.send((None, f"结果无法序列化: {type(e).__name__}: {e}"))
+                    except (EOFError, OSError):
+                        break
+            # 运行中的状态由引擎在拍末发布，这里只补发停止/暂停时的状态
+            if not 引擎.running or 引擎.paused:
+                块.写入(引擎.get_running_status())
+    finally:
+        引擎.stop()
+        块.写入(引擎.get_running_status())
+        块.关闭()
+
+
+class 引擎进程客户端:
+    """
+    引擎进程客户端
+    提供与技能循环引擎相同的界面接口（start/stop/pause/get_running_status），
+    状态读取只访问共享内存；引擎进程意外退出后，下次start()时自动重建
+    """
+
+    def __init__(self, 配置路径: str = "./config/", 发布间隔: float = 0.1, 请求超时: float = 5.0,
+                 启动超时: float = 30.0):
+        """
+        初始化客户端并启动引擎进程
+
+        参数:
+            配置路径: 传给引擎的配置文件目录
+            发布间隔: 引擎停止或暂停时状态块的刷新间隔（秒）
+            请求超时: 需要回复的请求的最长等待时间（秒）
+            启动超时: start请求的最长等待时间（秒），包含引擎进程创建引擎和启动预热的时间
+        """
+        self.配置路径 = 配置路径
+        self.发布间隔 = 发布间隔
+        self.请求超时 = 请求超时
+        self.启动超时 = 启动超时
+        self._上下文 = multiprocessing.get_context("spawn")
+        self._锁 = threading.Lock()
+        self._进程 = None
+        self._命令连接 = None
+        self._状态块: Optional[状态块] = None
+        self.重启次数 = 0
+        self._启动进程()
+
+    def _启动进程(self):
+        """创建状态块、命令管道和引擎进程（引擎进程会再创建帧总线等子进程，不能是守护进程）"""
+        self._清理()
+        self._状态块 = 状态块()
+        本端, 对端 = self._上下文.Pipe()
+        self._进程 = self._上下文.Process(
+            target=_引擎进程主循环,
+            args=(self._状态块.名称, 对端, self.配置路径, self.发布间隔),
+            name="技能循环引擎进程"
+        )
+        self._进程.start()
+        对端.close()
+        self._命令连接 = 本端
+
+    def _清理(self):
+        if self._命令连接 is not None:
+            self._命令连接.close()
+            self._命令连接 = None
+        if self._状态块 is not None:
+            self._状态块.关闭()
+            self._状态块 = None
+
+    @property
+    def 进程存活(self) -> bool:
+        """引擎进程是否存活"""
+        return self._进程 is not None and self._进程.is_alive()
+
+    def _发送(self, 命令: str, *参数, 需要回复: bool = False, 超时: Optional[float] = None) -> Any:
+        """发送命令；需要回复时等待结果（引擎进程执行失败时抛出RuntimeError）"""
+        超时 = self.请求超时 if 超时 is None else 超时
+        with self._锁:
+            if not self.进程存活:
+                if 命令 != "start":
+                    return None
+                self.重启次数 += 1
+                self._启动进程()
+            try:
+                # 丢弃之前超时请求迟到的回复，避免错配到本次请求
+                while self._命令连接.poll():
+                    self._命令连接.recv()
+                self._命令连接.send((命令, 参数, 需要回复))
+                if not 需要回复:
+                    return None
+                if not self._命令连接.poll(超时):
+                    raise TimeoutError(f"引擎进程未在{超时}秒内响应: {命令}")
+                结果, 错误 = self._命令连接.recv()
+            except (EOFError, OSError, BrokenPipeError) as e:
+                raise RuntimeError(f"引擎进程通信失败: {e}") from e
+        if 错误 is not None:
+            raise RuntimeError(错误)
+        return 结果
+
+    # ---------- 与技能循环引擎一致的界面接口 ----------
+
+    @property
+    def running(self) -> bool:
+        return bool(self.get_running_status().get('running'))
+
+    @property
+    def paused(self) -> bool:
+        return bool(self.get_running_status().get('paused'))
+
+    def start(self) -> bool:
+        """
+        启动技能循环（引擎进程已退出时先重建进程）
+
+        返回:
+            bool: 循环是否在运行（启动失败时为False，原因见状态中的start_error）
+        """
+        return bool(self._发送("start", 需要回复=True, 超时=self.启动超时))
+
+    def stop(self):
+        """停止技能循环"""
+        self._发送("stop")
+
+    def pause(self):
+        """暂停/恢复技能循环"""
+        self._发送("pause")
+
+    def 设置循环模式(self, 模式: Any):
+        """切换循环模式"""
+        self._发送("设置循环模式", 模式)
+
+    def get_running_status(self) -> Dict[str, Any]:
+        """读取引擎最近发布的运行状态（无锁、无进程间往返）"""
+        状态 = dict(self._状态块.读取()) if self._状态块 is not None else {}
+        if not self.进程存活:
+            状态.update(running=False, paused=False, ready=False)
+        状态['engine_process_alive'] = self.进程存活
+        return 状态
+
+    def 获取性能报告(self) -> Dict[str, Any]:
+        """从引擎进程获取完整性能报告（经命令管道往返）"""
+        return self._发送("获取性能报告", 需要回复=True) or {}
+
+    def 关闭(self, 超时: float = 3.0):
+        """通知引擎进程停止并退出，超时未退出时强制终止"""
+        with self._锁:
+            if self._进程 is not None:
+                try:
+                    self._命令连接.send(("exit", (), False))
+                except (EOFError, OSError, BrokenPipeError):
+                    pass
+                self._进程.join(超时)
+                if self._进程.is_alive():
+                    self._进程.terminate()
+                    self._进程.join(1.0)
+                self._进程 = None
+            self._清理()
@@ -3,24 +3,40 @@
 基于依赖注入和策略模式的现代化架构
 集成安全监控、异常隔离和性能优化
 """
+import os
 import time
 import threading
-from typing import Dict, Any, Optional, List
+from concurrent.futures import TimeoutError as 等待超时错误
+from typing import Dict, Any, Optional, List, Tuple
 from config.配置管理器 import 配置管理器
+from config.配置快照 import 配置快照
 from core.技能状态检测器 import 技能状态检测器
 from core.目标选择器 import 目标选择器
 from core.状态监测器 import 状态监测器
-from core.依赖容器 import 容器工厂, 配置提供器接口
+from core.依赖容器 import 容器工厂, 配置提供器接口, 延迟代理
 from core.策略接口 import 循环模式, 策略上下文, 策略管理器
+from core.施放确认器 import 施放确认器
+from core.启动预热器 import 启动预热器
+from core.活动状态机 import 活动状态机
+from core.检测图执行器 import 检测图, 检测图执行器
 from interface.按键操作接口 import 按键操作接口
 from interface.图像获取接口 import 图像获取接口
-from utils.性能监控 import 性能监控器, 监控操作
-from utils.异常隔离 import 异常隔离器, 安全执行技能检测, 安全执行按键操作
-from utils.权限控制 import 权限控制器, 需要权限
+from interface.缓存图像接口 import 缓存图像接口
+from utils.性能监控 import 性能监控器
+from utils.异常隔离 import 异常隔离器, 安全执行按键操作
+from utils.权限控制 import 权限控制器
+from utils.拦截器链 import 拦截器链, 权限拦截器, 频率拦截器, 监控拦截器, 异常隔离拦截器
 from utils.配置监听器 import 配置监听器
-from utils.统一缓存管理器 import 注册全局缓存, 同步全局缓存策略, 全局缓存管理器
-from utils.内存管理 import 全局内存监控器, 跟踪对象, 强制内存清理, 设置内存安全配置
-from utils.自适应延迟 import 智能延迟
+from utils.统一缓存管理器 import 注册全局缓存, 同步全局缓存策略
+from utils.内存管理 import 获取内存统计, 跟踪对象, 强制内存清理, 设置内存安全配置
+from utils.服务注册表 import 全局服务注册表, 获取服务
+from utils.时间戳优化器 import 全局时钟
+from utils.精确等待器 import 精确等待
+from utils.循环节拍器 import 循环节拍器
+from utils.后台调度器 import 全局调度器
+from utils.服务质量管理器 import 服务质量管理器, 工作优先级
+from utils.工作线程池 import 工作线程池
+from utils.帧总线 import 帧总线, 帧总线错误
 
 
 class 技能循环引擎:
@@ -51,36 +67,31 @@ class 技能循环引擎:
         # 初始化依赖容器
         if 容器 is None:
             self.容器 = 容器工厂.创建默认容器(配置路径)
-            
-            # 注册默认依赖
-            try:
-                from interface.按键操作接口 import 按键操作接口
-                from interface.幽灵盒子按键接口 import 幽灵盒子按键接口
-                self.容器.注册实现(按键操作接口, 幽灵盒子按键接口)
-                
-                from interface.图像获取接口 import 图像获取接口
-                from interface.Windows图像接口 import Windows图像接口
-                self.容器.注册实现(图像获取接口, Windows图像接口)
-            except ImportError as e:
-                self._日志("警告", f"无法注册默认接口: {e}")
+            # 默认后端以延迟导入路径注册，驱动和win32模块在首次使用时才加载
+            容器工厂.注册默认后端(self.容器)
         else:
             self.容器 = 容器
         
+        # 循环启动前检查缺失和循环绑定
+        验证结果 = self.容器.验证()
+        for 问题 in 验证结果["缺失依赖"]:
+            self._日志("警告", f"依赖缺失: {问题}")
+        for 问题 in 验证结果["循环依赖"]:
+            self._日志("错误", f"循环依赖: {问题}")
+        
         # 获取依赖实例
         self.配置提供器 = self.容器.获取实例(配置提供器接口)
         
-        try:
-            self.按键接口 = 按键接口 or self.容器.获取实例(按键操作接口)
-        except Exception as e:
-            self._日志("警告", f"未检测到硬件按键设备，按键功能将受限: {e}")
+        # 后端以延迟代理注入，真实实例在start()或首次使用时创建
+        self.按键接口 = 按键接口 or self._获取后端(按键操作接口)
+        if self.按键接口 is None:
+            self._日志("警告", "未检测到硬件按键设备，按键功能将受限")
             self._日志("信息", "提示：请确保幽灵盒子硬件已连接")
-            self.按键接口 = None
-            
-        try:
-            self.图像接口 = 图像接口 or self.容器.获取实例(图像获取接口)
-        except Exception as e:
-            self._日志("信息", f"未找到图像接口，将禁用智能模式: {e}")
-            self.图像接口 = None
+        
+        self.图像接口 = 图像接口 or self._获取后端(图像获取接口)
+        if self.图像接口 is None:
+            缺失模块 = 验证结果["不可用实现"].get(图像获取接口.__name__, [])
+            self._日志("信息", f"未找到图像接口，将禁用智能模式: 缺少模块 {缺失模块}")
         
         # 初始化配置管理器
         self.配置管理器 = 配置管理器(self.配置提供器.获取配置路径())
@@ -91,18 +102,19 @@ class 技能循环引擎:
         # 初始化核心组件
         if self.使用智能模式:
             self.状态检测器 = 技能状态检测器()
-            self.状态监测器 = 状态监测器(self.图像接口)
+            # 检测与目标状态读取都经过区域缓存：同一帧内被已截取区域包含的请求直接返回切片视图
+            self.区域图像接口 = 缓存图像接口(self.图像接口)
+            self.状态监测器 = 状态监测器(self.区域图像接口)
             self.策略管理器 = 策略管理器()
-            self.检测区域 = self.配置管理器.获取检测区域()
-            self.蓝条配置 = self.配置管理器.获取蓝条配置()
-            self.目标状态配置 = self.配置管理器.获取目标状态配置() if hasattr(self.配置管理器, '获取目标状态配置') else {}
-        else:
-            # 简单模式下，从配置中获取技能序列
-            self.技能序列 = self._获取技能序列()
-            self.当前技能索引 = 0
         
-        self.自动选人键值 = self.配置管理器.获取自动选人键值()
-        self.选中最低血量键值 = self.配置管理器.获取选中最低血量键值() if hasattr(self.配置管理器, '获取选中最低血量键值') else 0
+        # 配置快照：引擎只持有快照引用，重载后在拍边界切换到新版本
+        self._配置快照: Optional[配置快照] = None
+        self.技能序列: Tuple[int, ...] = ()
+        self.当前技能索引 = 0
+        # 活动状态机：无目标、脱战或画面静止/黑屏时降低采样频率和检测量
+        self.活动状态机 = 活动状态机()
+        self._应用配置快照(self.配置管理器.快照)
+        self.配置管理器.添加快照预处理(self._预处理配置快照)
         self.目标选择器 = 目标选择器(self.按键接口, self.选中最低血量键值)
         
         # 当前模式
@@ -112,26 +124,87 @@ class 技能循环引擎:
         self.最后技能键值 = 0
         self.执行次数 = 0
         self.七情和合状态 = 0
+        self.按键尝试次数 = 0
+        self.帧时间戳 = 全局时钟.当前帧
+        
+        # 施放闭环确认：按键后等待技能进入冷却，确认前不重复按同一键
+        self.施放确认器 = 施放确认器()
+        
+        # 服务质量：每拍工作预算为节拍周期的一部分，超预算时卸载低优先级工作
+        self._拍预算比例 = 0.8
+        self.服务质量 = 服务质量管理器()
+        # Debuff检测驱动驱散决策，沿用上一拍结果会驱散已消失或漏掉新出现的Debuff，按关键工作始终执行
+        self.服务质量.注册("Debuff检测", 工作优先级.关键, 0.002)
+        self.服务质量.注册("Buff检测", 工作优先级.中, 0.002, 最长延后拍数=15)
+        self.服务质量.注册("蓝条探测", 工作优先级.中, 0.0002, 最长延后拍数=30)
+        self.服务质量.注册("性能指标", 工作优先级.低, 0.0001, 最长延后拍数=60)
+        self.服务质量.注册("调试记录", 工作优先级.低, 0.0002)
+        self.服务质量.注册("UI发布", 工作优先级.低, 0.00005, 最长延后拍数=30)
+        self._已发布运行状态: Optional[Dict[str, Any]] = None
+        # 可选的状态发布回调（引擎在独立进程运行时写入共享内存状态块）
+        self.状态发布回调: Optional[Any] = None
+        # 可选的按键分派（异步引擎模式下由输入执行器完成按键），签名 (技能键值, 开始时间) -> bool
+        self.按键分派: Optional[Any] = None
+        
+        # 目标状态检测在工作线程上投机预取，最坏决策延迟约为单个检测的耗时而非总和
+        self._启用投机预取 = True
+        # 检测图：截图、技能探测、HP估算、Buff/Debuff检测按输入依赖在检测线程池上并行
+        self._本拍目标状态配置: Dict[str, Any] = {}
+        # 图标检测节点的准入在派发前由引擎线程判定（工作线程开始执行时预算尚未消耗，判定几乎不会卸载）
+        self._本拍检测准入: Dict[str, bool] = {}
+        # 帧总线（默认未启用）：HP估算和图标匹配可交给工作进程，在共享内存帧上执行
+        self.视觉帧总线.注册检测器("HP估算", "core.状态监测器:进程计算HP百分比")
+        self.视觉帧总线.注册检测器("图标匹配", "core.状态监测器:进程匹配图标")
+        self.检测执行器 = 检测图执行器(self._构建检测图(), self.检测线程池) if self.使用智能模式 else None
+        
+        # 主循环节拍：按目标频率固定节奏执行
+        节拍配置 = self._配置快照.循环节拍
+        self.节拍器 = 循环节拍器(节拍配置["目标频率"], 节拍配置["错拍策略"])
+        self.服务质量.设置拍预算(self.节拍器.周期 * self._拍预算比例)
+        # 拍间空闲窗口执行后台任务时给下一拍预留的余量（纳秒）
+        self._空闲余量纳秒 = 1_000_000
+        
+        # 启动预热：start()时预先支付首拍开销，完成后才标记就绪
+        预热配置 = self._配置快照.启动预热
+        self._启用启动预热 = 预热配置["启用"]
+        self.预热器 = 启动预热器(self, 预热配置["空跑次数"])
+        self.已就绪 = False
+        
+        # 性能统计
+        self.性能统计 = self._创建性能统计()
         
         # 性能监控和安全控制
         self.性能监控器 = 性能监控器()
         self.异常隔离器 = 异常隔离器()
         self.权限控制器 = 权限控制器()
+        if self.使用智能模式:
+            # 截图失败可能意味着屏幕访问能力变化：在截图路径上触发能力重新探测（使失效自带限流）
+            self.区域图像接口.截图失败回调 = self.权限控制器.能力服务.使失效
         self.配置监听器 = 配置监听器(self.配置提供器.获取配置路径())
         
+        # 热路径拦截器：权限→频率→监控→异常隔离，编译为单层包装
+        self.循环拦截器链 = 拦截器链(self._执行一次循环, 默认返回值=False, 拒绝回调=self._循环被拦截)
+        self.循环拦截器链.注册(权限拦截器(self.权限控制器, "技能释放"))
+        self._频率拦截器 = 频率拦截器(self.权限控制器.频率限制器, "技能释放")
+        self.循环拦截器链.注册(self._频率拦截器)
+        self.循环拦截器链.注册(监控拦截器(self.性能监控器, "执行技能循环", 全局时钟,
+                                    准入=lambda: self.服务质量.准入("性能指标")))
+        self.循环拦截器链.注册(异常隔离拦截器("技能循环"))
+        
         # 初始化异步功能
         # self.异步引擎 = 异步技能循环引擎() # 暂时注释，避免未定义引用
         # self.异步检测器 = 异步技能检测器() # 暂时注释，避免未定义引用
         
-        # 初始化统一缓存管理器
-        self.全局缓存管理器 = 全局缓存管理器
-        
-        # 注册技能状态检测器的缓存到全局缓存管理器
+        # 注册检测、决策与模板缓存到全局缓存管理器，由其分配内存预算
+        # 模板被淘汰后需在检测时重新读盘，给予更高权重
         if self.使用智能模式:
-            注册全局缓存(self.状态检测器, "技能状态检测器")
+            注册全局缓存(self.状态检测器.颜色缓存, self.状态检测器.颜色缓存.名称)
+            注册全局缓存(self.状态检测器.技能结果缓存, self.状态检测器.技能结果缓存.名称)
+            注册全局缓存(self.状态监测器.模板缓存, self.状态监测器.模板缓存.名称, 权重=4.0)
+            注册全局缓存(self.区域图像接口.缓存, self.区域图像接口.缓存.名称, 权重=2.0)
         
-        # 启动内存监控（优化：集成内存管理）
-        self._启动内存监控()
+        # 内存监控在首次启动时配置（优化：导入和构造时不启动后台服务）
+        self._内存监控已配置 = False
 
         # 性能优化参数
         self._响应时间阈值 = 0.1  # 100ms阈值
@@ -140,6 +213,27 @@ class 技能循环引擎:
         
         # 日志级别 (0=DEBUG, 1=INFO, 2=WARN, 3=ERROR)
         self.日志级别 = 1
+        
+        # 最近一次启动失败的原因（后端创建失败等），成功启动时清空
+        self.启动错误: Optional[str] = None
+    
+    def _获取后端(self, 接口类型: type) -> Optional[Any]:
+        """后端可用时返回延迟代理，否则返回None"""
+        if not self.容器.是否可用(接口类型):
+            return None
+        return self.容器.获取延迟实例(接口类型)
+    
+    def _创建后端(self) -> bool:
+        """在循环开始前创建延迟代理背后的真实后端，使创建失败在启动阶段暴露"""
+        for 名称, 后端 in (("按键接口", self.按键接口), ("图像接口", self.图像接口)):
+            if isinstance(后端, 延迟代理) and not 后端.已创建:
+                try:
+                    后端.获取目标()
+                except Exception as e:
+                    self.启动错误 = f"{名称}创建失败: {e}"
+                    self._日志("错误", f"{名称}创建失败，循环未启动: {e}")
+                    return False
+        return True
     
     def _启动内存监控(self):
         """启动内存监控"""
@@ -164,9 +258,66 @@ class 技能循环引擎:
         from utils.内存管理 import 获取安全配置 as 获取内存安全配置
         return 获取内存安全配置()
     
+    @property
+    def 检测线程池(self) -> 工作线程池:
+        """共享检测线程池（首次使用时创建线程）"""
+        return 获取服务("工作线程池")
+    
+    @property
+    def 视觉帧总线(self) -> 帧总线:
+        """重型视觉检测的帧总线（按配置启用，随引擎启动创建工作进程）"""
+        return 获取服务("帧总线")
+    
+    def _重型检测(self, 检测器: str, 本地函数: Any, 截图: Any, *参数) -> Any:
+        """
+        执行重型视觉检测：帧总线可用时在工作进程上执行，
+        帧无法写入、工作进程异常或等待超时时回退到当前线程执行
+        """
+        总线 = self.视觉帧总线
+        if 总线.可用 and 截图 is not None:
+            try:
+                return 总线.执行(检测器, 截图, *参数)
+            except (帧总线错误, 等待超时错误) as e:
+                self._日志("调试", f"帧总线{检测器}回退到进程内执行: {type(e).__name__} {e}")
+        return 本地函数(截图, *参数)
+    
+    def _构建检测图(self) -> 检测图:
+        """
+        构建本引擎的检测图：截图节点读取区域缓存，计算节点只依赖自己的截图
+        节点在工作线程上执行，配置读取本拍的目标状态配置
+        """
+        def 截取(键: str):
+            return lambda: self.区域图像接口.获取屏幕区域(tuple(self._本拍目标状态配置[键]))
+
+        def 匹配(类型: str):
+            def 执行(截图):
+                配置 = self._本拍目标状态配置
+                return self.服务质量.执行(
+                    f"{类型}检测", self._重型检测, "图标匹配", self.状态监测器.匹配图标, 截图,
+                    配置.get(f"关注{类型}列表", []), 配置.get(f"{类型}模板路径", {}), 类型, 默认=[],
+                    已准入=self._本拍检测准入.get(f"{类型}检测"))
+            return 执行
+
+        图 = 检测图()
+        图.添加节点("检测区域图像", lambda: self.区域图像接口.获取屏幕区域(self.检测区域))
+        图.添加节点("技能探测", self.状态检测器.采样到期探测, ["检测区域图像"])
+        图.添加节点("血条图像", 截取("血条区域"))
+        图.添加节点("目标HP", lambda 截图: self._重型检测(
+            "HP估算", self.状态监测器.计算HP百分比, 截图, self._本拍目标状态配置.get("血条颜色阈值")), ["血条图像"])
+        图.添加节点("Buff图像", 截取("Buff区域"))
+        图.添加节点("目标Buffs", 匹配("Buff"), ["Buff图像"])
+        图.添加节点("Debuff图像", 截取("Debuff区域"))
+        图.添加节点("目标Debuffs", 匹配("Debuff"), ["Debuff图像"])
+        return 图
+    
+    @property
+    def 全局缓存管理器(self):
+        """统一缓存管理器（首次访问时创建）"""
+        return 获取服务("缓存管理器")
+    
     def 获取内存统计(self) -> Dict[str, Any]:
         """获取内存统计信息"""
-        return 全局内存监控器.获取内存统计()
+        return 获取内存统计()
     
     def 强制内存清理(self):
         """强制执行内存清理"""
@@ -175,9 +326,10 @@ class 技能循环引擎:
             
         # 同步缓存策略
         同步全局缓存策略()
-        
-        # 性能统计
-        self.性能统计 = {
+    
+    def _创建性能统计(self) -> Dict[str, Any]:
+        """创建初始性能统计字典"""
+        return {
             "总执行时间": 0.0,
             "平均响应时间": 0.0,
             "成功率": 0.0,
@@ -185,35 +337,99 @@ class 技能循环引擎:
             "最大响应时间": 0.0,
             "响应时间分布": []  # 记录最近100次响应时间
         }
-        
-        # 响应时间优化相关
-        self._响应时间阈值 = 0.1  # 100ms阈值
-        self._连续超时次数 = 0
-        self._自适应调整间隔 = 10  # 每10次执行检查一次
-        
-        # 日志级别 (0=DEBUG, 1=INFO, 2=WARN, 3=ERROR)
-        self.日志级别 = 1
     
-    def _获取技能序列(self) -> List[int]:
+    def _预处理配置快照(self, 新快照: 配置快照, 旧快照: Optional[配置快照]):
         """
-        简单模式下获取技能序列
+        新快照替换前在重载线程中执行：只重新读取路径发生变化的Buff/Debuff模板，
+        避免检测线程在下一拍读盘
+        """
+        if not self.使用智能模式 or 旧快照 is None or "目标状态配置" not in 新快照.差异.基本配置:
+            return
         
-        返回:
-            list: 技能键值序列
+        for 类型 in ("Buff", "Debuff"):
+            新路径 = 新快照.目标状态配置.get(f"{类型}模板路径") or {}
+            旧路径 = 旧快照.目标状态配置.get(f"{类型}模板路径") or {}
+            变更名称 = {名称 for 名称 in set(新路径) | set(旧路径) if 新路径.get(名称) != 旧路径.get(名称)}
+            if 变更名称:
+                数量 = self.状态监测器.更新模板(变更名称, 新路径, 类型)
+                self._日志("信息", f"配置变更：重新加载{类型}模板{数量}/{len(变更名称)}个")
+    
+    def _应用配置快照(self, 快照: 配置快照):
         """
-        技能字典 = self.配置管理器.技能字典
+        采用新的配置快照，只替换引用和派生字段，不复制配置
+        运行中由主循环在拍边界调用，一拍之内始终使用同一版本
         
-        # 根据优先级获取技能序列
-        技能序列 = []
+        参数:
+            快照: 配置管理器发布的配置快照
+        """
+        旧快照 = self._配置快照
+        self._配置快照 = 快照
+        
+        self.检测区域 = 快照.检测区域
+        self.蓝条配置 = 快照.蓝条配置
+        self.目标状态配置 = 快照.目标状态配置
+        # 施放确认使用的 {键值: 技能配置} 映射，快照构建时已编译
+        self._键值技能映射 = 快照.键值技能映射
+        if self.使用智能模式 and 快照.探测计划 is not getattr(旧快照, "探测计划", None):
+            self.状态检测器.设置探测计划(快照.探测计划)
+        if 快照.技能序列 != self.技能序列:
+            self.技能序列 = 快照.技能序列
+            self.当前技能索引 = 0
         
-        # 默认技能优先级顺序
-        for 技能名 in ["青川濯莲", "七情和合", "千枝绽蕊", "逐云寒蕊", 
-                      "当归四逆", "银光照雪", "赤芍寒香", "绿野蔓生", "白芷含芳"]:
-            技能配置 = 技能字典.get(技能名)
-            if 技能配置 and "键值" in 技能配置:
-                技能序列.append(技能配置["键值"])
+        self.自动选人键值 = 快照.自动选人键值
+        self.选中最低血量键值 = 快照.选中最低血量键值
+        if hasattr(self, '目标选择器'):
+            self.目标选择器.选中最低血量键值 = 快照.选中最低血量键值
+        self.活动状态机.应用配置(快照.活动状态, 快照.循环节拍["目标频率"])
+        self.视觉帧总线.应用配置(快照.帧总线)
+        if hasattr(self, '节拍器'):
+            self._同步节拍频率()
+        
+        if 旧快照 is not None:
+            self._日志("信息", f"配置已切换: 版本 {旧快照.版本} -> {快照.版本}, 变更 {快照.差异.获取摘要()}")
+    
+    def _同步节拍频率(self):
+        """让节拍器频率跟随活动状态（满速频率来自循环节拍配置）"""
+        频率 = self.活动状态机.有效频率
+        if 频率 != self.节拍器.目标频率:
+            self.节拍器.设置目标频率(频率)
+            self.服务质量.设置拍预算(self.节拍器.周期 * self._拍预算比例)
+    
+    def _更新活动状态(self) -> bool:
+        """
+        采集本帧活动信号并推进活动状态机，状态切换时同步节拍频率
+        检测区域截图经过区域缓存，策略随后取图直接命中
         
-        return 技能序列
+        返回:
+            bool: 当前状态是否允许执行策略
+        """
+        图像 = self.区域图像接口.获取屏幕区域(self.检测区域)
+        旧状态 = self.活动状态机.状态
+        if self.活动状态机.更新(self.活动状态机.采集信号(图像), self.帧时间戳.秒):
+            新状态 = self.活动状态机.状态
+            self._同步节拍频率()
+            self._日志("信息", f"活动状态切换: {旧状态.name} -> {新状态.name}, 采样频率 {self.活动状态机.有效频率:.1f}Hz")
+        return self.活动状态机.允许检测("策略")
+    
+    def _后台维护截止纳秒(self) -> int:
+        """拍间空闲窗口中后台维护的截止时刻：给下一拍预留余量，且不超过当前活动状态的维护额度"""
+        截止 = self.节拍器.下次截止纳秒 - self._空闲余量纳秒
+        额度 = self.活动状态机.当前策略.后台维护额度
+        if 额度 is not None:
+            截止 = min(截止, time.perf_counter_ns() + int(额度 * 1e9))
+        return 截止
+    
+    def _技能仍就绪(self, 图片: Any, 技能配置: Dict[str, Any]) -> bool:
+        """施放确认用的就绪判断：技能图标未变灰即视为仍就绪"""
+        return self.状态检测器.判断普通技能可用性(图片, 技能配置) > 0
+    
+    def _更新成功率(self):
+        """更新成功率：优先使用闭环确认结果，无确认数据时退化为驱动层按键成功率"""
+        确认成功率 = self.施放确认器.成功率
+        if 确认成功率 is not None:
+            self.性能统计["成功率"] = 确认成功率
+        elif self.按键尝试次数 > 0:
+            self.性能统计["成功率"] = self.执行次数 / self.按键尝试次数
     
     def 注册新策略(self, 策略实例: Any) -> None:
         """
@@ -258,32 +474,54 @@ class 技能循环引擎:
             else:
                 self.当前模式 = 循环模式.默认循环
     
-    @需要权限("技能释放")
-    @监控操作("执行技能循环")
     def 执行一次循环(self) -> bool:
         """
         执行一次完整的技能循环（安全优化版本）
-        集成权限检查、性能监控和异常隔离
+        权限检查、频率限制、性能监控和异常隔离由循环拦截器链统一处理
         
         返回:
             bool: 是否成功执行了技能释放
         """
-        import time
-        
-        开始时间 = time.time()
-        
+        # 每拍只取一次时间快照，本拍内的时间判断都读取该快照
+        self.帧时间戳 = 全局时钟.开始新帧()
+        self.服务质量.开始拍(self.帧时间戳.纳秒)
+        # 拍边界检查配置版本：只比较引用，重载完成后下一拍生效
+        快照 = self.配置管理器.快照
+        if 快照 is not self._配置快照:
+            self._应用配置快照(快照)
+        # 活动状态不允许执行策略时（空闲/降级）本拍只采集信号，不进入拦截器链
+        if (self.使用智能模式 and self.活动状态机.启用 and self.检测区域
+                and self.当前模式 != 循环模式.默认循环 and not self._更新活动状态()):
+            结果 = False
+        else:
+            结果 = self.循环拦截器链.调用()
+        # 拍末发布UI状态（低优先级，超预算时延后），再结算本拍耗时
+        self.服务质量.执行("UI发布", self._发布运行状态)
+        self.服务质量.结束拍()
+        return 结果
+    
+    def _执行一次循环(self) -> bool:
+        """拦截器链包装的循环主体"""
         if self.当前模式 == 循环模式.默认循环:
             self._日志("调试", "技能循环未激活")
             return False
         
-        # 使用异常隔离器安全执行
-        成功, 结果, 错误信息 = self.异常隔离器.安全执行(self._执行循环逻辑, 开始时间)
-        
-        if not 成功:
-            self._日志("错误", f"技能循环执行失败: {错误信息}")
-            return False
+        return self._执行循环逻辑(self.帧时间戳.秒)
+    
+    def _循环被拦截(self, 拦截器名称: str, 原因: str):
+        """循环被拦截器拒绝时的回调"""
+        self._日志("调试", f"技能循环被{拦截器名称}拦截: {原因}")
+    
+    def 设置拦截器启用(self, 名称: str, 启用: bool):
+        """
+        运行时开关循环拦截器
         
-        return 结果
+        参数:
+            名称: 拦截器名称（权限检查/频率限制/性能监控/异常隔离）
+            启用: 是否启用
+        """
+        self.循环拦截器链.设置启用(名称, 启用)
+        self._日志("信息", f"循环拦截器{名称}已{'启用' if 启用 else '禁用'}")
     
     def _执行循环逻辑(self, 开始时间: float) -> bool:
         """
@@ -300,18 +538,42 @@ class 技能循环引擎:
             # 创建策略上下文（优化：延迟加载，避免不必要的计算）
             上下文 = 策略上下文(
                 技能状态检测器=self.状态检测器,
-                图像获取接口=self.图像接口,
+                图像获取接口=self.区域图像接口,
                 状态监测器=self.状态监测器,
-                技能字典=self.配置管理器.技能字典,
-                气劲字典=self.配置管理器.气劲字典,
+                技能字典=self._配置快照.技能配置,
+                气劲字典=self._配置快照.气劲配置,
                 蓝条配置=self.蓝条配置,
                 检测区域=self.检测区域,
                 七情和合状态=self.七情和合状态,
-                目标状态配置=self.目标状态配置
+                # 脱战时不做HP/Buff/Debuff检测：空配置让上下文直接返回默认值
+                目标状态配置=self.目标状态配置 if self.活动状态机.允许检测("目标状态") else {},
+                帧时间戳=self.帧时间戳,
+                服务质量=self.服务质量
             )
+            self.状态检测器.开始新帧(self.帧时间戳)
+            # 投机预取：检测图的各节点先在工作线程上并行开始，策略用到哪个输出才等待哪个
+            if self._启用投机预取:
+                self._本拍目标状态配置 = 上下文.目标状态配置
+                需要的检测 = 上下文.需要的检测()
+                图标检测 = {"目标Buffs": "Buff检测", "目标Debuffs": "Debuff检测"}
+                self._本拍检测准入 = self.服务质量.准入批次(
+                    [图标检测[输出] for 输出 in 需要的检测 if 输出 in 图标检测])
+                运行 = self.检测执行器.启动(需要的检测 + ["技能探测"])
+                上下文.绑定检测运行(运行)
+                # 探测点采样与检测器的调度状态共享，读取探测点前先等它完成
+                # （采样失败时由策略在安全推算中重新读取并处理异常）
+                try:
+                    运行.结果("技能探测")
+                except Exception as e:
+                    self._日志("调试", f"探测点预采样失败: {e}")
+            
+            # 用本帧推进待确认的施放（就绪→冷却）
+            if self.施放确认器.是否有待确认():
+                self.施放确认器.观察(上下文.获取屏幕图像(), self._技能仍就绪)
             
             # 使用策略推算技能（安全执行）
             技能键值 = self._安全推算技能(策略, 上下文)
+            上下文.丢弃预取()
         else:
             # 简单模式：按顺序循环释放技能
             if not self.技能序列:
@@ -327,47 +589,88 @@ class 技能循环引擎:
         
         # 如果有技能可释放
         if 技能键值 > 0:
-            # 先执行自动选人（如果有配置）
-            if self.自动选人键值 > 0:
-                self._安全按下并释放("自动选人", self.自动选人键值)
+            # 上次按下尚未确认时不重复按同一键，节省设备调用和频率限制名额
+            if not self.施放确认器.允许按下(技能键值):
+                self._日志("调试", f"技能 {技能键值} 等待施放确认，跳过重复按键")
+                return False
             
-            # 使用目标选择器选择最低血量队友 (如果配置了)
-            if self.选中最低血量键值 > 0:
-                self.目标选择器.选择最低血量队友()
-                # 给一点时间让UI更新
-                time.sleep(0.05)
+            # 异步引擎模式：按键交给输入执行器，与下一拍的截图检测重叠
+            if self.按键分派 is not None:
+                return self.按键分派(技能键值, 开始时间)
             
-            # 释放技能
-            成功 = self._安全按下并释放("技能释放", 技能键值)
+            return self._完成释放(技能键值, self._执行按键(技能键值), 开始时间)
+        
+        return False
+    
+    def _执行按键(self, 技能键值: int) -> bool:
+        """
+        执行一次技能释放的按键序列（自动选人、选择最低血量队友、技能键）
+        
+        返回:
+            bool: 技能键是否按下成功
+        """
+        # 先执行自动选人（如果有配置）
+        if self.自动选人键值 > 0:
+            self._安全按下并释放("自动选人", self.自动选人键值)
+        
+        # 使用目标选择器选择最低血量队友 (如果配置了)
+        if self.选中最低血量键值 > 0:
+            self.目标选择器.选择最低血量队友()
+            # 给一点时间让UI更新
+            精确等待(0.05)
+        
+        # 释放技能
+        成功 = self._安全按下并释放("技能释放", 技能键值)
+        self.按键尝试次数 += 1
+        return 成功
+    
+    def _完成释放(self, 技能键值: int, 成功: bool, 开始时间: float) -> bool:
+        """
+        按键完成后的记账：登记待确认施放、更新响应时间统计
+        
+        返回:
+            bool: 是否成功释放
+        """
+        if 成功:
+            self.执行次数 += 1
+            if self.使用智能模式:
+                self.施放确认器.记录按下(技能键值, self._键值技能映射.get(技能键值))
+                self.状态检测器.记录施放(技能键值, self.施放确认器.确认帧数)
+            
+            # 更新性能统计（优化：进一步减少计算频率）
+            执行时间 = 全局时钟.现在() - 开始时间
+            self.性能统计["总执行时间"] += 执行时间
+            
+            # 优化：每20次执行更新一次平均响应时间，大幅减少计算开销
+            if self.执行次数 % 20 == 0:
+                self.性能统计["平均响应时间"] = self.性能统计["总执行时间"] / self.执行次数
+                self._更新成功率()
+            
+            # 执行响应时间优化（优化：仅在超时时执行）
+            if 执行时间 > self._响应时间阈值 * 0.8:  # 超过80%阈值才优化
+                self._优化响应时间(执行时间)
             
-            if 成功:
-                self.执行次数 += 1
-                
-                # 更新性能统计（优化：进一步减少计算频率）
-                执行时间 = time.time() - 开始时间
-                self.性能统计["总执行时间"] += 执行时间
-                
-                # 优化：每20次执行更新一次平均响应时间，大幅减少计算开销
-                if self.执行次数 % 20 == 0:
-                    self.性能统计["平均响应时间"] = self.性能统计["总执行时间"] / self.执行次数
-                    self.性能统计["成功率"] = (self.执行次数 - 0) / self.执行次数
-                
-                # 执行响应时间优化（优化：仅在超时时执行）
-                if 执行时间 > self._响应时间阈值 * 0.8:  # 超过80%阈值才优化
-                    self._优化响应时间(执行时间)
-                
-                # 优化：仅在调试模式下记录详细耗时
-                if self.日志级别 <= 0:  # 调试模式
-                    self._日志("调试", f"成功释放技能: {技能键值}, 耗时: {执行时间:.3f}s")
-                
-                return True
+            # 优化：仅在调试模式下记录详细耗时
+            if self.日志级别 <= 0 and self.服务质量.准入("调试记录"):  # 调试模式
+                self._日志("调试", f"成功释放技能: {技能键值}, 耗时: {执行时间:.3f}s")
+            
+            return True
         
         return False
     
-    @安全执行技能检测
     def _安全推算技能(self, 策略, 上下文) -> int:
-        """安全地推算技能"""
-        return 策略.推算技能(上下文)
+        """安全地推算技能（异常或返回类型错误时视为无技能可放）"""
+        try:
+            结果 = 策略.推算技能(上下文)
+        except Exception as e:
+            if self.异常隔离器._应该记录异常("推算技能", type(e).__name__):
+                self._日志("错误", f"策略推算技能失败: {type(e).__name__}: {e}")
+            return 0
+        
+        if 结果 is not None and not isinstance(结果, int):
+            self._日志("警告", f"技能检测返回类型错误: {type(结果)}")
+            return 0
+        return 结果
     
     def _优化响应时间(self, 执行时间: float):
         """
@@ -545,25 +848,9 @@ class 技能循环引擎:
         self._自适应调整响应时间阈值()
     
     def _临时禁用非核心功能(self):
-        """临时禁用非核心功能"""
-        # 记录当前状态，以便恢复
-        self._原配置监听状态 = hasattr(self, '配置监听器') and self.配置监听器.获取监听状态()
-        
-        # 临时禁用配置监听（如果启用）
-        if hasattr(self, '配置监听器'):
-            self.配置监听器.停止监听()
-            self._日志("信息", "已临时禁用配置监听")
-        
-        # 设置恢复定时器（5分钟后恢复）
-        import threading
-        def 恢复功能():
-            实际延迟 = 智能延迟(300)  # 5分钟自适应延迟
-            self._日志("信息", f"智能恢复延迟: {实际延迟:.1f}秒")
-            if hasattr(self, '配置监听器') and hasattr(self, '_原配置监听状态'):
-                self.配置监听器.开始监听()
-                self._日志("信息", "已恢复配置监听")
-        
-        threading.Thread(target=恢复功能, daemon=True).start()
+        """临时禁用非核心功能：服务质量提升到最高负载级别，只保留关键工作，负载平稳后逐级恢复"""
+        self.服务质量.提高负载级别(服务质量管理器.最高负载级别)
+        self._日志("信息", "已卸载全部非关键工作，负载平稳后逐级恢复")
     
     def _自适应调整响应时间阈值(self):
         """自适应调整响应时间阈值（智能动态优化版）"""
@@ -1092,9 +1379,10 @@ class 技能循环引擎:
     def 开始配置监听(self):
         """开始监听配置文件变化"""
         # 监听关键配置文件
-        self.配置监听器.添加监听("技能配置.json", self.重新加载配置)
-        self.配置监听器.添加监听("技能模板配置.json", self.重新加载配置)
-        self.配置监听器.添加监听("按键配置.json", self.重新加载配置)
+        # 监听参与构建配置快照的文件，同一批变更合并为一次增量重载
+        for 配置文件 in self.配置管理器.获取配置文件列表():
+            if os.path.exists(os.path.join(self.配置管理器.获取配置路径(), 配置文件)):
+                self.配置监听器.添加监听(配置文件, self.重新加载配置)
         
         self.配置监听器.开始监听()
         self._日志("信息", "配置监听器已启动")
@@ -1140,7 +1428,22 @@ class 技能循环引擎:
             "性能报告": 性能报告,
             "权限报告": 权限报告,
             "配置监听": self.配置监听器.获取监听状态(),
-            "响应时间优化": 响应时间分布
+            "响应时间优化": 响应时间分布,
+            "施放确认": self.施放确认器.获取统计信息(),
+            "循环节拍": self.节拍器.获取抖动统计(),
+            "拦截器开销": self.循环拦截器链.获取开销报告(),
+            "后台调度": 全局调度器.获取统计信息(),
+            "服务状态": 全局服务注册表.获取服务状态(),
+            "启动预热": self.获取预热报告(),
+            "配置快照": self._配置快照.获取摘要(),
+            "配置重载": self.配置管理器.获取重载统计(),
+            "区域图像缓存": self.区域图像接口.获取统计信息() if self.使用智能模式 else {},
+            "依赖绑定": self.容器.获取绑定信息(),
+            "活动状态": self.活动状态机.获取统计信息(),
+            "服务质量": self.服务质量.获取统计信息(),
+            "工作线程池": self.检测线程池.获取统计信息() if 全局服务注册表.是否已创建("工作线程池") else {},
+            "检测图": self.检测执行器.获取统计信息() if self.检测执行器 is not None else {},
+            "帧总线": self.视觉帧总线.获取统计信息()
         }
     
     def 检查权限状态(self) -> Dict[str, Any]:
@@ -1156,11 +1459,12 @@ class 技能循环引擎:
         """重置所有性能统计"""
         self.性能监控器.重置统计()
         self.执行次数 = 0
-        self.性能统计 = {
-            "总执行时间": 0.0,
-            "平均响应时间": 0.0,
-            "成功率": 0.0
-        }
+        self.按键尝试次数 = 0
+        self.性能统计 = self._创建性能统计()
+        self.施放确认器 = 施放确认器()
+        self.节拍器.重置统计()
+        self.循环拦截器链.重置统计()
+        self.服务质量.重置统计()
         self._日志("信息", "性能统计已重置")
     
     def 设置七情和合状态(self, 状态: int):
@@ -1188,14 +1492,18 @@ class 技能循环引擎:
             "自动选人键值": self.自动选人键值
         }
     
-    def 重新加载配置(self):
-        """重新加载所有配置文件"""
-        self.配置管理器.重新加载配置()
+    def 重新加载配置(self, 变更文件: Optional[List[str]] = None):
+        """
+        重新加载配置文件
+        运行中新快照在下一拍边界生效；未运行时立即应用
         
-        # 更新配置信息
-        self.检测区域 = self.配置管理器.获取检测区域()
-        self.蓝条配置 = self.配置管理器.获取蓝条配置()
-        self.自动选人键值 = self.配置管理器.获取自动选人键值()
+        参数:
+            变更文件: 可选，发生变化的配置文件，只重新解析并重建受影响的部分；None表示全部重载
+        """
+        self.配置管理器.重新加载配置(变更文件)
+        快照 = self.配置管理器.快照
+        if not self.running and 快照 is not self._配置快照:
+            self._应用配置快照(快照)
     
     def 停止循环(self):
         """停止技能循环"""
@@ -1203,23 +1511,72 @@ class 技能循环引擎:
     
     def 释放所有按键(self):
         """释放所有当前按下的按键"""
+        if self.按键接口 is None:
+            return
+        if isinstance(self.按键接口, 延迟代理) and not self.按键接口.已创建:
+            # 后端从未创建，不可能有按下的按键
+            return
         self.按键接口.释放所有按键()
 
-    def start(self):
-        """启动技能循环（后台线程）"""
-        if not self.running:
-            self.running = True
-            self.paused = False
-            self.thread = threading.Thread(target=self._run_loop, daemon=True)
-            self.thread.start()
-            self._日志("信息", "技能循环引擎已启动")
+    def start(self) -> bool:
+        """
+        启动技能循环（后台线程）
+        
+        返回:
+            bool: 循环是否在运行（启动失败时为False，原因见 启动错误）
+        """
+        if self.running:
+            return True
+        if not self._启动准备():
+            return False
+        # 后台维护任务改由循环线程在拍间空闲时执行
+        全局调度器.接管()
+        self.thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        self._日志("信息", "技能循环引擎已启动")
+        return True
+
+    def _启动准备(self) -> bool:
+        """
+        启动前的准备（创建后端、启动服务、预热），由同步循环线程和异步引擎共用
+        
+        返回:
+            bool: 是否可以开始循环
+        """
+        if self.running:
+            return False
+        self.启动错误 = None
+        if not self._创建后端():
+            return False
+        self.running = True
+        self.paused = False
+        # 每次启动都从满速开始，由首帧信号决定是否降频
+        self.活动状态机.重置()
+        self._同步节拍频率()
+        self.节拍器.开始()
+        # 惰性服务在显式启动时统一创建，避免首拍承担创建开销
+        全局服务注册表.启动全部()
+        if not self._内存监控已配置:
+            self._启动内存监控()
+            self._内存监控已配置 = True
+        self._执行启动预热()
+        # 启动时探测一次系统能力，之后由后台慢速刷新
+        self.权限控制器.能力服务.启动()
+        return True
 
     def stop(self):
         """停止技能循环"""
         self.running = False
         self.paused = False
-        if self.thread and self.thread.is_alive():
+        self.已就绪 = False
+        self.节拍器.停止()
+        # 先等循环线程退出，再停止它正在使用的调度器和服务（线程池、帧总线等）
+        if self.thread and self.thread.is_alive() and self.thread is not threading.current_thread():
             self.thread.join(timeout=1.0)
+        self.权限控制器.能力服务.停止()
+        全局调度器.释放()
+        全局服务注册表.停止全部()
+        self.施放确认器.清除待确认()
         self.当前模式 = 0
         self.释放所有按键()
         self._日志("信息", "技能循环引擎已停止")
@@ -1227,31 +1584,95 @@ class 技能循环引擎:
     def pause(self):
         """暂停/恢复技能循环"""
         self.paused = not self.paused
+        if self.paused:
+            self.节拍器.暂停()
+            # 暂停期间循环线程阻塞，维护任务交还调度器自己的线程
+            全局调度器.释放()
+        else:
+            全局调度器.接管()
+            self.节拍器.恢复()
         状态 = "暂停" if self.paused else "恢复"
         self._日志("信息", f"技能循环引擎已{状态}")
 
+    def _执行启动预热(self):
+        """执行启动预热并标记引擎就绪"""
+        if self._启用启动预热:
+            全部成功 = self.预热器.执行()
+            报告 = self.预热器.获取预热报告()
+            if 全部成功:
+                self._日志("信息", f"启动预热完成，耗时{报告['总耗时']}")
+            else:
+                失败步骤 = [名称 for 名称, 步骤 in 报告["步骤"].items() if not 步骤["成功"]]
+                self._日志("警告", f"启动预热部分失败: {', '.join(失败步骤)}，耗时{报告['总耗时']}")
+        self.已就绪 = True
+    
+    def 获取预热报告(self) -> Dict[str, Any]:
+        """获取启动预热的分步耗时报告"""
+        return {
+            "已就绪": self.已就绪,
+            "已启用": self._启用启动预热,
+            **self.预热器.获取预热报告()
+        }
+
+    def _发布运行状态(self) -> Dict[str, Any]:
+        """在拍末生成运行状态供UI读取（UI线程只读取引用）"""
+        self._已发布运行状态 = self._生成运行状态()
+        if self.状态发布回调 is not None:
+            self.状态发布回调(self._已发布运行状态)
+        return self._已发布运行状态
+    
     def get_running_status(self) -> Dict[str, Any]:
-        """获取运行状态（UI适配）"""
+        """获取运行状态（UI适配）：运行中读取主循环最近发布的状态，其余时候实时生成"""
+        已发布 = self._已发布运行状态
+        if self.running and not self.paused and 已发布 is not None:
+            return 已发布
+        return self._生成运行状态()
+    
+    def _生成运行状态(self) -> Dict[str, Any]:
+        """生成运行状态字典"""
         return {
             'running': self.running,
             'paused': self.paused,
+            'ready': self.已就绪,
             'mode': self.获取可用策略().get(self.当前模式, "未知模式") if self.使用智能模式 else "简单模式",
             'execution_count': self.执行次数,
             'avg_response_time': self.性能统计.get("平均响应时间", 0.0),
-            'success_rate': self.性能统计.get("成功率", 0.0) * 100
+            'success_rate': self.性能统计.get("成功率", 0.0) * 100,
+            'activity_state': self.活动状态机.状态.name,
+            'load_level': self.服务质量.负载级别,
+            'tick_rate': self.节拍器.目标频率,
+            'start_error': self.启动错误 or ""
         }
 
+    def 获取节拍统计(self) -> Dict[str, Any]:
+        """获取主循环节拍与抖动统计"""
+        return self.节拍器.获取抖动统计()
+
     def _run_loop(self):
-        """后台循环线程"""
+        """后台循环线程（按节拍器的截止时间执行，暂停时阻塞等待）"""
         while self.running:
-            if not self.paused:
-                try:
-                    self.执行一次循环()
-                except Exception as e:
-                    self._日志("错误", f"循环异常: {e}")
-                    time.sleep(1)
-            else:
-                time.sleep(0.1)
+            if not self.节拍器.等待恢复():
+                break
+            
+            try:
+                self.执行一次循环()
+            except Exception as e:
+                self._日志("错误", f"循环异常: {e}")
+                # 异常退避，可被停止立即打断
+                if not self.节拍器.等待(1.0):
+                    break
+                continue
+            
+            # 被频率限制拒绝时直接睡到最早允许时间，而不是逐拍重试
+            剩余时间 = self._频率拦截器.下次允许时间 - time.monotonic()
+            if 剩余时间 > self.节拍器.周期:
+                允许时刻 = time.perf_counter_ns() + int(剩余时间 * 1e9)
+                全局调度器.运行空闲任务(允许时刻 - self._空闲余量纳秒)
+                if not self.节拍器.等待(max(0, 允许时刻 - time.perf_counter_ns()) / 1e9):
+                    break
+                continue
             
-            # 避免CPU占用过高
-            time.sleep(0.01)
\ No newline at end of file
+            # 拍间空闲窗口：执行到期的后台维护任务，给下一拍预留余量
+            全局调度器.运行空闲任务(self._后台维护截止纳秒())
+            if not self.节拍器.等待下一拍():
+                break
@@ -1,11 +1,28 @@
 """
 技能状态检测器（性能优化版）
-基于颜色检测的技能状态判断逻辑，集成智能缓存和增量更新
+基于颜色检测的技能状态判断逻辑，集成智能缓存和增量更新；
+每个探测点按各自观察到的状态波动自适应调整采样间隔，一拍只重新采样到期的探测点
 """
-from typing import Dict, Any, Tuple, Optional, List
+from dataclasses import dataclass
+from typing import Dict, Any, Tuple, Optional, List, Iterable
 import time
 from collections import defaultdict, deque
 from utils.颜色判断工具 import 判断颜色是否在范围, 判断颜色是否超出范围
+from utils.缓存框架 import 缓存
+
+
+@dataclass
+class 探测调度:
+    """单个探测点的采样调度状态"""
+    间隔: float = 0.0
+    下次采样: float = 0.0
+    上次采样: Optional[float] = None
+    上次状态: Any = None
+    冷却结束: float = 0.0
+    强制帧数: int = 0
+    采样次数: int = 0
+    跳过次数: int = 0
+    变化次数: int = 0
 
 
 class 技能状态检测器:
@@ -13,14 +30,14 @@ class 技能状态检测器:
     
     def __init__(self):
         """初始化检测器，添加性能优化功能"""
-        # 智能缓存：缓存最近的颜色检测结果
-        self._颜色缓存: Dict[Tuple[int, int], Tuple[Tuple[int, int, int], float]] = {}
+        # 智能缓存：缓存最近的颜色检测结果 {(x, y): 颜色}
         self._缓存有效期 = 0.05  # 50ms缓存有效期
         self._最大缓存大小 = 50
+        self.颜色缓存 = 缓存("检测器颜色缓存", 最大条目=self._最大缓存大小, 默认有效期=self._缓存有效期)
         
-        # 检测结果缓存：缓存技能判断结果
-        self._技能结果缓存: Dict[str, Tuple[int, float]] = {}
+        # 检测结果缓存：缓存技能判断结果 {技能键: 技能键值}
         self._技能缓存有效期 = 0.1  # 100ms技能缓存
+        self.技能结果缓存 = 缓存("技能决策缓存", 最大条目=200, 默认有效期=self._技能缓存有效期)
         
         # 性能统计
         self._缓存命中次数 = 0
@@ -28,8 +45,7 @@ class 技能状态检测器:
         self._总检测次数 = 0
         
         # 增量更新控制
-        self._最后检测时间 = 0
-        self._增量更新阈值 = 0.02  # 20ms内不重复检测
+        self._帧时间: Optional[float] = None  # 引擎每拍设置的时间快照（秒）
         
         # 智能缓存预热
         self._预热完成 = False
@@ -39,6 +55,141 @@ class 技能状态检测器:
         
         # 自适应调整
         self._自适应调整间隔 = 50  # 每50次检测调整一次
+        
+        # 探测点自适应采样：状态变化后收紧到每帧，稳定时按退避系数放宽
+        self._最小采样间隔 = 0.0  # 0表示每帧采样
+        self._最大采样间隔 = 0.1
+        self._退避步长 = 0.016  # 首次退避的间隔（约一帧）
+        self._退避系数 = 1.5
+        self._冷却提前量 = 0.1  # 已知冷却结束前提前恢复采样的时间
+        self._冷却最长间隔 = 1.0  # 冷却中两次采样的最长间隔（冷却提示不准时的兜底）
+        self._探测调度: Dict[Tuple[int, int], 探测调度] = {}
+        self._探测项: Dict[Tuple[int, int], Any] = {}
+        self._键值坐标: Dict[int, Tuple[int, int]] = {}
+    
+    def 开始新帧(self, 帧时间戳: Any):
+        """
+        设置本拍的时间快照，缓存判断直接读取该字段而不再调用时钟
+        
+        参数:
+            帧时间戳: 时间快照（含秒字段），None表示恢复为实时读取时钟
+        """
+        self._帧时间 = 帧时间戳.秒 if 帧时间戳 is not None else None
+    
+    def _当前时间(self) -> float:
+        """当前时间：优先使用本拍快照，否则读取单调时钟"""
+        帧时间 = self._帧时间
+        return 帧时间 if 帧时间 is not None else time.perf_counter()
+    
+    def 设置探测计划(self, 探测计划: Iterable[Any]):
+        """
+        设置配置快照编译的探测计划，用于判断探测点状态和读取冷却提示
+        坐标未变化的探测点保留其采样调度
+        
+        参数:
+            探测计划: 探测项序列（含名称、类型、坐标、颜色、波动值、键值、冷却时间）
+        """
+        self._探测项 = {项.坐标: 项 for 项 in 探测计划}
+        self._键值坐标 = {项.键值: 项.坐标 for 项 in self._探测项.values() if 项.类型 == "技能" and 项.键值 > 0}
+        self._探测调度 = {坐标: 调度 for 坐标, 调度 in self._探测调度.items() if 坐标 in self._探测项}
+    
+    def 记录施放(self, 键值: int, 确认帧数: int = 5, 当前时间: Optional[float] = None):
+        """
+        记录技能已按下：随后若干帧强制采样该技能的探测点（供施放确认观察），
+        配置了冷却时间的技能在确认后按冷却剩余时间退避
+        
+        参数:
+            键值: 按下的技能键值
+            确认帧数: 强制逐帧采样的帧数
+            当前时间: 按下时刻，None则使用本拍时间
+        """
+        坐标 = self._键值坐标.get(键值)
+        if 坐标 is None:
+            return
+        if 当前时间 is None:
+            当前时间 = self._当前时间()
+        调度 = self._探测调度.setdefault(坐标, 探测调度())
+        调度.强制帧数 = 确认帧数
+        调度.间隔 = self._最小采样间隔
+        调度.下次采样 = 当前时间
+        冷却时间 = self._探测项[坐标].冷却时间
+        调度.冷却结束 = 当前时间 + 冷却时间 if 冷却时间 else 0.0
+    
+    def _探测状态(self, 坐标: Tuple[int, int], 颜色值: tuple) -> Any:
+        """探测点的离散状态：有探测计划时为颜色判断结果，否则为原始颜色"""
+        项 = self._探测项.get(坐标)
+        if 项 is None or not 项.颜色 or 项.波动值 is None:
+            return 颜色值
+        return (判断颜色是否在范围(颜色值, 项.颜色, 项.波动值),
+                判断颜色是否超出范围(颜色值, 项.颜色, 项.波动值))
+    
+    def _更新探测调度(self, 调度: 探测调度, 状态: Any, 当前时间: float):
+        """根据本次采样结果计算探测点的下一次采样时间"""
+        变化 = 调度.上次采样 is not None and 状态 != 调度.上次状态
+        调度.上次状态 = 状态
+        调度.上次采样 = 当前时间
+        调度.采样次数 += 1
+        
+        if 变化:
+            调度.变化次数 += 1
+            调度.间隔 = self._最小采样间隔
+            # 强制采样期间观察到变化即视为施放已生效
+            调度.强制帧数 = 0
+        else:
+            调度.间隔 = min(max(调度.间隔 * self._退避系数, self._退避步长), self._最大采样间隔)
+        
+        if 调度.强制帧数 > 0:
+            调度.强制帧数 -= 1
+            调度.下次采样 = 当前时间
+            return
+        
+        调度.下次采样 = 当前时间 + 调度.间隔
+        if 调度.冷却结束 > 当前时间:
+            # 已知冷却远未结束：推迟到冷却即将结束时再采样
+            调度.下次采样 = max(调度.下次采样, min(调度.冷却结束 - self._冷却提前量,
+                                           当前时间 + self._冷却最长间隔))
+    
+    def 获取到期探测(self, 当前时间: Optional[float] = None) -> List[Any]:
+        """
+        获取本拍需要重新采样的探测项
+        
+        参数:
+            当前时间: 可选，默认使用本拍时间
+            
+        返回:
+            list: 到期的探测项（从未采样过的探测点视为到期）
+        """
+        if 当前时间 is None:
+            当前时间 = self._当前时间()
+        到期 = []
+        for 坐标, 项 in self._探测项.items():
+            调度 = self._探测调度.get(坐标)
+            if 调度 is None or self._已到期(调度, 当前时间):
+                到期.append(项)
+        return 到期
+    
+    def 采样到期探测(self, 图片) -> int:
+        """
+        一次性采样本拍所有到期的探测点（检测图中与其他检测器并行执行），
+        之后策略读取这些探测点时直接命中颜色缓存
+        
+        参数:
+            图片: 检测区域图像，None时不采样
+            
+        返回:
+            int: 采样的探测点数量
+        """
+        if 图片 is None:
+            return 0
+        到期 = self.获取到期探测()
+        for 项 in 到期:
+            self._获取图片颜色(图片, 项.坐标)
+        return len(到期)
+    
+    @staticmethod
+    def _已到期(调度: 探测调度, 当前时间: float) -> bool:
+        """到达下次采样时间且本拍尚未采样"""
+        return 当前时间 >= 调度.下次采样 and (调度.上次采样 is None or 当前时间 > 调度.上次采样)
     
     def 判断普通技能可用性(self, 图片, 技能配置: Dict[str, Any]) -> int:
         """
@@ -179,33 +330,28 @@ class 技能状态检测器:
         返回:
             tuple: RGB颜色值 (r, g, b)
         """
-        # 增量更新检查：避免过于频繁的检测
-        当前时间 = time.time()
-        if 当前时间 - self._最后检测时间 < self._增量更新阈值:
-            # 使用缓存结果（如果存在）
-            缓存键 = (坐标[0], 坐标[1])
-            if 缓存键 in self._颜色缓存:
-                缓存颜色, 缓存时间 = self._颜色缓存[缓存键]
-                if 当前时间 - 缓存时间 < self._缓存有效期:
-                    self._缓存命中次数 += 1
-                    return 缓存颜色
-        
-        self._最后检测时间 = 当前时间
+        # 自适应采样：未到期的探测点直接使用上次采样的颜色
+        当前时间 = self._当前时间()
+        键 = (坐标[0], 坐标[1])
+        调度 = self._探测调度.get(键)
+        if 调度 is None:
+            调度 = self._探测调度[键] = 探测调度()
+        elif not self._已到期(调度, 当前时间):
+            缓存颜色 = self.颜色缓存.获取(键, 当前时间=当前时间)
+            if 缓存颜色 is not None:
+                self._缓存命中次数 += 1
+                调度.跳过次数 += 1
+                return 缓存颜色
+        
         self._总检测次数 += 1
         
         try:
             # 实际获取颜色值
-            颜色值 = 图片.getpixel((坐标[0], 坐标[1]))
-            
-            # 更新缓存
-            缓存键 = (坐标[0], 坐标[1])
-            self._颜色缓存[缓存键] = (颜色值, 当前时间)
-            
-            # 控制缓存大小
-            if len(self._颜色缓存) > self._最大缓存大小:
-                # 移除最旧的缓存项
-                最旧键 = min(self._颜色缓存.keys(), key=lambda k: self._颜色缓存[k][1])
-                del self._颜色缓存[最旧键]
+            颜色值 = self._读取像素(图片, 坐标)
+            self._更新探测调度(调度, self._探测状态(键, 颜色值), 当前时间)
+
+            # 更新缓存（超出条目上限时按LRU淘汰），保留到下次采样之后一个缓存有效期
+            self.颜色缓存.设置(键, 颜色值, 调度.下次采样 - 当前时间 + self._缓存有效期, 当前时间)
             
             self._缓存未命中次数 += 1
             return 颜色值
@@ -213,7 +359,22 @@ class 技能状态检测器:
         except AttributeError:
             # 如果适配器没有提供标准接口，需要适配器自行处理
             raise NotImplementedError("图像适配器需要实现getpixel方法或重写此方法")
-    
+
+    @staticmethod
+    def _读取像素(图片, 坐标: list) -> tuple:
+        """
+        读取单个像素的RGB值
+        支持带getpixel方法的图像对象，以及BGR排列的ndarray（Windows图像接口的输出）
+        """
+        if hasattr(图片, 'getpixel'):
+            return 图片.getpixel((坐标[0], 坐标[1]))
+
+        if hasattr(图片, 'shape'):
+            像素 = 图片[坐标[1], 坐标[0]]
+            return (int(像素[2]), int(像素[1]), int(像素[0]))
+
+        raise AttributeError("图像对象不支持像素读取")
+
     def 判断普通技能可用性_优化版(self, 图片, 技能配置: Dict[str, Any]) -> int:
         """
         判断普通技能是否可释放（优化版：带技能结果缓存）
@@ -230,13 +391,12 @@ class 技能状态检测器:
         技能颜色波动值 = 技能配置.get("技能颜色波动值")
         
         # 检查技能结果缓存
-        当前时间 = time.time()
+        当前时间 = self._当前时间()
         技能键 = f"普通技能_{技能坐标值}_{技能颜色值}_{技能颜色波动值}"
         
-        if 技能键 in self._技能结果缓存:
-            缓存结果, 缓存时间 = self._技能结果缓存[技能键]
-            if 当前时间 - 缓存时间 < self._技能缓存有效期:
-                return 缓存结果
+        缓存结果 = self.技能结果缓存.获取(技能键, 当前时间=当前时间)
+        if 缓存结果 is not None:
+            return 缓存结果
         
         # 获取图片中指定坐标的颜色值（使用优化版）
         图片技能颜色值 = self._获取图片颜色(图片, 技能坐标值)
@@ -247,14 +407,15 @@ class 技能状态检测器:
             结果 = 技能配置.get("技能按键", {}).get("key", 0)
         
         # 更新技能结果缓存
-        self._技能结果缓存[技能键] = (结果, 当前时间)
+        self.技能结果缓存.设置(技能键, 结果, self._技能缓存有效期, 当前时间)
         
         return 结果
     
     def 清除缓存(self):
         """清除所有缓存"""
-        self._颜色缓存.clear()
-        self._技能结果缓存.clear()
+        self.颜色缓存.清除缓存()
+        self.技能结果缓存.清除缓存()
+        self._探测调度.clear()
         self._缓存命中次数 = 0
         self._缓存未命中次数 = 0
         self._总检测次数 = 0
@@ -269,12 +430,43 @@ class 技能状态检测器:
             "缓存命中次数": self._缓存命中次数,
             "缓存未命中次数": self._缓存未命中次数,
             "总检测次数": self._总检测次数,
-            "颜色缓存大小": len(self._颜色缓存),
-            "技能缓存大小": len(self._技能结果缓存),
+            "颜色缓存大小": len(self.颜色缓存),
+            "技能缓存大小": len(self.技能结果缓存),
             "缓存有效期": f"{self._缓存有效期}秒",
-            "技能缓存有效期": f"{self._技能缓存有效期}秒"
+            "技能缓存有效期": f"{self._技能缓存有效期}秒",
+            "探测采样": self.获取探测采样统计()
+        }
+    
+    def 获取探测采样统计(self) -> Dict[str, Any]:
+        """获取探测点自适应采样统计"""
+        调度列表 = list(self._探测调度.values())
+        采样次数 = sum(调度.采样次数 for 调度 in 调度列表)
+        跳过次数 = sum(调度.跳过次数 for 调度 in 调度列表)
+        平均间隔 = sum(调度.间隔 for 调度 in 调度列表) / len(调度列表) if 调度列表 else 0.0
+        当前时间 = self._当前时间()
+        return {
+            "探测点数量": len(调度列表),
+            "到期探测点": sum(1 for 调度 in 调度列表 if self._已到期(调度, 当前时间)),
+            "采样次数": 采样次数,
+            "跳过次数": 跳过次数,
+            "采样比例": f"{采样次数 / max(采样次数 + 跳过次数, 1):.2%}",
+            "状态变化次数": sum(调度.变化次数 for 调度 in 调度列表),
+            "平均采样间隔": f"{平均间隔 * 1000:.1f}ms",
+            "冷却中探测点": sum(1 for 调度 in 调度列表 if 调度.冷却结束 > 当前时间)
         }
     
+    def 设置采样参数(self, 最大采样间隔: float = None, 退避系数: float = None,
+               冷却提前量: float = None, 冷却最长间隔: float = None):
+        """设置探测点自适应采样参数"""
+        if 最大采样间隔 is not None:
+            self._最大采样间隔 = max(self._最小采样间隔, 最大采样间隔)
+        if 退避系数 is not None:
+            self._退避系数 = max(1.0, 退避系数)
+        if 冷却提前量 is not None:
+            self._冷却提前量 = max(0.0, 冷却提前量)
+        if 冷却最长间隔 is not None:
+            self._冷却最长间隔 = max(self._最大采样间隔, 冷却最长间隔)
+    
     def 设置缓存配置(self, 缓存有效期: float = None, 技能缓存有效期: float = None, 最大缓存大小: int = None):
         """设置缓存配置"""
         if 缓存有效期 is not None:
@@ -283,6 +475,7 @@ class 技能状态检测器:
             self._技能缓存有效期 = 技能缓存有效期
         if 最大缓存大小 is not None:
             self._最大缓存大小 = 最大缓存大小
+            self.颜色缓存.设置最大条目(最大缓存大小)
         
         print(f"缓存配置已更新：有效期={self._缓存有效期}s, 技能缓存={self._技能缓存有效期}s, 最大大小={self._最大缓存大小}")
     
@@ -293,7 +486,7 @@ class 技能状态检测器:
             
             # 检查是否达到预热条件
             if len(self._预热样本记录) >= self._预热样本数:
-                命中率 = sum(self._预热样本_record) / len(self._预热样本记录)
+                命中率 = sum(self._预热样本记录) / len(self._预热样本记录)
                 if 命中率 >= self._预热阈值:
                     self._预热完成 = True
                     print(f"缓存预热完成，命中率: {命中率:.2%}")
@@ -343,7 +536,7 @@ class 技能状态检测器:
     
     def 获取缓存预热状态(self) -> Dict[str, Any]:
         """获取缓存预热状态"""
-        预热进度 = len(self._预热样本记录) / self._预热样本数 if self._预热样本_num > 0 else 0
+        预热进度 = len(self._预热样本记录) / self._预热样本数 if self._预热样本数 > 0 else 0
         
         if len(self._预热样本记录) > 0:
             当前命中率 = sum(self._预热样本记录) / len(self._预热样本记录)
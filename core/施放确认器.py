@@ -0,0 +1,186 @@
+"""
+施放确认器
+按键后观察技能探测点由就绪转为冷却，闭环确认技能是否真正释放，
+确认前抑制同一按键的重复按下，并统计确认延迟与真实成功率
+"""
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Optional
+
+
+@dataclass
+class 待确认施放:
+    """一次等待确认的技能释放"""
+    键值: int
+    技能配置: Dict[str, Any]
+    按下时间: float
+    剩余帧数: int
+
+
+class 施放确认器:
+    """
+    施放确认器
+    记录每次按键，在随后若干帧内等待技能图标变灰（就绪→冷却）
+    """
+
+    def __init__(self, 确认帧数: int = 5, 确认超时: float = 0.5, 延迟样本数: int = 100):
+        """
+        初始化施放确认器
+
+        参数:
+            确认帧数: 按键后最多观察的帧数
+            确认超时: 按键后最长等待确认的时间（秒）
+            延迟样本数: 保留的确认延迟样本数量
+        """
+        self._确认帧数 = 确认帧数
+        self._确认超时 = 确认超时
+        self._待确认: Dict[int, 待确认施放] = {}
+        self._确认延迟历史: deque = deque(maxlen=延迟样本数)
+
+        # 统计信息
+        self._按下次数 = 0
+        self._确认次数 = 0
+        self._超时次数 = 0
+        self._拦截次数 = 0
+
+    def 记录按下(self, 键值: int, 技能配置: Optional[Dict[str, Any]], 按下时间: Optional[float] = None):
+        """
+        记录一次成功的按键，开始等待确认
+
+        参数:
+            键值: 按下的技能键值
+            技能配置: 技能探测配置，None表示该按键无法闭环确认
+            按下时间: 按下时刻，None则取当前时间
+        """
+        self._按下次数 += 1
+        if not 技能配置 or not 技能配置.get("技能坐标值"):
+            return
+
+        self._待确认[键值] = 待确认施放(
+            键值=键值,
+            技能配置=技能配置,
+            按下时间=time.perf_counter() if 按下时间 is None else 按下时间,
+            剩余帧数=self._确认帧数
+        )
+
+    def 观察(self, 图片: Any, 就绪判断: Callable[[Any, Dict[str, Any]], bool],
+           当前时间: Optional[float] = None) -> int:
+        """
+        用新一帧图像推进所有待确认的施放
+
+        参数:
+            图片: 当前帧图像
+            就绪判断: 判断技能在该帧是否仍处于就绪状态的函数
+            当前时间: 当前时刻，None则取当前时间
+
+        返回:
+            int: 本帧确认的施放数量
+        """
+        if not self._待确认 or 图片 is None:
+            return 0
+
+        if 当前时间 is None:
+            当前时间 = time.perf_counter()
+
+        确认数量 = 0
+        for 键值, 施放 in list(self._待确认.items()):
+            try:
+                仍就绪 = 就绪判断(图片, 施放.技能配置)
+            except Exception:
+                仍就绪 = True
+
+            if not 仍就绪:
+                # 就绪→冷却，释放已生效
+                self._确认延迟历史.append(当前时间 - 施放.按下时间)
+                self._确认次数 += 1
+                确认数量 += 1
+                del self._待确认[键值]
+                continue
+
+            施放.剩余帧数 -= 1
+            if 施放.剩余帧数 <= 0 or 当前时间 - 施放.按下时间 > self._确认超时:
+                self._超时次数 += 1
+                del self._待确认[键值]
+
+        return 确认数量
+
+    def 允许按下(self, 键值: int, 当前时间: Optional[float] = None) -> bool:
+        """
+        判断是否允许再次按下该键（确认前或超时前抑制重复按键）
+
+        参数:
+            键值: 技能键值
+            当前时间: 当前时刻，None则取当前时间
+
+        返回:
+            bool: 是否允许按下
+        """
+        施放 = self._待确认.get(键值)
+        if 施放 is None:
+            return True
+
+        if 当前时间 is None:
+            当前时间 = time.perf_counter()
+
+        if 当前时间 - 施放.按下时间 > self._确认超时:
+            self._超时次数 += 1
+            del self._待确认[键值]
+            return True
+
+        self._拦截次数 += 1
+        return False
+
+    def 是否待确认(self, 键值: int) -> bool:
+        """判断该键是否仍在等待确认"""
+        return 键值 in self._待确认
+
+    def 是否有待确认(self) -> bool:
+        """判断是否存在任何待确认的施放"""
+        return bool(self._待确认)
+
+    @property
+    def 确认帧数(self) -> int:
+        """按键后最多观察的帧数"""
+        return self._确认帧数
+
+    @property
+    def 成功率(self) -> Optional[float]:
+        """已判定施放中确认成功的比例，尚无判定样本时为None"""
+        已判定次数 = self._确认次数 + self._超时次数
+        if 已判定次数 == 0:
+            return None
+        return self._确认次数 / 已判定次数
+
+    def 清除待确认(self):
+        """清除所有待确认的施放（停止循环时调用）"""
+        self._待确认.clear()
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取施放确认统计信息"""
+        if self._确认延迟历史:
+            排序延迟 = sorted(self._确认延迟历史)
+            平均延迟 = sum(排序延迟) / len(排序延迟)
+            P95延迟 = 排序延迟[min(len(排序延迟) - 1, int(len(排序延迟) * 0.95))]
+        else:
+            平均延迟 = 0.0
+            P95延迟 = 0.0
+
+        成功率 = self.成功率
+        return {
+            "按下次数": self._按下次数,
+            "确认次数": self._确认次数,
+            "超时次数": self._超时次数,
+            "拦截重复按键次数": self._拦截次数,
+            "待确认数量": len(self._待确认),
+            "确认成功率": f"{成功率:.2%}" if 成功率 is not None else "无数据",
+            "平均确认延迟": f"{平均延迟 * 1000:.1f}ms",
+            "P95确认延迟": f"{P95延迟 * 1000:.1f}ms"
+        }
+
+    def 设置确认参数(self, 确认帧数: int = None, 确认超时: float = None):
+        """设置确认参数"""
+        if 确认帧数 is not None:
+            self._确认帧数 = max(1, 确认帧数)
+        if 确认超时 is not None:
+            self._确认超时 = max(0.01, 确认超时)
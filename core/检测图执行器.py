@@ -0,0 +1,283 @@
+"""
+检测图执行器
+检测器声明输入（帧视图或其他检测器的输出）和输出，组成有向无环图；
+每拍按需启动子图：依赖已就绪的节点立即提交到共享线程池并行执行，
+下游节点只等待自己的输入，消费方只等待自己需要的输出，并按节点统计耗时
+"""
+import time
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class 检测节点:
+    """检测图中的一个节点：以输入节点的结果为参数（按声明顺序）计算本节点输出"""
+    名称: str
+    函数: Callable[..., Any]
+    输入: Tuple[str, ...] = ()
+
+
+class 检测图:
+    """
+    检测图
+    添加节点时只检查名称唯一；编译时检查输入是否存在并按拓扑序排列，有环时报错
+    """
+
+    def __init__(self):
+        self._节点: Dict[str, 检测节点] = {}
+        self._拓扑序: Optional[Tuple[str, ...]] = None
+        self._下游: Dict[str, Tuple[str, ...]] = {}
+
+    def 添加节点(self, 名称: str, 函数: Callable[..., Any], 输入: Iterable[str] = ()) -> '检测图':
+        """
+        添加检测节点
+
+        参数:
+            名称: 节点名称（即输出名称）
+            函数: 检测函数，参数为各输入节点的结果
+            输入: 依赖的节点名称
+
+        返回:
+            检测图本身（便于链式添加）
+        """
+        if 名称 in self._节点:
+            raise ValueError(f"检测节点重复: {名称}")
+        self._节点[名称] = 检测节点(名称, 函数, tuple(输入))
+        self._拓扑序 = None
+        return self
+
+    def __contains__(self, 名称: str) -> bool:
+        return 名称 in self._节点
+
+    @property
+    def 节点(self) -> Dict[str, 检测节点]:
+        """全部节点"""
+        return self._节点
+
+    def 编译(self) -> Tuple[str, ...]:
+        """
+        校验依赖并计算拓扑序
+
+        返回:
+            tuple: 拓扑序的节点名称
+        """
+        if self._拓扑序 is not None:
+            return self._拓扑序
+
+        下游: Dict[str, List[str]] = {名称: [] for 名称 in self._节点}
+        入度 = {}
+        for 节点 in self._节点.values():
+            for 输入 in 节点.输入:
+                if 输入 not in self._节点:
+                    raise ValueError(f"检测节点 {节点.名称} 的输入不存在: {输入}")
+                下游[输入].append(节点.名称)
+            入度[节点.名称] = len(节点.输入)
+
+        拓扑序 = []
+        就绪 = [名称 for 名称, 度 in 入度.items() if 度 == 0]
+        while 就绪:
+            名称 = 就绪.pop()
+            拓扑序.append(名称)
+            for 后继 in 下游[名称]:
+                入度[后继] -= 1
+                if 入度[后继] == 0:
+                    就绪.append(后继)
+        if len(拓扑序) != len(self._节点):
+            raise ValueError(f"检测图存在环: {sorted(set(self._节点) - set(拓扑序))}")
+
+        self._下游 = {名称: tuple(后继) for 名称, 后继 in 下游.items()}
+        self._拓扑序 = tuple(拓扑序)
+        return self._拓扑序
+
+    def 求闭包(self, 输出: Iterable[str]) -> List[str]:
+        """计算产生指定输出所需的节点（含全部上游），按拓扑序返回"""
+        拓扑序 = self.编译()
+        需要 = set()
+        待处理 = [名称 for 名称 in 输出 if 名称 in self._节点]
+        while 待处理:
+            名称 = 待处理.pop()
+            if 名称 not in 需要:
+                需要.add(名称)
+                待处理.extend(self._节点[名称].输入)
+        return [名称 for 名称 in 拓扑序 if 名称 in 需要]
+
+    def 下游(self, 名称: str) -> Tuple[str, ...]:
+        """直接依赖该节点的节点"""
+        self.编译()
+        return self._下游.get(名称, ())
+
+
+class 检测运行:
+    """
+    一拍内的一次检测图运行
+    每个节点对应一个Future，节点的输入全部完成后才提交；上游失败或被取消时下游随之失败/取消
+    """
+
+    def __init__(self, 执行器: '检测图执行器', 节点列表: List[str]):
+        self._执行器 = 执行器
+        self._图 = 执行器.图
+        self._锁 = threading.Lock()
+        self._已取消 = False
+        self._结果: Dict[str, Future] = {名称: Future() for 名称 in 节点列表}
+        self._剩余输入 = {名称: len(self._图.节点[名称].输入) for 名称 in 节点列表}
+        # 已提交到线程池的节点 -> 线程池任务
+        self._池任务: Dict[str, Future] = {}
+        self.耗时: Dict[str, float] = {}
+        self.开始时间 = time.perf_counter()
+
+    def _启动(self):
+        """提交所有无输入的节点"""
+        for 名称, 剩余 in list(self._剩余输入.items()):
+            if 剩余 == 0:
+                self._提交(名称)
+
+    def _提交(self, 名称: str):
+        if self._已取消:
+            self._结果[名称].cancel()
+            return
+        self._池任务[名称] = self._执行器.线程池.提交(f"检测:{名称}", self._执行节点, 名称)
+
+    def _执行节点(self, 名称: str):
+        """在工作线程上执行节点，完成后推进下游"""
+        结果 = self._结果[名称]
+        if not 结果.set_running_or_notify_cancel():
+            self._推进下游(名称)
+            return
+        节点 = self._图.节点[名称]
+        开始时间 = time.perf_counter()
+        try:
+            参数 = [self._结果[输入].result() for 输入 in 节点.输入]
+            值 = 节点.函数(*参数)
+        except BaseException as e:
+            self.耗时[名称] = time.perf_counter() - 开始时间
+            self._执行器._记录(名称, self.耗时[名称], 成功=False)
+            结果.set_exception(e)
+        else:
+            self.耗时[名称] = time.perf_counter() - 开始时间
+            self._执行器._记录(名称, self.耗时[名称], 成功=True)
+            结果.set_result(值)
+        self._推进下游(名称)
+
+    def _推进下游(self, 名称: str):
+        for 后继 in self._图.下游(名称):
+            if 后继 not in self._剩余输入:
+                continue
+            with self._锁:
+                self._剩余输入[后继] -= 1
+                就绪 = self._剩余输入[后继] == 0
+            if 就绪:
+                self._提交(后继)
+
+    def 包含(self, 名称: str) -> bool:
+        """本次运行是否包含该节点"""
+        return 名称 in self._结果
+
+    def 结果(self, 名称: str, 超时: Optional[float] = None) -> Any:
+        """
+        等待并返回节点结果（节点失败时抛出其异常）
+
+        参数:
+            名称: 节点名称
+            超时: 可选，最长等待秒数
+        """
+        return self._结果[名称].result(超时)
+
+    def 完成(self, 名称: str) -> bool:
+        """节点是否已完成"""
+        return self._结果[名称].done()
+
+    def 取消(self) -> int:
+        """
+        取消尚未开始的节点（运行中的节点执行完毕后结果被忽略），未完成节点的线程池任务交给线程池丢弃
+
+        返回:
+            int: 被取消的节点数量
+        """
+        self._已取消 = True
+        for 名称, 池任务 in list(self._池任务.items()):
+            if not self._结果[名称].done():
+                self._执行器.线程池.丢弃(池任务)
+        数量 = sum(1 for 结果 in self._结果.values() if 结果.cancel())
+        if 数量:
+            self._执行器._记录取消(数量)
+        return 数量
+
+
+class 检测图执行器:
+    """
+    检测图执行器
+    持有检测图和共享线程池，按节点累计执行次数、耗时和失败次数
+    """
+
+    def __init__(self, 图: 检测图, 线程池: Any):
+        """
+        初始化检测图执行器
+
+        参数:
+            图: 检测图
+            线程池: 工作线程池（提供 提交(类别, 函数, *参数)）
+        """
+        self.图 = 图
+        self.线程池 = 线程池
+        self._统计锁 = threading.Lock()
+        # 节点名称 -> [执行次数, 失败次数, 总耗时, 最大耗时]
+        self._节点统计: Dict[str, List[float]] = {}
+        self._运行次数 = 0
+        self._取消节点数 = 0
+        图.编译()
+
+    def 启动(self, 输出: Iterable[str]) -> 检测运行:
+        """
+        启动产生指定输出所需的子图
+
+        参数:
+            输出: 需要的节点名称（未在图中的名称被忽略）
+
+        返回:
+            检测运行
+        """
+        运行 = 检测运行(self, self.图.求闭包(输出))
+        self._运行次数 += 1
+        运行._启动()
+        return 运行
+
+    def _记录(self, 名称: str, 耗时: float, 成功: bool):
+        with self._统计锁:
+            统计 = self._节点统计.setdefault(名称, [0, 0, 0.0, 0.0])
+            统计[0] += 1
+            if not 成功:
+                统计[1] += 1
+            统计[2] += 耗时
+            统计[3] = max(统计[3], 耗时)
+
+    def _记录取消(self, 数量: int):
+        with self._统计锁:
+            self._取消节点数 += 数量
+
+    def 重置统计(self):
+        """重置节点统计"""
+        with self._统计锁:
+            self._节点统计.clear()
+            self._运行次数 = 0
+            self._取消节点数 = 0
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取按节点的耗时统计"""
+        with self._统计锁:
+            节点统计 = {名称: list(统计) for 名称, 统计 in self._节点统计.items()}
+        return {
+            "运行次数": self._运行次数,
+            "取消节点数": self._取消节点数,
+            "节点": {
+                名称: {
+                    "输入": list(self.图.节点[名称].输入),
+                    "执行次数": int(统计[0]),
+                    "失败次数": int(统计[1]),
+                    "平均耗时": f"{统计[2] / max(统计[0], 1) * 1000:.3f}ms",
+                    "最大耗时": f"{统计[3] * 1000:.3f}ms"
+                }
+                for 名称, 统计 in 节点统计.items()
+            }
+        }
@@ -0,0 +1,250 @@
+"""
+活动状态机
+根据每拍的廉价帧信号（截图是否成功、黑屏、画面指纹是否变化、目标框与战斗指示探测点）
+在 空闲/脱战/战斗中/降级 之间切换；每个状态有自己的采样频率、检测集合和后台维护额度，
+无目标或画面静止时引擎以低频空转，检测到战斗的第一帧即恢复满速；
+未配置目标框/战斗指示探测点时默认不启用（仅凭画面静止无法区分等待施法与真正空闲）
+"""
+from dataclasses import dataclass
+from enum import Enum
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, Mapping, Optional
+
+from core.技能状态检测器 import 技能状态检测器
+from utils.颜色判断工具 import 判断颜色是否在范围, 判断颜色是否超出范围
+
+
+class 活动状态(Enum):
+    """引擎活动状态"""
+    空闲 = "idle"
+    脱战 = "out_of_combat"
+    战斗中 = "in_combat"
+    降级 = "degraded"
+
+
+@dataclass(frozen=True)
+class 状态策略:
+    """一个活动状态下的工作量设置"""
+    采样频率: Optional[float]  # Hz，None表示使用循环节拍配置的满速频率
+    检测集合: FrozenSet[str]  # 允许执行的检测：策略（技能推算）、目标状态（HP/Buff/Debuff）
+    后台维护额度: Optional[float]  # 每拍后台维护最多占用的秒数，None表示可用满拍间空闲窗口
+
+
+默认状态策略: Mapping[活动状态, 状态策略] = MappingProxyType({
+    活动状态.战斗中: 状态策略(None, frozenset({"策略", "目标状态"}), 0.002),
+    活动状态.脱战: 状态策略(15.0, frozenset({"策略"}), 0.005),
+    活动状态.空闲: 状态策略(4.0, frozenset(), None),
+    活动状态.降级: 状态策略(2.0, frozenset(), None),
+})
+
+
+@dataclass
+class 活动信号:
+    """一帧的廉价活动信号"""
+    截图成功: bool
+    黑屏: bool = False
+    画面变化: bool = True
+    目标存在: Optional[bool] = None  # None表示未配置目标框探测点
+    战斗指示: Optional[bool] = None  # None表示未配置战斗指示探测点
+
+
+class 活动状态机:
+    """
+    活动状态机
+    进入战斗立即切换；离开战斗需持续脱战确认时长，避免战斗间隙频繁降频
+    """
+
+    def __init__(self, 满速频率: float = 60.0, 配置: Optional[Mapping[str, Any]] = None):
+        """
+        初始化活动状态机
+
+        参数:
+            满速频率: 战斗中的采样频率（循环节拍配置的目标频率）
+            配置: 可选，基本配置中的"活动状态"配置
+        """
+        self.状态 = 活动状态.战斗中  # 启动时按满速运行，首帧信号再决定是否降频
+        self._满速频率 = 满速频率
+        self._状态进入时间: Optional[float] = None
+        self._最后变化时间: Optional[float] = None
+        self._最后战斗时间: Optional[float] = None
+        self._上次指纹: Optional[int] = None
+        self._异常帧数 = 0
+
+        # 统计信息
+        self._切换次数 = 0
+        self._状态拍数: Dict[活动状态, int] = {状态: 0 for 状态 in 活动状态}
+        self._状态驻留时间: Dict[活动状态, float] = {状态: 0.0 for 状态 in 活动状态}
+        self._上次更新时间: Optional[float] = None
+
+        self.应用配置(配置 or {})
+
+    def 应用配置(self, 配置: Mapping[str, Any], 满速频率: Optional[float] = None):
+        """
+        应用"活动状态"配置（缺省项使用默认值）
+
+        参数:
+            配置: {启用, 目标框探测, 战斗指示探测, 静止判定时长, 脱战确认时长, 降级帧数, 黑屏阈值, 状态}
+                  启用缺省时只在配置了目标框或战斗指示探测点时启用：技能条画面静止
+                  （如等待资源）时引擎需保持运行策略才能施法改变画面
+            满速频率: 可选，新的满速频率
+        """
+        if 满速频率 is not None:
+            self._满速频率 = 满速频率
+        self._目标框探测 = 配置.get("目标框探测")
+        self._战斗指示探测 = 配置.get("战斗指示探测")
+        self.启用 = 配置.get("启用", bool(self._目标框探测 or self._战斗指示探测))
+        self._静止判定时长 = 配置.get("静止判定时长", 1.0)
+        self._脱战确认时长 = 配置.get("脱战确认时长", 1.5)
+        self._降级帧数 = max(1, 配置.get("降级帧数", 3))
+        self._黑屏阈值 = 配置.get("黑屏阈值", 8)
+
+        # 各状态设置可按字段覆盖默认值，如 {"空闲": {"采样频率": 2}}
+        状态配置 = 配置.get("状态") or {}
+        策略表 = {}
+        for 状态, 默认 in 默认状态策略.items():
+            覆盖 = 状态配置.get(状态.name) or {}
+            检测集合 = 覆盖.get("检测集合")
+            策略表[状态] = 状态策略(
+                覆盖.get("采样频率", 默认.采样频率),
+                frozenset(检测集合) if 检测集合 is not None else 默认.检测集合,
+                覆盖.get("后台维护额度", 默认.后台维护额度)
+            )
+        self._策略表 = 策略表
+        if not self.启用:
+            self.状态 = 活动状态.战斗中
+
+    @property
+    def 当前策略(self) -> 状态策略:
+        """当前状态的工作量设置"""
+        return self._策略表[self.状态]
+
+    @property
+    def 有效频率(self) -> float:
+        """当前状态的采样频率（不超过满速频率）"""
+        频率 = self.当前策略.采样频率
+        return self._满速频率 if 频率 is None else min(频率, self._满速频率)
+
+    def 允许检测(self, 名称: str) -> bool:
+        """当前状态是否允许执行指定检测"""
+        return 名称 in self.当前策略.检测集合
+
+    def 采集信号(self, 图像: Any) -> 活动信号:
+        """
+        从检测区域图像采集活动信号（只读取稀疏采样点和两个探测像素）
+
+        参数:
+            图像: 检测区域图像，None表示截图失败
+
+        返回:
+            活动信号
+        """
+        if 图像 is None:
+            return 活动信号(截图成功=False)
+
+        黑屏 = False
+        画面变化 = True
+        if hasattr(图像, 'shape') and 图像.size > 0:
+            # 约16x16的稀疏网格：指纹变化即视为画面变化
+            步长 = max(1, min(图像.shape[0], 图像.shape[1]) // 16)
+            网格 = 图像[::步长, ::步长]
+            指纹 = hash(网格.tobytes())
+            画面变化 = 指纹 != self._上次指纹
+            self._上次指纹 = 指纹
+            黑屏 = int(网格.max()) <= self._黑屏阈值
+
+        return 活动信号(
+            截图成功=True,
+            黑屏=黑屏,
+            画面变化=画面变化,
+            目标存在=self._探测匹配(图像, self._目标框探测),
+            战斗指示=self._探测匹配(图像, self._战斗指示探测)
+        )
+
+    @staticmethod
+    def _探测匹配(图像: Any, 探测: Optional[Mapping[str, Any]]) -> Optional[bool]:
+        """探测点颜色是否在目标颜色的波动范围内，未配置或读取失败返回None"""
+        if not 探测 or not 探测.get("坐标") or not 探测.get("颜色"):
+            return None
+        try:
+            颜色值 = 技能状态检测器._读取像素(图像, 探测["坐标"])
+        except (AttributeError, IndexError):
+            return None
+        波动值 = 探测.get("颜色波动值", 10)
+        return (判断颜色是否在范围(颜色值, 探测["颜色"], 波动值)
+                and 判断颜色是否超出范围(颜色值, 探测["颜色"], 波动值))
+
+    def 更新(self, 信号: 活动信号, 当前时间: float) -> bool:
+        """
+        用本帧信号推进状态机
+
+        参数:
+            信号: 本帧活动信号
+            当前时间: 本拍时间（秒）
+
+        返回:
+            bool: 状态是否发生切换
+        """
+        if self._上次更新时间 is not None:
+            self._状态驻留时间[self.状态] += 当前时间 - self._上次更新时间
+        self._上次更新时间 = 当前时间
+        self._状态拍数[self.状态] += 1
+
+        if not self.启用:
+            return False
+
+        新状态 = self._判定状态(信号, 当前时间)
+        if 新状态 is self.状态:
+            return False
+        self.状态 = 新状态
+        self._状态进入时间 = 当前时间
+        self._切换次数 += 1
+        return True
+
+    def _判定状态(self, 信号: 活动信号, 当前时间: float) -> 活动状态:
+        """根据信号计算本帧应处的状态"""
+        if not 信号.截图成功 or 信号.黑屏:
+            self._异常帧数 += 1
+            return 活动状态.降级 if self._异常帧数 >= self._降级帧数 else self.状态
+        self._异常帧数 = 0
+
+        if 信号.画面变化 or self._最后变化时间 is None:
+            self._最后变化时间 = 当前时间
+        画面静止 = 当前时间 - self._最后变化时间 >= self._静止判定时长
+
+        # 有战斗指示时以其为准，否则以目标框为准；都未配置时只能依据画面是否静止
+        战斗 = 信号.战斗指示 if 信号.战斗指示 is not None else 信号.目标存在
+        if 战斗 is None:
+            return 活动状态.空闲 if 画面静止 else 活动状态.战斗中
+        if 战斗:
+            self._最后战斗时间 = 当前时间
+            return 活动状态.战斗中
+        if 画面静止:
+            return 活动状态.空闲
+        if (self.状态 is 活动状态.战斗中 and self._最后战斗时间 is not None
+                and 当前时间 - self._最后战斗时间 < self._脱战确认时长):
+            return 活动状态.战斗中
+        return 活动状态.脱战
+
+    def 重置(self):
+        """恢复为战斗中并清除信号历史（引擎重新启动时调用）"""
+        self.状态 = 活动状态.战斗中
+        self._状态进入时间 = None
+        self._最后变化时间 = None
+        self._最后战斗时间 = None
+        self._上次指纹 = None
+        self._异常帧数 = 0
+        self._上次更新时间 = None
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取活动状态统计信息"""
+        策略 = self.当前策略
+        return {
+            "启用": self.启用,
+            "当前状态": self.状态.name,
+            "有效频率": f"{self.有效频率:.1f}Hz",
+            "检测集合": sorted(策略.检测集合),
+            "后台维护额度": f"{策略.后台维护额度 * 1000:.1f}ms" if 策略.后台维护额度 is not None else "不限",
+            "切换次数": self._切换次数,
+            "状态拍数": {状态.name: 拍数 for 状态, 拍数 in self._状态拍数.items()},
+            "状态驻留时间": {状态.name: f"{时长:.1f}s" for 状态, 时长 in self._状态驻留时间.items()}
+        }
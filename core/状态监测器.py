@@ -2,12 +2,77 @@
 状态监测器
 负责监测当前目标的HP和Buff/Debuff状态
 """
-import cv2
-import numpy as np
+import os
+import time
 from typing import Dict, List, Tuple, Any, Optional
 from interface.图像获取接口 import 图像获取接口
 from utils.日志管理 import 日志管理器
 from utils.颜色判断工具 import 判断颜色是否在范围
+from utils.缓存框架 import 缓存
+
+# cv2/numpy导入较慢，首次检测时才加载
+cv2 = None
+np = None
+
+
+def _加载视觉库():
+    """按需导入cv2和numpy"""
+    global cv2, np
+    if cv2 is None:
+        import cv2 as _cv2
+        import numpy as _np
+        cv2, np = _cv2, _np
+
+# 帧总线工作进程内的状态监测器（每个进程一份模板缓存）
+_进程监测器 = None
+# 工作进程中已使用模板的版本 {"类型_名称": (路径, 修改时间, 检查时间)}
+_进程模板版本: Dict[str, Tuple[Optional[str], Optional[float], float]] = {}
+# 同一路径的文件修改时间最多每隔该秒数检查一次
+_模板检查间隔 = 1.0
+
+
+def _获取进程监测器() -> '状态监测器':
+    global _进程监测器
+    if _进程监测器 is None:
+        _进程监测器 = 状态监测器(None)
+    return _进程监测器
+
+
+def 进程计算HP百分比(截图: Any, 颜色阈值: Dict[str, Any]) -> float:
+    """帧总线检测器：在工作进程中由共享内存帧计算HP百分比"""
+    return _获取进程监测器().计算HP百分比(截图, 颜色阈值)
+
+
+def _刷新进程模板(监测器: '状态监测器', 名称列表: List[str], 模板路径字典: Dict[str, str], 类型: str):
+    """
+    工作进程不经过主进程的配置热重载：模板路径或文件修改时间变化时重新读入该模板，
+    避免继续使用按"类型_名称"缓存的旧模板
+    """
+    当前 = time.monotonic()
+    变更名称 = []
+    for 名称 in 名称列表:
+        缓存Key = f"{类型}_{名称}"
+        模板路径 = 模板路径字典.get(名称)
+        旧版本 = _进程模板版本.get(缓存Key)
+        if 旧版本 is not None and 旧版本[0] == 模板路径 and 当前 - 旧版本[2] < _模板检查间隔:
+            continue
+        try:
+            修改时间 = os.path.getmtime(模板路径) if 模板路径 else None
+        except OSError:
+            修改时间 = None
+        _进程模板版本[缓存Key] = (模板路径, 修改时间, 当前)
+        if 旧版本 is not None and 旧版本[:2] != (模板路径, 修改时间):
+            变更名称.append(名称)
+    if 变更名称:
+        监测器.更新模板(变更名称, 模板路径字典, 类型)
+
+
+def 进程匹配图标(截图: Any, 名称列表: List[str], 模板路径字典: Dict[str, str], 类型: str) -> List[str]:
+    """帧总线检测器：在工作进程中由共享内存帧匹配图标模板（模板首次使用时读入该进程，变更后重新读入）"""
+    监测器 = _获取进程监测器()
+    _刷新进程模板(监测器, 名称列表, 模板路径字典, 类型)
+    return 监测器.匹配图标(截图, 名称列表, 模板路径字典, 类型)
+
 
 class 状态监测器:
     """
@@ -17,8 +82,9 @@ class 状态监测器:
     def __init__(self, 图像接口: 图像获取接口):
         self.图像接口 = 图像接口
         self.日志 = 日志管理器.获取日志记录器("状态监测器")
-        self.Buff模板缓存 = {}
-        self.Debuff模板缓存 = {}
+        # Buff/Debuff模板图像 {"类型_名称": 模板}，按字节计量，不过期；
+        # 模板每拍都要用且需从磁盘重新加载，内存压力清理时不收缩
+        self.模板缓存 = 缓存("模板缓存", 可收缩=False)
         
     def 获取目标HP百分比(self, 血条区域: Tuple[int, int, int, int], 颜色阈值: Dict[str, Any]) -> float:
         """
@@ -35,10 +101,21 @@ class 状态监测器:
         if not 血条区域 or not 颜色阈值:
             return 1.0 # 默认满血，避免误判
             
-        截图 = self.图像接口.获取屏幕区域(血条区域)
-        if 截图 is None or 截图.size == 0:
+        return self.计算HP百分比(self.图像接口.获取屏幕区域(血条区域), 颜色阈值)
+    
+    def 计算HP百分比(self, 截图: Any, 颜色阈值: Dict[str, Any]) -> float:
+        """
+        由已截取的血条图像计算HP百分比（检测图中与截图节点分开执行）
+        
+        参数:
+            截图: 血条区域图像，None表示截图失败
+            颜色阈值: HSV颜色阈值
+        """
+        if 截图 is None or 截图.size == 0 or not 颜色阈值:
             return 1.0
             
+        _加载视觉库()
+        
         # 转换到HSV空间
         hsv图像 = cv2.cvtColor(截图, cv2.COLOR_BGR2HSV)
         
@@ -78,33 +155,85 @@ class 状态监测器:
         """
         return self._检测图标(Debuff区域, Debuff名称列表, 模板路径字典, "Debuff")
 
+    def 预加载模板(self, 名称列表: List[str], 模板路径字典: Dict[str, str], 类型: str) -> int:
+        """
+        预先读取并缓存模板图像（启动预热时调用，避免首次检测时读盘）
+        
+        返回:
+            int: 成功缓存的模板数量
+        """
+        _加载视觉库()
+        return sum(1 for 名称 in 名称列表 if self._获取模板(名称, 模板路径字典, 类型) is not None)
+
+    def 更新模板(self, 名称集合: Any, 模板路径字典: Dict[str, str], 类型: str) -> int:
+        """
+        配置变更后重新读取指定模板：先读完新图像再逐项替换缓存，
+        检测线程只会看到旧模板或新模板；路径被移除的模板从缓存删除
+        
+        返回:
+            int: 成功读取的模板数量
+        """
+        _加载视觉库()
+        数量 = 0
+        for 名称 in 名称集合:
+            缓存Key = f"{类型}_{名称}"
+            模板路径 = 模板路径字典.get(名称)
+            模板 = cv2.imread(模板路径) if 模板路径 else None
+            if 模板 is None:
+                if 模板路径:
+                    self.日志.警告(f"无法加载{类型}模板: {名称} -> {模板路径}")
+                self.模板缓存.删除(缓存Key)
+                continue
+            self.模板缓存.设置(缓存Key, 模板)
+            数量 += 1
+        return 数量
+
+    def _获取模板(self, 名称: str, 模板路径字典: Dict[str, str], 类型: str) -> Optional[Any]:
+        """读取模板（带缓存），路径缺失或读取失败返回None"""
+        缓存Key = f"{类型}_{名称}"
+        模板 = self.模板缓存.获取(缓存Key)
+        if 模板 is not None:
+            return 模板
+        
+        模板路径 = 模板路径字典.get(名称)
+        if not 模板路径:
+            return None
+        
+        模板 = cv2.imread(模板路径)
+        if 模板 is None:
+            self.日志.警告(f"无法加载{类型}模板: {名称} -> {模板路径}")
+            return None
+        self.模板缓存.设置(缓存Key, 模板)
+        return 模板
+
     def _检测图标(self, 区域: Tuple[int, int, int, int], 名称列表: List[str], 模板路径字典: Dict[str, str], 类型: str) -> List[str]:
         """
         通用的图标检测逻辑
         """
-        已发现列表 = []
         if not 区域:
-            return 已发现列表
-            
-        截图 = self.图像接口.获取屏幕区域(区域)
+            return []
+        return self.匹配图标(self.图像接口.获取屏幕区域(区域), 名称列表, 模板路径字典, 类型)
+    
+    def 匹配图标(self, 截图: Any, 名称列表: List[str], 模板路径字典: Dict[str, str], 类型: str) -> List[str]:
+        """
+        在已截取的图像中匹配图标模板（检测图中与截图节点分开执行）
+        
+        参数:
+            截图: Buff/Debuff区域图像，None表示截图失败
+            名称列表: 关注的图标名称
+            模板路径字典: {名称: 模板路径}
+            类型: Buff / Debuff
+        """
+        已发现列表 = []
         if 截图 is None or 截图.size == 0:
             return 已发现列表
+        
+        _加载视觉库()
             
         for 名称 in 名称列表:
-            模板路径 = 模板路径字典.get(名称)
-            if not 模板路径:
+            模板 = self._获取模板(名称, 模板路径字典, 类型)
+            if 模板 is None:
                 continue
-                
-            # 缓存模板
-            缓存Key = f"{类型}_{名称}"
-            if 缓存Key not in self.Buff模板缓存: # 统称缓存
-                模板 = cv2.imread(模板路径)
-                if 模板 is None:
-                    self.日志.警告(f"无法加载{类型}模板: {名称} -> {模板路径}")
-                    continue
-                self.Buff模板缓存[缓存Key] = 模板
-            
-            模板 = self.Buff模板缓存[缓存Key]
             
             # 模板匹配
             try:
@@ -2,7 +2,7 @@
 可插拔的策略接口
 支持运行时策略切换和扩展
 """
-from typing import Dict, Any, List, Protocol, Tuple, Optional
+from typing import Dict, Any, List, Mapping, Protocol, Tuple, Optional
 from abc import ABC, abstractmethod
 from enum import Enum
 from utils.时间戳优化器 import 获取优化时间
@@ -13,6 +13,11 @@ if TYPE_CHECKING:
     from core.状态监测器 import 状态监测器
 
 
+def _区域有效(区域: Any) -> bool:
+    """区域已配置且宽高为正"""
+    return bool(区域) and len(区域) == 4 and 区域[2] > 0 and 区域[3] > 0
+
+
 class 循环模式(Enum):
     """技能循环模式枚举"""
     默认循环 = 1
@@ -46,15 +51,16 @@ class 策略上下文:
     """策略执行上下文（性能优化版）"""
     
     def __init__(self, 技能状态检测器: Any, 图像获取接口: Any, 状态监测器: Any, 
-                技能字典: Dict[str, Any], 气劲字典: Dict[str, Any], 蓝条配置: Dict[str, Any], 
+                技能字典: Mapping[str, Any], 气劲字典: Mapping[str, Any], 蓝条配置: Mapping[str, Any], 
                 检测区域: Tuple[int, int, int, int], 七情和合状态: int,
-                目标状态配置: Optional[Dict[str, Any]] = None) -> None:
+                目标状态配置: Optional[Dict[str, Any]] = None, 帧时间戳: Optional[Any] = None,
+                服务质量: Optional[Any] = None) -> None:
         # 使用弱引用避免循环引用
         self.技能状态检测器 = 技能状态检测器
         self.图像获取接口 = 图像获取接口
         self.状态监测器 = 状态监测器
         
-        # 懒加载数据：仅在需要时创建副本
+        # 配置来自不可变快照，直接共享引用，无需每拍复制
         self._技能字典 = 技能字典
         self._气劲字典 = 气劲字典
         self._蓝条配置 = 蓝条配置
@@ -62,6 +68,12 @@ class 策略上下文:
         self.七情和合状态 = 七情和合状态
         self.目标状态配置 = 目标状态配置 or {}
         
+        # 本拍时间快照：上下文内的时间判断直接读取该字段
+        self.帧时间戳 = 帧时间戳
+        
+        # 服务质量管理器：蓝条探测、Buff/Debuff检测受每拍预算约束，被跳过时沿用上次结果
+        self.服务质量 = 服务质量
+        
         # 缓存图像，避免重复获取
         self._缓存图像 = None
         self._缓存时间 = 0
@@ -72,47 +84,42 @@ class 策略上下文:
         self._目标Buffs = None
         self._目标Debuffs = None
         
-        # 性能优化：懒加载数据副本
-        self._技能字典副本 = None
-        self._气劲字典副本 = None
-        self._蓝条配置副本 = None
+        # 本拍的检测图运行（投机预取的截图、HP估算、Buff/Debuff检测）
+        self._检测运行 = None
+        self.预取使用次数 = 0
         
         # 使用统计
         self._图像获取次数 = 0
         self._字典访问次数 = 0
     
     @property
-    def 技能字典(self) -> Dict[str, Any]:
-        """懒加载技能字典副本"""
+    def 技能字典(self) -> Mapping[str, Any]:
+        """技能配置（只读）"""
         self._字典访问次数 += 1
-        if self._技能字典副本 is None:
-            # 仅在需要时创建副本
-            self._技能字典副本 = self._技能字典.copy()
-        return self._技能字典副本
+        return self._技能字典
     
     @property
-    def 气劲字典(self) -> Dict[str, Any]:
-        """懒加载气劲字典副本"""
+    def 气劲字典(self) -> Mapping[str, Any]:
+        """气劲配置（只读）"""
         self._字典访问次数 += 1
-        if self._气劲字典副本 is None:
-            self._气劲字典副本 = self._气劲字典.copy()
-        return self._气劲字典副本
+        return self._气劲字典
     
     @property
-    def 蓝条配置(self) -> Dict[str, Any]:
-        """懒加载蓝条配置副本"""
+    def 蓝条配置(self) -> Mapping[str, Any]:
+        """蓝条监控配置（只读）"""
         self._字典访问次数 += 1
-        if self._蓝条配置副本 is None:
-            self._蓝条配置副本 = self._蓝条配置.copy()
-        return self._蓝条配置副本
+        return self._蓝条配置
     
     def 获取屏幕图像(self) -> Any:
         """获取屏幕图像（带缓存优化）"""
         self._图像获取次数 += 1
-        当前时间 = 获取优化时间()
+        当前时间 = self.帧时间戳.秒 if self.帧时间戳 is not None else 获取优化时间()
         
         # 优化缓存策略
-        if (self._缓存图像 is None or 
+        if self._缓存图像 is None and self._有预取("检测区域图像"):
+            self._缓存图像 = self._检测运行.结果("检测区域图像")
+            self._缓存时间 = 当前时间
+        elif (self._缓存图像 is None or 
             (当前时间 - self._缓存时间) > self.缓存有效期 or
             self._图像获取次数 % 3 == 0):  # 每3次强制刷新一次
             self._缓存图像 = self.图像获取接口.获取屏幕区域(self.检测区域)
@@ -120,6 +127,11 @@ class 策略上下文:
         
         return self._缓存图像
     
+    @property
+    def 截图失败(self) -> bool:
+        """本帧是否尝试过截图但未获取到图像"""
+        return self._图像获取次数 > 0 and self._缓存图像 is None
+    
     def 获取性能统计(self) -> Dict[str, Any]:
         """获取上下文性能统计"""
         return {
@@ -134,44 +146,109 @@ class 策略上下文:
         self._图像获取次数 = 0
         self._字典访问次数 = 0
 
+    def 判断蓝量状态(self, 图片: Any) -> int:
+        """判断蓝量是否充足（受服务质量预算约束）"""
+        if self.服务质量 is None:
+            return self.技能状态检测器.判断蓝量状态(图片, self._蓝条配置)
+        return self.服务质量.执行("蓝条探测", self.技能状态检测器.判断蓝量状态, 图片, self._蓝条配置, 默认=1)
+    
+    def 需要的检测(self) -> List[str]:
+        """
+        本拍按目标状态配置可以预取的检测输出（检测图节点名称）
+        
+        返回:
+            list: 检测区域图像及已配置的目标HP、目标Buffs、目标Debuffs
+        """
+        配置 = self.目标状态配置
+        输出 = ["检测区域图像"]
+        if _区域有效(配置.get("血条区域")) and 配置.get("血条颜色阈值"):
+            输出.append("目标HP")
+        if _区域有效(配置.get("Buff区域")) and 配置.get("关注Buff列表"):
+            输出.append("目标Buffs")
+        if _区域有效(配置.get("Debuff区域")) and 配置.get("关注Debuff列表"):
+            输出.append("目标Debuffs")
+        return 输出
+    
+    def 绑定检测运行(self, 运行: Any):
+        """
+        绑定本拍的检测图运行：属性首次被访问时等待对应节点的结果，
+        未被访问的节点由丢弃预取()取消
+        
+        参数:
+            运行: 检测图执行器.启动()返回的检测运行
+        """
+        self._检测运行 = 运行
+    
+    def 丢弃预取(self) -> int:
+        """
+        取消本拍检测图中尚未开始的节点（运行中的节点执行完毕后结果被忽略）
+        
+        返回:
+            int: 取消的节点数量
+        """
+        运行, self._检测运行 = self._检测运行, None
+        return 运行.取消() if 运行 is not None else 0
+    
+    def _有预取(self, 名称: str) -> bool:
+        return self._检测运行 is not None and self._检测运行.包含(名称)
+    
+    def _取结果(self, 名称: str, 计算函数: Any) -> Any:
+        """检测运行包含该节点时等待其结果，否则在当前线程计算"""
+        if self._有预取(名称):
+            self.预取使用次数 += 1
+            return self._检测运行.结果(名称)
+        return 计算函数()
+    
+    def _计算目标HP(self) -> float:
+        血条区域 = self.目标状态配置.get("血条区域")
+        颜色阈值 = self.目标状态配置.get("血条颜色阈值")
+        if hasattr(self.状态监测器, '获取目标HP百分比'):
+            return self.状态监测器.获取目标HP百分比(血条区域, 颜色阈值)
+        return 1.0  # 默认满血
+    
+    def _计算目标Buffs(self) -> List[str]:
+        Buff区域 = self.目标状态配置.get("Buff区域")
+        Buff名称列表 = self.目标状态配置.get("关注Buff列表", [])
+        模板路径字典 = self.目标状态配置.get("Buff模板路径", {})
+        if hasattr(self.状态监测器, '检测Buff状态'):
+            return self._执行工作("Buff检测", self.状态监测器.检测Buff状态, Buff区域, Buff名称列表, 模板路径字典)
+        return []
+    
+    def _计算目标Debuffs(self) -> List[str]:
+        Debuff区域 = self.目标状态配置.get("Debuff区域")
+        Debuff名称列表 = self.目标状态配置.get("关注Debuff列表", [])
+        模板路径字典 = self.目标状态配置.get("Debuff模板路径", {})
+        if hasattr(self.状态监测器, '检测Debuff状态'):
+            return self._执行工作("Debuff检测", self.状态监测器.检测Debuff状态, Debuff区域, Debuff名称列表, 模板路径字典)
+        return []
+    
     @property
     def 目标HP(self) -> float:
-        """获取目标HP百分比（懒加载）"""
+        """获取目标HP百分比（懒加载，有预取时等待预取结果）"""
         if self._目标HP is None:
-            血条区域 = self.目标状态配置.get("血条区域")
-            颜色阈值 = self.目标状态配置.get("血条颜色阈值")
-            if hasattr(self.状态监测器, '获取目标HP百分比'):
-                self._目标HP = self.状态监测器.获取目标HP百分比(血条区域, 颜色阈值)
-            else:
-                self._目标HP = 1.0 # 默认满血
+            self._目标HP = self._取结果("目标HP", self._计算目标HP)
         return self._目标HP
 
     @property
     def 目标Buffs(self) -> List[str]:
-        """获取目标Buff列表（懒加载）"""
+        """获取目标Buff列表（懒加载，有预取时等待预取结果）"""
         if self._目标Buffs is None:
-            Buff区域 = self.目标状态配置.get("Buff区域")
-            Buff名称列表 = self.目标状态配置.get("关注Buff列表", [])
-            模板路径字典 = self.目标状态配置.get("Buff模板路径", {})
-            if hasattr(self.状态监测器, '检测Buff状态'):
-                self._目标Buffs = self.状态监测器.检测Buff状态(Buff区域, Buff名称列表, 模板路径字典)
-            else:
-                self._目标Buffs = []
+            self._目标Buffs = self._取结果("目标Buffs", self._计算目标Buffs)
         return self._目标Buffs
 
     @property
     def 目标Debuffs(self) -> List[str]:
-        """获取目标Debuff列表（懒加载）"""
+        """获取目标Debuff列表（懒加载，有预取时等待预取结果）"""
         if self._目标Debuffs is None:
-            Debuff区域 = self.目标状态配置.get("Debuff区域")
-            Debuff名称列表 = self.目标状态配置.get("关注Debuff列表", [])
-            模板路径字典 = self.目标状态配置.get("Debuff模板路径", {})
-            if hasattr(self.状态监测器, '检测Debuff状态'):
-                self._目标Debuffs = self.状态监测器.检测Debuff状态(Debuff区域, Debuff名称列表, 模板路径字典)
-            else:
-                self._目标Debuffs = []
+            self._目标Debuffs = self._取结果("目标Debuffs", self._计算目标Debuffs)
         return self._目标Debuffs
 
+    def _执行工作(self, 名称: str, 函数: Any, *参数) -> List[str]:
+        """执行图标检测工作单元，无服务质量管理器时直接执行"""
+        if self.服务质量 is None:
+            return 函数(*参数)
+        return self.服务质量.执行(名称, 函数, *参数, 默认=[])
+    
     @property
     def 可驱散Debuff列表(self) -> List[str]:
         """获取可驱散Debuff列表"""
@@ -219,7 +296,7 @@ class 默认循环策略(抽象策略):
         图片 = 上下文.获取屏幕图像()
         
         # 判断当前蓝量
-        蓝量 = 上下文.技能状态检测器.判断蓝量状态(图片, 上下文.蓝条配置)
+        蓝量 = 上下文.判断蓝量状态(图片)
         
         # 判断千枝气劲状态
         千枝开启 = 上下文.技能状态检测器.判断气劲状态(图片, 上下文.气劲字典.get("千枝状态"))
@@ -339,7 +416,7 @@ class 驱散循环策略(抽象策略):
         图片 = 上下文.获取屏幕图像()
         
         # 判断当前蓝量
-        蓝量 = 上下文.技能状态检测器.判断蓝量状态(图片, 上下文.蓝条配置)
+        蓝量 = 上下文.判断蓝量状态(图片)
         
         # 判断千枝气劲状态
         千枝开启 = 上下文.技能状态检测器.判断气劲状态(图片, 上下文.气劲字典.get("千枝状态"))
@@ -165,7 +165,7 @@ class 幽灵盒子按键接口(按键操作接口):
             
             # 添加智能按键延迟
             if 按键延迟 > 0:
-                实际延迟 = 智能延迟(按键延迟)
+                实际延迟 = 智能延迟(按键延迟, 通道="按键")
                 self.logger.debug(f"智能延迟: {实际延迟:.3f}秒 (预期: {按键延迟:.3f}秒)")
             
             return True
@@ -200,7 +200,7 @@ class 幽灵盒子按键接口(按键操作接口):
             
             # 添加智能按键延迟
             if 按键延迟 > 0:
-                实际延迟 = 智能延迟(按键延迟)
+                实际延迟 = 智能延迟(按键延迟, 通道="按键")
                 self.logger.debug(f"智能延迟: {实际延迟:.3f}秒 (预期: {按键延迟:.3f}秒)")
             
             return True
@@ -236,7 +236,7 @@ class 幽灵盒子按键接口(按键操作接口):
             
             # 添加智能延迟
             if 移动延迟 > 0:
-                实际延迟 = 智能延迟(移动延迟)
+                实际延迟 = 智能延迟(移动延迟, 通道="鼠标")
                 self.logger.debug(f"智能延迟: {实际延迟:.3f}秒 (预期: {移动延迟:.3f}秒)")
             
             return True
@@ -271,7 +271,7 @@ class 幽灵盒子按键接口(按键操作接口):
             
             # 添加智能延迟
             if 点击延迟 > 0:
-                实际延迟 = 智能延迟(点击延迟)
+                实际延迟 = 智能延迟(点击延迟, 通道="鼠标")
                 self.logger.debug(f"智能延迟: {实际延迟:.3f}秒 (预期: {点击延迟:.3f}秒)")
             
             return True
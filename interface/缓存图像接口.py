@@ -0,0 +1,66 @@
+"""
+带区域缓存的图像获取接口
+包装任意图像获取接口：同一帧内被已截取区域包含的请求直接返回切片视图，
+只有未被覆盖的区域才交给后端截图
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+from interface.图像获取接口 import 图像获取接口
+from utils.图像缓存 import 图像缓存管理器
+from utils.时间戳优化器 import 全局时钟
+
+
+class 缓存图像接口(图像获取接口):
+    """
+    区域缓存图像接口
+    以全局时钟的帧序号作为采集代，上一帧的图像不会在下一帧命中
+    """
+
+    def __init__(self, 后端: 图像获取接口, 缓存时间: float = 0.05, 最大缓存大小: int = 8,
+                 截图失败回调: Optional[Callable[[], None]] = None):
+        """
+        初始化区域缓存图像接口
+
+        参数:
+            后端: 实际截图的图像获取接口
+            缓存时间: 同一帧内图像的最长复用时间（秒），引擎暂停时避免返回旧图像
+            最大缓存大小: 最多缓存的区域图像数量
+            截图失败回调: 可选，后端截图返回None时调用（可能在检测线程上调用，需自行限流）
+        """
+        self.后端 = 后端
+        self.截图失败回调 = 截图失败回调
+        self.缓存管理器 = 图像缓存管理器(最大缓存大小, 缓存时间, 启用智能缓存=False,
+                               自适应调整=False, 名称="区域图像缓存")
+
+    @property
+    def 缓存(self):
+        """底层缓存（用于注册到统一缓存管理器）"""
+        return self.缓存管理器.缓存
+
+    def 获取屏幕区域(self, 区域: Tuple[int, int, int, int]) -> Any:
+        """
+        获取指定屏幕区域的图像（可能是本帧已截取图像的只读视图）
+
+        参数:
+            区域: (x, y, width, height) 屏幕区域坐标
+
+        返回:
+            图像对象，失败返回None
+        """
+        return self.缓存管理器.获取区域图像(tuple(区域), self._后端截图, 全局时钟.帧序号)
+
+    def _后端截图(self, 区域: Tuple[int, int, int, int]) -> Any:
+        """由后端截图，失败时通知回调（失败结果不进入缓存，每次重试都会通知）"""
+        图像 = self.后端.获取屏幕区域(区域)
+        if 图像 is None and self.截图失败回调 is not None:
+            self.截图失败回调()
+        return 图像
+
+    def 清除缓存(self):
+        """清除已缓存的区域图像"""
+        self.缓存管理器.清除缓存()
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取区域缓存统计信息"""
+        统计 = self.缓存管理器.获取统计信息()
+        统计["后端截图次数"] = 统计["未命中次数"]
+        return 统计
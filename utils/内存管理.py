@@ -10,7 +10,8 @@ from typing import Dict, Any, List, Optional
 from collections import defaultdict, deque
 import weakref
 import math
-from utils.自适应延迟 import 智能延迟
+from utils.后台调度器 import 全局调度器
+from utils.服务注册表 import 全局服务注册表
 
 
 class 内存监控器:
@@ -55,19 +56,26 @@ class 内存监控器:
         self._清理优先级 = "低"  # 可选：低、中、高
         self._启用安全模式 = True  # 启用安全模式，避免影响主循环
         
-        # 启动监控线程
-        self._监控线程 = threading.Thread(target=self._监控循环, daemon=True)
-        self._监控线程.start()
+        # 注册到后台调度器（引擎空闲窗口或调度线程中执行）
+        self._调度任务名 = 全局调度器.生成任务名("内存监控")
+        self.开始监控()
     
-    def _监控循环(self):
-        """内存监控循环"""
-        while True:
-            try:
-                智能延迟(self._监控间隔)  # 使用智能延迟替代硬编码sleep
-                self._检查内存使用()
-                self._清理无效引用()
-            except Exception as e:
-                print(f"内存监控错误: {e}")
+    def _执行监控(self):
+        """执行一次内存监控（由后台调度器周期调用）"""
+        try:
+            self._检查内存使用()
+            self._清理无效引用()
+        except Exception as e:
+            print(f"内存监控错误: {e}")
+    
+    def 开始监控(self):
+        """开始周期内存监控（已在监控时忽略）"""
+        if not 全局调度器.是否已注册(self._调度任务名):
+            全局调度器.注册周期任务(self._调度任务名, self._执行监控, self._监控间隔, 优先级=3)
+    
+    def 停止监控(self):
+        """停止周期内存监控"""
+        全局调度器.取消任务(self._调度任务名)
     
     def _检查内存使用(self):
         """检查内存使用情况"""
@@ -355,6 +363,9 @@ class 内存监控器:
         with self._锁:
             if 监控间隔 is not None:
                 self._监控间隔 = 监控间隔
+                # 监控中时以新周期替换调度任务（同名注册会替换原任务）
+                if 全局调度器.是否已注册(self._调度任务名):
+                    全局调度器.注册周期任务(self._调度任务名, self._执行监控, 监控间隔, 优先级=3)
             if 内存阈值 is not None:
                 self._内存阈值 = 内存阈值
     
@@ -423,39 +434,46 @@ class 引用计数管理器:
             return 潜在泄漏
 
 
-# 全局内存监控器实例
-全局内存监控器 = 内存监控器()
+# 全局内存监控器（首次使用或引擎启动时创建）
+全局服务注册表.注册("内存监控器", 内存监控器,
+              启动=lambda 实例: 实例.开始监控(), 停止=lambda 实例: 实例.停止监控(), 随引擎启动=True)
+__getattr__ = 全局服务注册表.模块属性({"全局内存监控器": "内存监控器"})
+
+
+def _全局内存监控器() -> 内存监控器:
+    """获取全局内存监控器"""
+    return 全局服务注册表.获取("内存监控器")
 
 
 # 内存管理工具函数
 def 启用内存监控(监控间隔: float = 5.0, 内存阈值: float = 0.8):
     """启用全局内存监控"""
-    全局内存监控器.设置监控配置(监控间隔, 内存阈值)
+    _全局内存监控器().设置监控配置(监控间隔, 内存阈值)
 
 
 def 设置内存安全配置(清理时间窗口: float = 0.1, 清理优先级: str = "低", 启用安全模式: bool = True):
     """设置内存安全配置"""
-    全局内存监控器.设置安全配置(清理时间窗口, 清理优先级, 启用安全模式)
+    _全局内存监控器().设置安全配置(清理时间窗口, 清理优先级, 启用安全模式)
 
 
 def 获取内存统计() -> Dict[str, Any]:
     """获取内存统计信息"""
-    return 全局内存监控器.获取内存统计()
+    return _全局内存监控器().获取内存统计()
 
 
 def 获取安全配置() -> Dict[str, Any]:
     """获取当前安全配置"""
-    return 全局内存监控器.获取安全配置()
+    return _全局内存监控器().获取安全配置()
 
 
 def 跟踪对象(对象标识: str, 对象):
     """跟踪对象引用"""
-    全局内存监控器.跟踪对象引用(对象标识, 对象)
+    _全局内存监控器().跟踪对象引用(对象标识, 对象)
 
 
 def 强制内存清理():
     """强制执行内存清理"""
-    全局内存监控器.强制内存优化()
+    _全局内存监控器().强制内存优化()
 
 
 # 使用示例
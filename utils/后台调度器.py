@@ -0,0 +1,450 @@
+"""
+后台调度器
+统一的后台维护任务调度：哈希时间轮管理周期任务与延迟任务，按优先级执行；
+引擎运行时由引擎在两拍之间的空闲窗口驱动，引擎停止时由单个后台线程驱动，
+并统计每个任务的执行耗时
+"""
+import time
+import heapq
+import threading
+import itertools
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+
+@dataclass
+class 调度任务:
+    """一个周期任务或一次性延迟任务"""
+    名称: str
+    函数: Callable[[], Any]
+    周期纳秒: Optional[int]
+    优先级: int
+    到期纳秒: int
+    剩余轮数: int = 0
+    版本: int = 0
+    已取消: bool = False
+
+    # 统计信息
+    执行次数: int = 0
+    错误次数: int = 0
+    总耗时纳秒: int = 0
+    平均耗时纳秒: float = 0.0
+    最大耗时纳秒: int = 0
+    最大迟到纳秒: int = 0
+
+
+class 后台调度器:
+    """
+    后台调度器
+    优先级数值越小越优先；同优先级按到期时间先后执行
+    """
+
+    def __init__(self, 刻度: float = 0.05, 槽数: int = 256, 饥饿阈值: float = 5.0,
+                 耗时平滑系数: float = 0.2):
+        """
+        初始化后台调度器
+
+        参数:
+            刻度: 时间轮每格时长（秒）
+            槽数: 时间轮槽数
+            饥饿阈值: 任务超过到期时间该时长后，若引擎空闲窗口仍不够，则移交后台线程执行（秒）
+            耗时平滑系数: 任务耗时EWMA平滑系数
+        """
+        self._刻度纳秒 = int(刻度 * 1e9)
+        self._槽数 = 槽数
+        self._槽: List[List[Tuple[调度任务, int]]] = [[] for _ in range(槽数)]
+        self._起点 = time.perf_counter_ns()
+        self._已处理刻度 = 0
+        self._饥饿阈值纳秒 = int(饥饿阈值 * 1e9)
+        self._耗时平滑系数 = 耗时平滑系数
+
+        self._任务: Dict[str, 调度任务] = {}
+        self._就绪堆: List[Tuple[int, int, int, 调度任务, int]] = []
+        self._序号 = itertools.count()
+        self._锁 = threading.RLock()
+        self._执行锁 = threading.Lock()
+
+        # 驱动方式：引擎接管时后台线程阻塞等待，只在有饥饿任务移交时被唤醒
+        self._已接管 = False
+        self._移交请求 = False
+        self._自驱事件 = threading.Event()
+        self._自驱事件.set()
+        self._唤醒事件 = threading.Event()
+        self._停止事件 = threading.Event()
+        self._线程: Optional[threading.Thread] = None
+
+        # 统计信息
+        self._空闲窗口次数 = 0
+        self._窗口不足次数 = 0
+        self._饥饿移交次数 = 0
+
+    # ---------- 任务注册 ----------
+
+    def 注册周期任务(self, 名称: str, 函数: Callable[[], Any], 周期: float,
+                   优先级: int = 5, 首次延迟: Optional[float] = None) -> str:
+        """
+        注册周期任务（同名任务会被替换）
+
+        参数:
+            名称: 任务名称
+            函数: 无参任务函数
+            周期: 执行周期（秒）
+            优先级: 优先级，数值越小越优先
+            首次延迟: 首次执行前的延迟（秒），None表示一个周期后
+
+        返回:
+            str: 任务名称
+        """
+        首次 = 周期 if 首次延迟 is None else 首次延迟
+        任务 = 调度任务(
+            名称=名称,
+            函数=函数,
+            周期纳秒=int(周期 * 1e9),
+            优先级=优先级,
+            到期纳秒=time.perf_counter_ns() + int(首次 * 1e9)
+        )
+        self._添加任务(任务)
+        return 名称
+
+    def 延迟执行(self, 名称: str, 函数: Callable[[], Any], 延迟: float, 优先级: int = 5) -> str:
+        """
+        注册一次性延迟任务
+
+        参数:
+            名称: 任务名称
+            函数: 无参任务函数
+            延迟: 延迟时间（秒）
+            优先级: 优先级，数值越小越优先
+
+        返回:
+            str: 任务名称
+        """
+        任务 = 调度任务(
+            名称=名称,
+            函数=函数,
+            周期纳秒=None,
+            优先级=优先级,
+            到期纳秒=time.perf_counter_ns() + int(延迟 * 1e9)
+        )
+        self._添加任务(任务)
+        return 名称
+
+    def _添加任务(self, 任务: 调度任务):
+        """添加任务并确保驱动线程已启动"""
+        with self._锁:
+            旧任务 = self._任务.get(任务.名称)
+            if 旧任务 is not None:
+                旧任务.已取消 = True
+            self._任务[任务.名称] = 任务
+            self._放入时间轮(任务)
+        self._确保线程()
+        self._唤醒事件.set()
+
+    def 取消任务(self, 名称: str) -> bool:
+        """取消任务（时间轮与就绪队列中的条目惰性丢弃）"""
+        with self._锁:
+            任务 = self._任务.pop(名称, None)
+            if 任务 is None:
+                return False
+            任务.已取消 = True
+            return True
+
+    def 立即调度(self, 名称: str) -> bool:
+        """将任务提前到当前时刻执行（周期不变）"""
+        with self._锁:
+            任务 = self._任务.get(名称)
+            if 任务 is None:
+                return False
+            任务.版本 += 1
+            任务.到期纳秒 = time.perf_counter_ns()
+            self._放入就绪堆(任务)
+        self._唤醒事件.set()
+        return True
+
+    def 是否已注册(self, 名称: str) -> bool:
+        """判断任务是否已注册"""
+        return 名称 in self._任务
+
+    def 生成任务名(self, 前缀: str) -> str:
+        """生成未被占用的任务名（同类组件有多个实例时使用）"""
+        with self._锁:
+            if 前缀 not in self._任务:
+                return 前缀
+            for 序号 in itertools.count(2):
+                名称 = f"{前缀}#{序号}"
+                if 名称 not in self._任务:
+                    return 名称
+
+    # ---------- 时间轮 ----------
+
+    def _放入时间轮(self, 任务: 调度任务):
+        """按到期时间放入时间轮；已到期则直接进入就绪队列"""
+        绝对刻度 = -(-(任务.到期纳秒 - self._起点) // self._刻度纳秒)
+        相对刻度 = 绝对刻度 - self._已处理刻度
+        if 相对刻度 <= 0:
+            self._放入就绪堆(任务)
+            return
+        任务.剩余轮数 = (相对刻度 - 1) // self._槽数
+        self._槽[绝对刻度 % self._槽数].append((任务, 任务.版本))
+
+    def _放入就绪堆(self, 任务: 调度任务):
+        """放入按优先级排序的就绪队列"""
+        heapq.heappush(self._就绪堆, (任务.优先级, 任务.到期纳秒, next(self._序号), 任务, 任务.版本))
+
+    def _推进时间轮(self, 当前纳秒: int):
+        """把时间轮推进到当前时刻，到期任务移入就绪队列"""
+        目标刻度 = (当前纳秒 - self._起点) // self._刻度纳秒
+        跨度 = 目标刻度 - self._已处理刻度
+        if 跨度 <= 0:
+            return
+
+        if 跨度 >= self._槽数:
+            # 跨越超过一圈：直接按到期时间重新分桶
+            条目列表 = [条目 for 槽 in self._槽 for 条目 in 槽]
+            for 槽 in self._槽:
+                槽.clear()
+            self._已处理刻度 = 目标刻度
+            for 任务, 版本 in 条目列表:
+                if not 任务.已取消 and 版本 == 任务.版本:
+                    self._放入时间轮(任务)
+            return
+
+        for 刻度 in range(self._已处理刻度 + 1, 目标刻度 + 1):
+            槽 = self._槽[刻度 % self._槽数]
+            if not 槽:
+                continue
+            保留 = []
+            for 任务, 版本 in 槽:
+                if 任务.已取消 or 版本 != 任务.版本:
+                    continue
+                if 任务.剩余轮数 > 0:
+                    任务.剩余轮数 -= 1
+                    保留.append((任务, 版本))
+                else:
+                    self._放入就绪堆(任务)
+            槽[:] = 保留
+        self._已处理刻度 = 目标刻度
+
+    def _最近到期纳秒(self) -> Optional[int]:
+        """最近一个待执行任务的到期时间"""
+        with self._锁:
+            if self._就绪堆:
+                return time.perf_counter_ns()
+            到期列表 = [任务.到期纳秒 for 任务 in self._任务.values() if not 任务.已取消]
+            if not 到期列表:
+                return None
+            # 时间轮按刻度推进，对齐到刻度边界，避免在刻度内空转
+            刻度数 = -(-(min(到期列表) - self._起点) // self._刻度纳秒)
+            return self._起点 + 刻度数 * self._刻度纳秒
+
+    # ---------- 执行 ----------
+
+    def 运行空闲任务(self, 截止纳秒: Optional[int] = None) -> int:
+        """
+        在空闲窗口内执行到期任务
+
+        参数:
+            截止纳秒: 窗口结束时刻（time.perf_counter_ns时钟），None表示不限时
+
+        返回:
+            int: 本次执行的任务数量
+        """
+        if not self._执行锁.acquire(blocking=False):
+            return 0
+
+        执行数量 = 0
+        try:
+            self._空闲窗口次数 += 1
+            while True:
+                with self._锁:
+                    当前 = time.perf_counter_ns()
+                    self._推进时间轮(当前)
+                    任务 = self._取出可执行任务(当前, 截止纳秒)
+                if 任务 is None:
+                    break
+                self._执行任务(任务, 当前)
+                执行数量 += 1
+        finally:
+            self._执行锁.release()
+        return 执行数量
+
+    def _取出可执行任务(self, 当前纳秒: int, 截止纳秒: Optional[int]) -> Optional[调度任务]:
+        """从就绪队列取出下一个可在窗口内执行的任务（窗口不足时只记录，饥饿任务移交后台线程）"""
+        while self._就绪堆:
+            _, _, _, 任务, 版本 = self._就绪堆[0]
+            if 任务.已取消 or 版本 != 任务.版本:
+                heapq.heappop(self._就绪堆)
+                continue
+
+            if 截止纳秒 is not None and 当前纳秒 + 任务.平均耗时纳秒 > 截止纳秒:
+                # 窗口不足：任务留在就绪队列；已饥饿的交给后台线程，不越过引擎的帧截止时间
+                self._窗口不足次数 += 1
+                if 当前纳秒 - 任务.到期纳秒 > self._饥饿阈值纳秒:
+                    self._请求移交()
+                return None
+
+            heapq.heappop(self._就绪堆)
+            return 任务
+        return None
+
+    def _请求移交(self):
+        """（持有锁）唤醒后台线程执行饥饿任务"""
+        if not self._移交请求:
+            self._移交请求 = True
+            self._确保线程()
+            self._自驱事件.set()
+
+    def _运行饥饿任务(self) -> int:
+        """在后台线程上执行就绪队列头部的饥饿任务（引擎接管期间，只执行已饥饿的任务）"""
+        执行数量 = 0
+        with self._执行锁:
+            while True:
+                with self._锁:
+                    当前 = time.perf_counter_ns()
+                    self._推进时间轮(当前)
+                    任务 = None
+                    while self._就绪堆:
+                        _, _, _, 候选, 版本 = self._就绪堆[0]
+                        if 候选.已取消 or 版本 != 候选.版本:
+                            heapq.heappop(self._就绪堆)
+                            continue
+                        if 当前 - 候选.到期纳秒 > self._饥饿阈值纳秒:
+                            任务 = heapq.heappop(self._就绪堆)[3]
+                        break
+                if 任务 is None:
+                    break
+                self._饥饿移交次数 += 1
+                self._执行任务(任务, 当前)
+                执行数量 += 1
+        return 执行数量
+
+    def _执行任务(self, 任务: 调度任务, 当前纳秒: int):
+        """执行任务并更新统计，周期任务重新放入时间轮"""
+        迟到 = 当前纳秒 - 任务.到期纳秒
+        开始 = time.perf_counter_ns()
+        try:
+            任务.函数()
+        except Exception as e:
+            任务.错误次数 += 1
+            print(f"后台任务 {任务.名称} 执行失败: {e}")
+        耗时 = time.perf_counter_ns() - 开始
+
+        任务.执行次数 += 1
+        任务.总耗时纳秒 += 耗时
+        任务.最大耗时纳秒 = max(任务.最大耗时纳秒, 耗时)
+        任务.最大迟到纳秒 = max(任务.最大迟到纳秒, 迟到)
+        if 任务.执行次数 == 1:
+            任务.平均耗时纳秒 = float(耗时)
+        else:
+            任务.平均耗时纳秒 += self._耗时平滑系数 * (耗时 - 任务.平均耗时纳秒)
+
+        with self._锁:
+            if 任务.已取消:
+                return
+            if 任务.周期纳秒 is None:
+                if self._任务.get(任务.名称) is 任务:
+                    del self._任务[任务.名称]
+                return
+            # 按原节奏推进，落后太多时从当前时刻重新计时
+            任务.到期纳秒 = max(任务.到期纳秒 + 任务.周期纳秒, time.perf_counter_ns())
+            任务.版本 += 1
+            self._放入时间轮(任务)
+
+    # ---------- 驱动方式 ----------
+
+    def 接管(self):
+        """由引擎在两拍之间驱动调度，后台线程进入零唤醒等待"""
+        self._已接管 = True
+        self._自驱事件.clear()
+
+    def 释放(self):
+        """引擎停止或暂停时交还驱动权，由后台线程驱动调度"""
+        self._已接管 = False
+        self._自驱事件.set()
+        self._唤醒事件.set()
+
+    @property
+    def 已接管(self) -> bool:
+        """是否由引擎驱动"""
+        return self._已接管
+
+    def _确保线程(self):
+        """启动后台驱动线程（仅一个）"""
+        if self._线程 is not None and self._线程.is_alive():
+            return
+        with self._锁:
+            if self._线程 is not None and self._线程.is_alive():
+                return
+            self._停止事件.clear()
+            self._线程 = threading.Thread(target=self._后台驱动循环, name="后台调度器", daemon=True)
+            self._线程.start()
+
+    def _后台驱动循环(self):
+        """引擎未接管时按最近到期时间休眠并执行任务"""
+        while not self._停止事件.is_set():
+            if self._已接管:
+                self._自驱事件.wait()
+                with self._锁:
+                    移交 = self._移交请求 and self._已接管
+                    self._移交请求 = False
+                    if self._已接管:
+                        self._自驱事件.clear()
+                if 移交:
+                    self._运行饥饿任务()
+                continue
+
+            最近到期 = self._最近到期纳秒()
+            if 最近到期 is None:
+                等待秒数 = None
+            else:
+                等待秒数 = max(0.0, (最近到期 - time.perf_counter_ns()) / 1e9)
+
+            if 等待秒数 is None or 等待秒数 > 0:
+                self._唤醒事件.wait(等待秒数)
+            self._唤醒事件.clear()
+
+            if self._停止事件.is_set() or self._已接管:
+                continue
+            self.运行空闲任务(None)
+
+    def 停止(self):
+        """停止后台驱动线程（已注册的任务保留）"""
+        self._停止事件.set()
+        self._自驱事件.set()
+        self._唤醒事件.set()
+
+    # ---------- 统计 ----------
+
+    def 获取任务统计(self) -> Dict[str, Dict[str, Any]]:
+        """获取每个任务的执行统计"""
+        with self._锁:
+            任务列表 = list(self._任务.values())
+        return {
+            任务.名称: {
+                "周期": f"{任务.周期纳秒 / 1e9:g}秒" if 任务.周期纳秒 else "一次性",
+                "优先级": 任务.优先级,
+                "执行次数": 任务.执行次数,
+                "错误次数": 任务.错误次数,
+                "平均耗时": f"{任务.平均耗时纳秒 / 1e6:.3f}ms",
+                "最大耗时": f"{任务.最大耗时纳秒 / 1e6:.3f}ms",
+                "总耗时": f"{任务.总耗时纳秒 / 1e6:.1f}ms",
+                "最大迟到": f"{任务.最大迟到纳秒 / 1e6:.1f}ms",
+                "距到期": f"{(任务.到期纳秒 - time.perf_counter_ns()) / 1e9:.1f}秒"
+            }
+            for 任务 in 任务列表
+        }
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取调度器统计信息"""
+        return {
+            "任务数量": len(self._任务),
+            "驱动方式": "引擎空闲窗口" if self._已接管 else "后台线程",
+            "空闲窗口次数": self._空闲窗口次数,
+            "窗口不足次数": self._窗口不足次数,
+            "饥饿移交次数": self._饥饿移交次数,
+            "任务": self.获取任务统计()
+        }
+
+
+# 全局后台调度器实例
+全局调度器 = 后台调度器()
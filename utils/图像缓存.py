@@ -1,28 +1,29 @@
 """
 图像处理缓存优化模块
-提供图像缓存和增量更新功能
+提供图像缓存和增量更新功能，图像条目按ndarray实际字节数计入缓存预算；
+按区域获取时以(采集代, 区域)建立空间索引，被已缓存区域包含的请求直接返回切片视图
 """
 import time
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import threading
-from dataclasses import dataclass
 from collections import deque
+from utils.缓存框架 import 缓存
 
+_未命中 = object()
 
-@dataclass
-class 缓存条目:
-    """缓存条目数据结构"""
-    图像数据: Any
-    缓存时间: float
-    访问次数: int = 0
-    区域: Optional[Tuple] = None
+
+def 区域包含(外区域: Tuple[int, int, int, int], 内区域: Tuple[int, int, int, int]) -> bool:
+    """判断外区域是否完整包含内区域（区域格式均为(x, y, 宽, 高)）"""
+    外x, 外y, 外宽, 外高 = 外区域
+    内x, 内y, 内宽, 内高 = 内区域
+    return 外x <= 内x and 外y <= 内y and 内x + 内宽 <= 外x + 外宽 and 内y + 内高 <= 外y + 外高
 
 
 class 图像缓存管理器:
     """图像缓存管理器"""
     
     def __init__(self, 最大缓存大小: int = 20, 默认缓存时间: float = 0.05, 
-                 启用智能缓存: bool = True, 自适应调整: bool = True):
+                 启用智能缓存: bool = True, 自适应调整: bool = True, 名称: str = "图像缓存"):
         """
         初始化缓存管理器
         
@@ -31,10 +32,11 @@ class 图像缓存管理器:
             默认缓存时间: 默认缓存有效期（秒）（优化：缩短到50ms）
             启用智能缓存: 是否启用智能缓存策略
             自适应调整: 是否启用自适应调整
+            名称: 注册到统一缓存管理器时使用的名称
         """
-        self._缓存: Dict[str, 缓存条目] = {}
         self._最大缓存大小 = 最大缓存大小
         self._默认缓存时间 = 默认缓存时间
+        self.缓存 = 缓存(名称, 最大条目=最大缓存大小, 默认有效期=默认缓存时间)
         self._锁 = threading.RLock()
         
         # 统计信息
@@ -42,6 +44,12 @@ class 图像缓存管理器:
         self._未命中次数 = 0
         self._清理次数 = 0
         
+        # 区域空间索引：当前采集代已缓存的区域
+        self._当前代 = None
+        self._代区域: List[Tuple[int, int, int, int]] = []
+        self._区域命中次数 = 0
+        self._包含命中次数 = 0
+        
         # 智能缓存配置
         self._启用智能缓存 = 启用智能缓存
         self._自适应调整 = 自适应调整
@@ -72,16 +80,13 @@ class 图像缓存管理器:
         if 缓存时间 is None:
             缓存时间 = self._默认缓存时间
         
-        当前时间 = time.time()
-        
         with self._锁:
             # 检查缓存
-            条目 = self._缓存.get(缓存键)
+            图像数据 = self.缓存.获取(缓存键, _未命中, 最大年龄=缓存时间)
             
-            if 条目 and (当前时间 - 条目.缓存时间) <= 缓存时间:
+            if 图像数据 is not _未命中:
                 # 缓存命中
                 self._命中次数 += 1
-                条目.访问次数 += 1
                 
                 # 记录命中分布
                 self._缓存命中分布[缓存键] = self._缓存命中分布.get(缓存键, 0) + 1
@@ -91,7 +96,7 @@ class 图像缓存管理器:
                     self._更新命中率统计(True)
                     self._自适应调整缓存策略()
                 
-                return 条目.图像数据
+                return 图像数据
             
             # 缓存未命中或过期
             self._未命中次数 += 1
@@ -100,53 +105,96 @@ class 图像缓存管理器:
             if self._启用智能缓存:
                 self._更新命中率统计(False)
             
-            # 获取新图像
+            # 获取新图像（截图失败不缓存）
             图像数据 = 获取函数(区域)
             
-            # 更新缓存
-            self._设置缓存(缓存键, 图像数据, 区域, 当前时间)
+            # 更新缓存：超出条目上限或字节预算时由缓存按LRU淘汰
+            if 图像数据 is not None:
+                self.缓存.设置(缓存键, 图像数据, 缓存时间)
             
             return 图像数据
     
-    def _设置缓存(self, 缓存键: str, 图像数据: Any, 区域: Tuple, 缓存时间: float):
-        """设置缓存条目"""
-        with self._锁:
-            # 检查是否需要清理
-            if len(self._缓存) >= self._最大缓存大小:
-                self._清理过期缓存()
+    def 获取区域图像(self, 区域: Tuple[int, int, int, int], 获取函数: callable, 代: Any = 0,
+                 缓存时间: Optional[float] = None) -> Any:
+        """
+        按区域获取图像（空间索引）
+        同一采集代内，若已缓存区域完整包含请求区域，直接返回其切片视图（不拷贝）；
+        只有未被覆盖的区域才调用获取函数截图
+        
+        参数:
+            区域: (x, y, 宽, 高)
+            获取函数: 截图函数，以区域调用
+            代: 采集代（通常为帧序号），不同代的图像互不命中
+            缓存时间: 缓存有效期（秒），None则使用默认值
             
-            # 添加新条目
-            self._缓存[缓存键] = 缓存条目(
-                图像数据=图像数据,
-                缓存时间=缓存时间,
-                区域=区域
-            )
-    
-    def _清理过期缓存(self):
-        """清理过期缓存"""
-        当前时间 = time.time()
-        过期键值 = []
+        返回:
+            图像数据（可能是缓存图像的只读视图），截图失败返回None
+        """
+        if 缓存时间 is None:
+            缓存时间 = self._默认缓存时间
+        x, y, 宽, 高 = 区域
         
         with self._锁:
-            for 键, 条目 in self._缓存.items():
-                if (当前时间 - 条目.缓存时间) > self._默认缓存时间:
-                    过期键值.append(键)
+            if 代 != self._当前代:
+                # 进入新的采集代，旧代图像不会再命中，立即释放
+                for 旧区域 in self._代区域:
+                    self.缓存.删除((self._当前代, 旧区域))
+                self._当前代 = 代
+                self._代区域 = []
             
-            for 键 in 过期键值:
-                del self._缓存[键]
+            for 已缓存区域 in list(self._代区域):
+                if not 区域包含(已缓存区域, 区域):
+                    continue
+                图像 = self.缓存.获取((代, 已缓存区域), _未命中, 最大年龄=缓存时间)
+                if 图像 is _未命中:
+                    self._代区域.remove(已缓存区域)
+                    continue
+                if 已缓存区域 == 区域:
+                    self._区域命中次数 += 1
+                    self._命中次数 += 1
+                    return 图像
+                if hasattr(图像, 'shape'):
+                    缓存x, 缓存y = 已缓存区域[0], 已缓存区域[1]
+                    self._包含命中次数 += 1
+                    self._命中次数 += 1
+                    return 图像[y - 缓存y:y - 缓存y + 高, x - 缓存x:x - 缓存x + 宽]
             
-            self._清理次数 += len(过期键值)
-            
-            # 如果仍然超过大小，按访问频率清理
-            if len(self._缓存) >= self._最大缓存大小:
-                排序条目 = sorted(self._缓存.items(), key=lambda x: x[1].访问次数)
-                for 键, _ in 排序条目[:len(排序条目) // 2]:
-                    del self._缓存[键]
+            self._未命中次数 += 1
+        
+        # 截图在锁外进行，不阻塞其他区域的读取
+        图像 = 获取函数(区域)
+        if 图像 is None:
+            return None
+        
+        # 视图与缓存共享内存，禁止调用方原地修改
+        try:
+            图像.flags.writeable = False
+        except (AttributeError, ValueError):
+            pass
+        
+        with self._锁:
+            if 代 == self._当前代:
+                # 被新区域包含的旧区域不再需要单独索引
+                被覆盖 = [旧区域 for 旧区域 in self._代区域 if 区域包含(区域, 旧区域)]
+                for 旧区域 in 被覆盖:
+                    self._代区域.remove(旧区域)
+                    self.缓存.删除((代, 旧区域))
+                self._代区域.append(区域)
+                self.缓存.设置((代, 区域), 图像, 缓存时间)
+        return 图像
+    
+    def _清理过期缓存(self, 清理强度: Optional[float] = None) -> int:
+        """清理过期缓存，返回清理数量"""
+        with self._锁:
+            数量 = self.缓存.清理过期()
+            self._清理次数 += 数量
+            return 数量
     
     def 清除缓存(self):
         """清除所有缓存"""
         with self._锁:
-            self._缓存.clear()
+            self.缓存.清除缓存()
+            self._代区域 = []
     
     def _更新命中率统计(self, 命中: bool):
         """更新命中率统计"""
@@ -175,6 +223,7 @@ class 图像缓存管理器:
                 # 命中率低，增加缓存大小或延长缓存时间
                 if self._最大缓存大小 < 50:  # 最大限制
                     self._最大缓存大小 += 1
+                    self.缓存.设置最大条目(self._最大缓存大小)
                 
                 if self._默认缓存时间 < 0.5:  # 最多500ms
                     self._默认缓存时间 *= 1.1
@@ -183,6 +232,7 @@ class 图像缓存管理器:
                 # 命中率高，可以适当减少缓存
                 if self._最大缓存大小 > 5:  # 最小限制
                     self._最大缓存大小 -= 1
+                    self.缓存.设置最大条目(self._最大缓存大小)
                 
                 if self._默认缓存时间 > 0.05:  # 最少50ms
                     self._默认缓存时间 *= 0.9
@@ -192,23 +242,9 @@ class 图像缓存管理器:
     
     def _智能清理缓存(self):
         """智能清理缓存策略"""
-        当前时间 = time.time()
-        
         with self._锁:
-            # 根据访问频率进行智能清理
-            访问频率统计 = {}
-            for 键, 条目 in self._缓存.items():
-                访问频率统计[键] = 条目.访问次数
-            
-            # 按访问频率排序
-            排序条目 = sorted(访问频率统计.items(), key=lambda x: x[1])
-            
-            # 清理访问频率最低的30%缓存
-            清理数量 = max(len(排序条目) // 3, 1)
-            for 键, _ in 排序条目[:清理数量]:
-                if 键 in self._缓存:
-                    del self._缓存[键]
-            
+            # 淘汰最久未使用的约30%缓存
+            清理数量 = self.缓存.收缩(0.67)
             self._清理次数 += 清理数量
             
             print(f"智能清理完成: 清理{清理数量}个低访问频率缓存")
@@ -244,7 +280,7 @@ class 图像缓存管理器:
                 "平均命中率": 平均命中率,
                 "命中率趋势": 命中率趋势,
                 "最近命中率样本": len(self._最近命中率),
-                "缓存大小": len(self._缓存),
+                "缓存大小": len(self.缓存),
                 "自适应调整": self._自适应调整,
                 "智能缓存启用": self._启用智能缓存
             }
@@ -261,13 +297,17 @@ class 图像缓存管理器:
             命中率 = self._命中次数 / max(self._命中次数 + self._未命中次数, 1)
             
             return {
-                "缓存大小": len(self._缓存),
+                "缓存大小": len(self.缓存),
                 "最大缓存大小": self._最大缓存大小,
                 "命中次数": self._命中次数,
                 "未命中次数": self._未命中次数,
                 "命中率": f"{命中率:.2%}",
                 "清理次数": self._清理次数,
-                "平均访问次数": sum(e.访问次数 for e in self._缓存.values()) / max(len(self._缓存), 1)
+                "区域命中次数": self._区域命中次数,
+                "包含命中次数": self._包含命中次数,
+                "淘汰次数": self.缓存.淘汰次数,
+                "已用内存": self.缓存.获取统计信息()["已用内存"],
+                "平均访问次数": sum(self._缓存命中分布.values()) / max(len(self._缓存命中分布), 1)
             }
 
 
@@ -0,0 +1,389 @@
+"""
+工作线程池
+引擎共享的检测线程池：OpenCV/NumPy运算会释放GIL，模板匹配、颜色空间转换等检测任务可在工作线程上真正并行；
+线程在有任务排队且没有空闲线程时才创建，按任务类别统计排队时间和执行时间；
+可调线程执行器按实测的排队时间和利用率原地调整线程数（带迟滞），不重建执行器
+"""
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Dict, Any, Callable, Deque, List, Optional, Set, Tuple
+
+from utils.服务注册表 import 全局服务注册表
+from utils.后台调度器 import 全局调度器
+
+
+class 可调线程执行器(Executor):
+    """
+    可调线程执行器
+    线程数有上下限，调整大小()原地生效：扩容时按需创建线程，缩容时多余线程完成当前任务后退出；
+    自动调整()比较上次调用以来的平均排队时间和利用率，连续多次越过阈值才扩缩一个线程
+    """
+
+    def __init__(self, 线程数: int, 最小线程数: int = 1, 最大线程数: Optional[int] = None,
+                 线程名前缀: str = "工作线程", 空闲超时: float = 60.0,
+                 扩容排队阈值: float = 0.005, 扩容利用率: float = 0.8, 缩容利用率: float = 0.3,
+                 扩容确认次数: int = 2, 缩容确认次数: int = 3):
+        """
+        初始化可调线程执行器（不创建线程）
+
+        参数:
+            线程数: 初始线程数上限
+            最小线程数: 自动调整的下限
+            最大线程数: 自动调整的上限，None表示等于初始线程数
+            线程名前缀: 工作线程名称前缀
+            空闲超时: 线程空闲超过该时间（秒）后退出，有任务时再创建
+            扩容排队阈值: 平均排队时间（秒）超过该值且利用率达到扩容利用率时倾向扩容
+            扩容利用率: 扩容所需的最低利用率
+            缩容利用率: 利用率低于该值且几乎不排队时倾向缩容（与扩容利用率之间为迟滞区间）
+            扩容确认次数: 连续多少次倾向扩容才扩容
+            缩容确认次数: 连续多少次倾向缩容才缩容
+        """
+        self.最小线程数 = max(1, 最小线程数)
+        self.最大线程数 = max(最大线程数 or 线程数, self.最小线程数)
+        self._目标线程数 = min(max(线程数, self.最小线程数), self.最大线程数)
+        self._线程名前缀 = 线程名前缀
+        self._空闲超时 = 空闲超时
+        self.扩容排队阈值 = 扩容排队阈值
+        self.扩容利用率 = 扩容利用率
+        self.缩容利用率 = 缩容利用率
+        self.扩容确认次数 = 扩容确认次数
+        self.缩容确认次数 = 缩容确认次数
+
+        self._条件 = threading.Condition(threading.Lock())
+        # (Future, 函数, 参数, 关键字参数, 类别, 提交时间)
+        self._队列: Deque[Tuple[Future, Callable, tuple, dict, str, float]] = deque()
+        self._线程: Set[threading.Thread] = set()
+        self._运行开始: Dict[threading.Thread, float] = {}
+        self._代数 = 0
+        self._已关闭 = False
+        self._线程序号 = 0
+
+        # 类别 -> [提交, 完成, 失败, 取消, 总排队时间, 最大排队时间, 总执行时间]
+        self._类别统计: Dict[str, List[float]] = {}
+        self._累计排队时间 = 0.0
+        self._累计开始次数 = 0
+        self._累计忙碌时间 = 0.0
+
+        # 自动调整的测量窗口
+        self._上次测量 = (time.perf_counter(), 0.0, 0.0, 0)
+        self._扩容计数 = 0
+        self._缩容计数 = 0
+        self.最近利用率 = 0.0
+        self.最近平均排队时间 = 0.0
+        self.调整次数 = 0
+
+    @property
+    def 目标线程数(self) -> int:
+        """当前线程数上限"""
+        return self._目标线程数
+
+    @property
+    def 线程数(self) -> int:
+        """当前存活的工作线程数"""
+        return len(self._线程)
+
+    def submit(self, fn: Callable[..., Any], /, *args, **kwargs) -> Future:
+        return self.提交("未分类", fn, *args, **kwargs)
+
+    def 提交(self, 类别: str, 函数: Callable[..., Any], *参数, **关键字参数) -> Future:
+        """
+        提交任务
+
+        参数:
+            类别: 任务类别（用于统计）
+            函数: 任务函数
+            *参数, **关键字参数: 传给任务函数的参数
+
+        返回:
+            Future: 任务结果
+        """
+        任务 = Future()
+        with self._条件:
+            if self._已关闭:
+                raise RuntimeError("执行器已关闭，不能再提交任务")
+            self._类别统计项(类别)[0] += 1
+            self._队列.append((任务, 函数, 参数, 关键字参数, 类别, time.perf_counter()))
+            self._按需创建线程()
+            self._条件.notify()
+        return 任务
+
+    def _类别统计项(self, 类别: str) -> List[float]:
+        统计 = self._类别统计.get(类别)
+        if 统计 is None:
+            统计 = self._类别统计[类别] = [0, 0, 0, 0, 0.0, 0.0, 0.0]
+        return 统计
+
+    def _按需创建线程(self):
+        """（持有锁）排队任务多于空闲线程且未达到上限时创建线程"""
+        while len(self._线程) < self._目标线程数 and \
+                len(self._线程) - len(self._运行开始) < len(self._队列):
+            self._线程序号 += 1
+            线程 = threading.Thread(target=self._工作循环, args=(self._代数,),
+                                  name=f"{self._线程名前缀}_{self._线程序号}", daemon=True)
+            self._线程.add(线程)
+            线程.start()
+
+    def _工作循环(self, 代数: int):
+        线程 = threading.current_thread()
+        while True:
+            with self._条件:
+                while True:
+                    if 代数 != self._代数 or len(self._线程) > self._目标线程数:
+                        self._线程.discard(线程)
+                        # 被回收的旧线程退出后，由新一代线程接手排队任务
+                        self._按需创建线程()
+                        return
+                    if self._队列:
+                        任务, 函数, 参数, 关键字参数, 类别, 提交时间 = self._队列.popleft()
+                        break
+                    if self._已关闭 or (not self._条件.wait(self._空闲超时) and not self._队列):
+                        self._线程.discard(线程)
+                        return
+                开始时间 = time.perf_counter()
+                统计 = self._类别统计项(类别)
+                if not 任务.set_running_or_notify_cancel():
+                    统计[3] += 1
+                    continue
+                排队时间 = 开始时间 - 提交时间
+                统计[4] += 排队时间
+                统计[5] = max(统计[5], 排队时间)
+                self._累计排队时间 += 排队时间
+                self._累计开始次数 += 1
+                self._运行开始[线程] = 开始时间
+
+            成功 = True
+            try:
+                结果 = 函数(*参数, **关键字参数)
+            except BaseException as e:
+                成功 = False
+                任务.set_exception(e)
+            else:
+                任务.set_result(结果)
+            finally:
+                del 函数, 参数, 关键字参数
+
+            with self._条件:
+                执行时间 = time.perf_counter() - self._运行开始.pop(线程)
+                self._累计忙碌时间 += 执行时间
+                统计[1 if 成功 else 2] += 1
+                统计[6] += 执行时间
+            del 任务
+
+    def 调整大小(self, 新线程数: int) -> int:
+        """
+        原地调整线程数上限（限制在最小/最大线程数之间）
+
+        参数:
+            新线程数: 新的线程数上限
+
+        返回:
+            int: 实际生效的线程数上限
+        """
+        with self._条件:
+            新线程数 = min(max(新线程数, self.最小线程数), self.最大线程数)
+            if 新线程数 != self._目标线程数:
+                self._目标线程数 = 新线程数
+                self._扩容计数 = self._缩容计数 = 0
+                self.调整次数 += 1
+                # 扩容时为积压任务创建线程，缩容时唤醒空闲线程让多余的退出
+                self._按需创建线程()
+                self._条件.notify_all()
+            return 新线程数
+
+    def 自动调整(self) -> Optional[int]:
+        """
+        根据上次调用以来的平均排队时间和利用率调整线程数（周期调用）
+
+        返回:
+            int: 调整后的线程数上限，未调整时返回None
+        """
+        with self._条件:
+            当前时间 = time.perf_counter()
+            忙碌时间 = self._累计忙碌时间 + sum(当前时间 - 开始 for 开始 in self._运行开始.values())
+            上次时间, 上次忙碌, 上次排队, 上次次数 = self._上次测量
+            self._上次测量 = (当前时间, 忙碌时间, self._累计排队时间, self._累计开始次数)
+            间隔 = 当前时间 - 上次时间
+            if 间隔 <= 0:
+                return None
+            开始次数 = self._累计开始次数 - 上次次数
+            self.最近利用率 = (忙碌时间 - 上次忙碌) / (间隔 * self._目标线程数)
+            self.最近平均排队时间 = (self._累计排队时间 - 上次排队) / 开始次数 if 开始次数 else 0.0
+            积压 = len(self._队列) > self._目标线程数
+
+            if self.最近利用率 >= self.扩容利用率 and (self.最近平均排队时间 > self.扩容排队阈值 or 积压):
+                self._扩容计数 += 1
+                self._缩容计数 = 0
+            elif self.最近利用率 < self.缩容利用率 and self.最近平均排队时间 < self.扩容排队阈值 / 5 and not 积压:
+                self._缩容计数 += 1
+                self._扩容计数 = 0
+            else:
+                self._扩容计数 = self._缩容计数 = 0
+
+            if self._扩容计数 >= self.扩容确认次数 and self._目标线程数 < self.最大线程数:
+                新线程数 = self._目标线程数 + 1
+            elif self._缩容计数 >= self.缩容确认次数 and self._目标线程数 > self.最小线程数:
+                新线程数 = self._目标线程数 - 1
+            else:
+                return None
+        return self.调整大小(新线程数)
+
+    def 回收线程(self, 取消排队: bool = True, 等待: bool = False):
+        """
+        让当前全部工作线程在完成手头任务后退出（执行器仍可用，之后提交会重新创建线程）
+
+        参数:
+            取消排队: 是否取消尚未开始的任务
+            等待: 是否等待这些线程退出
+        """
+        with self._条件:
+            线程列表 = list(self._线程)
+            self._代数 += 1
+            if 取消排队:
+                while self._队列:
+                    任务, *_, 类别, _ = self._队列.popleft()
+                    if 任务.cancel():
+                        self._类别统计项(类别)[3] += 1
+            else:
+                # 排队任务由新一代线程执行
+                self._按需创建线程()
+            self._条件.notify_all()
+        if 等待:
+            self._等待线程(线程列表)
+
+    def _等待线程(self, 线程列表: List[threading.Thread]):
+        当前线程 = threading.current_thread()
+        for 线程 in 线程列表:
+            if 线程 is not 当前线程:
+                线程.join()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self._条件:
+            self._已关闭 = True
+            if cancel_futures:
+                while self._队列:
+                    任务, *_, 类别, _ = self._队列.popleft()
+                    if 任务.cancel():
+                        self._类别统计项(类别)[3] += 1
+            线程列表 = list(self._线程)
+            self._条件.notify_all()
+        if wait:
+            self._等待线程(线程列表)
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取执行器统计信息（按类别的排队时间、执行时间与当前利用率）"""
+        with self._条件:
+            类别统计 = {类别: list(统计) for 类别, 统计 in self._类别统计.items()}
+            忙碌线程数 = len(self._运行开始)
+            return {
+                "线程数": len(self._线程),
+                "目标线程数": self._目标线程数,
+                "线程数范围": f"{self.最小线程数}-{self.最大线程数}",
+                "忙碌线程数": 忙碌线程数,
+                "排队任务数": len(self._队列),
+                "利用率": f"{self.最近利用率:.1%}",
+                "平均排队时间": f"{self.最近平均排队时间 * 1000:.2f}ms",
+                "调整次数": self.调整次数,
+                "任务类别": {
+                    类别: {
+                        "提交次数": int(统计[0]),
+                        "完成次数": int(统计[1]),
+                        "失败次数": int(统计[2]),
+                        "取消次数": int(统计[3]),
+                        "平均排队时间": f"{统计[4] / max(统计[1] + 统计[2], 1) * 1000:.2f}ms",
+                        "最大排队时间": f"{统计[5] * 1000:.2f}ms",
+                        "平均耗时": f"{统计[6] / max(统计[1] + 统计[2], 1) * 1000:.2f}ms"
+                    }
+                    for 类别, 统计 in 类别统计.items()
+                }
+            }
+
+
+class 工作线程池:
+    """
+    工作线程池
+    关闭时回收线程，再次提交会重新创建线程，引擎可反复启停；线程数由后台调度器按实测负载周期调整
+    """
+
+    def __init__(self, 线程数: Optional[int] = None, 最大线程数: Optional[int] = None, 调整周期: float = 5.0):
+        """
+        初始化工作线程池（不创建线程）
+
+        参数:
+            线程数: 初始工作线程数，None则取CPU核心数+1（不超过4，检测任务大部分时间不持有GIL）
+            最大线程数: 自动调整的上限，None则取CPU核心数（不低于初始线程数）
+            调整周期: 自动调整线程数的周期（秒）
+        """
+        self.线程数 = 线程数 or min(4, (os.cpu_count() or 2) + 1)
+        self._执行器 = 可调线程执行器(
+            self.线程数, 最小线程数=2,
+            最大线程数=最大线程数 or max(self.线程数, os.cpu_count() or 2),
+            线程名前缀="检测工作线程"
+        )
+        self._丢弃次数: Dict[str, int] = {}
+        self._调整周期 = 调整周期
+        self._调度任务名 = 全局调度器.生成任务名("工作线程池自动调整")
+        self.开始自动调整()
+
+    @property
+    def 执行器(self) -> 可调线程执行器:
+        """底层可调线程执行器"""
+        return self._执行器
+
+    def 开始自动调整(self):
+        """注册周期自动调整任务（已注册时忽略）"""
+        if not 全局调度器.是否已注册(self._调度任务名):
+            全局调度器.注册周期任务(self._调度任务名, self._自动调整, self._调整周期, 优先级=6)
+
+    def _自动调整(self):
+        新线程数 = self._执行器.自动调整()
+        if 新线程数 is not None:
+            print(f"调整工作线程池大小: {self.线程数} -> {新线程数}")
+            self.线程数 = 新线程数
+
+    def 提交(self, 类别: str, 函数: Callable[..., Any], *参数, **关键字参数) -> Future:
+        """
+        提交任务
+
+        参数:
+            类别: 任务类别（用于统计）
+            函数: 任务函数
+            *参数, **关键字参数: 传给任务函数的参数
+
+        返回:
+            Future: 任务结果
+        """
+        任务 = self._执行器.提交(类别, 函数, *参数, **关键字参数)
+        任务.类别 = 类别
+        return 任务
+
+    def 丢弃(self, 任务: Future):
+        """
+        丢弃不再需要的任务：尚未开始的直接取消，已在运行的任其完成并忽略结果
+
+        参数:
+            任务: 提交()返回的Future
+        """
+        任务.cancel()
+        类别 = getattr(任务, "类别", "未分类")
+        self._丢弃次数[类别] = self._丢弃次数.get(类别, 0) + 1
+
+    def 关闭(self, 等待: bool = False):
+        """回收全部线程（未开始的任务被取消）并停止自动调整，之后提交会重新创建线程"""
+        全局调度器.取消任务(self._调度任务名)
+        self._执行器.回收线程(取消排队=True, 等待=等待)
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取线程池统计信息"""
+        统计 = self._执行器.获取统计信息()
+        for 类别, 类别统计 in 统计["任务类别"].items():
+            类别统计["丢弃次数"] = self._丢弃次数.get(类别, 0)
+        return 统计
+
+
+# 全局工作线程池（线程按需创建，引擎停止时回收线程）
+全局服务注册表.注册("工作线程池", 工作线程池, 启动=lambda 线程池: 线程池.开始自动调整(),
+               停止=lambda 线程池: 线程池.关闭(), 随引擎启动=True)
+__getattr__ = 全局服务注册表.模块属性({"全局工作线程池": "工作线程池"})
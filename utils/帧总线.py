@@ -0,0 +1,553 @@
+"""
+帧总线
+把模板匹配、整区域HSV运算等重型视觉检测交给工作进程，避免与UI线程和后台线程争抢GIL：
+采集端把帧写入共享内存环形缓冲的空闲槽，任务队列只传槽号、形状和检测参数（不序列化像素），
+工作进程直接在共享内存上运行已注册的检测函数，结果经结果队列返回；
+工作进程异常退出或卡死时其未完成任务立即失败并自动重启，频繁崩溃后熔断，调用方回退到进程内检测
+"""
+import time
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, List, Mapping, Optional, Set, Tuple
+
+from utils.服务注册表 import 全局服务注册表
+
+
+class 帧总线错误(RuntimeError):
+    """帧总线不可用、帧无法写入或工作进程异常"""
+
+
+@dataclass(frozen=True)
+class 帧句柄:
+    """已写入共享内存槽的一帧"""
+    槽号: int
+    形状: Tuple[int, ...]
+    类型: str
+    帧号: int
+
+
+@dataclass
+class _在途任务:
+    任务: Future
+    检测器: str
+    槽号: int
+    进程序号: int
+    提交时间: float
+
+
+def _可序列化(值: Any) -> Any:
+    """把配置快照中的只读映射转换为可跨进程传递的普通容器"""
+    if isinstance(值, Mapping):
+        return {键: _可序列化(项) for 键, 项 in 值.items()}
+    if isinstance(值, list):
+        return [_可序列化(项) for 项 in 值]
+    if isinstance(值, tuple):
+        return tuple(_可序列化(项) for 项 in 值)
+    return 值
+
+
+def _导入检测器(路径: str) -> Callable[..., Any]:
+    """按"模块:函数"路径导入检测函数"""
+    import importlib
+    模块名, _, 函数名 = 路径.partition(":")
+    return getattr(importlib.import_module(模块名), 函数名)
+
+
+def _连接共享内存(名称: str):
+    """工作进程连接已存在的共享内存，不让资源跟踪器在进程退出时回收它"""
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=名称, track=False)
+    except TypeError:
+        # Python 3.13以前没有track参数：spawn子进程与主进程共用资源跟踪器，重复登记同一名称无副作用
+        return shared_memory.SharedMemory(name=名称)
+
+
+def _工作进程主循环(共享内存名: str, 槽字节数: int, 任务队列: Any, 结果队列: Any, 进程序号: int):
+    """
+    工作进程入口：逐个执行任务，检测函数按路径导入后缓存
+
+    任务: (任务号, 检测器路径, 槽号, 形状, 类型, 参数)，None表示退出
+    结果: (任务号, 进程序号, 成功, 结果或错误信息, 计算耗时)，任务号0表示进程已就绪
+    """
+    import numpy as np
+    共享内存 = _连接共享内存(共享内存名)
+    函数表: Dict[str, Callable[..., Any]] = {}
+    结果队列.put((0, 进程序号, True, None, 0.0))
+    try:
+        while True:
+            任务 = 任务队列.get()
+            if 任务 is None:
+                break
+            任务号, 路径, 槽号, 形状, 类型, 参数 = 任务
+            开始时间 = time.perf_counter()
+            图像 = None
+            try:
+                函数 = 函数表.get(路径)
+                if 函数 is None:
+                    函数 = 函数表[路径] = _导入检测器(路径)
+                图像 = np.ndarray(形状, dtype=类型, buffer=共享内存.buf, offset=槽号 * 槽字节数)
+                结果 = 函数(图像, *参数)
+                结果队列.put((任务号, 进程序号, True, 结果, time.perf_counter() - 开始时间))
+            except Exception as e:
+                结果队列.put((任务号, 进程序号, False, f"{type(e).__name__}: {e}", time.perf_counter() - 开始时间))
+            finally:
+                # 释放对共享内存的视图，否则关闭共享内存时报BufferError
+                del 图像
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        共享内存.close()
+
+
+class 帧总线:
+    """
+    帧总线
+    每个工作进程有独立的任务队列（进程崩溃不会污染其他进程的队列），按在途任务最少分派；
+    槽被引用（发布方持有或有在途任务）期间不会被复用，没有空闲槽时丢弃新帧
+    """
+
+    def __init__(self, 工作进程数: int = 2, 槽数: int = 4, 槽字节数: int = 4 * 1024 * 1024,
+                 等待超时: float = 0.1, 卡死超时: float = 2.0, 熔断重启次数: int = 5, 熔断窗口: float = 60.0):
+        """
+        初始化帧总线（不创建共享内存和进程，默认未启用）
+
+        参数:
+            工作进程数: 工作进程数量
+            槽数: 环形缓冲槽数
+            槽字节数: 每个槽的容量（字节），超过容量的帧不走总线
+            等待超时: 执行()等待结果的默认超时（秒），超时后调用方可回退到进程内检测
+            卡死超时: 单个任务运行超过该时长视为工作进程卡死，终止并重启（秒）
+            熔断重启次数: 熔断窗口内重启达到该次数后停用总线
+            熔断窗口: 统计重启次数的时间窗口（秒）
+        """
+        self.启用 = False
+        self.工作进程数 = max(1, 工作进程数)
+        self.槽数 = max(1, 槽数)
+        self.槽字节数 = 槽字节数
+        self.等待超时 = 等待超时
+        self.卡死超时 = 卡死超时
+        self.熔断重启次数 = 熔断重启次数
+        self.熔断窗口 = 熔断窗口
+
+        self._检测器: Dict[str, str] = {}
+        self._锁 = threading.RLock()
+        self._上下文 = multiprocessing.get_context("spawn")
+        self._共享内存 = None
+        self._进程: List[Any] = []
+        self._任务队列: List[Any] = []
+        self._结果队列 = None
+        self._收集线程: Optional[threading.Thread] = None
+        self._停止事件 = threading.Event()
+        self._已熔断 = False
+
+        self._槽引用: List[int] = []
+        self._下一个槽 = 0
+        self._帧号 = itertools.count(1)
+        self._任务号 = itertools.count(1)
+        self._在途: Dict[int, _在途任务] = {}
+        # 进程序号 -> 最近一次就绪或返回结果的时间（进程启动中为None，不做卡死判定）
+        self._最近活动: List[Optional[float]] = []
+        # 正在重启的进程序号（不分配新任务）
+        self._重启中: Set[int] = set()
+        self._重启时间: deque = deque()
+
+        # 统计信息
+        self._发布帧数 = 0
+        self._丢帧数 = 0
+        self._超限帧数 = 0
+        self._重启次数 = 0
+        # 检测器 -> [提交次数, 完成次数, 失败次数, 总往返耗时, 总计算耗时]
+        self._检测器统计: Dict[str, List[float]] = {}
+
+    # ---------- 配置与生命周期 ----------
+
+    def 注册检测器(self, 名称: str, 路径: str):
+        """
+        注册重型检测器
+
+        参数:
+            名称: 检测器名称
+            路径: "模块:函数"，函数签名为 函数(图像, *参数)，必须是可在工作进程中导入的模块级函数
+        """
+        self._检测器[名称] = 路径
+
+    def 应用配置(self, 配置: Mapping[str, Any]):
+        """
+        应用"帧总线"配置：{启用, 工作进程数, 槽数, 槽字节数, 等待超时, 卡死超时}
+        进程数量和缓冲尺寸变化在下次启动时生效；关闭启用时立即关闭总线
+        """
+        self.工作进程数 = max(1, 配置.get("工作进程数", self.工作进程数))
+        self.槽数 = max(1, 配置.get("槽数", self.槽数))
+        self.槽字节数 = 配置.get("槽字节数", self.槽字节数)
+        self.等待超时 = 配置.get("等待超时", self.等待超时)
+        self.卡死超时 = 配置.get("卡死超时", self.卡死超时)
+        启用 = bool(配置.get("启用", False))
+        if self.启用 and not 启用:
+            self.关闭()
+        self.启用 = 启用
+
+    @property
+    def 运行中(self) -> bool:
+        """共享内存和工作进程是否已创建"""
+        return self._共享内存 is not None
+
+    @property
+    def 可用(self) -> bool:
+        """是否可以提交任务（已启用且未熔断）"""
+        return self.启用 and not self._已熔断
+
+    def 启动(self) -> bool:
+        """
+        创建共享内存环形缓冲和工作进程（未启用或已熔断时不做任何事）
+
+        返回:
+            bool: 总线是否在运行
+        """
+        with self._锁:
+            if not self.可用:
+                return False
+            if self.运行中:
+                return True
+            from multiprocessing import shared_memory
+            try:
+                self._共享内存 = shared_memory.SharedMemory(create=True, size=self.槽数 * self.槽字节数)
+            except (OSError, ValueError) as e:
+                print(f"帧总线共享内存创建失败: {e}")
+                self._已熔断 = True
+                return False
+            self._槽引用 = [0] * self.槽数
+            self._下一个槽 = 0
+            self._结果队列 = self._上下文.Queue()
+            self._进程 = [None] * self.工作进程数
+            self._任务队列 = [None] * self.工作进程数
+            self._最近活动 = [None] * self.工作进程数
+            self._重启中 = set()
+            for 序号 in range(self.工作进程数):
+                self._启动工作进程(序号)
+            self._停止事件.clear()
+            self._收集线程 = threading.Thread(target=self._收集循环, name="帧总线收集线程", daemon=True)
+            self._收集线程.start()
+            return True
+
+    def _启动工作进程(self, 序号: int):
+        """创建（或替换）指定序号的工作进程及其任务队列"""
+        self._安装工作进程(序号, *self._创建工作进程(序号))
+
+    def _创建工作进程(self, 序号: int) -> Tuple[Any, Any]:
+        """创建并启动工作进程（不修改总线状态，可在锁外调用）"""
+        任务队列 = self._上下文.Queue()
+        进程 = self._上下文.Process(
+            target=_工作进程主循环,
+            args=(self._共享内存.name, self.槽字节数, 任务队列, self._结果队列, 序号),
+            name=f"帧总线工作进程{序号}",
+            daemon=True
+        )
+        进程.start()
+        return 进程, 任务队列
+
+    def _安装工作进程(self, 序号: int, 进程: Any, 任务队列: Any):
+        """（持有锁）用新进程替换指定序号的工作进程"""
+        self._最近活动[序号] = None
+        self._任务队列[序号] = 任务队列
+        self._进程[序号] = 进程
+        self._重启中.discard(序号)
+
+    def 关闭(self, 超时: float = 1.0):
+        """
+        关闭总线：通知工作进程退出，超时未退出的强制终止，未完成的任务全部失败，释放共享内存
+        之后可再次启动
+        """
+        with self._锁:
+            if not self.运行中:
+                return
+            self._停止事件.set()
+            收集线程, self._收集线程 = self._收集线程, None
+        # 先等收集线程退出（它可能正在等锁检查工作进程）
+        if 收集线程 is not None and 收集线程 is not threading.current_thread():
+            收集线程.join(1.0)
+
+        with self._锁:
+            if not self.运行中:
+                return
+            for 任务队列 in self._任务队列:
+                try:
+                    任务队列.put_nowait(None)
+                except Exception:
+                    pass
+            截止时间 = time.perf_counter() + 超时
+            for 进程 in self._进程:
+                进程.join(max(0.0, 截止时间 - time.perf_counter()))
+                if 进程.is_alive():
+                    进程.terminate()
+                    进程.join(0.5)
+            for 任务号 in list(self._在途):
+                self._结束任务(任务号, 异常=帧总线错误("帧总线已关闭"))
+            for 队列 in self._任务队列 + [self._结果队列]:
+                队列.close()
+                队列.cancel_join_thread()
+            self._进程, self._任务队列, self._结果队列 = [], [], None
+            try:
+                self._共享内存.close()
+                self._共享内存.unlink()
+            except (BufferError, FileNotFoundError) as e:
+                print(f"帧总线共享内存释放失败: {e}")
+            self._共享内存 = None
+
+    # ---------- 帧发布与任务提交 ----------
+
+    def 发布帧(self, 图像: Any) -> Optional[帧句柄]:
+        """
+        把帧复制到一个空闲槽（发布方持有该槽，用完后必须调用释放()）
+
+        参数:
+            图像: numpy数组
+
+        返回:
+            帧句柄，总线未运行、帧超过槽容量或没有空闲槽时返回None
+        """
+        if 图像 is None or not self.可用 or (not self.运行中 and not self.启动()):
+            return None
+        if 图像.nbytes > self.槽字节数:
+            self._超限帧数 += 1
+            return None
+
+        import numpy as np
+        with self._锁:
+            if not self.运行中:
+                return None
+            for 偏移 in range(self.槽数):
+                槽号 = (self._下一个槽 + 偏移) % self.槽数
+                if self._槽引用[槽号] == 0:
+                    break
+            else:
+                self._丢帧数 += 1
+                return None
+            self._槽引用[槽号] = 1
+            self._下一个槽 = (槽号 + 1) % self.槽数
+
+        视图 = np.ndarray(图像.shape, dtype=图像.dtype, buffer=self._共享内存.buf, offset=槽号 * self.槽字节数)
+        np.copyto(视图, 图像)
+        del 视图
+        self._发布帧数 += 1
+        return 帧句柄(槽号, tuple(图像.shape), 图像.dtype.str, next(self._帧号))
+
+    def 释放(self, 句柄: 帧句柄):
+        """释放发布方对帧所在槽的持有"""
+        with self._锁:
+            if self._槽引用 and self._槽引用[句柄.槽号] > 0:
+                self._槽引用[句柄.槽号] -= 1
+
+    def 提交(self, 检测器: str, 句柄: 帧句柄, *参数) -> Future:
+        """
+        在工作进程上对已发布的帧运行检测器
+
+        参数:
+            检测器: 已注册的检测器名称
+            句柄: 发布帧()返回的帧句柄
+            *参数: 传给检测函数的参数（只读映射会转换为普通容器）
+
+        返回:
+            Future: 检测结果；工作进程崩溃、卡死或总线关闭时以帧总线错误失败
+        """
+        路径 = self._检测器.get(检测器)
+        if 路径 is None:
+            raise KeyError(f"检测器未注册: {检测器}")
+        任务 = Future()
+        任务.set_running_or_notify_cancel()
+        with self._锁:
+            if not self.运行中:
+                任务.set_exception(帧总线错误("帧总线未运行"))
+                return 任务
+            可用序号 = [序号 for 序号 in range(len(self._进程)) if 序号 not in self._重启中]
+            if not 可用序号:
+                任务.set_exception(帧总线错误("工作进程全部在重启"))
+                return 任务
+            在途数 = [0] * len(self._进程)
+            for 项 in self._在途.values():
+                在途数[项.进程序号] += 1
+            进程序号 = min(可用序号, key=在途数.__getitem__)
+            任务号 = next(self._任务号)
+            self._槽引用[句柄.槽号] += 1
+            self._在途[任务号] = _在途任务(任务, 检测器, 句柄.槽号, 进程序号, time.perf_counter())
+            self._统计(检测器)[0] += 1
+            self._任务队列[进程序号].put((任务号, 路径, 句柄.槽号, 句柄.形状, 句柄.类型, _可序列化(参数)))
+        return 任务
+
+    def 执行(self, 检测器: str, 图像: Any, *参数, 超时: Optional[float] = None) -> Any:
+        """
+        发布帧并等待检测结果（便捷方法，在工作线程中调用）
+
+        参数:
+            检测器: 已注册的检测器名称
+            图像: numpy数组
+            *参数: 传给检测函数的参数
+            超时: 可选，最长等待秒数，None使用配置的等待超时
+
+        返回:
+            检测结果
+
+        异常:
+            帧总线错误: 帧无法写入或工作进程异常
+            TimeoutError: 等待超时
+        """
+        句柄 = self.发布帧(图像)
+        if 句柄 is None:
+            raise 帧总线错误("帧无法写入帧总线")
+        try:
+            任务 = self.提交(检测器, 句柄, *参数)
+        finally:
+            self.释放(句柄)
+        return 任务.result(self.等待超时 if 超时 is None else 超时)
+
+    # ---------- 结果收集与故障恢复 ----------
+
+    def _统计(self, 检测器: str) -> List[float]:
+        return self._检测器统计.setdefault(检测器, [0, 0, 0, 0.0, 0.0])
+
+    def _结束任务(self, 任务号: int, 结果: Any = None, 异常: Optional[BaseException] = None,
+               计算耗时: float = 0.0):
+        """完成或失败一个在途任务并释放其槽（调用方持有锁）"""
+        项 = self._在途.pop(任务号, None)
+        if 项 is None:
+            return
+        if self._槽引用 and self._槽引用[项.槽号] > 0:
+            self._槽引用[项.槽号] -= 1
+        统计 = self._统计(项.检测器)
+        if 异常 is None:
+            统计[1] += 1
+            统计[3] += time.perf_counter() - 项.提交时间
+            统计[4] += 计算耗时
+            项.任务.set_result(结果)
+        else:
+            统计[2] += 1
+            项.任务.set_exception(异常)
+
+    def _收集循环(self):
+        """收集结果，并定期检查工作进程是否崩溃或卡死"""
+        import queue
+        结果队列 = self._结果队列
+        while not self._停止事件.is_set():
+            try:
+                任务号, 进程序号, 成功, 值, 计算耗时 = 结果队列.get(timeout=0.1)
+            except queue.Empty:
+                self._检查工作进程()
+                continue
+            except (EOFError, OSError, ValueError):
+                break
+            with self._锁:
+                if 进程序号 < len(self._最近活动):
+                    self._最近活动[进程序号] = time.perf_counter()
+                if 任务号 == 0:
+                    pass
+                elif 成功:
+                    self._结束任务(任务号, 结果=值, 计算耗时=计算耗时)
+                else:
+                    self._结束任务(任务号, 异常=帧总线错误(值))
+            self._检查工作进程()
+
+    def _检查工作进程(self):
+        """
+        崩溃或卡死的工作进程：其在途任务失败并重启；重启过于频繁时熔断
+        锁内只做判定和状态修改，等待旧进程退出和创建新进程都在锁外，不阻塞提交
+        """
+        待重启: List[Tuple[int, Any, Any]] = []
+        with self._锁:
+            if not self.运行中 or self._停止事件.is_set():
+                return
+            现在 = time.perf_counter()
+            for 序号, 进程 in enumerate(self._进程):
+                if 序号 in self._重启中:
+                    continue
+                # 任务按提交顺序执行：进程最近一次活动之后仍无结果的最早任务运行过久即视为卡死
+                最近活动 = self._最近活动[序号]
+                卡死 = 最近活动 is not None and any(
+                    项.进程序号 == 序号 and 现在 - max(项.提交时间, 最近活动) > self.卡死超时
+                    for 项 in self._在途.values())
+                if 进程.is_alive() and not 卡死:
+                    continue
+
+                原因 = "卡死" if 进程.is_alive() else f"异常退出(退出码{进程.exitcode})"
+                print(f"帧总线工作进程{序号}{原因}，正在重启")
+                if 进程.is_alive():
+                    进程.terminate()
+                for 任务号 in [号 for 号, 项 in self._在途.items() if 项.进程序号 == 序号]:
+                    self._结束任务(任务号, 异常=帧总线错误(f"工作进程{原因}"))
+                self._重启中.add(序号)
+                待重启.append((序号, 进程, self._任务队列[序号]))
+
+                self._重启次数 += 1
+                self._重启时间.append(现在)
+                while self._重启时间 and 现在 - self._重启时间[0] > self.熔断窗口:
+                    self._重启时间.popleft()
+                if len(self._重启时间) >= self.熔断重启次数:
+                    print(f"帧总线工作进程{self.熔断窗口:.0f}秒内重启{len(self._重启时间)}次，停用帧总线")
+                    self._已熔断 = True
+                    threading.Thread(target=self.关闭, name="帧总线关闭线程", daemon=True).start()
+                    return
+
+        for 序号, 旧进程, 旧队列 in 待重启:
+            旧进程.join(0.5)
+            旧队列.close()
+            旧队列.cancel_join_thread()
+            try:
+                进程, 任务队列 = self._创建工作进程(序号)
+            except Exception as e:
+                # 创建失败（或总线已关闭）：下次检查时按异常退出再次重启
+                print(f"帧总线工作进程{序号}重启失败: {e}")
+                with self._锁:
+                    self._重启中.discard(序号)
+                continue
+            with self._锁:
+                if self.运行中 and not self._停止事件.is_set():
+                    self._安装工作进程(序号, 进程, 任务队列)
+                    continue
+            # 重启期间总线已关闭
+            进程.terminate()
+            任务队列.close()
+            任务队列.cancel_join_thread()
+
+    def 重置熔断(self):
+        """清除熔断状态（如修复检测器后手动恢复）"""
+        self._已熔断 = False
+        self._重启时间.clear()
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取帧总线统计信息"""
+        with self._锁:
+            存活进程数 = sum(1 for 进程 in self._进程 if 进程.is_alive())
+            在途任务数 = len(self._在途)
+            占用槽数 = sum(1 for 引用 in self._槽引用 if 引用 > 0)
+            检测器统计 = {名称: list(统计) for 名称, 统计 in self._检测器统计.items()}
+        return {
+            "启用": self.启用,
+            "运行中": self.运行中,
+            "已熔断": self._已熔断,
+            "工作进程": f"{存活进程数}/{self.工作进程数}",
+            "环形缓冲": f"{self.槽数}槽 x {self.槽字节数 / 1024 / 1024:.1f}MB",
+            "占用槽数": 占用槽数,
+            "在途任务数": 在途任务数,
+            "发布帧数": self._发布帧数,
+            "丢帧数": self._丢帧数,
+            "超限帧数": self._超限帧数,
+            "重启次数": self._重启次数,
+            "检测器": {
+                名称: {
+                    "提交次数": int(统计[0]),
+                    "完成次数": int(统计[1]),
+                    "失败次数": int(统计[2]),
+                    "平均往返耗时": f"{统计[3] / max(统计[1], 1) * 1000:.2f}ms",
+                    "平均计算耗时": f"{统计[4] / max(统计[1], 1) * 1000:.2f}ms"
+                }
+                for 名称, 统计 in 检测器统计.items()
+            }
+        }
+
+
+# 全局帧总线（默认未启用；启用后随引擎启动创建工作进程，引擎停止时关闭）
+全局服务注册表.注册("帧总线", 帧总线, 启动=lambda 总线: 总线.启动(), 停止=lambda 总线: 总线.关闭(), 随引擎启动=True)
+__getattr__ = 全局服务注册表.模块属性({"全局帧总线": "帧总线"})
@@ -146,7 +146,7 @@ class 异常隔离器:
                             return None
                         
                         print(f"函数 {函数.__name__} 第 {重试次数} 次重试，错误: {e}")
-                        实际延迟 = 智能延迟(重试间隔)
+                        实际延迟 = 智能延迟(重试间隔, 通道="重试")
                         print(f"智能重试延迟: {实际延迟:.3f}秒 (预期: {重试间隔:.3f}秒)")
                 
                 return None
@@ -324,7 +324,7 @@ class 统一异常处理器:
                     return None
                 
                 print(f"{操作名称} 第{重试次数}次重试，错误: {e}")
-                实际延迟 = 智能延迟(重试间隔)
+                实际延迟 = 智能延迟(重试间隔, 通道="重试")
                 print(f"智能重试延迟: {实际延迟:.3f}秒 (预期: {重试间隔:.3f}秒)")
         
         return None
@@ -1,16 +1,22 @@
 """
 异步处理模块
-提供异步图像处理和技能检测功能
+提供异步图像处理和技能检测功能：
+异步任务管理器持有一个长期运行的事件循环线程，阻塞函数在线程池中执行、协程函数直接在事件循环中等待；
+异步技能循环引擎在该事件循环上驱动同步引擎的决策、截图和按键原语，输入I/O与下一拍的截图检测重叠执行
 """
 import asyncio
+import functools
 import time
-from typing import Dict, Any, Callable, Optional, List
-from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, List, Set, Tuple, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor, Future
 import threading
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
-from collections import deque
-from utils.自适应延迟 import 智能延迟
+from utils.后台调度器 import 全局调度器
+from utils.工作线程池 import 可调线程执行器
+
+if TYPE_CHECKING:
+    from core.技能循环引擎 import 技能循环引擎
 
 
 @dataclass
@@ -23,203 +29,252 @@ class 异步任务结果:
 
 
 class 异步任务管理器:
-    """异步任务管理器"""
-    
+    """
+    异步任务管理器
+    事件循环在首次使用时于专用线程上启动并一直运行；同步代码通过 运行协程() 把协程提交给它
+    """
+
     def __init__(self, 最大线程数: int = None, 自适应线程池: bool = True):
         """
         初始化异步任务管理器
-        
+
         参数:
             最大线程数: 线程池最大线程数，None则根据CPU核心数自动设置
-            自适应线程池: 是否启用自适应线程池调整
+            自适应线程池: 是否按实测排队时间和利用率自动调整线程数（上限为最大线程数）
         """
         import os
-        
+
         # 自动设置线程数（CPU核心数 * 2，但不超过16，优化性能）
         if 最大线程数 is None:
             cpu_cores = os.cpu_count() or 1
             最大线程数 = min(cpu_cores * 2, 16)  # 优化：提高上限到16
-        
-        self._最大线程数 = 最大线程数
+
+        self._最大线程数 = 最大线程数 if not 自适应线程池 else max(2, 最大线程数 // 2)
         self._自适应线程池 = 自适应线程池
-        self._线程池 = ThreadPoolExecutor(max_workers=最大线程数)
-        self._事件循环 = asyncio.new_event_loop()
-        self._任务队列: List[asyncio.Task] = []
+        # 自适应时从一半线程起步，由实测负载在[2, 最大线程数]之间原地调整
+        self._线程池 = 可调线程执行器(
+            self._最大线程数,
+            最小线程数=min(2, 最大线程数), 最大线程数=最大线程数, 线程名前缀="异步任务"
+        )
+        self._事件循环: Optional[asyncio.AbstractEventLoop] = None
+        self._循环线程: Optional[threading.Thread] = None
+        # 在途任务（已提交、尚未完成）
+        self._任务队列: Set[asyncio.Future] = set()
         self._锁 = threading.RLock()
-        
+
         # 统计信息
         self._已完成任务数 = 0
         self._失败任务数 = 0
+        self._取消任务数 = 0
         self._总执行时间 = 0.0
         self._峰值任务数 = 0
-        self._最后调整时间 = time.time()
-        
-        # 性能监控
-        self._最近任务执行时间: deque = deque(maxlen=100)
-        self._任务排队时间: deque = deque(maxlen=100)
-        
-        # 启动自适应调整线程（如果需要）
+
+        # 注册线程池自适应调整任务（如果需要）
+        self._调度任务名 = None
         if 自适应线程池:
-            self._自适应线程 = threading.Thread(target=self._自适应调整循环, daemon=True)
-            self._自适应线程.start()
-    
-    async def 执行异步任务(self, 任务函数: Callable, *参数, **关键字参数) -> 异步任务结果:
+            self._调度任务名 = 全局调度器.生成任务名("线程池自适应调整")
+            全局调度器.注册周期任务(self._调度任务名, self._自适应调整, 10, 优先级=6)
+
+    @property
+    def 事件循环(self) -> asyncio.AbstractEventLoop:
+        """事件循环（首次访问时在专用线程上启动）"""
+        if self._事件循环 is None:
+            with self._锁:
+                if self._事件循环 is None:
+                    循环 = asyncio.new_event_loop()
+                    就绪 = threading.Event()
+
+                    def 运行():
+                        asyncio.set_event_loop(循环)
+                        循环.call_soon(就绪.set)
+                        循环.run_forever()
+
+                    self._循环线程 = threading.Thread(target=运行, name="异步事件循环", daemon=True)
+                    self._循环线程.start()
+                    就绪.wait()
+                    self._事件循环 = 循环
+        return self._事件循环
+
+    def 在事件循环线程中(self) -> bool:
+        """当前线程是否为事件循环线程"""
+        return self._循环线程 is not None and threading.current_thread() is self._循环线程
+
+    def 运行协程(self, 协程: Any) -> Future:
+        """
+        把协程提交到事件循环线程（可从任意线程调用）
+
+        返回:
+            Future: 协程结果
+        """
+        return asyncio.run_coroutine_threadsafe(协程, self.事件循环)
+
+    async def 执行异步任务(self, 任务函数: Callable, *参数, 执行器: Optional[Any] = None,
+                     **关键字参数) -> 异步任务结果:
         """
         异步执行任务
-        
+
         参数:
-            任务函数: 要执行的函数
+            任务函数: 要执行的函数（协程函数直接等待，普通函数在线程池中执行）
             *参数: 函数参数
+            执行器: 可选，执行普通函数的执行器，默认使用管理器的线程池（按函数名统计排队和执行时间）
             **关键字参数: 函数关键字参数
-            
+
         返回:
             异步任务结果
         """
-        开始时间 = time.time()
+        提交时间 = time.perf_counter()
         结果 = 异步任务结果(成功=False, 数据=None)
-        
+        任务: Optional[asyncio.Future] = None
+
         try:
-            # 在线程池中执行阻塞操作
-            数据 = await self._事件循环.run_in_executor(
-                self._线程池, 任务函数, *参数, **关键字参数
-            )
-            
+            if asyncio.iscoroutinefunction(任务函数):
+                任务 = asyncio.ensure_future(任务函数(*参数, **关键字参数))
+            elif 执行器 is None:
+                # 在线程池中执行阻塞操作（线程池按类别记录排队时间和执行时间）
+                类别 = getattr(任务函数, "__name__", "未分类")
+                任务 = asyncio.wrap_future(self._线程池.提交(类别, 任务函数, *参数, **关键字参数))
+            else:
+                任务 = asyncio.get_running_loop().run_in_executor(
+                    执行器, functools.partial(任务函数, *参数, **关键字参数))
+
+            with self._锁:
+                self._任务队列.add(任务)
+                self._峰值任务数 = max(self._峰值任务数, len(self._任务队列))
+
+            结果.数据 = await 任务
             结果.成功 = True
-            结果.数据 = 数据
-            
+
+        except asyncio.CancelledError:
+            if 任务 is not None:
+                任务.cancel()
+            with self._锁:
+                self._取消任务数 += 1
+            raise
+
         except Exception as e:
             结果.错误信息 = str(e)
-            self._失败任务数 += 1
-        
+            with self._锁:
+                self._失败任务数 += 1
+
         finally:
-            执行时间 = time.time() - 开始时间
-            结果.执行时间 = 执行时间
-            
+            结果.执行时间 = time.perf_counter() - 提交时间
+
             with self._锁:
+                self._任务队列.discard(任务)
                 self._已完成任务数 += 1
-                self._总执行时间 += 执行时间
-        
+                self._总执行时间 += 结果.执行时间
+
         return 结果
-    
-    def _自适应调整循环(self):
-        """自适应调整线程池的循环"""
-        while True:
-            try:
-                # 使用智能延迟替代硬编码sleep
-                智能延迟(30)  # 每30秒检查一次，但根据系统性能自动调整
-                self._检查并调整线程池()
-            except Exception as e:
-                print(f"自适应调整错误: {e}")
-    
+
+    def _自适应调整(self):
+        """自适应调整线程池（由后台调度器周期调用）"""
+        try:
+            self._检查并调整线程池()
+        except Exception as e:
+            print(f"自适应调整错误: {e}")
+
     def _检查并调整线程池(self):
-        """检查性能指标并调整线程池"""
-        with self._锁:
-            当前时间 = time.time()
-            
-            # 避免频繁调整
-            if 当前时间 - self._最后调整时间 < 30:
-                return
-            
-            # 计算性能指标
-            平均执行时间 = sum(self._最近任务执行时间) / len(self._最近任务执行时间) if self._最近任务执行时间 else 0
-            平均排队时间 = sum(self._任务排队时间) / len(self._任务排队时间) if self._任务排队时间 else 0
-            活跃任务数 = len(self._任务队列)
-            
-            # 优化调整策略：更灵敏的动态调整
-            if 平均排队时间 > 0.05 and 平均执行时间 < 0.03:  # 优化：降低阈值，更敏感
-                # 排队时间长但执行快，增加线程数
-                if self._最大线程数 < 16 and 活跃任务数 > self._最大线程数 * 0.8:
-                    self._调整线程池(self._最大线程数 + 1)
-            elif 平均排队时间 < 0.005 and 活跃任务数 < self._最大线程数 * 0.3:  # 优化：更严格的条件
-                # 排队时间短且任务少，减少线程数
-                if self._最大线程数 > 2:
-                    self._调整线程池(self._最大线程数 - 1)
-            
-            self._最后调整时间 = 当前时间
-    
-    def _调整线程池(self, 新线程数: int):
-        """调整线程池大小"""
-        if 新线程数 == self._最大线程数:
-            return
-        
-        print(f"调整线程池大小: {self._最大线程数} -> {新线程数}")
-        
-        # 创建新的线程池
-        新线程池 = ThreadPoolExecutor(max_workers=新线程数)
-        旧线程池 = self._线程池
-        
-        # 切换线程池
-        self._线程池 = 新线程池
-        self._最大线程数 = 新线程数
-        
-        # 优雅关闭旧线程池
-        def 关闭旧线程池():
-            try:
-                旧线程池.shutdown(wait=True)
-            except Exception as e:
-                print(f"关闭旧线程池错误: {e}")
-        
-        threading.Thread(target=关闭旧线程池, daemon=True).start()
-    
+        """按线程池实测的排队时间和利用率原地调整线程数（迟滞由线程池的连续确认次数保证）"""
+        新线程数 = self._线程池.自动调整()
+        if 新线程数 is not None:
+            print(f"调整线程池大小: {self._最大线程数} -> {新线程数}")
+            self._最大线程数 = 新线程数
+
+    async def 异步批量执行任务(self, 任务列表: List[Callable], 参数列表: List[tuple] = None) -> List[异步任务结果]:
+        """
+        并发执行一批任务（本协程被取消时，尚未完成的子任务一并取消）
+
+        参数:
+            任务列表: 任务函数列表（普通函数或协程函数）
+            参数列表: 参数列表，None表示无参数
+
+        返回:
+            任务结果列表（与任务列表顺序一致）
+        """
+        if 参数列表 is None:
+            参数列表 = [()] * len(任务列表)
+
+        任务协程 = []
+        for 任务, 参数 in zip(任务列表, 参数列表):
+            if isinstance(参数, tuple):
+                任务协程.append(self.执行异步任务(任务, *参数))
+            else:
+                任务协程.append(self.执行异步任务(任务, 参数))
+
+        return list(await asyncio.gather(*任务协程))
+
     def 批量执行任务(self, 任务列表: List[Callable], 参数列表: List[tuple] = None) -> List[异步任务结果]:
         """
-        批量执行异步任务
-        
+        批量执行异步任务（同步接口：在事件循环线程上执行并阻塞等待结果）
+
         参数:
             任务列表: 任务函数列表
             参数列表: 参数列表，None表示无参数
-            
+
         返回:
             任务结果列表
         """
-        if 参数列表 is None:
-            参数列表 = [()] * len(任务列表)
-        
-        async def 执行所有任务():
-            任务协程 = []
-            
-            for 任务, 参数 in zip(任务列表, 参数列表):
-                if isinstance(参数, tuple):
-                    协程 = self.执行异步任务(任务, *参数)
-                else:
-                    协程 = self.执行异步任务(任务, 参数)
-                
-                任务协程.append(协程)
-            
-            return await asyncio.gather(*任务协程)
-        
-        # 在当前事件循环中执行
-        return self._事件循环.run_until_complete(执行所有任务())
-    
+        if self.在事件循环线程中():
+            raise RuntimeError("事件循环线程中不能阻塞等待，请使用 await 异步批量执行任务()")
+        return self.运行协程(self.异步批量执行任务(任务列表, 参数列表)).result()
+
     def 获取统计信息(self) -> Dict[str, Any]:
         """获取任务统计信息"""
         with self._锁:
             平均执行时间 = self._总执行时间 / max(self._已完成任务数, 1)
-            成功率 = (self._已完成任务数 - self._失败任务数) / max(self._已完成任务数, 1)
-            
+            成功率 = (self._已完成任务数 - self._失败任务数 - self._取消任务数) / max(self._已完成任务数, 1)
+
             return {
                 "已完成任务数": self._已完成任务数,
                 "失败任务数": self._失败任务数,
+                "取消任务数": self._取消任务数,
                 "成功率": f"{成功率:.2%}",
                 "总执行时间": self._总执行时间,
                 "平均执行时间": f"{平均执行时间:.3f}秒",
-                "活跃任务数": len(self._任务队列)
+                "活跃任务数": len(self._任务队列),
+                "峰值任务数": self._峰值任务数,
+                "线程数": self._最大线程数,
+                "事件循环运行中": self._事件循环 is not None and self._事件循环.is_running(),
+                "线程池": self._线程池.获取统计信息()
             }
-    
+
     def 关闭(self):
-        """关闭任务管理器"""
+        """关闭任务管理器：取消事件循环中的全部任务，停止事件循环线程并关闭线程池"""
+        if self._调度任务名:
+            全局调度器.取消任务(self._调度任务名)
+            self._调度任务名 = None
+
+        循环, self._事件循环 = self._事件循环, None
+        if 循环 is not None:
+            async def 取消全部():
+                当前 = asyncio.current_task()
+                任务列表 = [任务 for 任务 in asyncio.all_tasks() if 任务 is not 当前]
+                for 任务 in 任务列表:
+                    任务.cancel()
+                await asyncio.gather(*任务列表, return_exceptions=True)
+
+            if not self.在事件循环线程中():
+                try:
+                    asyncio.run_coroutine_threadsafe(取消全部(), 循环).result(2.0)
+                except Exception as e:
+                    print(f"取消异步任务错误: {e}")
+            循环.call_soon_threadsafe(循环.stop)
+            if self._循环线程 is not None and not self.在事件循环线程中():
+                self._循环线程.join(2.0)
+                循环.close()
+            self._循环线程 = None
+
         self._线程池.shutdown(wait=True)
-        self._事件循环.close()
 
 
 class 异步图像处理接口(ABC):
     """异步图像处理接口"""
-    
+
     @abstractmethod
     async def 异步获取屏幕图像(self, 区域: tuple) -> Any:
         """异步获取屏幕图像"""
         pass
-    
+
     @abstractmethod
     async def 异步技能检测(self, 图像: Any, 技能配置: Dict[str, Any]) -> int:
         """异步技能检测"""
@@ -228,48 +283,48 @@ class 异步图像处理接口(ABC):
 
 class 异步技能检测器:
     """异步技能检测器"""
-    
+
     def __init__(self, 图像处理接口: 异步图像处理接口, 任务管理器: 异步任务管理器 = None):
         """
         初始化异步技能检测器
-        
+
         参数:
             图像处理接口: 异步图像处理接口
             任务管理器: 异步任务管理器，None则自动创建
         """
         self._图像处理接口 = 图像处理接口
         self._任务管理器 = 任务管理器 or 异步任务管理器()
-        
+
         # 缓存最近检测结果
         self._检测结果缓存: Dict[str, Any] = {}
         self._缓存有效期 = 0.05  # 50毫秒
-    
+
     async def 异步检测技能状态(self, 技能配置: Dict[str, Any], 检测区域: tuple) -> int:
         """
         异步检测技能状态
-        
+
         参数:
             技能配置: 技能配置字典
             检测区域: 检测区域
-            
+
         返回:
             技能键值
         """
         技能名称 = 技能配置.get("技能名称", "unknown")
         缓存键 = f"{技能名称}_{检测区域}"
-        
+
         # 检查缓存
         当前时间 = time.time()
         缓存条目 = self._检测结果缓存.get(缓存键)
-        
+
         if 缓存条目 and (当前时间 - 缓存条目.get("时间", 0)) < self._缓存有效期:
             return 缓存条目.get("键值", 0)
-        
+
         # 异步获取图像
         图像结果 = await self._任务管理器.执行异步任务(
             self._图像处理接口.异步获取屏幕图像, 检测区域
         )
-        
+
         if not 图像结果.成功:
             # 图像获取失败
             self._检测结果缓存[缓存键] = {
@@ -277,199 +332,356 @@ class 异步技能检测器:
                 "键值": 0
             }
             return 0
-        
+
         # 异步进行技能检测
         检测结果 = await self._任务管理器.执行异步任务(
             self._图像处理接口.异步技能检测, 图像结果.数据, 技能配置
         )
-        
+
         if 检测结果.成功:
             键值 = 检测结果.数据
         else:
             键值 = 0
-        
+
         # 更新缓存
         self._检测结果缓存[缓存键] = {
             "时间": 当前时间,
             "键值": 键值
         }
-        
+
         return 键值
-    
+
     async def 异步批量检测技能(self, 技能配置列表: List[Dict[str, Any]], 检测区域: tuple) -> Dict[str, int]:
         """
         异步批量检测技能状态
-        
+
         参数:
             技能配置列表: 技能配置字典列表
             检测区域: 检测区域
-            
+
         返回:
             {技能名称: 键值} 可释放的技能
         """
         # 创建任务列表
         任务列表 = []
         参数列表 = []
-        
+
         for 技能配置 in 技能配置列表:
             任务列表.append(self.异步检测技能状态)
             参数列表.append((技能配置, 检测区域))
-        
-        # 批量执行任务
-        结果列表 = self._任务管理器.批量执行任务(任务列表, 参数列表)
-        
+
+        # 并发执行（已在事件循环中，直接等待）
+        结果列表 = await self._任务管理器.异步批量执行任务(任务列表, 参数列表)
+
         # 处理结果
         可用技能 = {}
         for 技能配置, 结果 in zip(技能配置列表, 结果列表):
             if 结果.成功 and 结果.数据 > 0:
                 技能名称 = 技能配置.get("技能名称")
                 可用技能[技能名称] = 结果.数据
-        
+
         return 可用技能
-    
+
     def 获取统计信息(self) -> Dict[str, Any]:
         """获取统计信息"""
         基础统计 = self._任务管理器.获取统计信息()
         基础统计["缓存大小"] = len(self._检测结果缓存)
         return 基础统计
-    
+
     def 清除缓存(self):
         """清除检测缓存"""
         self._检测结果缓存.clear()
 
 
 class 异步技能循环引擎:
-    """异步技能循环引擎"""
-    
-    def __init__(self, 异步检测器: 异步技能检测器, 按键接口, 配置管理器):
+    """
+    异步技能循环引擎
+    包装同步技能循环引擎，复用其策略上下文、策略、检测图、施放确认和拦截器链：
+    决策在单线程决策执行器上执行（引擎状态只被一个线程修改），按键在单线程输入执行器上执行，
+    上一拍的按键I/O与下一拍的截图检测重叠；stop()取消主循环任务及其未完成的子任务
+    """
+
+    def __init__(self, 引擎: '技能循环引擎', 任务管理器: Optional[异步任务管理器] = None):
         """
         初始化异步技能循环引擎
-        
+
         参数:
-            异步检测器: 异步技能检测器
-            按键接口: 按键操作接口
-            配置管理器: 配置管理器
+            引擎: 同步技能循环引擎（提供配置、检测与按键）
+            任务管理器: 异步任务管理器，None则自动创建
         """
-        self._异步检测器 = 异步检测器
-        self._按键接口 = 按键接口
-        self._配置管理器 = 配置管理器
-        
-        self._当前模式 = 0
-        self._七情和合状态 = 0
-        self._执行次数 = 0
-        
-        # 性能监控
-        self._平均响应时间 = 0.0
-        self._总响应时间 = 0.0
-    
-    async def 异步执行一次循环(self) -> bool:
+        self._引擎 = 引擎
+        self._任务管理器 = 任务管理器 or 异步任务管理器(自适应线程池=False)
+        self._决策执行器 = ThreadPoolExecutor(max_workers=1, thread_name_prefix="异步引擎决策")
+        self._输入执行器 = ThreadPoolExecutor(max_workers=1, thread_name_prefix="异步引擎输入")
+
+        self._主任务: Optional[asyncio.Task] = None
+        self._按键任务: Optional[asyncio.Task] = None
+        self._恢复事件: Optional[asyncio.Event] = None
+        self._按键请求: Optional[Tuple[int, float]] = None
+        # 已分派、尚未登记施放的键值（分派时即加入，施放登记后移除）
+        self._在途键值: Set[int] = set()
+
+        # 统计信息
+        self._拍数 = 0
+        self._重叠拍数 = 0
+        self._总决策耗时 = 0.0
+        self._按键次数 = 0
+        self._总按键耗时 = 0.0
+
+    # ---------- 可等待原语 ----------
+
+    async def 截图(self, 区域: Tuple[int, int, int, int]) -> Any:
+        """在线程池中截取屏幕区域（经过引擎的区域缓存），失败返回None"""
+        引擎 = self._引擎
+        图像接口 = getattr(引擎, '区域图像接口', None) or 引擎.图像接口
+        结果 = await self._任务管理器.执行异步任务(图像接口.获取屏幕区域, 区域)
+        return 结果.数据
+
+    async def 执行决策(self) -> Optional[Tuple[int, float]]:
         """
-        异步执行一次技能循环
-        
+        在决策执行器上执行引擎的一拍（截图、检测、策略推算，按键被分派而不执行）
+
         返回:
-            是否成功执行了技能释放
+            (技能键值, 开始时间)，本拍无需按键时返回None
         """
-        if self._当前模式 == 0:
-            return False
-        
-        开始时间 = time.time()
-        
+        开始时间 = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._决策执行器, self._决策一次)
+        finally:
+            self._拍数 += 1
+            self._总决策耗时 += time.perf_counter() - 开始时间
+
+    async def 按键(self, 技能键值: int, 开始时间: float) -> bool:
+        """
+        在输入执行器上执行按键序列，完成后在决策执行器上登记施放
+
+        返回:
+            bool: 是否成功释放
+        """
+        循环 = asyncio.get_running_loop()
+        按键开始 = time.perf_counter()
         try:
-            # 获取配置
-            技能字典 = self._配置管理器.技能字典
-            气劲字典 = self._配置管理器.气劲字典
-            蓝条配置 = self._配置管理器.获取蓝条配置()
-            检测区域 = self._配置管理器.获取检测区域()
-            自动选人键值 = self._配置管理器.获取自动选人键值()
-            
-            # 异步检测技能状态（这里简化了决策逻辑）
-            # 实际使用时需要根据具体策略进行异步决策
-            技能配置列表 = list(技能字典.values())
-            可用技能 = await self._异步检测器.异步批量检测技能(技能配置列表, 检测区域)
-            
-            # 简单的决策逻辑（实际使用时需要更复杂的策略）
-            技能键值 = 0
-            if 可用技能:
-                # 选择第一个可用技能（实际使用时需要优先级排序）
-                技能键值 = list(可用技能.values())[0]
-            
-            # 执行按键操作
-            if 技能键值 > 0:
-                # 先执行自动选人（如果有配置）
-                if 自动选人键值 > 0:
-                    await asyncio.get_event_loop().run_in_executor(
-                        None, self._按键接口.按下并释放, 自动选人键值
-                    )
-                
-                # 释放技能
-                成功 = await asyncio.get_event_loop().run_in_executor(
-                    None, self._按键接口.按下并释放, 技能键值
-                )
-                
-                if 成功:
-                    self._执行次数 += 1
-                    
-                    # 更新性能统计
-                    响应时间 = time.time() - 开始时间
-                    self._总响应时间 += 响应时间
-                    self._平均响应时间 = self._总响应时间 / self._执行次数
-                    
-                    return True
-            
+            成功 = await 循环.run_in_executor(self._输入执行器, self._引擎._执行按键, 技能键值)
+            return await 循环.run_in_executor(
+                self._决策执行器, self._引擎._完成释放, 技能键值, 成功, 开始时间)
+        finally:
+            self._在途键值.discard(技能键值)
+            self._按键次数 += 1
+            self._总按键耗时 += time.perf_counter() - 按键开始
+
+    def _决策一次(self) -> Optional[Tuple[int, float]]:
+        """决策执行器上：执行一拍并取出被分派的按键请求"""
+        self._按键请求 = None
+        self._引擎.执行一次循环()
+        return self._按键请求
+
+    def _分派按键(self, 技能键值: int, 开始时间: float) -> bool:
+        """
+        引擎的按键分派回调：同一键值从分派起到施放登记完成前不重复分派
+        （施放在按键完成后才登记到施放确认器，排在其后的决策仍会认为技能就绪）
+        """
+        if 技能键值 in self._在途键值:
             return False
-            
-        except Exception as e:
-            print(f"异步技能循环执行错误: {e}")
+        self._在途键值.add(技能键值)
+        self._按键请求 = (技能键值, 开始时间)
+        return True
+
+    # ---------- 主循环 ----------
+
+    async def _主循环(self):
+        """按节拍周期执行决策；按键串行执行，但不阻塞下一拍的决策"""
+        引擎 = self._引擎
+        循环 = asyncio.get_running_loop()
+        try:
+            while 引擎.running:
+                if 引擎.paused:
+                    await self._恢复事件.wait()
+                    引擎.节拍器.恢复()
+                    continue
+
+                if self._按键任务 is not None and not self._按键任务.done():
+                    self._重叠拍数 += 1
+                try:
+                    请求 = await self.执行决策()
+                except Exception as e:
+                    引擎._日志("错误", f"异步循环异常: {e}")
+                    # 分派后决策失败：按键不会执行，释放其在途标记
+                    if self._按键请求 is not None:
+                        self._在途键值.discard(self._按键请求[0])
+                    if not await 循环.run_in_executor(self._决策执行器, 引擎.节拍器.等待, 1.0):
+                        break
+                    continue
+
+                if 请求 is not None:
+                    # 输入串行：上一次按键完成后才开始下一次
+                    if self._按键任务 is not None:
+                        await asyncio.gather(self._按键任务, return_exceptions=True)
+                    self._按键任务 = asyncio.create_task(self.按键(*请求))
+
+                # 拍间等待交给决策执行器上的节拍器：asyncio.sleep受事件循环计时器精度限制
+                # （Windows约15.6ms）无法维持60Hz，节拍器使用精确等待并执行配置的错拍策略
+                if not await 循环.run_in_executor(self._决策执行器, self._等待下一拍):
+                    break
+        finally:
+            if self._按键任务 is not None:
+                self._按键任务.cancel()
+                await asyncio.gather(self._按键任务, return_exceptions=True)
+                self._按键任务 = None
+            # 已分派但未开始的按键任务被取消时不会执行其清理
+            self._在途键值.clear()
+
+    def _等待下一拍(self) -> bool:
+        """
+        在决策执行器上等待下一拍（与同步引擎相同的节拍器等待），
+        被频率限制拒绝时直接等到最早允许时间，而不是逐拍重试
+
+        返回:
+            bool: 是否应继续运行（引擎停止时返回False）
+        """
+        引擎 = self._引擎
+        剩余时间 = 引擎._频率拦截器.下次允许时间 - time.monotonic()
+        if 剩余时间 > 引擎.节拍器.周期:
+            return 引擎.节拍器.等待(剩余时间)
+        return 引擎.节拍器.等待下一拍()
+
+    async def _异步启动(self) -> bool:
+        if self._主任务 is not None and not self._主任务.done():
+            return True
+        self._恢复事件 = asyncio.Event()
+        self._恢复事件.set()
+        # 启动准备包含预热，放到决策执行器上，不阻塞事件循环
+        if not await asyncio.get_running_loop().run_in_executor(self._决策执行器, self._引擎._启动准备):
             return False
-    
-    def 设置循环模式(self, 模式: int):
-        """设置循环模式"""
-        self._当前模式 = 模式
-    
+        self._引擎.按键分派 = self._分派按键
+        self._主任务 = asyncio.create_task(self._主循环())
+        self._引擎._日志("信息", "异步技能循环引擎已启动")
+        return True
+
+    async def _异步停止(self):
+        主任务, self._主任务 = self._主任务, None
+        self._引擎.running = False
+        # 唤醒决策执行器上的节拍等待，随后排队的stop才能立即执行
+        self._引擎.节拍器.停止()
+        if self._恢复事件 is not None:
+            self._恢复事件.set()
+        if 主任务 is not None:
+            主任务.cancel()
+            await asyncio.gather(主任务, return_exceptions=True)
+        self._引擎.按键分派 = None
+        # 在决策执行器上停止：正在执行的一拍结束后才释放按键和服务
+        await asyncio.get_running_loop().run_in_executor(self._决策执行器, self._引擎.stop)
+
+    def _切换暂停(self):
+        引擎 = self._引擎
+        引擎.paused = not 引擎.paused
+        if self._恢复事件 is not None:
+            if 引擎.paused:
+                self._恢复事件.clear()
+            else:
+                self._恢复事件.set()
+        引擎._日志("信息", f"异步技能循环引擎已{'暂停' if 引擎.paused else '恢复'}")
+
+    # ---------- 与技能循环引擎一致的界面接口 ----------
+
+    @property
+    def running(self) -> bool:
+        return self._引擎.running
+
+    @property
+    def paused(self) -> bool:
+        return self._引擎.paused
+
+    def start(self) -> bool:
+        """
+        启动异步循环（等待启动准备完成，与同步引擎一样在调用线程上阻塞）
+
+        返回:
+            bool: 循环是否在运行（启动失败时为False，原因见引擎的 启动错误）
+        """
+        任务 = self._任务管理器.运行协程(self._异步启动())
+        if self._任务管理器.在事件循环线程中():
+            return True
+        return 任务.result()
+
+    @property
+    def 启动错误(self) -> Optional[str]:
+        """最近一次启动失败的原因"""
+        return self._引擎.启动错误
+
+    def stop(self, 超时: float = 3.0):
+        """取消主循环及未完成的按键任务，等待引擎停止"""
+        任务 = self._任务管理器.运行协程(self._异步停止())
+        if not self._任务管理器.在事件循环线程中():
+            任务.result(超时)
+
+    def pause(self):
+        """暂停/恢复异步循环"""
+        self._任务管理器.事件循环.call_soon_threadsafe(self._切换暂停)
+
+    def 设置循环模式(self, 模式: Any):
+        """切换循环模式（在决策执行器上执行，不与正在进行的一拍交错）"""
+        self._决策执行器.submit(self._引擎.设置循环模式, 模式).result()
+
+    def get_running_status(self) -> Dict[str, Any]:
+        """获取运行状态（UI适配）"""
+        return self._引擎.get_running_status()
+
     def 获取性能统计(self) -> Dict[str, Any]:
         """获取性能统计信息"""
-        检测统计 = self._异步检测器.获取统计信息()
-        
         return {
-            "执行次数": self._执行次数,
-            "平均响应时间": f"{self._平均响应时间:.3f}秒",
-            "检测统计": 检测统计
+            "拍数": self._拍数,
+            "重叠拍数": self._重叠拍数,
+            "平均决策耗时": f"{self._总决策耗时 / max(self._拍数, 1) * 1000:.2f}ms",
+            "按键次数": self._按键次数,
+            "平均按键耗时": f"{self._总按键耗时 / max(self._按键次数, 1) * 1000:.2f}ms",
+            "任务统计": self._任务管理器.获取统计信息()
         }
 
+    def 关闭(self):
+        """停止引擎并关闭事件循环与执行器"""
+        if self._引擎.running:
+            self.stop()
+        self._任务管理器.关闭()
+        self._决策执行器.shutdown(wait=False)
+        self._输入执行器.shutdown(wait=False)
+
 
 # 使用示例
 if __name__ == "__main__":
     # 创建异步任务管理器
     任务管理器 = 异步任务管理器()
-    
+
     # 模拟异步图像处理接口
     class 模拟异步图像处理接口(异步图像处理接口):
         async def 异步获取屏幕图像(self, 区域: tuple) -> Any:
             await asyncio.sleep(0.01)  # 模拟IO操作
             return f"图像_{区域}"
-        
+
         async def 异步技能检测(self, 图像: Any, 技能配置: Dict[str, Any]) -> int:
             await asyncio.sleep(0.005)  # 模拟处理时间
             return 81  # 模拟技能键值
-    
+
     # 测试异步检测器
     图像接口 = 模拟异步图像处理接口()
     异步检测器 = 异步技能检测器(图像接口, 任务管理器)
-    
+
     # 测试异步检测
     async def 测试异步检测():
         技能配置 = {"技能名称": "青川濯莲", "键值": 81}
         检测区域 = (0, 0, 100, 100)
-        
+
         结果 = await 异步检测器.异步检测技能状态(技能配置, 检测区域)
         print(f"异步检测结果: {结果}")
-        
+
+        批量结果 = await 异步检测器.异步批量检测技能([技能配置, {"技能名称": "七情和合"}], 检测区域)
+        print(f"批量检测结果: {批量结果}")
+
         # 获取统计信息
         统计 = 异步检测器.获取统计信息()
         print(f"检测器统计: {统计}")
-    
-    # 运行测试
-    asyncio.run(测试异步检测())
-    
+
+    # 在任务管理器的事件循环线程上运行
+    任务管理器.运行协程(测试异步检测()).result()
+
     # 关闭任务管理器
-    任务管理器.关闭()
\ No newline at end of file
+    任务管理器.关闭()
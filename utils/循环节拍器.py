@@ -0,0 +1,225 @@
+"""
+循环节拍器
+以目标频率驱动主循环：基于单调时钟的截止时间调度、错拍补偿/跳过策略、
+基于Event的零唤醒暂停，以及节拍间隔抖动统计
+"""
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, List
+
+from utils.精确等待器 import 全局精确等待器
+
+
+class 循环节拍器:
+    """
+    循环节拍器
+    每一拍的截止时间由上一拍截止时间推算，避免误差累积
+    """
+
+    错拍策略列表 = ("跳过", "追赶")
+
+    def __init__(self, 目标频率: float = 60.0, 错拍策略: str = "跳过",
+                 最大追赶拍数: int = 3, 抖动样本数: int = 1000):
+        """
+        初始化循环节拍器
+
+        参数:
+            目标频率: 目标循环频率（Hz）
+            错拍策略: "跳过"=错过的拍直接丢弃并对齐到下一拍，"追赶"=立即补跑错过的拍
+            最大追赶拍数: 追赶策略下最多补跑的拍数，超过则重新对齐
+            抖动样本数: 保留的节拍间隔样本数量
+        """
+        if 错拍策略 not in self.错拍策略列表:
+            raise ValueError(f"不支持的错拍策略: {错拍策略}")
+
+        self._周期纳秒 = int(1e9 / max(目标频率, 0.1))
+        self._目标频率 = 目标频率
+        self._错拍策略 = 错拍策略
+        self._最大追赶拍数 = 最大追赶拍数
+
+        self._下次截止 = 0
+        self._上拍开始 = 0
+
+        # 运行事件置位表示未暂停；暂停时等待方阻塞在Event上，不产生任何唤醒
+        self._运行事件 = threading.Event()
+        self._运行事件.set()
+        self._停止事件 = threading.Event()
+
+        # 统计信息
+        self._间隔样本: deque = deque(maxlen=抖动样本数)
+        self._总拍数 = 0
+        self._错过拍数 = 0
+        self._追赶拍数 = 0
+
+    @property
+    def 目标频率(self) -> float:
+        """当前目标频率（Hz）"""
+        return self._目标频率
+
+    @property
+    def 周期(self) -> float:
+        """当前节拍周期（秒）"""
+        return self._周期纳秒 / 1e9
+
+    @property
+    def 下次截止纳秒(self) -> int:
+        """下一拍的截止时刻（time.perf_counter_ns时钟）"""
+        return self._下次截止
+
+    @property
+    def 已暂停(self) -> bool:
+        """是否处于暂停状态"""
+        return not self._运行事件.is_set()
+
+    @property
+    def 已停止(self) -> bool:
+        """是否已停止"""
+        return self._停止事件.is_set()
+
+    def 设置目标频率(self, 目标频率: float):
+        """
+        设置目标频率，下一拍立即按新周期对齐
+
+        参数:
+            目标频率: 目标循环频率（Hz）
+        """
+        self._目标频率 = 目标频率
+        self._周期纳秒 = int(1e9 / max(目标频率, 0.1))
+        self._下次截止 = time.perf_counter_ns() + self._周期纳秒
+
+    def 开始(self):
+        """开始计拍（循环线程启动时调用）"""
+        self._停止事件.clear()
+        self._运行事件.set()
+        现在 = time.perf_counter_ns()
+        self._上拍开始 = 0
+        self._下次截止 = 现在 + self._周期纳秒
+
+    def 停止(self):
+        """停止计拍，唤醒所有等待方"""
+        self._停止事件.set()
+        self._运行事件.set()
+
+    def 暂停(self):
+        """暂停：等待恢复()将阻塞直到恢复或停止"""
+        self._运行事件.clear()
+
+    def 恢复(self):
+        """恢复计拍，并从当前时刻重新对齐截止时间"""
+        self._下次截止 = time.perf_counter_ns() + self._周期纳秒
+        self._上拍开始 = 0
+        self._运行事件.set()
+
+    def 等待恢复(self) -> bool:
+        """
+        暂停时阻塞直到恢复或停止
+
+        返回:
+            bool: 是否应继续运行（已停止时返回False）
+        """
+        if not self._运行事件.is_set():
+            self._运行事件.wait()
+        return not self._停止事件.is_set()
+
+    def 等待下一拍(self) -> bool:
+        """
+        等待到下一拍的截止时间
+
+        返回:
+            bool: 是否应继续运行（已停止时返回False）
+        """
+        截止 = self._下次截止
+        现在 = time.perf_counter_ns()
+
+        if 现在 < 截止:
+            if not 全局精确等待器.等待至(截止, self._停止事件, self._周期纳秒):
+                return False
+            self._下次截止 = 截止 + self._周期纳秒
+        else:
+            落后拍数 = (现在 - 截止) // self._周期纳秒
+            if self._错拍策略 == "追赶" and 落后拍数 < self._最大追赶拍数:
+                # 不等待直接开始下一拍，后续拍逐步追回
+                self._下次截止 = 截止 + self._周期纳秒
+                if 落后拍数 > 0:
+                    self._追赶拍数 += 1
+            else:
+                # 丢弃错过的拍，对齐到下一个整拍
+                self._错过拍数 += 落后拍数
+                self._下次截止 = 截止 + (落后拍数 + 1) * self._周期纳秒
+
+        self._记录节拍开始()
+        return not self._停止事件.is_set()
+
+    def 等待(self, 秒数: float) -> bool:
+        """
+        在循环线程中等待一段时间（可被停止打断），并重新对齐截止时间
+
+        参数:
+            秒数: 等待时长（秒）
+
+        返回:
+            bool: 是否应继续运行（已停止时返回False）
+        """
+        if 秒数 > 0 and self._停止事件.wait(秒数):
+            return False
+        self._下次截止 = time.perf_counter_ns() + self._周期纳秒
+        self._上拍开始 = 0
+        return not self._停止事件.is_set()
+
+    def _记录节拍开始(self):
+        """记录本拍开始时刻和与上一拍的间隔"""
+        现在 = time.perf_counter_ns()
+        if self._上拍开始:
+            self._间隔样本.append(现在 - self._上拍开始)
+        self._上拍开始 = 现在
+        self._总拍数 += 1
+
+    @staticmethod
+    def _百分位(排序样本: List[int], 百分位: float) -> int:
+        """从已排序样本中取百分位值"""
+        索引 = min(len(排序样本) - 1, int(len(排序样本) * 百分位))
+        return 排序样本[索引]
+
+    def 获取抖动统计(self) -> Dict[str, Any]:
+        """
+        获取节拍间隔与抖动统计
+
+        返回:
+            dict: 统计信息，抖动为实际间隔与目标周期之差的绝对值
+        """
+        样本 = list(self._间隔样本)
+        if not 样本:
+            return {
+                "目标频率": self._目标频率,
+                "错拍策略": self._错拍策略,
+                "总拍数": self._总拍数,
+                "样本数量": 0
+            }
+
+        排序间隔 = sorted(样本)
+        排序抖动 = sorted(abs(间隔 - self._周期纳秒) for 间隔 in 样本)
+        平均间隔 = sum(样本) / len(样本)
+
+        return {
+            "目标频率": self._目标频率,
+            "实际频率": 1e9 / 平均间隔 if 平均间隔 > 0 else 0.0,
+            "错拍策略": self._错拍策略,
+            "总拍数": self._总拍数,
+            "错过拍数": self._错过拍数,
+            "追赶次数": self._追赶拍数,
+            "样本数量": len(样本),
+            "间隔P50": f"{self._百分位(排序间隔, 0.5) / 1e6:.3f}ms",
+            "间隔P99": f"{self._百分位(排序间隔, 0.99) / 1e6:.3f}ms",
+            "抖动P50": f"{self._百分位(排序抖动, 0.5) / 1e6:.3f}ms",
+            "抖动P90": f"{self._百分位(排序抖动, 0.9) / 1e6:.3f}ms",
+            "抖动P99": f"{self._百分位(排序抖动, 0.99) / 1e6:.3f}ms",
+            "最大抖动": f"{排序抖动[-1] / 1e6:.3f}ms"
+        }
+
+    def 重置统计(self):
+        """重置统计信息"""
+        self._间隔样本.clear()
+        self._总拍数 = 0
+        self._错过拍数 = 0
+        self._追赶拍数 = 0
@@ -2,12 +2,10 @@
 性能监控模块
 提供实时性能监控和统计功能
 """
-import time
-import threading
 from typing import Dict, Any, List
 from collections import defaultdict, deque
 from dataclasses import dataclass
-from threading import Lock
+from threading import RLock
 from utils.时间戳优化器 import 获取优化时间, 获取优化时间差
 
 
@@ -42,7 +40,8 @@ class 性能监控器:
         """
         self.历史记录 = deque(maxlen=历史记录数量)
         self.统计信息 = defaultdict(lambda: {"总次数": 0, "成功次数": 0, "总耗时": 0.0})
-        self.锁 = Lock()
+        # 可重入：生成性能报告持锁时还会调用获取操作统计
+        self.锁 = RLock()
         
         # 内存优化设置
         self._启用内存优化 = 启用内存优化
@@ -67,31 +66,20 @@ class 性能监控器:
             "最近10秒": {"总次数": 0, "成功次数": 0, "总耗时": 0.0, "最小耗时": float('inf'), "最大耗时": 0.0},
             "最近30秒": {"总次数": 0, "成功次数": 0, "总耗时": 0.0, "最小耗时": float('inf'), "最大耗时": 0.0}
         }
-        
-        # 启动内存监控线程
-        if 启用内存优化:
-            self._内存监控线程 = threading.Thread(target=self._内存监控循环, daemon=True)
-            self._内存监控线程.start()
-    
-    def _内存监控循环(self):
-        """内存监控循环"""
-        while True:
-            try:
-                time.sleep(10)
-            except Exception:
-                pass
 
-    def 开始记录(self, 操作名称: str) -> 性能指标:
+
+    def 开始记录(self, 操作名称: str, 时间戳: float = None) -> 性能指标:
         """
         开始记录一个操作
         
         参数:
             操作名称: 操作的名称
+            时间戳: 已取得的开始时间（单调时钟秒，如本拍快照），None则读取时钟
         
         返回:
             性能指标: 性能指标对象
         """
-        return 性能指标(操作名称=操作名称, 开始时间=获取优化时间())
+        return 性能指标(操作名称=操作名称, 开始时间=获取优化时间() if 时间戳 is None else 时间戳)
     
     def 结束记录(self, 指标: 性能指标, 成功: bool = True, 错误信息: str = ""):
         """
@@ -0,0 +1,332 @@
+"""
+拦截器链模块
+将权限检查、频率限制、性能监控、异常隔离等横切逻辑注册为有序拦截器，
+编译为单层包装函数，支持运行时开关并按拦截器统计每次调用的开销
+"""
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.异常隔离 import 异常隔离器
+
+
+class 拦截器:
+    """
+    拦截器基类
+    前置返回(是否放行, 状态)，拒绝时状态为拒绝原因；后置收到前置返回的状态
+    """
+
+    名称 = "拦截器"
+    # 是否在目标函数抛出异常时拦截异常并返回默认值
+    捕获异常 = False
+
+    def 前置(self) -> Tuple[bool, Any]:
+        """目标函数执行前调用"""
+        return True, None
+
+    def 后置(self, 状态: Any, 成功: bool, 错误信息: str = ""):
+        """目标函数执行后（或被后续拦截器拒绝后）调用"""
+        pass
+
+    def 处理异常(self, 异常: Exception) -> None:
+        """捕获异常时调用（仅捕获异常=True的拦截器）"""
+        pass
+
+
+class 权限拦截器(拦截器):
+    """检查系统权限（输入设备/屏幕访问）"""
+
+    名称 = "权限检查"
+
+    def __init__(self, 权限控制器: Any, 操作类型: str):
+        self._权限控制器 = 权限控制器
+        self._操作类型 = 操作类型
+
+    def 前置(self) -> Tuple[bool, Any]:
+        return self._权限控制器.检查系统权限(self._操作类型)
+
+
+class 频率拦截器(拦截器):
+    """检查操作频率限制，被拒绝时记录最早允许时间供调度方等待"""
+
+    名称 = "频率限制"
+
+    def __init__(self, 频率限制器: Any, 操作类型: str):
+        self._频率限制器 = 频率限制器
+        self._操作类型 = 操作类型
+        # 最近一次被拒绝时的最早允许时间（time.monotonic时钟），0表示无需等待
+        self.下次允许时间 = 0.0
+
+    def 前置(self) -> Tuple[bool, Any]:
+        允许, 下次允许时间, 原因 = self._频率限制器.尝试获取(self._操作类型)
+        self.下次允许时间 = 0.0 if 允许 else 下次允许时间
+        return 允许, 原因
+
+
+class 监控拦截器(拦截器):
+    """记录操作耗时和成功率到性能监控器"""
+
+    名称 = "性能监控"
+
+    def __init__(self, 性能监控器: Any, 操作名称: str, 时钟: Any = None,
+                 准入: Optional[Callable[[], bool]] = None):
+        """
+        参数:
+            性能监控器: 性能监控器实例
+            操作名称: 记录的操作名称
+            时钟: 时钟服务，提供时以其当前帧快照作为开始时间
+            准入: 可选，返回False时本次不记录（由服务质量管理器在负载高时卸载）
+        """
+        self._性能监控器 = 性能监控器
+        self._操作名称 = 操作名称
+        self._时钟 = 时钟
+        self._准入 = 准入
+
+    def 前置(self) -> Tuple[bool, Any]:
+        if self._准入 is not None and not self._准入():
+            return True, None
+        时间戳 = self._时钟.当前帧.秒 if self._时钟 is not None else None
+        return True, self._性能监控器.开始记录(self._操作名称, 时间戳)
+
+    def 后置(self, 状态: Any, 成功: bool, 错误信息: str = ""):
+        if 状态 is None:
+            return
+        self._性能监控器.结束记录(状态, 成功=成功, 错误信息=错误信息)
+
+
+class 异常隔离拦截器(拦截器):
+    """捕获目标函数的异常，按频率控制输出后返回默认值"""
+
+    名称 = "异常隔离"
+    捕获异常 = True
+
+    def __init__(self, 操作名称: str):
+        self._操作名称 = 操作名称
+        self.异常次数 = 0
+
+    def 处理异常(self, 异常: Exception) -> None:
+        self.异常次数 += 1
+        异常类型 = type(异常).__name__
+        if 异常隔离器._应该记录异常(self._操作名称, 异常类型):
+            print(f"{self._操作名称}执行失败: {异常类型}: {异常}")
+
+
+class 拦截器链:
+    """
+    拦截器链
+    按注册顺序执行拦截器；每次开关或增删拦截器后重新编译为单层包装函数，
+    调用方通过 链.调用(*args, **kwargs) 执行
+    """
+
+    def __init__(self, 目标函数: Callable, 默认返回值: Any = None,
+                 拒绝回调: Optional[Callable[[str, str], None]] = None, 计量采样间隔: int = 16):
+        """
+        初始化拦截器链
+
+        参数:
+            目标函数: 被拦截的函数
+            默认返回值: 被拒绝或异常被隔离时的返回值
+            拒绝回调: 被拒绝时调用，参数为(拦截器名称, 拒绝原因)
+            计量采样间隔: 每N次调用计量一次各拦截器开销，0表示不计量
+        """
+        self._目标函数 = 目标函数
+        self._默认返回值 = 默认返回值
+        self._拒绝回调 = 拒绝回调
+        self._计量采样间隔 = 计量采样间隔
+        self._拦截器列表: List[拦截器] = []
+        self._启用状态: Dict[str, bool] = {}
+        self._锁 = threading.Lock()
+
+        # 开销统计：名称 -> [采样次数, 累计纳秒]
+        self._开销统计: Dict[str, List[int]] = {}
+        self._调用次数 = 0
+        self._拒绝次数: Dict[str, int] = {}
+
+        self.调用: Callable = 目标函数
+        self._编译()
+
+    def 注册(self, 拦截器实例: 拦截器, 位置: Optional[int] = None, 启用: bool = True) -> "拦截器链":
+        """
+        注册拦截器
+
+        参数:
+            拦截器实例: 拦截器
+            位置: 插入位置，None表示追加到末尾
+            启用: 是否启用
+        """
+        with self._锁:
+            if 位置 is None:
+                self._拦截器列表.append(拦截器实例)
+            else:
+                self._拦截器列表.insert(位置, 拦截器实例)
+            self._启用状态[拦截器实例.名称] = 启用
+            self._编译()
+        return self
+
+    def 移除(self, 名称: str) -> bool:
+        """移除指定名称的拦截器"""
+        with self._锁:
+            原数量 = len(self._拦截器列表)
+            self._拦截器列表 = [i for i in self._拦截器列表 if i.名称 != 名称]
+            self._启用状态.pop(名称, None)
+            self._编译()
+            return len(self._拦截器列表) < 原数量
+
+    def 设置启用(self, 名称: str, 启用: bool):
+        """运行时开关指定拦截器"""
+        with self._锁:
+            if 名称 not in self._启用状态:
+                raise KeyError(f"未注册的拦截器: {名称}")
+            self._启用状态[名称] = 启用
+            self._编译()
+
+    def 是否启用(self, 名称: str) -> bool:
+        """判断指定拦截器是否启用"""
+        return self._启用状态.get(名称, False)
+
+    def 设置计量采样间隔(self, 采样间隔: int):
+        """设置开销计量的采样间隔，0表示关闭计量"""
+        with self._锁:
+            self._计量采样间隔 = max(0, 采样间隔)
+            self._编译()
+
+    def _编译(self):
+        """根据当前启用的拦截器生成单层包装函数"""
+        已启用 = tuple(i for i in self._拦截器列表 if self._启用状态.get(i.名称, False))
+        目标函数 = self._目标函数
+        默认返回值 = self._默认返回值
+
+        if not 已启用:
+            self.调用 = 目标函数
+            return
+
+        前置组 = tuple(i.前置 for i in 已启用)
+        后置组 = tuple((i.名称, i.后置) for i in 已启用)
+        名称组 = tuple(i.名称 for i in 已启用)
+        异常处理组 = tuple(i.处理异常 for i in 已启用 if i.捕获异常)
+        拦截器数量 = len(已启用)
+        采样间隔 = self._计量采样间隔
+        开销统计 = self._开销统计
+        for 名称 in 名称组:
+            开销统计.setdefault(名称, [0, 0])
+        开销统计.setdefault("目标函数", [0, 0])
+        计时 = time.perf_counter_ns
+        链 = self
+
+        def _拒绝(位置: int, 原因: Any, 状态列表: list):
+            名称 = 名称组[位置]
+            链._拒绝次数[名称] = 链._拒绝次数.get(名称, 0) + 1
+            for 序号 in range(位置 - 1, -1, -1):
+                后置组[序号][1](状态列表[序号], False, str(原因))
+            if 链._拒绝回调:
+                链._拒绝回调(名称, str(原因))
+            return 默认返回值
+
+        def _计量调用(*args, **kwargs):
+            状态列表 = [None] * 拦截器数量
+            前置耗时 = [0] * 拦截器数量
+            for 序号 in range(拦截器数量):
+                起点 = 计时()
+                允许, 状态 = 前置组[序号]()
+                前置耗时[序号] = 计时() - 起点
+                if not 允许:
+                    # 被拒绝的调用不计入开销样本
+                    return _拒绝(序号, 状态, 状态列表)
+                状态列表[序号] = 状态
+
+            起点 = 计时()
+            try:
+                结果 = 目标函数(*args, **kwargs)
+                成功, 错误信息 = True, ""
+            except Exception as e:
+                结果, 成功, 错误信息 = None, False, str(e)
+                异常 = e
+            开销统计["目标函数"][1] += 计时() - 起点
+            开销统计["目标函数"][0] += 1
+
+            for 序号 in range(拦截器数量 - 1, -1, -1):
+                名称, 后置 = 后置组[序号]
+                起点 = 计时()
+                后置(状态列表[序号], 成功, 错误信息)
+                统计 = 开销统计[名称]
+                统计[1] += 计时() - 起点 + 前置耗时[序号]
+                统计[0] += 1
+
+            if not 成功:
+                if not 异常处理组:
+                    raise 异常
+                for 处理 in 异常处理组:
+                    处理(异常)
+                return 默认返回值
+            return 结果
+
+        def 包装器(*args, **kwargs):
+            链._调用次数 += 1
+            if 采样间隔 and 链._调用次数 % 采样间隔 == 0:
+                return _计量调用(*args, **kwargs)
+
+            状态列表 = [None] * 拦截器数量
+            for 序号 in range(拦截器数量):
+                允许, 状态 = 前置组[序号]()
+                if not 允许:
+                    return _拒绝(序号, 状态, 状态列表)
+                状态列表[序号] = 状态
+
+            try:
+                结果 = 目标函数(*args, **kwargs)
+            except Exception as e:
+                for 序号 in range(拦截器数量 - 1, -1, -1):
+                    后置组[序号][1](状态列表[序号], False, str(e))
+                if not 异常处理组:
+                    raise
+                for 处理 in 异常处理组:
+                    处理(e)
+                return 默认返回值
+
+            for 序号 in range(拦截器数量 - 1, -1, -1):
+                后置组[序号][1](状态列表[序号], True, "")
+            return 结果
+
+        self.调用 = 包装器
+
+    def 获取开销报告(self) -> Dict[str, Any]:
+        """
+        获取各拦截器的单次调用平均开销（基于采样）
+
+        返回:
+            dict: 拦截器开销报告
+        """
+        拦截器报告 = {}
+        for 拦截器实例 in self._拦截器列表:
+            名称 = 拦截器实例.名称
+            次数, 累计纳秒 = self._开销统计.get(名称, [0, 0])
+            拦截器报告[名称] = {
+                "启用": self._启用状态.get(名称, False),
+                "平均开销": f"{累计纳秒 / 次数 / 1000:.2f}us" if 次数 else "无数据",
+                "采样次数": 次数,
+                "拒绝次数": self._拒绝次数.get(名称, 0)
+            }
+
+        目标次数, 目标纳秒 = self._开销统计.get("目标函数", [0, 0])
+        拦截器总纳秒 = sum(
+            self._开销统计[名称][1] / self._开销统计[名称][0]
+            for 名称 in self._开销统计
+            if 名称 != "目标函数" and self._开销统计[名称][0] and self._启用状态.get(名称, False)
+        )
+
+        return {
+            "调用次数": self._调用次数,
+            "计量采样间隔": self._计量采样间隔,
+            "拦截器": 拦截器报告,
+            "目标函数平均耗时": f"{目标纳秒 / 目标次数 / 1000:.2f}us" if 目标次数 else "无数据",
+            "拦截器总开销": f"{拦截器总纳秒 / 1000:.2f}us"
+        }
+
+    def 重置统计(self):
+        """重置开销统计"""
+        with self._锁:
+            for 统计 in self._开销统计.values():
+                统计[0] = 0
+                统计[1] = 0
+            self._调用次数 = 0
+            self._拒绝次数.clear()
@@ -8,6 +8,7 @@ import sys
 from typing import Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
+from utils.服务注册表 import 全局服务注册表
 
 
 class 日志级别(Enum):
@@ -46,7 +47,7 @@ class 日志管理器:
     @staticmethod
     def 获取日志记录器(名称: str):
         """获取指定名称的日志记录器（兼容性接口）"""
-        return 全局日志管理器
+        return _全局日志管理器()
     
     def _切换日志文件(self):
         """切换日志文件（按日期）"""
@@ -198,8 +199,14 @@ class 日志管理器:
         }
 
 
-# 全局日志管理器实例
-全局日志管理器 = 日志管理器()
+# 全局日志管理器（首次记录日志时创建日志目录和文件）
+全局服务注册表.注册("日志管理器", 日志管理器)
+__getattr__ = 全局服务注册表.模块属性({"全局日志管理器": "日志管理器"})
+
+
+def _全局日志管理器() -> 日志管理器:
+    """获取全局日志管理器"""
+    return 全局服务注册表.获取("日志管理器")
 
 
 def 日志装饰器(级别: 日志级别 = 日志级别.信息):
@@ -216,19 +223,19 @@ def 日志装饰器(级别: 日志级别 = 日志级别.信息):
             开始时间 = time.time()
             
             # 记录函数开始
-            全局日志管理器.记录日志(级别, f"函数调用开始: {函数名}", {"参数": str(args), "关键字参数": str(kwargs)})
+            _全局日志管理器().记录日志(级别, f"函数调用开始: {函数名}", {"参数": str(args), "关键字参数": str(kwargs)})
             
             try:
                 结果 = 函数(*args, **kwargs)
                 执行时间 = time.time() - 开始时间
                 
                 # 记录函数结束
-                全局日志管理器.记录日志(级别, f"函数调用结束: {函数名}", {"执行时间": 执行时间, "结果": str(结果)})
+                _全局日志管理器().记录日志(级别, f"函数调用结束: {函数名}", {"执行时间": 执行时间, "结果": str(结果)})
                 
                 return 结果
             except Exception as e:
                 # 记录错误
-                全局日志管理器.错误(f"函数调用异常: {函数名}", {"异常": str(e), "参数": str(args)})
+                _全局日志管理器().错误(f"函数调用异常: {函数名}", {"异常": str(e), "参数": str(args)})
                 raise
         
         return 包装器
@@ -237,14 +244,14 @@ def 日志装饰器(级别: 日志级别 = 日志级别.信息):
 
 def 快速记录调试(消息: str):
     """快速记录调试信息（简化调用）"""
-    全局日志管理器.调试(消息)
+    _全局日志管理器().调试(消息)
 
 
 def 快速记录信息(消息: str):
     """快速记录信息（简化调用）"""
-    全局日志管理器.信息(消息)
+    _全局日志管理器().信息(消息)
 
 
 def 快速记录错误(消息: str):
     """快速记录错误（简化调用）"""
-    全局日志管理器.错误(消息)
\ No newline at end of file
+    _全局日志管理器().错误(消息)
\ No newline at end of file
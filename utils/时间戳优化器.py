@@ -1,129 +1,174 @@
 """
 时间戳优化器
-减少频繁的time.time()系统调用，提升性能
+基于perf_counter_ns的单调时钟服务：读取无锁，不受系统时间调整影响；
+引擎在每一拍开始时生成一次时间快照，热路径直接读取快照字段
 """
 import time
 from typing import Dict, Any
-import threading
 
 
-class 时间戳优化器:
+class 时间快照:
+    """某一时刻的单调时间（纳秒与秒两种表示）"""
+
+    __slots__ = ("纳秒", "秒", "帧序号")
+
+    def __init__(self, 纳秒: int, 帧序号: int = 0):
+        self.纳秒 = 纳秒
+        self.秒 = 纳秒 / 1e9
+        self.帧序号 = 帧序号
+
+    def __repr__(self) -> str:
+        return f"时间快照(帧序号={self.帧序号}, 秒={self.秒:.6f})"
+
+
+class 时钟服务:
     """
-    时间戳优化器
-    通过采样机制减少time.time()调用次数
+    时钟服务
+    所有时间均来自同一个单调时钟（time.perf_counter_ns），可直接相减；
+    当前帧快照为普通属性，读取时不加锁、不产生系统调用
     """
-    
-    def __init__(self, 采样间隔: float = 0.005):
+
+    # 直接绑定时钟函数，避免额外的方法调用层
+    现在纳秒 = staticmethod(time.perf_counter_ns)
+    现在 = staticmethod(time.perf_counter)
+
+    def __init__(self):
+        """初始化时钟服务"""
+        self.帧序号 = 0
+        self.当前帧 = 时间快照(time.perf_counter_ns(), 0)
+
+    def 开始新帧(self) -> 时间快照:
         """
-        初始化时间戳优化器
-        
-        参数:
-            采样间隔: 采样间隔（秒），默认5ms（优化后）
+        生成新一拍的时间快照（每拍由引擎调用一次）
+
+        返回:
+            时间快照: 本拍开始时刻
         """
-        self._采样间隔 = 采样间隔
-        self._当前时间 = time.time()
-        self._最后采样时间 = 0
-        self._锁 = threading.RLock()
-        
-        # 统计信息
-        self._总调用次数 = 0
-        self._缓存命中次数 = 0
-        self._系统调用次数 = 0
-    
+        self.帧序号 += 1
+        快照 = 时间快照(time.perf_counter_ns(), self.帧序号)
+        self.当前帧 = 快照
+        return 快照
+
     def 获取当前时间(self) -> float:
         """
-        获取当前时间（带缓存优化）
-        
+        获取当前单调时间（秒）
+
         返回:
-            当前时间戳
+            当前单调时间
         """
-        self._总调用次数 += 1
-        
-        with self._锁:
-            当前时间 = time.time()
-            
-            # 检查是否需要重新采样
-            if 当前时间 - self._最后采样时间 > self._采样间隔:
-                self._当前时间 = 当前时间
-                self._最后采样时间 = 当前时间
-                self._系统调用次数 += 1
-            else:
-                self._缓存命中次数 += 1
-            
-            return self._当前时间
-    
+        return time.perf_counter()
+
     def 获取时间差(self, 开始时间: float) -> float:
         """
-        获取时间差（优化版本）
-        
+        获取距开始时间的时长
+
         参数:
-            开始时间: 开始时间戳
-            
+            开始时间: 由获取当前时间()得到的单调时间（秒）
+
         返回:
             时间差（秒）
         """
-        return self.获取当前时间() - 开始时间
-    
+        return time.perf_counter() - 开始时间
+
+    @staticmethod
+    def 耗时纳秒(开始纳秒: int) -> int:
+        """距开始时刻经过的纳秒数"""
+        return time.perf_counter_ns() - 开始纳秒
+
+    @staticmethod
+    def 截止纳秒(秒数: float, 起点纳秒: int = None) -> int:
+        """计算从起点（默认现在）起经过指定秒数的截止时刻"""
+        if 起点纳秒 is None:
+            起点纳秒 = time.perf_counter_ns()
+        return 起点纳秒 + int(秒数 * 1e9)
+
+    @staticmethod
+    def 剩余纳秒(截止纳秒: int) -> int:
+        """距截止时刻的剩余纳秒数（已过期为0）"""
+        return max(0, 截止纳秒 - time.perf_counter_ns())
+
+    @staticmethod
+    def 已到期(截止纳秒: int, 当前纳秒: int = None) -> bool:
+        """判断截止时刻是否已到"""
+        if 当前纳秒 is None:
+            当前纳秒 = time.perf_counter_ns()
+        return 当前纳秒 >= 截止纳秒
+
+    @staticmethod
+    def 秒转纳秒(秒数: float) -> int:
+        """秒转换为纳秒"""
+        return int(秒数 * 1e9)
+
+    @staticmethod
+    def 纳秒转秒(纳秒: int) -> float:
+        """纳秒转换为秒"""
+        return 纳秒 / 1e9
+
     def 重置统计(self):
         """重置统计信息"""
-        with self._锁:
-            self._总调用次数 = 0
-            self._缓存命中次数 = 0
-            self._系统调用次数 = 0
-    
+        self.帧序号 = 0
+
     def 获取统计信息(self) -> Dict[str, Any]:
         """
         获取统计信息
-        
+
         返回:
             统计信息字典
         """
-        with self._锁:
-            命中率 = self._缓存命中次数 / max(self._总调用次数, 1)
-            优化率 = 1 - (self._系统调用次数 / max(self._总调用次数, 1))
-            
-            return {
-                "总调用次数": self._总调用次数,
-                "缓存命中次数": self._缓存命中次数,
-                "系统调用次数": self._系统调用次数,
-                "缓存命中率": f"{命中率:.2%}",
-                "性能优化率": f"{优化率:.2%}",
-                "采样间隔": self._采样间隔
-            }
+        return {
+            "时钟源": "perf_counter_ns",
+            "帧序号": self.帧序号,
+            "当前帧时间": f"{self.当前帧.秒:.6f}",
+            "距当前帧": f"{(time.perf_counter_ns() - self.当前帧.纳秒) / 1e6:.3f}ms"
+        }
 
 
-# 全局时间戳优化器实例
-全局时间戳优化器 = 时间戳优化器()
+# 兼容旧名称
+时间戳优化器 = 时钟服务
+
+# 全局时钟服务实例
+全局时钟 = 时钟服务()
+全局时间戳优化器 = 全局时钟
 
 
 def 获取优化时间() -> float:
     """
-    获取优化后的当前时间
-    
+    获取当前单调时间（秒），只用于计算时间差
+
     返回:
-        当前时间戳
+        当前单调时间
     """
-    return 全局时间戳优化器.获取当前时间()
+    return time.perf_counter()
 
 
 def 获取优化时间差(开始时间: float) -> float:
     """
-    获取优化后的时间差
-    
+    获取时间差
+
     参数:
-        开始时间: 开始时间戳
-        
+        开始时间: 由获取优化时间()得到的单调时间
+
     返回:
         时间差（秒）
     """
-    return 全局时间戳优化器.获取时间差(开始时间)
+    return time.perf_counter() - 开始时间
+
+
+def 获取帧时间() -> float:
+    """
+    获取当前帧快照时间（秒），无锁、无系统调用
+
+    返回:
+        当前帧开始时刻的单调时间
+    """
+    return 全局时钟.当前帧.秒
 
 
 def 获取时间优化统计() -> Dict[str, Any]:
     """
-    获取时间优化统计信息
-    
+    获取时钟统计信息
+
     返回:
         统计信息字典
     """
-    return 全局时间戳优化器.获取统计信息()
\ No newline at end of file
+    return 全局时钟.获取统计信息()
@@ -0,0 +1,241 @@
+"""
+服务注册表
+全局服务在首次使用（或引擎显式启动）时才创建，模块导入不再产生线程、文件等副作用；
+模块通过PEP 562的模块级__getattr__保留旧的全局实例名称，并提供基于-X importtime的启动耗时报告
+"""
+import os
+import sys
+import time
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, Optional, List
+
+
+@dataclass
+class 服务描述:
+    """一个惰性服务的注册信息"""
+    名称: str
+    工厂: Callable[[], Any]
+    启动: Optional[Callable[[Any], None]] = None
+    停止: Optional[Callable[[Any], None]] = None
+    随引擎启动: bool = False
+    实例: Any = None
+    已创建: bool = False
+    已启动: bool = False
+    创建耗时: float = 0.0
+
+
+class 服务注册表:
+    """
+    服务注册表
+    注册只记录工厂函数；获取时按需创建（线程安全，只创建一次）
+    """
+
+    def __init__(self):
+        self._服务: Dict[str, 服务描述] = {}
+        self._锁 = threading.RLock()
+
+    def 注册(self, 名称: str, 工厂: Callable[[], Any], 启动: Optional[Callable[[Any], None]] = None,
+           停止: Optional[Callable[[Any], None]] = None, 随引擎启动: bool = False):
+        """
+        注册惰性服务（同名服务已创建时保留原实例）
+
+        参数:
+            名称: 服务名称
+            工厂: 无参工厂函数
+            启动: 可选，引擎启动时对实例调用
+            停止: 可选，引擎停止时对实例调用
+            随引擎启动: 是否在引擎启动时预先创建
+        """
+        with self._锁:
+            旧服务 = self._服务.get(名称)
+            if 旧服务 is not None and 旧服务.已创建:
+                return
+            self._服务[名称] = 服务描述(名称, 工厂, 启动, 停止, 随引擎启动)
+
+    def 获取(self, 名称: str) -> Any:
+        """
+        获取服务实例，首次调用时创建
+
+        参数:
+            名称: 服务名称
+
+        返回:
+            服务实例
+        """
+        服务 = self._服务.get(名称)
+        if 服务 is None:
+            raise KeyError(f"服务未注册: {名称}")
+        if 服务.已创建:
+            return 服务.实例
+
+        with self._锁:
+            if not 服务.已创建:
+                开始时间 = time.perf_counter()
+                服务.实例 = 服务.工厂()
+                服务.创建耗时 = time.perf_counter() - 开始时间
+                服务.已创建 = True
+        return 服务.实例
+
+    def 是否已创建(self, 名称: str) -> bool:
+        """判断服务是否已创建"""
+        服务 = self._服务.get(名称)
+        return 服务 is not None and 服务.已创建
+
+    def 启动全部(self):
+        """创建并启动所有随引擎启动的服务"""
+        for 服务 in list(self._服务.values()):
+            if not 服务.随引擎启动 or 服务.已启动:
+                continue
+            try:
+                实例 = self.获取(服务.名称)
+                if 服务.启动 is not None:
+                    服务.启动(实例)
+                服务.已启动 = True
+            except Exception as e:
+                print(f"服务 {服务.名称} 启动失败: {e}")
+
+    def 停止全部(self):
+        """停止所有已启动的服务（实例保留，可再次启动）"""
+        for 服务 in list(self._服务.values()):
+            if not 服务.已启动:
+                continue
+            try:
+                if 服务.停止 is not None:
+                    服务.停止(服务.实例)
+            except Exception as e:
+                print(f"服务 {服务.名称} 停止失败: {e}")
+            服务.已启动 = False
+
+    def 模块属性(self, 映射: Dict[str, str]) -> Callable[[str], Any]:
+        """
+        生成模块级__getattr__（PEP 562），把旧的全局实例名称映射到惰性服务
+
+        参数:
+            映射: {模块属性名: 服务名称}
+
+        返回:
+            可赋值给模块__getattr__的函数
+        """
+        def __getattr__(属性名: str) -> Any:
+            服务名称 = 映射.get(属性名)
+            if 服务名称 is None:
+                raise AttributeError(属性名)
+            return self.获取(服务名称)
+        return __getattr__
+
+    def 获取服务状态(self) -> Dict[str, Any]:
+        """获取各服务的创建与启动状态"""
+        return {
+            服务.名称: {
+                "已创建": 服务.已创建,
+                "已启动": 服务.已启动,
+                "随引擎启动": 服务.随引擎启动,
+                "创建耗时": f"{服务.创建耗时 * 1000:.2f}ms"
+            }
+            for 服务 in list(self._服务.values())
+        }
+
+
+# 全局服务注册表实例
+全局服务注册表 = 服务注册表()
+
+
+def 获取服务(名称: str) -> Any:
+    """获取全局服务实例（首次调用时创建）"""
+    return 全局服务注册表.获取(名称)
+
+
+def 解析导入耗时(输出: str) -> List[Dict[str, Any]]:
+    """
+    解析-X importtime输出
+
+    参数:
+        输出: 解释器stderr文本
+
+    返回:
+        每个模块的自身耗时与累计耗时（微秒）
+    """
+    记录 = []
+    for 行 in 输出.splitlines():
+        if not 行.startswith("import time:"):
+            continue
+        字段 = 行[len("import time:"):].split("|")
+        if len(字段) != 3:
+            continue
+        try:
+            自身耗时 = int(字段[0].strip())
+            累计耗时 = int(字段[1].strip())
+        except ValueError:
+            # 表头行
+            continue
+        模块名 = 字段[2].rstrip()
+        记录.append({
+            "模块": 模块名.strip(),
+            "层级": (len(模块名) - len(模块名.lstrip())) // 2,
+            "自身耗时": 自身耗时,
+            "累计耗时": 累计耗时
+        })
+    return 记录
+
+
+def 获取启动耗时报告(模块名: str = "core.技能循环引擎", 前N个: int = 15,
+                 工作目录: Optional[str] = None) -> Dict[str, Any]:
+    """
+    在子进程中以-X importtime导入模块，生成按模块分解的启动耗时报告
+
+    参数:
+        模块名: 要测量的模块
+        前N个: 报告中列出的最慢模块数量
+        工作目录: 子进程工作目录，默认为项目根目录
+
+    返回:
+        启动耗时报告
+    """
+    import subprocess
+
+    if 工作目录 is None:
+        工作目录 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    开始时间 = time.perf_counter()
+    结果 = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {模块名}"],
+        cwd=工作目录, capture_output=True, text=True, encoding="utf-8", errors="replace"
+    )
+    总耗时 = time.perf_counter() - 开始时间
+
+    记录 = 解析导入耗时(结果.stderr)
+    顶层 = [项 for 项 in 记录 if 项["模块"] == 模块名]
+    按自身耗时 = sorted(记录, key=lambda 项: 项["自身耗时"], reverse=True)[:前N个]
+
+    # 按顶级包汇总自身耗时
+    包汇总: Dict[str, int] = {}
+    for 项 in 记录:
+        包名 = 项["模块"].split(".")[0]
+        包汇总[包名] = 包汇总.get(包名, 0) + 项["自身耗时"]
+    包排行 = sorted(包汇总.items(), key=lambda 项: 项[1], reverse=True)[:前N个]
+
+    return {
+        "模块": 模块名,
+        "导入成功": 结果.returncode == 0,
+        "错误信息": 结果.stderr.strip().splitlines()[-1] if 结果.returncode != 0 and 结果.stderr.strip() else "",
+        "导入耗时": f"{顶层[-1]['累计耗时'] / 1000:.1f}ms" if 顶层 else "未知",
+        "进程总耗时": f"{总耗时 * 1000:.1f}ms",
+        "模块数量": len(记录),
+        "最慢模块": [
+            {"模块": 项["模块"], "自身耗时": f"{项['自身耗时'] / 1000:.2f}ms",
+             "累计耗时": f"{项['累计耗时'] / 1000:.2f}ms"}
+            for 项 in 按自身耗时
+        ],
+        "按包汇总": {包名: f"{耗时 / 1000:.2f}ms" for 包名, 耗时 in 包排行}
+    }
+
+
+if __name__ == "__main__":
+    目标模块 = sys.argv[1] if len(sys.argv) > 1 else "core.技能循环引擎"
+    报告 = 获取启动耗时报告(目标模块)
+    print(f"{报告['模块']} 导入耗时: {报告['导入耗时']}（进程总耗时 {报告['进程总耗时']}，共{报告['模块数量']}个模块）")
+    if 报告["错误信息"]:
+        print(f"导入失败: {报告['错误信息']}")
+    for 项 in 报告["最慢模块"]:
+        print(f"  {项['自身耗时']:>10} {项['累计耗时']:>10}  {项['模块']}")
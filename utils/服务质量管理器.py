@@ -0,0 +1,313 @@
+"""
+服务质量管理器
+每拍按时间预算执行工作单元：每个单元声明优先级和预估耗时（按实测耗时指数平滑），
+前序阶段超时后跳过剩余预算容纳不下的低优先级单元；连续超预算时提升负载级别整体卸载，
+负载平稳后逐级归还，关键单元始终执行，保证决策延迟有上界；
+并行工作（检测图节点）由调度线程在派发前统一判定准入，工作线程只执行和记录耗时
+"""
+import time
+import threading
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Dict, Any, Callable, List, Optional
+
+
+class 工作优先级(IntEnum):
+    """工作单元优先级（数值越大越先被卸载）"""
+    关键 = 0
+    高 = 1
+    中 = 2
+    低 = 3
+
+
+@dataclass
+class 工作单元:
+    """一个受预算约束的工作单元"""
+    名称: str
+    优先级: 工作优先级
+    预估耗时纳秒: float
+    最长延后拍数: Optional[int] = None  # 连续跳过达到该拍数后强制执行一次，None表示可无限延后
+    执行次数: int = 0
+    跳过次数: int = 0
+    超预算跳过次数: int = 0
+    降载跳过次数: int = 0
+    强制执行次数: int = 0
+    连续跳过拍数: int = 0
+    上次结果: Any = None
+
+
+class 服务质量管理器:
+    """
+    服务质量管理器
+    负载级别L（0~3）时优先级数值大于3-L的单元直接卸载；
+    未卸载的非关键单元在本拍剩余预算小于其预估耗时时跳过
+    """
+
+    最高负载级别 = 3
+
+    def __init__(self, 拍预算: float = 0.0133, 平滑系数: float = 0.2,
+                 升级超时拍数: int = 3, 归还平稳拍数: int = 60, 平稳比例: float = 0.5):
+        """
+        初始化服务质量管理器
+
+        参数:
+            拍预算: 每拍工作时间预算（秒）
+            平滑系数: 实测耗时的指数平滑系数
+            升级超时拍数: 连续超预算多少拍后提升一级负载级别
+            归还平稳拍数: 连续平稳多少拍后降低一级负载级别
+            平稳比例: 拍耗时低于预算的该比例视为平稳
+        """
+        self._拍预算纳秒 = int(拍预算 * 1e9)
+        self._平滑系数 = 平滑系数
+        self._升级超时拍数 = 升级超时拍数
+        self._归还平稳拍数 = 归还平稳拍数
+        self._平稳比例 = 平稳比例
+
+        self._单元: Dict[str, 工作单元] = {}
+        # 引擎线程计拍、工作线程记录耗时，单元状态和负载级别的读写都持锁（结束拍中会提高负载级别，需可重入）
+        self._锁 = threading.RLock()
+        self.负载级别 = 0
+        self._拍开始纳秒: Optional[int] = None
+        self._连续超时拍数 = 0
+        self._连续平稳拍数 = 0
+
+        # 统计信息
+        self._总拍数 = 0
+        self._超预算拍数 = 0
+        self._升级次数 = 0
+        self._归还次数 = 0
+        self._最大拍耗时纳秒 = 0
+
+    @property
+    def 拍预算(self) -> float:
+        """每拍工作时间预算（秒）"""
+        return self._拍预算纳秒 / 1e9
+
+    def 设置拍预算(self, 拍预算: float):
+        """设置每拍工作时间预算（秒），通常随节拍周期变化"""
+        self._拍预算纳秒 = int(max(拍预算, 0.0) * 1e9)
+
+    def 注册(self, 名称: str, 优先级: 工作优先级, 预估耗时: float, 最长延后拍数: Optional[int] = None):
+        """
+        注册工作单元（同名单元保留已学习的耗时和统计）
+
+        参数:
+            名称: 工作单元名称
+            优先级: 工作优先级
+            预估耗时: 初始预估耗时（秒），之后按实测耗时平滑更新
+            最长延后拍数: 可选，连续跳过达到该拍数后强制执行一次
+        """
+        with self._锁:
+            单元 = self._单元.get(名称)
+            if 单元 is not None:
+                单元.优先级 = 优先级
+                单元.最长延后拍数 = 最长延后拍数
+                return
+            self._单元[名称] = 工作单元(名称, 优先级, 预估耗时 * 1e9, 最长延后拍数)
+
+    def 开始拍(self, 开始纳秒: Optional[int] = None):
+        """
+        标记一拍开始，本拍预算从此刻起计算
+
+        参数:
+            开始纳秒: 可选，本拍开始时刻（time.perf_counter_ns时钟）
+        """
+        with self._锁:
+            self._拍开始纳秒 = time.perf_counter_ns() if 开始纳秒 is None else 开始纳秒
+
+    @property
+    def 剩余预算纳秒(self) -> int:
+        """本拍剩余预算（未开始计拍时视为预算充足）"""
+        if self._拍开始纳秒 is None:
+            return self._拍预算纳秒
+        return self._拍预算纳秒 - (time.perf_counter_ns() - self._拍开始纳秒)
+
+    def 允许(self, 名称: str) -> bool:
+        """
+        判断工作单元本拍是否可以执行（不允许时计入跳过）
+
+        参数:
+            名称: 工作单元名称（未注册的单元总是允许）
+
+        返回:
+            bool: 是否执行
+        """
+        with self._锁:
+            单元 = self._单元.get(名称)
+            return 单元 is None or self._判定(单元, self.剩余预算纳秒)
+
+    def _判定(self, 单元: 工作单元, 剩余预算纳秒: float) -> bool:
+        """按优先级、负载级别和剩余预算判定单元是否执行，不执行时计入跳过（需持有锁）"""
+        if 单元.优先级 == 工作优先级.关键:
+            return True
+
+        if 单元.最长延后拍数 is not None and 单元.连续跳过拍数 >= 单元.最长延后拍数:
+            单元.强制执行次数 += 1
+            return True
+
+        if 单元.优先级 > self.最高负载级别 - self.负载级别:
+            单元.降载跳过次数 += 1
+        elif 单元.预估耗时纳秒 > 剩余预算纳秒:
+            单元.超预算跳过次数 += 1
+        else:
+            return True
+
+        单元.跳过次数 += 1
+        单元.连续跳过拍数 += 1
+        return False
+
+    def 准入批次(self, 名称列表: List[str]) -> Dict[str, bool]:
+        """
+        在派发并行工作前于调度线程上一次性判定准入：按优先级依次判定，
+        已准入单元的预估耗时从本拍剩余预算中预留，后判定的单元只能使用余下部分
+
+        参数:
+            名称列表: 本拍将派发的工作单元名称
+
+        返回:
+            dict: {名称: 是否执行}，结果通过执行()的已准入参数交给工作线程
+        """
+        with self._锁:
+            剩余 = self.剩余预算纳秒
+            结果 = {}
+            for 名称 in sorted(名称列表, key=lambda 名称: self._单元[名称].优先级 if 名称 in self._单元 else 0):
+                单元 = self._单元.get(名称)
+                结果[名称] = 单元 is None or self._判定(单元, 剩余)
+                if 单元 is not None and 结果[名称]:
+                    剩余 -= 单元.预估耗时纳秒
+            return 结果
+
+    def 准入(self, 名称: str) -> bool:
+        """
+        判断并登记一次执行（用于无法单独计时的工作，如拦截器内的指标记录）
+
+        返回:
+            bool: 是否执行
+        """
+        with self._锁:
+            if not self.允许(名称):
+                return False
+            单元 = self._单元.get(名称)
+            if 单元 is not None:
+                单元.执行次数 += 1
+                单元.连续跳过拍数 = 0
+            return True
+
+    def 记录耗时(self, 名称: str, 耗时纳秒: int):
+        """记录工作单元的一次实测耗时，更新预估耗时"""
+        with self._锁:
+            单元 = self._单元.get(名称)
+            if 单元 is None:
+                return
+            单元.执行次数 += 1
+            单元.连续跳过拍数 = 0
+            单元.预估耗时纳秒 += self._平滑系数 * (耗时纳秒 - 单元.预估耗时纳秒)
+
+    def 执行(self, 名称: str, 函数: Callable[..., Any], *参数, 默认: Any = None,
+           已准入: Optional[bool] = None) -> Any:
+        """
+        在预算允许时执行工作单元并记录耗时；被跳过时返回该单元上次的结果
+
+        参数:
+            名称: 工作单元名称
+            函数: 工作函数
+            *参数: 传给工作函数的参数
+            默认: 从未执行过时被跳过的返回值
+            已准入: 可选，调度线程已通过准入批次()判定的结果，None表示在此判定
+
+        返回:
+            本次或上次的执行结果
+        """
+        if not (self.允许(名称) if 已准入 is None else 已准入):
+            with self._锁:
+                单元 = self._单元[名称]
+                return 默认 if 单元.执行次数 == 0 else 单元.上次结果
+
+        开始纳秒 = time.perf_counter_ns()
+        结果 = 函数(*参数)
+        with self._锁:
+            self.记录耗时(名称, time.perf_counter_ns() - 开始纳秒)
+            单元 = self._单元.get(名称)
+            if 单元 is not None:
+                单元.上次结果 = 结果
+        return 结果
+
+    def 结束拍(self) -> int:
+        """
+        标记一拍结束，根据本拍耗时调整负载级别
+
+        返回:
+            int: 本拍耗时（纳秒）
+        """
+        with self._锁:
+            if self._拍开始纳秒 is None:
+                return 0
+            拍耗时 = time.perf_counter_ns() - self._拍开始纳秒
+            self._拍开始纳秒 = None
+            self._总拍数 += 1
+            self._最大拍耗时纳秒 = max(self._最大拍耗时纳秒, 拍耗时)
+
+            if 拍耗时 > self._拍预算纳秒:
+                self._超预算拍数 += 1
+                self._连续超时拍数 += 1
+                self._连续平稳拍数 = 0
+                if self._连续超时拍数 >= self._升级超时拍数:
+                    self.提高负载级别()
+            else:
+                self._连续超时拍数 = 0
+                if 拍耗时 < self._拍预算纳秒 * self._平稳比例:
+                    self._连续平稳拍数 += 1
+                    if self._连续平稳拍数 >= self._归还平稳拍数 and self.负载级别 > 0:
+                        self.负载级别 -= 1
+                        self._归还次数 += 1
+                        self._连续平稳拍数 = 0
+                else:
+                    self._连续平稳拍数 = 0
+            return 拍耗时
+
+    def 提高负载级别(self, 级数: int = 1):
+        """提高负载级别（卸载更多低优先级工作），平稳后自动逐级归还"""
+        with self._锁:
+            新级别 = min(self.最高负载级别, self.负载级别 + max(级数, 0))
+            if 新级别 != self.负载级别:
+                self.负载级别 = 新级别
+                self._升级次数 += 1
+            self._连续超时拍数 = 0
+            self._连续平稳拍数 = 0
+
+    def 重置统计(self):
+        """重置统计和负载级别（保留已学习的预估耗时）"""
+        with self._锁:
+            self.负载级别 = 0
+            self._连续超时拍数 = 0
+            self._连续平稳拍数 = 0
+            self._总拍数 = self._超预算拍数 = self._升级次数 = self._归还次数 = 0
+            self._最大拍耗时纳秒 = 0
+            for 单元 in self._单元.values():
+                单元.执行次数 = 单元.跳过次数 = 单元.超预算跳过次数 = 0
+                单元.降载跳过次数 = 单元.强制执行次数 = 单元.连续跳过拍数 = 0
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取服务质量统计信息"""
+        with self._锁:
+            return {
+                "拍预算": f"{self._拍预算纳秒 / 1e6:.2f}ms",
+                "负载级别": self.负载级别,
+                "总拍数": self._总拍数,
+                "超预算拍数": self._超预算拍数,
+                "最大拍耗时": f"{self._最大拍耗时纳秒 / 1e6:.2f}ms",
+                "升级次数": self._升级次数,
+                "归还次数": self._归还次数,
+                "工作单元": {
+                    单元.名称: {
+                        "优先级": 单元.优先级.name,
+                        "预估耗时": f"{单元.预估耗时纳秒 / 1e6:.3f}ms",
+                        "执行次数": 单元.执行次数,
+                        "跳过次数": 单元.跳过次数,
+                        "超预算跳过": 单元.超预算跳过次数,
+                        "降载跳过": 单元.降载跳过次数,
+                        "强制执行": 单元.强制执行次数
+                    }
+                    for 单元 in self._单元.values()
+                }
+            }
@@ -6,9 +6,12 @@ import time
 import os
 import sys
 import ctypes
+import threading
+from utils.后台调度器 import 全局调度器
+from utils.服务注册表 import 全局服务注册表
 from typing import Dict, Callable, Optional, Any
 from functools import wraps
-from collections import defaultdict
+from collections import defaultdict, deque
 
 
 class 权限检查器:
@@ -96,58 +99,187 @@ class 权限检查器:
         }
 
 
+class 能力探测服务:
+    """
+    能力探测服务
+    启动时探测一次管理员/屏幕/输入设备能力并缓存，之后由后台调度器按较长间隔刷新，
+    或在显式失效（如截图持续失败）后尽快重新探测；热路径只读取缓存属性
+    """
+    
+    def __init__(self, 刷新间隔: float = 300.0, 最短重探间隔: float = 10.0):
+        """
+        初始化能力探测服务
+        
+        参数:
+            刷新间隔: 后台刷新间隔（秒）
+            最短重探间隔: 距上次探测不足该时间（秒）的失效请求被忽略（探测会切换CapsLock等，不能频繁执行）
+        """
+        self.刷新间隔 = 刷新间隔
+        self.最短重探间隔 = 最短重探间隔
+        
+        # 缓存的能力状态（探测前乐观地视为可用）
+        self.管理员权限 = False
+        self.屏幕访问可用 = True
+        self.输入设备可用 = True
+        self.已探测 = False
+        self.最后探测时间 = 0.0  # 墙钟时间，用于报告显示
+        self.探测次数 = 0
+        self.失效次数 = 0
+        self.忽略失效次数 = 0
+        # 重探限流使用单调时钟，不受系统时间调整影响
+        self._最后探测时刻 = 0.0
+        self._最后失效时刻 = 0.0
+        
+        self._调度任务名 = None
+        self._锁 = threading.Lock()
+        # 截图失败回调可能来自多个检测线程，失效判定单独加锁（刷新持有的探测锁耗时较长）
+        self._失效锁 = threading.Lock()
+    
+    def 刷新(self):
+        """立即重新探测所有能力"""
+        with self._锁:
+            self.管理员权限 = 权限检查器.检查管理员权限()
+            self.屏幕访问可用 = 权限检查器.检查屏幕访问权限()
+            self.输入设备可用 = 权限检查器.检查输入设备权限()
+            self.最后探测时间 = time.time()
+            self._最后探测时刻 = time.monotonic()
+            self.探测次数 += 1
+            self.已探测 = True
+    
+    def 确保已探测(self):
+        """尚未探测时同步探测一次"""
+        if not self.已探测:
+            self.刷新()
+    
+    def 使失效(self):
+        """标记缓存失效：已启动时提前调度刷新任务，否则下次检查时同步探测（距上次探测过近时忽略）"""
+        with self._失效锁:
+            if not self.已探测:
+                return  # 尚未探测或已在等待下次检查时同步探测
+            当前时刻 = time.monotonic()
+            if 当前时刻 - max(self._最后探测时刻, self._最后失效时刻) < self.最短重探间隔:
+                self.忽略失效次数 += 1
+                return
+            self._最后失效时刻 = 当前时刻
+            self.失效次数 += 1
+            if not (self._调度任务名 and 全局调度器.立即调度(self._调度任务名)):
+                self.已探测 = False
+    
+    def 启动(self):
+        """探测一次并注册周期刷新任务"""
+        self.确保已探测()
+        if self._调度任务名 and 全局调度器.是否已注册(self._调度任务名):
+            return
+        self._调度任务名 = 全局调度器.生成任务名("能力探测刷新")
+        全局调度器.注册周期任务(self._调度任务名, self._定时刷新, self.刷新间隔, 优先级=7)
+    
+    def 停止(self):
+        """取消周期刷新任务"""
+        if self._调度任务名:
+            全局调度器.取消任务(self._调度任务名)
+            self._调度任务名 = None
+    
+    def _定时刷新(self):
+        """周期刷新（由后台调度器调用）"""
+        try:
+            self.刷新()
+        except Exception as e:
+            print(f"能力探测失败: {e}")
+    
+    def 获取能力状态(self) -> Dict[str, bool]:
+        """
+        获取缓存的能力状态（与权限检查器.获取系统权限状态格式一致）
+        
+        返回:
+            dict: 权限状态字典
+        """
+        self.确保已探测()
+        return {
+            "管理员权限": self.管理员权限,
+            "屏幕访问权限": self.屏幕访问可用,
+            "输入设备权限": self.输入设备可用,
+            "文件读写权限": True,
+            "网络访问权限": True
+        }
+
+
 class 频率限制器:
     """
     频率限制器
-    限制操作的执行频率
+    限制操作的执行频率：每种操作用定长环形队列记录最近“最大次数”次操作的
+    单调时间，间隔与时间窗口检查均为O(1)，并给出最早允许时间
     """
     
     def __init__(self):
         """初始化频率限制器"""
-        self.操作历史 = defaultdict(list)
+        self.操作历史: Dict[str, deque] = {}
         self.限制规则 = {
             "按键操作": {"间隔": 0.1, "时间窗口": 10, "最大次数": 50},  # 每100ms，10秒内最多50次
             "技能释放": {"间隔": 0.5, "时间窗口": 30, "最大次数": 100},  # 每500ms，30秒内最多100次
             "图像识别": {"间隔": 0.2, "时间窗口": 5, "最大次数": 25},   # 每200ms，5秒内最多25次
             "配置重载": {"间隔": 1.0, "时间窗口": 60, "最大次数": 10}  # 每1秒，60秒内最多10次
         }
+        self._允许次数: Dict[str, int] = defaultdict(int)
+        self._拒绝次数: Dict[str, int] = defaultdict(int)
+        self._锁 = threading.Lock()
     
-    def 检查操作频率(self, 操作类型: str) -> tuple[bool, str]:
+    def _获取历史(self, 操作类型: str, 规则: Dict[str, Any]) -> deque:
+        """获取操作的环形历史队列（不存在则创建）"""
+        历史 = self.操作历史.get(操作类型)
+        if 历史 is None:
+            历史 = deque(maxlen=max(1, int(规则["最大次数"])))
+            self.操作历史[操作类型] = 历史
+        return 历史
+    
+    def 尝试获取(self, 操作类型: str) -> tuple[bool, float, str]:
         """
-        检查操作频率是否超出限制
+        检查并占用一次操作配额
         
         参数:
             操作类型: 操作类型名称
         
         返回:
-            tuple: (是否允许, 错误信息)
+            tuple: (是否允许, 最早允许时间(time.monotonic时钟), 原因)
         """
-        当前时间 = time.time()
         规则 = self.限制规则.get(操作类型)
-        
         if not 规则:
-            return True, ""  # 无限制
-        
-        # 清理过时记录
-        时间窗口开始 = 当前时间 - 规则["时间窗口"]
-        self.操作历史[操作类型] = [
-            时间 for 时间 in self.操作历史[操作类型] 
-            if 时间 > 时间窗口开始
-        ]
+            return True, 0.0, ""  # 无限制
         
-        # 检查间隔限制
-        if self.操作历史[操作类型]:
-            最后操作时间 = self.操作历史[操作类型][-1]
-            if 当前时间 - 最后操作时间 < 规则["间隔"]:
-                return False, f"操作间隔过短，需要等待 {规则['间隔']} 秒"
+        with self._锁:
+            当前时间 = time.monotonic()
+            历史 = self._获取历史(操作类型, 规则)
+            
+            if 历史:
+                # 检查间隔限制
+                下次允许时间 = 历史[-1] + 规则["间隔"]
+                if 当前时间 < 下次允许时间:
+                    self._拒绝次数[操作类型] += 1
+                    return False, 下次允许时间, f"操作间隔过短，需要等待 {规则['间隔']} 秒"
+                
+                # 队列已满时，最早的一次仍在窗口内说明窗口内已达上限
+                if len(历史) == 历史.maxlen:
+                    窗口释放时间 = 历史[0] + 规则["时间窗口"]
+                    if 当前时间 < 窗口释放时间:
+                        self._拒绝次数[操作类型] += 1
+                        return False, 窗口释放时间, f"时间窗口内操作次数超过限制 ({规则['最大次数']} 次)"
+            
+            # 记录本次操作（队列满时自动淘汰最早记录）
+            历史.append(当前时间)
+            self._允许次数[操作类型] += 1
+            return True, 当前时间, ""
+    
+    def 检查操作频率(self, 操作类型: str) -> tuple[bool, str]:
+        """
+        检查操作频率是否超出限制（兼容接口）
         
-        # 检查时间窗口限制
-        if len(self.操作历史[操作类型]) >= 规则["最大次数"]:
-            return False, f"时间窗口内操作次数超过限制 ({规则['最大次数']} 次)"
+        参数:
+            操作类型: 操作类型名称
         
-        # 记录本次操作
-        self.操作历史[操作类型].append(当前时间)
-        return True, ""
+        返回:
+            tuple: (是否允许, 错误信息)
+        """
+        允许, _, 原因 = self.尝试获取(操作类型)
+        return 允许, 原因
     
     def 设置限制规则(self, 操作类型: str, 间隔: float, 时间窗口: float, 最大次数: int):
         """
@@ -159,11 +291,16 @@ class 频率限制器:
             时间窗口: 时间窗口长度（秒）
             最大次数: 时间窗口内最大操作次数
         """
-        self.限制规则[操作类型] = {
-            "间隔": 间隔,
-            "时间窗口": 时间窗口,
-            "最大次数": 最大次数
-        }
+        with self._锁:
+            self.限制规则[操作类型] = {
+                "间隔": 间隔,
+                "时间窗口": 时间窗口,
+                "最大次数": 最大次数
+            }
+            # 按新容量重建历史队列，保留最近的记录
+            原历史 = self.操作历史.get(操作类型)
+            if 原历史 is not None:
+                self.操作历史[操作类型] = deque(原历史, maxlen=max(1, int(最大次数)))
     
     def 获取频率统计(self, 操作类型: str = None) -> Dict:
         """
@@ -175,19 +312,22 @@ class 频率限制器:
         返回:
             dict: 频率统计信息
         """
-        当前时间 = time.time()
+        当前时间 = time.monotonic()
         
         if 操作类型:
             if 操作类型 not in self.操作历史:
                 return {"操作类型": 操作类型, "最近操作次数": 0, "频率": 0.0}
             
-            最近操作 = [时间 for 时间 in self.操作历史[操作类型] if 时间 > 当前时间 - 60]
-            频率 = len(最近操作) / 60.0 if 最近操作 else 0.0
+            with self._锁:
+                最近操作次数 = sum(1 for 时间 in self.操作历史[操作类型] if 时间 > 当前时间 - 60)
+            频率 = 最近操作次数 / 60.0
             
             return {
                 "操作类型": 操作类型,
-                "最近操作次数": len(最近操作),
+                "最近操作次数": 最近操作次数,
                 "频率": 频率,
+                "允许次数": self._允许次数[操作类型],
+                "拒绝次数": self._拒绝次数[操作类型],
                 "规则": self.限制规则.get(操作类型, {})
             }
         else:
@@ -208,6 +348,7 @@ class 权限控制器:
         """初始化权限控制器"""
         self.权限检查器 = 权限检查器()
         self.频率限制器 = 频率限制器()
+        self.能力服务 = 能力探测服务()
     
     def 检查操作权限(self, 操作类型: str) -> tuple[bool, str]:
         """
@@ -219,19 +360,36 @@ class 权限控制器:
         返回:
             tuple: (是否允许, 错误信息)
         """
-        # 检查系统权限
-        权限状态 = self.权限检查器.获取系统权限状态()
+        允许, 错误信息 = self.检查系统权限(操作类型)
+        if not 允许:
+            return False, 错误信息
+        
+        # 检查频率限制
+        return self.频率限制器.检查操作频率(操作类型)
+    
+    def 检查系统权限(self, 操作类型: str) -> tuple[bool, str]:
+        """
+        仅检查操作所需的系统权限（不计入频率限制）
+        
+        参数:
+            操作类型: 操作类型名称
+        
+        返回:
+            tuple: (是否允许, 错误信息)
+        """
+        能力 = self.能力服务
+        if not 能力.已探测:
+            能力.刷新()
         
         if 操作类型 in ["按键操作", "技能释放"]:
-            if not 权限状态["输入设备权限"]:
+            if not 能力.输入设备可用:
                 return False, "缺少输入设备权限"
         
         if 操作类型 in ["图像识别"]:
-            if not 权限状态["屏幕访问权限"]:
+            if not 能力.屏幕访问可用:
                 return False, "缺少屏幕访问权限"
         
-        # 检查频率限制
-        return self.频率限制器.检查操作频率(操作类型)
+        return True, ""
     
     def 获取权限状态报告(self) -> Dict:
         """
@@ -241,14 +399,26 @@ class 权限控制器:
             dict: 权限状态报告
         """
         return {
-            "系统权限": self.权限检查器.获取系统权限状态(),
+            "系统权限": self.能力服务.获取能力状态(),
+            "能力探测": {
+                "探测次数": self.能力服务.探测次数,
+                "失效次数": self.能力服务.失效次数,
+                "忽略失效次数": self.能力服务.忽略失效次数,
+                "最后探测时间": self.能力服务.最后探测时间
+            },
             "频率限制": self.频率限制器.获取频率统计(),
             "时间戳": time.time()
         }
 
 
-# 全局权限控制器实例
-全局权限控制器 = 权限控制器()
+# 全局权限控制器（首次使用时创建）
+全局服务注册表.注册("权限控制器", 权限控制器)
+__getattr__ = 全局服务注册表.模块属性({"全局权限控制器": "权限控制器"})
+
+
+def _全局权限控制器() -> 权限控制器:
+    """获取全局权限控制器"""
+    return 全局服务注册表.获取("权限控制器")
 
 
 def 需要权限(操作类型: str):
@@ -261,7 +431,7 @@ def 需要权限(操作类型: str):
     def 装饰器(函数: Callable) -> Callable:
         @wraps(函数)
         def 包装器(*args, **kwargs) -> Optional[Any]:
-            允许, 错误信息 = 全局权限控制器.检查操作权限(操作类型)
+            允许, 错误信息 = _全局权限控制器().检查操作权限(操作类型)
             
             if not 允许:
                 print(f"权限检查失败 ({操作类型}): {错误信息}")
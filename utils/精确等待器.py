@@ -0,0 +1,200 @@
+"""
+精确等待器
+混合睡眠/自旋等待：学习平台睡眠的超调量，先粗睡到截止前，再以让出CPU的方式自旋补足剩余时间；
+自旋受CPU预算限制，并统计每次等待相对截止时间的偏差
+"""
+import time
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+
+class 精确等待器:
+    """
+    精确等待器
+    所有时间基于time.perf_counter_ns，与时钟服务、循环节拍器一致
+    """
+
+    def __init__(self, 初始超调: float = 0.001, 平滑系数: float = 0.1, 单次自旋上限: float = 0.003,
+                 CPU预算比例: float = 0.05, 迟到容差: float = 0.0002, 偏差样本数: int = 500):
+        """
+        初始化精确等待器
+
+        参数:
+            初始超调: 睡眠超调量初始估计（秒）
+            平滑系数: 超调量指数移动平均系数
+            单次自旋上限: 超调之外预留的自旋时间（秒）；自旋窗口取它与“超调估计+其三分之一”中的较大者
+            CPU预算比例: 允许用于自旋的时间比例：每次等待的自旋窗口不超过其周期的该比例，
+                         每秒累计超出后退化为纯睡眠
+            迟到容差: 偏差超过该值计为一次迟到（秒）
+            偏差样本数: 保留的偏差样本数量
+        """
+        self._超调估计纳秒 = int(初始超调 * 1e9)
+        self._平滑系数 = 平滑系数
+        self._单次自旋上限纳秒 = int(单次自旋上限 * 1e9)
+        self._CPU预算比例 = CPU预算比例
+        self._迟到容差纳秒 = int(迟到容差 * 1e9)
+
+        # CPU预算窗口（1秒）
+        self._窗口起点 = time.perf_counter_ns()
+        self._窗口自旋纳秒 = 0
+
+        # 统计信息
+        self._偏差样本: deque = deque(maxlen=偏差样本数)
+        self._等待次数 = 0
+        self._迟到次数 = 0
+        self._预算耗尽次数 = 0
+        self._总自旋纳秒 = 0
+        self._锁 = threading.Lock()
+
+    @property
+    def 超调估计(self) -> float:
+        """当前学习到的睡眠超调量（秒）"""
+        return self._超调估计纳秒 / 1e9
+
+    def _剩余自旋预算(self, 当前纳秒: int) -> int:
+        """当前1秒窗口内剩余的自旋预算（纳秒）"""
+        if 当前纳秒 - self._窗口起点 >= 1_000_000_000:
+            self._窗口起点 = 当前纳秒
+            self._窗口自旋纳秒 = 0
+        return int(self._CPU预算比例 * 1_000_000_000) - self._窗口自旋纳秒
+
+    def _睡眠(self, 时长纳秒: int, 中断事件: Optional[threading.Event]) -> bool:
+        """睡眠指定时长并学习超调量，返回是否被中断"""
+        起点 = time.perf_counter_ns()
+        if 中断事件 is not None:
+            if 中断事件.wait(时长纳秒 / 1e9):
+                return True
+        else:
+            time.sleep(时长纳秒 / 1e9)
+
+        超调 = time.perf_counter_ns() - 起点 - 时长纳秒
+        if 超调 > 0:
+            self._超调估计纳秒 += int(self._平滑系数 * (超调 - self._超调估计纳秒))
+        return False
+
+    def 等待至(self, 截止纳秒: int, 中断事件: Optional[threading.Event] = None,
+             周期纳秒: Optional[int] = None) -> bool:
+        """
+        等待到指定截止时刻
+
+        参数:
+            截止纳秒: 截止时刻（time.perf_counter_ns时钟）
+            中断事件: 可选，置位时立即结束等待
+            周期纳秒: 可选，周期性等待的周期，用于计算本次自旋份额；缺省按本次等待时长计算
+
+        返回:
+            bool: 是否等到截止时刻（被中断返回False）
+        """
+        当前 = time.perf_counter_ns()
+        剩余 = 截止纳秒 - 当前
+
+        if 剩余 > 0:
+            # 自旋窗口覆盖学习到的超调量（超调可能远大于单次自旋上限），但不超过本次的预算份额
+            # （周期×预算比例），使每拍都能分到自旋时间，而不是前几拍就耗尽整秒的预算
+            剩余预算 = self._剩余自旋预算(当前)
+            每拍份额 = int(self._CPU预算比例 * (周期纳秒 if 周期纳秒 else 剩余))
+            自旋窗口 = min(max(self._单次自旋上限纳秒, self._超调估计纳秒 + self._单次自旋上限纳秒 // 3),
+                        剩余, 剩余预算, 每拍份额)
+            if 剩余预算 <= 0:
+                # 预算耗尽，退化为直接睡眠
+                self._预算耗尽次数 += 1
+                if self._睡眠(剩余, 中断事件):
+                    return False
+            else:
+                # 粗睡阶段：只睡到自旋窗口之前
+                粗睡时长 = 剩余 - 自旋窗口
+                if 粗睡时长 > 0 and self._睡眠(粗睡时长, 中断事件):
+                    return False
+
+                # 自旋阶段：让出CPU的同时逼近截止时刻
+                自旋起点 = time.perf_counter_ns()
+                while time.perf_counter_ns() < 截止纳秒:
+                    if 中断事件 is not None and 中断事件.is_set():
+                        break
+                    time.sleep(0)
+                自旋时长 = time.perf_counter_ns() - 自旋起点
+                self._窗口自旋纳秒 += 自旋时长
+                self._总自旋纳秒 += 自旋时长
+
+        self._记录偏差(time.perf_counter_ns() - 截止纳秒)
+        return not (中断事件 is not None and 中断事件.is_set())
+
+    def 等待(self, 秒数: float, 中断事件: Optional[threading.Event] = None) -> bool:
+        """
+        精确等待指定时长
+
+        参数:
+            秒数: 等待时长（秒）
+            中断事件: 可选，置位时立即结束等待
+
+        返回:
+            bool: 是否完整等待（被中断返回False）
+        """
+        return self.等待至(time.perf_counter_ns() + int(秒数 * 1e9), 中断事件)
+
+    def _记录偏差(self, 偏差纳秒: int):
+        """记录一次等待的偏差（正值表示迟到）"""
+        with self._锁:
+            self._偏差样本.append(偏差纳秒)
+            self._等待次数 += 1
+            if 偏差纳秒 > self._迟到容差纳秒:
+                self._迟到次数 += 1
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取等待精度统计信息"""
+        with self._锁:
+            样本 = sorted(self._偏差样本)
+            等待次数 = self._等待次数
+            迟到次数 = self._迟到次数
+
+        if 样本:
+            平均偏差 = sum(样本) / len(样本)
+            P50偏差 = 样本[len(样本) // 2]
+            P99偏差 = 样本[min(len(样本) - 1, int(len(样本) * 0.99))]
+        else:
+            平均偏差 = P50偏差 = P99偏差 = 0
+
+        return {
+            "等待次数": 等待次数,
+            "迟到次数": 迟到次数,
+            "迟到率": f"{迟到次数 / max(等待次数, 1):.2%}",
+            "平均偏差": f"{平均偏差 / 1000:.1f}us",
+            "P50偏差": f"{P50偏差 / 1000:.1f}us",
+            "P99偏差": f"{P99偏差 / 1000:.1f}us",
+            "超调估计": f"{self._超调估计纳秒 / 1e6:.3f}ms",
+            "总自旋时间": f"{self._总自旋纳秒 / 1e6:.1f}ms",
+            "预算耗尽次数": self._预算耗尽次数
+        }
+
+    def 重置统计(self):
+        """重置统计信息（保留学习到的超调量）"""
+        with self._锁:
+            self._偏差样本.clear()
+            self._等待次数 = 0
+            self._迟到次数 = 0
+            self._预算耗尽次数 = 0
+            self._总自旋纳秒 = 0
+
+
+# 全局精确等待器实例
+全局精确等待器 = 精确等待器()
+
+
+def 精确等待(秒数: float, 中断事件: Optional[threading.Event] = None) -> bool:
+    """
+    全局精确等待函数
+
+    参数:
+        秒数: 等待时长（秒）
+        中断事件: 可选，置位时立即结束等待
+
+    返回:
+        bool: 是否完整等待（被中断返回False）
+    """
+    return 全局精确等待器.等待(秒数, 中断事件)
+
+
+def 获取等待精度统计() -> Dict[str, Any]:
+    """获取全局等待精度统计"""
+    return 全局精确等待器.获取统计信息()
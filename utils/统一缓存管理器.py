@@ -1,15 +1,17 @@
 """
 统一缓存管理器
-统一管理所有缓存实例，提供智能缓存策略和自适应清理
+统一管理所有缓存实例，在已注册的缓存间按权重分配全局内存预算，并提供智能缓存策略和自适应清理
 """
 import time
 import math
-from typing import Dict, Any, List, Optional, Protocol
+from typing import Dict, Any, List, Optional, Protocol, Union
 from enum import Enum
 import threading
 from dataclasses import dataclass
 from collections import defaultdict, deque
-from utils.自适应延迟 import 智能延迟
+from utils.后台调度器 import 全局调度器
+from utils.服务注册表 import 全局服务注册表
+from utils.缓存框架 import 缓存, 格式化字节
 
 
 class 缓存类型(Enum):
@@ -21,6 +23,14 @@ class 缓存类型(Enum):
     异步缓存 = "async_cache"
 
 
+def 缓存名称(缓存标识: Union[缓存类型, str]) -> str:
+    """把缓存类型枚举、枚举成员名或任意字符串统一为注册表使用的名称"""
+    if isinstance(缓存标识, 缓存类型):
+        return 缓存标识.value
+    成员 = 缓存类型.__members__.get(缓存标识)
+    return 成员.value if 成员 is not None else str(缓存标识)
+
+
 @dataclass
 class 缓存统计:
     """缓存统计信息"""
@@ -49,8 +59,11 @@ class 统一缓存管理器:
     
     def __init__(self):
         """初始化统一缓存管理器"""
-        self._缓存注册表: Dict[缓存类型, 缓存接口] = {}
+        self._缓存注册表: Dict[str, 缓存接口] = {}
+        # 各缓存分配内存预算的权重
+        self._预算权重: Dict[str, float] = {}
         self._缓存策略: Dict[str, Any] = {
+            "内存预算字节": 64 * 1024 * 1024,  # 所有框架缓存共享的总字节预算
             "默认缓存时间": 0.1,  # 100ms
             "最大缓存大小": 500,  # 优化：降低到500条，减少内存压力
             "自动清理间隔": 30.0,  # 优化：缩短到30秒，更频繁清理
@@ -84,21 +97,67 @@ class 统一缓存管理器:
         self._最后协同优化时间 = 0.0
         self._协同优化间隔 = 60.0  # 协同优化间隔（秒）
         
-        # 启动智能清理线程
-        if self._缓存策略["启用智能清理"]:
-            self._智能清理线程 = threading.Thread(target=self._智能清理循环, daemon=True)
-            self._智能清理线程.start()
+        # 注册智能清理任务
+        self._调度任务名 = 全局调度器.生成任务名("缓存智能清理")
+        self.开始智能清理()
+    
+    def 开始智能清理(self):
+        """注册周期智能清理任务（未启用或已注册时忽略）"""
+        if self._缓存策略["启用智能清理"] and not 全局调度器.是否已注册(self._调度任务名):
+            全局调度器.注册周期任务(self._调度任务名, self._智能清理, 60, 优先级=4)
+    
+    def 停止智能清理(self):
+        """取消周期智能清理任务"""
+        全局调度器.取消任务(self._调度任务名)
     
-    def 注册缓存(self, 缓存实例: 缓存接口, 缓存类型: 缓存类型):
+    def 注册缓存(self, 缓存实例: 缓存接口, 缓存类型: Union[缓存类型, str], 权重: float = 1.0):
         """
-        注册缓存实例
+        注册缓存实例（同名缓存会被替换），并重新分配内存预算
         
         参数:
-            缓存实例: 缓存实例
-            缓存类型: 缓存类型
+            缓存实例: 缓存实例（缓存框架的缓存会参与字节预算分配）
+            缓存类型: 缓存类型枚举或名称字符串
+            权重: 分配内存预算的权重
+        """
+        名称 = 缓存名称(缓存类型)
+        with self._锁:
+            self._缓存注册表[名称] = 缓存实例
+            self._预算权重[名称] = max(权重, 0.0)
+            self._分配内存预算()
+    
+    def 注销缓存(self, 缓存类型: Union[缓存类型, str]) -> bool:
         """
+        注销缓存实例，其预算分配给其余缓存
+        
+        返回:
+            bool: 是否存在该缓存
+        """
+        名称 = 缓存名称(缓存类型)
+        with self._锁:
+            if self._缓存注册表.pop(名称, None) is None:
+                return False
+            self._预算权重.pop(名称, None)
+            self._分配内存预算()
+            return True
+    
+    def _分配内存预算(self):
+        """按权重把总字节预算分给缓存框架的缓存（需持有锁）"""
+        框架缓存 = {名称: 实例 for 名称, 实例 in self._缓存注册表.items() if isinstance(实例, 缓存)}
+        总权重 = sum(self._预算权重.get(名称, 1.0) for 名称 in 框架缓存)
+        if 总权重 <= 0:
+            return
+        总预算 = int(self._缓存策略["内存预算字节"])
+        for 名称, 实例 in 框架缓存.items():
+            实例.设置字节预算(int(总预算 * self._预算权重.get(名称, 1.0) / 总权重))
+    
+    def _框架缓存列表(self) -> List[缓存]:
+        """已注册的缓存框架实例"""
+        return [实例 for 实例 in self._缓存注册表.values() if isinstance(实例, 缓存)]
+    
+    def 获取已用字节(self) -> int:
+        """所有框架缓存实际占用的字节数"""
         with self._锁:
-            self._缓存注册表[缓存类型] = 缓存实例
+            return sum(实例.已用字节 for 实例 in self._框架缓存列表())
     
     def 同步缓存策略(self):
         """同步所有缓存的缓存策略"""
@@ -109,12 +168,9 @@ class 统一缓存管理器:
                 return
             
             # 执行同步操作
-            for 缓存类型, 缓存实例 in self._缓存注册表.items():
-                # 可以在这里添加特定类型的缓存策略同步
-                if self._缓存策略["启用同步清理"]:
-                    # 触发缓存清理（如果缓存实例支持）
-                    if hasattr(缓存实例, '_清理过期缓存'):
-                        缓存实例._清理过期缓存()
+            if self._缓存策略["启用同步清理"]:
+                for 缓存实例 in self._缓存注册表.values():
+                    self._清理单个缓存(缓存实例)
             
             self._最后同步时间 = 当前时间
     
@@ -129,39 +185,51 @@ class 统一缓存管理器:
         with self._锁:
             if 策略名称 in self._缓存策略:
                 self._缓存策略[策略名称] = 策略值
+                if 策略名称 == "内存预算字节":
+                    self._分配内存预算()
+    
+    def _汇总命中次数(self) -> tuple:
+        """汇总框架缓存与手动上报的命中/未命中次数（需持有锁）"""
+        命中 = self._总命中次数 + sum(实例.命中次数 for 实例 in self._框架缓存列表())
+        未命中 = self._总未命中次数 + sum(实例.未命中次数 for 实例 in self._框架缓存列表())
+        return 命中, 未命中
     
-    def 获取缓存统计(self, 缓存类型: Optional[缓存类型] = None) -> Dict[str, Any]:
+    def 获取缓存统计(self, 缓存类型: Optional[Union[缓存类型, str]] = None) -> Dict[str, Any]:
         """
         获取缓存统计信息
         
         参数:
-            缓存类型: 指定缓存类型，None表示所有缓存
+            缓存类型: 指定缓存类型枚举或名称，None表示所有缓存
             
         返回:
             统计信息字典
         """
         with self._锁:
             if 缓存类型:
-                if 缓存类型 in self._缓存注册表:
-                    缓存统计 = self._缓存注册表[缓存类型].获取统计信息()
-                    缓存统计["缓存类型"] = 缓存类型.value
+                名称 = 缓存名称(缓存类型)
+                if 名称 in self._缓存注册表:
+                    缓存统计 = self._缓存注册表[名称].获取统计信息()
+                    缓存统计["缓存类型"] = 名称
                     return 缓存统计
                 else:
-                    return {"错误": f"缓存类型 {缓存类型} 未注册"}
+                    return {"错误": f"缓存类型 {名称} 未注册"}
             else:
                 # 返回所有缓存的统计
                 所有统计 = {}
-                for 缓存类型, 缓存实例 in self._缓存注册表.items():
-                    缓存统计 = 缓存实例.获取统计信息()
-                    所有统计[缓存类型.value] = 缓存统计
+                for 名称, 缓存实例 in self._缓存注册表.items():
+                    所有统计[名称] = 缓存实例.获取统计信息()
                 
                 # 计算总体统计
-                总命中率 = self._总命中次数 / max(self._总命中次数 + self._总未命中次数, 1)
+                总命中次数, 总未命中次数 = self._汇总命中次数()
+                总命中率 = 总命中次数 / max(总命中次数 + 总未命中次数, 1)
                 所有统计["总体统计"] = {
                     "注册缓存数量": len(self._缓存注册表),
-                    "总命中次数": self._总命中次数,
-                    "总未命中次数": self._总未命中次数,
+                    "总命中次数": 总命中次数,
+                    "总未命中次数": 总未命中次数,
                     "总命中率": f"{总命中率:.2%}",
+                    "已用内存": 格式化字节(sum(实例.已用字节 for 实例 in self._框架缓存列表())),
+                    "内存预算": 格式化字节(self._缓存策略["内存预算字节"]),
+                    "总淘汰次数": sum(实例.淘汰次数 for 实例 in self._框架缓存列表()),
                     "缓存策略": self._缓存策略
                 }
                 
@@ -198,7 +266,7 @@ class 统一缓存管理器:
             
             报告 = {
                 "缓存概况": {
-                    "注册缓存类型": [缓存类型.value for 缓存类型 in self._缓存注册表.keys()],
+                    "注册缓存类型": list(self._缓存注册表.keys()),
                     "缓存策略": self._缓存策略,
                     "最后同步时间": self._最后同步时间
                 },
@@ -213,11 +281,16 @@ class 统一缓存管理器:
         建议 = []
         
         with self._锁:
-            总命中率 = self._总命中次数 / max(self._总命中次数 + self._总未命中次数, 1)
+            总命中次数, 总未命中次数 = self._汇总命中次数()
+            总命中率 = 总命中次数 / max(总命中次数 + 总未命中次数, 1)
             
             if 总命中率 < 0.7:
                 建议.append("缓存命中率较低，建议调整缓存策略")
             
+            for 实例 in self._框架缓存列表():
+                if 实例.字节预算 and 实例.淘汰次数 > 实例.写入次数 * 0.5:
+                    建议.append(f"{实例.名称}淘汰频繁，预算{格式化字节(实例.字节预算)}可能不足")
+            
             if len(self._缓存注册表) > 5:
                 建议.append("注册缓存类型较多，建议合并相似缓存")
             
@@ -229,15 +302,12 @@ class 统一缓存管理器:
         
         return 建议
     
-    def _智能清理循环(self):
-        """智能清理循环"""
-        while True:
-            try:
-                # 使用智能延迟替代硬编码sleep
-                智能延迟(60)  # 每60秒检查一次，但根据系统性能自动调整
-                self._智能清理检查()
-            except Exception as e:
-                print(f"智能清理循环错误: {e}")
+    def _智能清理(self):
+        """智能清理（由后台调度器周期调用）"""
+        try:
+            self._智能清理检查()
+        except Exception as e:
+            print(f"智能清理错误: {e}")
     
     def _智能清理检查(self):
         """执行智能清理检查"""
@@ -279,20 +349,39 @@ class 统一缓存管理器:
         # 清理策略：根据内存压力决定清理强度
         清理强度 = min(1.0, 内存压力 / self._缓存策略["内存压力阈值"])
         清理数量 = 0
+        清理前字节 = sum(实例.已用字节 for 实例 in self._框架缓存列表())
         
         # 对每个注册的缓存执行清理
-        for 缓存类型, 缓存实例 in self._缓存注册表.items():
-            if hasattr(缓存实例, '_清理过期缓存'):
-                清理数量 += 缓存实例._清理过期缓存(清理强度)
+        for 缓存实例 in self._缓存注册表.values():
+            清理数量 += self._清理单个缓存(缓存实例, 清理强度)
         
-        # 记录清理效率
+        # 记录清理效率（框架缓存按实际字节数计算）
         清理耗时 = time.time() - 开始时间
-        self.清理效率统计["最近清理数量"] = 清理数量
-        self.清理效率统计["清理节省内存"] = int(清理数量 * 100)  # 假设每个缓存项节省100字节
-        self.清理效率统计["平均清理耗时"] = (
-            self.清理效率统计["平均清理耗时"] * 0.9 + 清理耗时 * 0.1
+        self._清理效率统计["最近清理数量"] = 清理数量
+        self._清理效率统计["清理节省内存"] = 清理前字节 - sum(实例.已用字节 for 实例 in self._框架缓存列表())
+        self._清理效率统计["平均清理耗时"] = (
+            self._清理效率统计["平均清理耗时"] * 0.9 + 清理耗时 * 0.1
         )
     
+    def _清理单个缓存(self, 缓存实例: 缓存接口, 清理强度: Optional[float] = None) -> int:
+        """
+        清理单个缓存：框架缓存移除过期条目，清理强度超过1时再按LRU收缩（不可收缩的缓存除外）；
+        其他缓存调用其自身的_清理过期缓存（如果支持）
+        
+        返回:
+            int: 清理的条目数
+        """
+        if isinstance(缓存实例, 缓存):
+            数量 = 缓存实例.清理过期()
+            if 清理强度 is not None and 清理强度 >= 1.0 and 缓存实例.可收缩:
+                数量 += 缓存实例.收缩(0.5)
+            return 数量
+        清理函数 = getattr(缓存实例, '_清理过期缓存', None)
+        if 清理函数 is None:
+            return 0
+        结果 = 清理函数(清理强度) if 清理强度 is not None else 清理函数()
+        return 结果 if isinstance(结果, int) else 0
+    
     def _自适应调整策略(self):
         """自适应调整缓存策略"""
         if not self._缓存策略["自适应调整"]:
@@ -352,6 +441,7 @@ class 统一缓存管理器:
         with self._锁:
             if 内存使用率 > 0.8:
                 # 内存紧张：减少缓存，增加清理频率
+                self._缓存策略["内存预算字节"] = max(8 * 1024 * 1024, int(self._缓存策略["内存预算字节"] * 0.7))
                 self._缓存策略["最大缓存大小"] = max(100, self._缓存策略["最大缓存大小"] * 0.7)
                 self._缓存策略["默认缓存时间"] = max(0.02, self._缓存策略["默认缓存时间"] * 0.8)
                 self._缓存策略["自动清理间隔"] = max(10.0, self._缓存策略["自动清理间隔"] * 0.6)
@@ -359,6 +449,7 @@ class 统一缓存管理器:
                 
             elif 内存使用率 < 0.4:
                 # 内存充足：增加缓存，提高命中率
+                self._缓存策略["内存预算字节"] = min(256 * 1024 * 1024, int(self._缓存策略["内存预算字节"] * 1.3))
                 self._缓存策略["最大缓存大小"] = min(1000, self._缓存策略["最大缓存大小"] * 1.3)
                 self._缓存策略["默认缓存时间"] = min(0.5, self._缓存策略["默认缓存时间"] * 1.2)
                 self._缓存策略["自动清理间隔"] = min(120.0, self._缓存策略["自动清理间隔"] * 1.4)
@@ -367,41 +458,51 @@ class 统一缓存管理器:
             else:
                 # 内存适中：保持平衡策略
                 print(f"内存适中({内存使用率:.1%})：保持平衡缓存策略")
+            
+            self._分配内存预算()
+
+
+# 全局统一缓存管理器（首次使用或引擎启动时创建）
+全局服务注册表.注册("缓存管理器", 统一缓存管理器, 启动=lambda 管理器: 管理器.开始智能清理(),
+               停止=lambda 管理器: 管理器.停止智能清理(), 随引擎启动=True)
+__getattr__ = 全局服务注册表.模块属性({"全局缓存管理器": "缓存管理器"})
 
 
-# 全局统一缓存管理器实例
-全局缓存管理器 = 统一缓存管理器()
+def _全局缓存管理器() -> 统一缓存管理器:
+    """获取全局统一缓存管理器"""
+    return 全局服务注册表.获取("缓存管理器")
 
 
-def 注册全局缓存(缓存实例: 缓存接口, 缓存类型: 缓存类型):
+def 注册全局缓存(缓存实例: 缓存接口, 缓存类型: Union[缓存类型, str], 权重: float = 1.0):
     """
     注册全局缓存
     
     参数:
         缓存实例: 缓存实例
-        缓存类型: 缓存类型
+        缓存类型: 缓存类型枚举或名称
+        权重: 分配内存预算的权重
     """
-    全局缓存管理器.注册缓存(缓存实例, 缓存类型)
+    _全局缓存管理器().注册缓存(缓存实例, 缓存类型, 权重)
 
 
-def 获取全局缓存统计(缓存类型: Optional[缓存类型] = None) -> Dict[str, Any]:
+def 获取全局缓存统计(缓存类型: Optional[Union[缓存类型, str]] = None) -> Dict[str, Any]:
     """
     获取全局缓存统计
     
     参数:
-        缓存类型: 指定缓存类型，None表示所有缓存
+        缓存类型: 指定缓存类型枚举或名称，None表示所有缓存
         
     返回:
         统计信息字典
     """
-    return 全局缓存管理器.获取缓存统计(缓存类型)
+    return _全局缓存管理器().获取缓存统计(缓存类型)
 
 
 def 同步全局缓存策略():
     """同步全局缓存策略"""
-    全局缓存管理器.同步缓存策略()
+    _全局缓存管理器().同步缓存策略()
 
 
 def 生成全局缓存报告() -> Dict[str, Any]:
     """生成全局缓存报告"""
-    return 全局缓存管理器.生成缓存报告()
\ No newline at end of file
+    return _全局缓存管理器().生成缓存报告()
\ No newline at end of file
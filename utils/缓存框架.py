@@ -0,0 +1,274 @@
+"""
+缓存框架
+基于OrderedDict的TTL + LRU缓存：读取、写入、淘汰均为O(1)，
+按条目实际字节数（ndarray按nbytes）计量内存，字节预算由统一缓存管理器在各缓存间分配
+"""
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# ndarray等对象头部的近似开销（字节）
+_对象头部字节 = 96
+
+_缺失 = object()
+_默认 = object()
+
+
+def 估算字节数(值: Any, _深度: int = 0) -> int:
+    """
+    估算缓存值占用的字节数
+
+    参数:
+        值: 缓存值（ndarray按数据字节数计算，容器递归两层）
+
+    返回:
+        int: 估算字节数
+    """
+    数据字节 = getattr(值, "nbytes", None)
+    if isinstance(数据字节, int):
+        return 数据字节 + _对象头部字节
+    if isinstance(值, (tuple, list)) and _深度 < 2:
+        return sys.getsizeof(值) + sum(估算字节数(子值, _深度 + 1) for 子值 in 值)
+    if isinstance(值, dict) and _深度 < 2:
+        return sys.getsizeof(值) + sum(
+            估算字节数(键, _深度 + 1) + 估算字节数(子值, _深度 + 1) for 键, 子值 in 值.items())
+    return sys.getsizeof(值)
+
+
+def 格式化字节(字节数: float) -> str:
+    """把字节数格式化为可读字符串"""
+    for 单位 in ("B", "KB", "MB"):
+        if abs(字节数) < 1024:
+            return f"{字节数:.1f}{单位}" if 单位 != "B" else f"{int(字节数)}B"
+        字节数 /= 1024
+    return f"{字节数:.1f}GB"
+
+
+class 缓存:
+    """
+    TTL + LRU缓存
+    条目按访问顺序保存在OrderedDict中，超过条目上限或字节预算时从最久未使用端淘汰；
+    条目可设置有效期（写入时确定），读取时可额外限定最大年龄
+    """
+
+    def __init__(self, 名称: str, 最大条目: Optional[int] = None, 默认有效期: Optional[float] = None,
+                 字节预算: Optional[int] = None, 估算函数: Callable[[Any], int] = 估算字节数,
+                 时钟: Callable[[], float] = time.perf_counter, 可收缩: bool = True):
+        """
+        初始化缓存
+
+        参数:
+            名称: 缓存名称（注册到统一缓存管理器时使用）
+            最大条目: 最大条目数，None表示不限
+            默认有效期: 条目默认有效期（秒），None表示不过期
+            字节预算: 最大字节数，None表示不限（通常由统一缓存管理器分配）
+            估算函数: 条目字节数估算函数
+            时钟: 未显式传入当前时间时使用的时钟（秒）
+            可收缩: 内存压力时是否允许统一缓存管理器按比例收缩（重建代价高的缓存应设为False）
+        """
+        self.名称 = 名称
+        self.最大条目 = 最大条目
+        self.默认有效期 = 默认有效期
+        self.字节预算 = 字节预算
+        self._估算 = 估算函数
+        self._时钟 = 时钟
+        self.可收缩 = 可收缩
+        # 键 -> (值, 写入时间, 到期时间, 字节数)
+        self._条目: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._锁 = threading.Lock()
+        self.已用字节 = 0
+
+        # 指标
+        self.命中次数 = 0
+        self.未命中次数 = 0
+        self.写入次数 = 0
+        self.淘汰次数 = 0
+        self.过期次数 = 0
+        self.超限拒绝次数 = 0
+
+    def __len__(self) -> int:
+        return len(self._条目)
+
+    def __contains__(self, 键: Hashable) -> bool:
+        """是否存在该键（不检查有效期，不影响LRU顺序和指标）"""
+        return 键 in self._条目
+
+    def 获取(self, 键: Hashable, 默认: Any = None, 最大年龄: Optional[float] = None,
+           当前时间: Optional[float] = None) -> Any:
+        """
+        读取缓存
+
+        参数:
+            键: 缓存键
+            默认: 未命中时的返回值
+            最大年龄: 可选，写入后超过该秒数视为未命中（条目保留）
+            当前时间: 可选，调用方的时间快照（与时钟同一时基）
+
+        返回:
+            缓存值或默认值
+        """
+        with self._锁:
+            条目 = self._条目.get(键)
+            if 条目 is None:
+                self.未命中次数 += 1
+                return 默认
+
+            _, 写入时间, 到期时间, _ = 条目
+            if 到期时间 is not None or 最大年龄 is not None:
+                现在 = self._时钟() if 当前时间 is None else 当前时间
+                if 到期时间 is not None and 现在 >= 到期时间:
+                    self._移除(键)
+                    self.过期次数 += 1
+                    self.未命中次数 += 1
+                    return 默认
+                if 最大年龄 is not None and 现在 - 写入时间 > 最大年龄:
+                    self.未命中次数 += 1
+                    return 默认
+
+            self._条目.move_to_end(键)
+            self.命中次数 += 1
+            return 条目[0]
+
+    def 设置(self, 键: Hashable, 值: Any, 有效期: Any = _默认, 当前时间: Optional[float] = None):
+        """
+        写入缓存，超出条目上限或字节预算时淘汰最久未使用的条目
+
+        参数:
+            键: 缓存键
+            值: 缓存值
+            有效期: 可选，本条目的有效期（秒），None表示不过期，不传使用默认有效期
+            当前时间: 可选，调用方的时间快照
+        """
+        if 有效期 is _默认:
+            有效期 = self.默认有效期
+        字节数 = self._估算(值)
+        with self._锁:
+            if 键 in self._条目:
+                self._移除(键)
+            if self.字节预算 is not None and 字节数 > self.字节预算:
+                # 单个条目超过整个预算，不缓存
+                self.超限拒绝次数 += 1
+                return
+
+            现在 = self._时钟() if 当前时间 is None else 当前时间
+            self._条目[键] = (值, 现在, 现在 + 有效期 if 有效期 is not None else None, 字节数)
+            self.已用字节 += 字节数
+            self.写入次数 += 1
+            self._淘汰至限额()
+
+    def 获取或创建(self, 键: Hashable, 创建函数: Callable[[], Any], 有效期: Any = _默认,
+              当前时间: Optional[float] = None) -> Any:
+        """
+        读取缓存，未命中时调用创建函数并写入（创建函数在锁外执行）
+
+        返回:
+            缓存值或新创建的值（创建结果为None时不缓存）
+        """
+        值 = self.获取(键, _缺失, 当前时间=当前时间)
+        if 值 is not _缺失:
+            return 值
+        值 = 创建函数()
+        if 值 is not None:
+            self.设置(键, 值, 有效期, 当前时间)
+        return 值
+
+    def 删除(self, 键: Hashable) -> bool:
+        """删除条目，返回是否存在"""
+        with self._锁:
+            if 键 not in self._条目:
+                return False
+            self._移除(键)
+            return True
+
+    def _移除(self, 键: Hashable):
+        """移除条目并扣减字节数（需持有锁）"""
+        self.已用字节 -= self._条目.pop(键)[3]
+
+    def _淘汰至限额(self):
+        """从最久未使用端淘汰，直到满足条目上限和字节预算（需持有锁）"""
+        条目 = self._条目
+        while 条目 and ((self.最大条目 is not None and len(条目) > self.最大条目) or
+                      (self.字节预算 is not None and self.已用字节 > self.字节预算)):
+            _, 旧条目 = 条目.popitem(last=False)
+            self.已用字节 -= 旧条目[3]
+            self.淘汰次数 += 1
+
+    def 清理过期(self, 当前时间: Optional[float] = None) -> int:
+        """
+        移除所有已过期条目（后台清理使用，需遍历全部条目）
+
+        返回:
+            int: 移除的条目数
+        """
+        现在 = self._时钟() if 当前时间 is None else 当前时间
+        with self._锁:
+            过期键 = [键 for 键, 条目 in self._条目.items() if 条目[2] is not None and 现在 >= 条目[2]]
+            for 键 in 过期键:
+                self._移除(键)
+            self.过期次数 += len(过期键)
+        return len(过期键)
+
+    def 收缩(self, 保留比例: float) -> int:
+        """
+        按LRU顺序淘汰，只保留指定比例的条目（内存压力时使用）
+
+        返回:
+            int: 淘汰的条目数
+        """
+        with self._锁:
+            淘汰数量 = len(self._条目) - int(len(self._条目) * max(0.0, min(保留比例, 1.0)))
+            for _ in range(淘汰数量):
+                _, 旧条目 = self._条目.popitem(last=False)
+                self.已用字节 -= 旧条目[3]
+            self.淘汰次数 += 淘汰数量
+        return 淘汰数量
+
+    def 设置字节预算(self, 字节预算: Optional[int]):
+        """设置字节预算并立即淘汰超出部分"""
+        with self._锁:
+            self.字节预算 = 字节预算
+            self._淘汰至限额()
+
+    def 设置最大条目(self, 最大条目: Optional[int]):
+        """设置条目上限并立即淘汰超出部分"""
+        with self._锁:
+            self.最大条目 = 最大条目
+            self._淘汰至限额()
+
+    def 清除缓存(self):
+        """清除所有条目（指标保留）"""
+        with self._锁:
+            self._条目.clear()
+            self.已用字节 = 0
+
+    def 重置统计(self):
+        """重置命中、淘汰等指标"""
+        self.命中次数 = self.未命中次数 = self.写入次数 = 0
+        self.淘汰次数 = self.过期次数 = self.超限拒绝次数 = 0
+
+    @property
+    def 命中率(self) -> float:
+        """命中率（无访问时为0）"""
+        return self.命中次数 / max(self.命中次数 + self.未命中次数, 1)
+
+    def 获取统计信息(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        return {
+            "条目数": len(self._条目),
+            "最大条目": self.最大条目 if self.最大条目 is not None else "不限",
+            "已用内存": 格式化字节(self.已用字节),
+            "字节预算": 格式化字节(self.字节预算) if self.字节预算 is not None else "不限",
+            "默认有效期": f"{self.默认有效期 * 1000:.0f}ms" if self.默认有效期 is not None else "不过期",
+            "命中次数": self.命中次数,
+            "未命中次数": self.未命中次数,
+            "命中率": f"{self.命中率:.2%}",
+            "写入次数": self.写入次数,
+            "淘汰次数": self.淘汰次数,
+            "过期次数": self.过期次数,
+            "超限拒绝次数": self.超限拒绝次数
+        }
+
+    def __repr__(self) -> str:
+        return f"缓存({self.名称}, 条目={len(self._条目)}, 已用={格式化字节(self.已用字节)})"
@@ -1,60 +1,41 @@
 """
 配置监听器模块
-实现配置文件的热重载功能
+实现配置文件的热重载功能：一段时间内的多次文件事件合并为一次防抖重载，
+在单个后台线程中按回调分组调用，每个回调只收到一次本批变更的文件列表
 """
 import time
 import threading
 import os
-from typing import Callable, List
+from typing import Callable, Dict, List, Optional, Set
 from pathlib import Path
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from utils.服务注册表 import 全局服务注册表
 
 
-class 配置变更处理器(FileSystemEventHandler):
-    """配置变更处理器（性能优化版）"""
+class 配置变更处理器:
+    """
+    配置变更处理器
+    实现watchdog事件处理器的dispatch协议（模块导入时不依赖watchdog），
+    只负责把事件路径交给监听器，不做任何IO或回调
+    """
+    
+    # 会改变文件内容的事件（编辑器保存时常见的写临时文件再改名也会产生moved/created）
+    关注事件 = ("modified", "created", "moved")
     
-    def __init__(self, 配置路径: str, 变更回调: Callable):
+    def __init__(self, 变更通知: Callable[[str], None]):
         """
         初始化配置变更处理器
         
         参数:
-            配置路径: 配置文件路径
-            变更回调: 配置变更时的回调函数
+            变更通知: 以规范化的文件路径调用
         """
-        self.配置路径 = 配置路径
-        self.变更回调 = 变更回调
-        self.最后修改时间 = self._获取文件修改时间()
-        self.最后回调时间 = 0.0
-        self.回调间隔 = 1.0  # 优化：最小回调间隔1秒，避免频繁回调
+        self.变更通知 = 变更通知
     
-    def _获取文件修改时间(self) -> float:
-        """获取文件最后修改时间"""
-        try:
-            return os.path.getmtime(self.配置路径)
-        except OSError:
-            return 0.0
-    
-    def on_modified(self, event):
-        """文件修改事件处理（优化：添加频率控制）"""
-        if event.src_path == self.配置路径:
-            当前时间 = time.time()
-            
-            # 频率控制：避免过于频繁的回调
-            if 当前时间 - self.最后回调时间 < self.回调间隔:
-                return
-            
-            当前修改时间 = self._获取文件修改时间()
-            if 当前修改时间 > self.最后修改时间:
-                self.最后修改时间 = 当前修改时间
-                self.最后回调时间 = 当前时间
-                
-                # 优化：异步执行回调，避免阻塞主线程
-                threading.Thread(
-                    target=self.变更回调, 
-                    args=(self.配置路径,), 
-                    daemon=True
-                ).start()
+    def dispatch(self, event):
+        """watchdog事件分发入口"""
+        if event.is_directory or event.event_type not in self.关注事件:
+            return
+        路径 = getattr(event, "dest_path", None) or event.src_path
+        self.变更通知(os.path.normcase(os.path.abspath(路径)))
 
 
 class 配置监听器:
@@ -63,19 +44,42 @@ class 配置监听器:
     监听配置文件变化并自动重载
     """
     
-    def __init__(self, 配置目录: str = "./config/"):
+    def __init__(self, 配置目录: str = "./config/", 防抖时间: float = 0.3):
         """
         初始化配置监听器
         
         参数:
             配置目录: 配置文件目录路径
+            防抖时间: 最后一次文件事件之后静默多久才执行重载（秒）
         """
         self.配置目录 = Path(配置目录)
-        self.观察器 = Observer()
+        self.防抖时间 = 防抖时间
+        self._观察器 = None
+        self._已监听目录 = False
         self.监听器列表 = []
         self.回调函数列表 = []
         self.运行中 = False
         self.锁 = threading.Lock()
+        
+        # 规范化路径 -> 回调列表
+        self._路径回调: Dict[str, List[Callable]] = {}
+        # 防抖状态
+        self._待处理路径: Set[str] = set()
+        self._最后事件时间 = 0.0
+        self._变更事件 = threading.Event()
+        self._停止事件 = threading.Event()
+        self._防抖线程: Optional[threading.Thread] = None
+        self._修改时间: Dict[str, float] = {}
+        
+        self._统计 = {"文件事件": 0, "重载批次": 0, "回调次数": 0, "跳过未修改": 0, "回调失败": 0}
+    
+    @property
+    def 观察器(self):
+        """文件观察器（首次使用时导入watchdog并创建）"""
+        if self._观察器 is None:
+            from watchdog.observers import Observer
+            self._观察器 = Observer()
+        return self._观察器
     
     def 添加监听(self, 配置文件: str, 回调函数: Callable):
         """
@@ -91,34 +95,120 @@ class 配置监听器:
             print(f"警告: 配置文件不存在: {配置路径}")
             return
         
-        处理器 = 配置变更处理器(配置路径, 回调函数)
-        事件处理器 = self.观察器.schedule(处理器, str(self.配置目录), recursive=False)
+        键 = os.path.normcase(os.path.abspath(配置路径))
+        with self.锁:
+            self._路径回调.setdefault(键, []).append(回调函数)
+            self._修改时间.setdefault(键, self._获取文件修改时间(键))
+            self._确保监听目录()
+        
+        self.监听器列表.append((配置路径, 回调函数))
+        if 回调函数 not in self.回调函数列表:
+            self.回调函数列表.append(回调函数)
+    
+    def _确保监听目录(self):
+        """整个目录只注册一个事件处理器，按路径分发（需持有锁）"""
+        if not self._已监听目录:
+            self.观察器.schedule(配置变更处理器(self._记录变更), str(self.配置目录), recursive=False)
+            self._已监听目录 = True
+    
+    @staticmethod
+    def _获取文件修改时间(路径: str) -> float:
+        """获取文件最后修改时间"""
+        try:
+            return os.path.getmtime(路径)
+        except OSError:
+            return 0.0
+    
+    def _记录变更(self, 路径: str):
+        """记录一次文件事件并重新开始防抖计时（在watchdog线程中调用，不做IO）"""
+        if 路径 not in self._路径回调:
+            return
+        with self.锁:
+            self._统计["文件事件"] += 1
+            self._待处理路径.add(路径)
+            self._最后事件时间 = time.monotonic()
+        self._变更事件.set()
+    
+    def _防抖循环(self):
+        """等待事件静默防抖时间后，批量分发本轮积累的变更"""
+        while not self._停止事件.is_set():
+            self._变更事件.wait()
+            if self._停止事件.is_set():
+                break
+            
+            剩余 = self._最后事件时间 + self.防抖时间 - time.monotonic()
+            if 剩余 > 0:
+                self._停止事件.wait(剩余)
+                continue
+            
+            with self.锁:
+                路径集合 = self._待处理路径
+                self._待处理路径 = set()
+                self._变更事件.clear()
+            if 路径集合:
+                self._分发变更(路径集合)
+    
+    def _分发变更(self, 路径集合: Set[str]):
+        """过滤内容未变化的文件，按回调分组，每个回调调用一次"""
+        回调分组: Dict[Callable, List[str]] = {}
+        for 路径 in sorted(路径集合):
+            修改时间 = self._获取文件修改时间(路径)
+            if 修改时间 <= self._修改时间.get(路径, 0.0):
+                self._统计["跳过未修改"] += 1
+                continue
+            self._修改时间[路径] = 修改时间
+            for 回调函数 in self._路径回调.get(路径, ()):
+                回调分组.setdefault(回调函数, []).append(路径)
         
-        self.监听器列表.append((配置路径, 事件处理器))
-        self.回调函数列表.append(回调函数)
+        if not 回调分组:
+            return
+        self._统计["重载批次"] += 1
+        for 回调函数, 路径列表 in 回调分组.items():
+            self._统计["回调次数"] += 1
+            try:
+                回调函数(路径列表)
+            except Exception as e:
+                self._统计["回调失败"] += 1
+                print(f"配置重载回调执行失败: {e}")
     
     def 开始监听(self):
         """开始监听配置文件变化"""
         with self.锁:
             if not self.运行中:
+                if self._路径回调:
+                    self._确保监听目录()
+                self._停止事件.clear()
+                self._防抖线程 = threading.Thread(target=self._防抖循环, name="配置防抖重载", daemon=True)
+                self._防抖线程.start()
                 self.观察器.start()
                 self.运行中 = True
                 print("配置监听器已启动")
     
     def 停止监听(self):
-        """停止监听配置文件变化"""
+        """停止监听配置文件变化（未分发的变更被丢弃）"""
         with self.锁:
-            if self.运行中:
-                self.观察器.stop()
-                self.观察器.join()
-                self.运行中 = False
-                print("配置监听器已停止")
+            if not self.运行中:
+                return
+            self.观察器.stop()
+            self.观察器.join()
+            # watchdog的Observer停止后不能再次start，下次开始监听时重新创建
+            self._观察器 = None
+            self._已监听目录 = False
+            self._待处理路径.clear()
+            self._停止事件.set()
+            self._变更事件.set()
+            self.运行中 = False
+            防抖线程 = self._防抖线程
+            self._防抖线程 = None
+        
+        防抖线程.join(timeout=1.0)
+        print("配置监听器已停止")
     
     def 手动重载所有配置(self):
-        """手动重载所有监听配置"""
+        """手动重载所有监听配置（每个回调以None调用，表示全部重载）"""
         for 回调函数 in self.回调函数列表:
             try:
-                回调函数("手动重载")
+                回调函数(None)
             except Exception as e:
                 print(f"手动重载配置失败: {e}")
     
@@ -126,13 +216,17 @@ class 配置监听器:
         """获取监听器状态"""
         return {
             "运行中": self.运行中,
-            "监听文件数量": len(self.监听器列表),
-            "配置目录": str(self.配置目录)
+            "监听文件数量": len(self._路径回调),
+            "配置目录": str(self.配置目录),
+            "防抖时间": f"{self.防抖时间:.2f}s",
+            "待处理文件": len(self._待处理路径),
+            **self._统计
         }
 
 
-# 全局配置监听器实例
-全局配置监听器 = 配置监听器()
+# 全局配置监听器（首次使用时创建）
+全局服务注册表.注册("配置监听器", 配置监听器)
+__getattr__ = 全局服务注册表.模块属性({"全局配置监听器": "配置监听器"})
 
 
 def 热重载配置(配置文件: str):
@@ -145,7 +239,7 @@ def 热重载配置(配置文件: str):
     def 装饰器(函数):
         def 包装器(*args, **kwargs):
             # 注册配置变更监听
-            全局配置监听器.添加监听(配置文件, lambda path: 函数(*args, **kwargs))
+            全局服务注册表.获取("配置监听器").添加监听(配置文件, lambda 路径列表: 函数(*args, **kwargs))
             
             # 执行函数
             return 函数(*args, **kwargs)
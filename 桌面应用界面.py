@@ -120,6 +120,7 @@ class GameScriptUI(QMainWindow):
         
         self.engine = main_engine        
         self.running_status = "已停止"   
+        self._last_style_state = None
         self.ui_visible = True
         self.tray_icon = None
         self.drag_pos = None             
@@ -480,13 +481,15 @@ class GameScriptUI(QMainWindow):
                 self.pause_button.setEnabled(False) # 停止时禁用暂停键
                 
             
-            # 刷新所有需要动态改变样式的控件
-            self.status_big_text.style().unpolish(self.status_big_text)
-            self.status_big_text.style().polish(self.status_big_text)
-            self.main_switch_button.style().unpolish(self.main_switch_button)
-            self.main_switch_button.style().polish(self.main_switch_button)
-            self.pause_button.style().unpolish(self.pause_button)
-            self.pause_button.style().polish(self.pause_button)
+            # 刷新所有需要动态改变样式的控件（仅在运行状态变化时重新应用样式）
+            if (is_running, is_paused) != self._last_style_state:
+                self._last_style_state = (is_running, is_paused)
+                self.status_big_text.style().unpolish(self.status_big_text)
+                self.status_big_text.style().polish(self.status_big_text)
+                self.main_switch_button.style().unpolish(self.main_switch_button)
+                self.main_switch_button.style().polish(self.main_switch_button)
+                self.pause_button.style().unpolish(self.pause_button)
+                self.pause_button.style().polish(self.pause_button)
 
 
             # --- 3. 更新仪表盘和托盘信息 ---
@@ -590,7 +593,23 @@ class GameScriptUI(QMainWindow):
             self.stop_script()
 
     def start_script(self): 
-        if hasattr(self.engine, 'start'): self.engine.start()
+        if not hasattr(self.engine, 'start'): return
+        try:
+            started = self.engine.start()
+            error = None if started is not False else (
+                getattr(self.engine, '启动错误', None)
+                or self.engine.get_running_status().get('start_error')
+                or "未知原因")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        if error:
+            self.show_start_error(error)
+
+    def show_start_error(self, error):
+        """启动失败时提示原因（引擎未运行）"""
+        box = QMessageBox(QMessageBox.Icon.Warning, "启动失败", f"技能循环未启动：\n{error}", parent=self)
+        box.setStyleSheet(self.get_message_box_style())
+        box.exec()
 
     def stop_script(self): 
         if hasattr(self.engine, 'stop'): self.engine.stop()
@@ -623,6 +642,8 @@ class GameScriptUI(QMainWindow):
         dialog = CustomExitDialog(self)
         if dialog.exec():
             if hasattr(self.engine, 'stop'): self.engine.stop()
+            # 独立引擎进程：通知其退出并释放状态块
+            if hasattr(self.engine, '关闭'): self.engine.关闭()
             QApplication.quit()
     
     def closeEvent(self, event):
@@ -675,11 +696,22 @@ def main():
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
     
-    # 使用真实的技能循环引擎
+    # 使用真实的技能循环引擎（--engine-process：引擎在独立进程运行，界面只读共享内存状态块；
+    # --async-engine：引擎由事件循环驱动，按键与下一拍检测重叠）
     try:
-        from core.技能循环引擎 import 技能循环引擎
-        engine = 技能循环引擎()
-        print("✅ 技能循环引擎加载成功")
+        if "--engine-process" in sys.argv:
+            from core.引擎进程 import 引擎进程客户端
+            engine = 引擎进程客户端()
+            print("✅ 技能循环引擎进程已启动")
+        elif "--async-engine" in sys.argv:
+            from core.技能循环引擎 import 技能循环引擎
+            from utils.异步处理 import 异步技能循环引擎
+            engine = 异步技能循环引擎(技能循环引擎())
+            print("✅ 异步技能循环引擎加载成功")
+        else:
+            from core.技能循环引擎 import 技能循环引擎
+            engine = 技能循环引擎()
+            print("✅ 技能循环引擎加载成功")
     except Exception as e:
         print(f"❌ 技能循环引擎加载失败: {e}")
         import traceback